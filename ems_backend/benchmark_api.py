@@ -0,0 +1,566 @@
+#!/usr/bin/env python
+"""
+Benchmark suite for the REST API.
+
+Seeds a synthetic organisation (``manage.py seed_synthetic_org``: employees,
+years of weekday attendance, leave requests, tasks with attachments and
+progress updates), then drives every GET route of the API router, a few write
+actions, auth and the chatbot (fake model):
+
+1. Through Django's test client, one request at a time: p50/p95/p99 latency,
+   SQL queries per request and throughput per route.
+2. With --load, over HTTP against one in-process uvicorn worker (or --url):
+   a concurrent mix of the read routes. Queries per request come from the
+   server's own /api/metrics/ histograms.
+
+Routes are named like the request metrics (``employee.list``,
+``attendancerecord.by_date``, ``auth_login``). Write routes that would
+reshape the dataset (create, update, delete, deactivate, photo upload) are
+listed under ``skipped``.
+
+Results are printed and, with --json, written as JSON with stable keys, so
+runs can be diffed. --compare BASELINE.json prints the change per route and
+exits with status 1 when a percentile grew by more than --threshold or the
+query count per request grew at all.
+
+By default everything runs on a throwaway SQLite file (and a temporary
+MEDIA_ROOT). Pass --use-configured-db to seed and measure the database in
+settings.py, e.g. a local MySQL (it must have no employees, or pass
+--skip-seed to measure the data already there).
+
+Usage:
+    python benchmark_api.py
+    python benchmark_api.py --employees 500 --years 2 --load --concurrency 32 --json api_bench.json
+    python benchmark_api.py --only 'attendance|reports' --compare api_bench.json
+    python benchmark_api.py --use-configured-db --skip-seed --load --url http://localhost:8000 --token <key>
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from datetime import timedelta
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+from benchmark_setup import add_database_arguments, setup_django
+
+BENCH_USERNAME = 'bench_admin'
+BENCH_PASSWORD = 'bench-password-123'
+CHATBOT_MESSAGES = [
+    "Show me the attendance summary",
+    "Give me the leave summary",
+    "What is the task summary for engineering department?",
+    "How do I add a new employee?",
+]
+# Latency noise below this is not reported as a regression
+NOISE_FLOOR_MS = 1.0
+
+
+class Scenario(NamedTuple):
+    name: str
+    method: str
+    path: str
+    params: Dict[str, Any] = {}
+    # body(i) returns the JSON body (or multipart fields) of the i-th request
+    body: Optional[Callable[[int], Any]] = None
+    multipart: bool = False
+    write: bool = False
+    # Expensive by design (password hashing, full exports): fewer requests, not in the HTTP mix
+    max_requests: Optional[int] = None
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    data = parser.add_argument_group('dataset')
+    data.add_argument('--employees', type=int, default=200, help='Employees to seed')
+    data.add_argument('--years', type=float, default=1, help='Years of attendance to seed')
+    data.add_argument('--leaves-per-employee', type=int, default=6)
+    data.add_argument('--tasks-per-employee', type=int, default=4)
+    data.add_argument('--seed', type=int, default=42, help='Random seed for the dataset')
+    data.add_argument('--skip-seed', action='store_true', help='Measure the data already in the database')
+    run = parser.add_argument_group('run')
+    run.add_argument('--requests', type=int, default=30, help='Timed test client requests per route')
+    run.add_argument('--warmup', type=int, default=3, help='Untimed requests per route first')
+    run.add_argument('--only', help='Regex: only routes whose name matches')
+    run.add_argument('--read-only', action='store_true', help='Skip the write routes')
+    run.add_argument('--chatbot-latency', type=float, default=0.0, help='Fake model latency in seconds')
+    load = parser.add_argument_group('HTTP load')
+    load.add_argument('--load', action='store_true', help='Also run the concurrent HTTP load phase')
+    load.add_argument('--load-requests', type=int, default=2000, help='Total HTTP requests')
+    load.add_argument('--concurrency', type=int, default=32, help='HTTP requests in flight at once')
+    load.add_argument('--url', help='Base URL of a running server (default: start uvicorn in-process)')
+    load.add_argument('--token', help='API token for --url (default: the benchmark user\'s token)')
+    load.add_argument('--timeout', type=float, default=60, help='Client timeout per HTTP request')
+    db = parser.add_argument_group('database and output')
+    add_database_arguments(db)
+    db.add_argument('--json', help='Write results to this JSON file')
+    db.add_argument('--compare', metavar='BASELINE', help='Compare with an earlier --json file')
+    db.add_argument('--threshold', type=float, default=1.25,
+                    help='Latency ratio to a baseline percentile that counts as a regression')
+    return parser.parse_args()
+
+
+def seed(args):
+    from django.core.management import call_command
+
+    started = time.perf_counter()
+    call_command('seed_synthetic_org', employees=args.employees, years=args.years,
+                 leaves_per_employee=args.leaves_per_employee, tasks_per_employee=args.tasks_per_employee,
+                 seed=args.seed)
+    return round(time.perf_counter() - started, 2)
+
+
+def dataset_counts():
+    from ems_api.models import Employee, AttendanceRecord, LeaveRequest, Task, TaskAttachment, TaskProgressUpdate
+
+    return {model._meta.db_table: model.objects.count()
+            for model in (Employee, AttendanceRecord, LeaveRequest, Task, TaskAttachment, TaskProgressUpdate)}
+
+
+def prepare_fixtures(args):
+    """Benchmark user and token, plus the rows the detail routes and filters point at"""
+    from django.contrib.auth.models import User
+    from django.core.files.base import ContentFile
+    from django.core.files.storage import default_storage
+    from django.db.models import Max
+    from rest_framework.authtoken.models import Token
+    from ems_api.models import Employee, AttendanceRecord, LeaveRequest, Task, TaskAttachment
+
+    if not Employee.objects.exists():
+        sys.exit('No employees to benchmark. Seed the database or drop --skip-seed.')
+    user, created = User.objects.get_or_create(username=BENCH_USERNAME, defaults={'is_staff': True})
+    if created or not user.check_password(BENCH_PASSWORD):
+        user.set_password(BENCH_PASSWORD)
+        user.save()
+    token, _ = Token.objects.get_or_create(user=user)
+
+    employees = Employee.objects.filter(status='Active').order_by('id')
+    employee = employees[employees.count() // 2]
+    task = Task.objects.filter(assigned_to=employee).order_by('id').first() or Task.objects.order_by('id').first()
+    attachment = TaskAttachment.objects.order_by('id').first()
+    if attachment is not None and not args.read_only and not default_storage.exists(attachment.file_path):
+        # Seeded attachments have no files; give the download route one
+        attachment.file_path = default_storage.save(attachment.file_path, ContentFile(b'x' * 4096))
+        attachment.save(update_fields=['file_path'])
+    end_date = AttendanceRecord.objects.aggregate(latest=Max('date'))['latest']
+    return {
+        'token': token.key,
+        'employee': employee,
+        'name_query': employee.name.split()[0][:4],
+        'end_date': end_date,
+        'pks': {
+            'employee': employee.pk,
+            'attendancerecord': AttendanceRecord.objects.filter(employee=employee).values_list('pk', flat=True).first(),
+            'leaverequest': LeaveRequest.objects.order_by('id').values_list('pk', flat=True).first(),
+            'task': task.pk if task else None,
+            'taskattachment': attachment.pk if attachment else None,
+        },
+        'bulk_codes': list(employees.values_list('employee_id', flat=True)[:25]),
+    }
+
+
+def route_params(fixtures):
+    """Query parameters for routes that need them"""
+    end_date = fixtures['end_date']
+    date_range = {'start_date': str(end_date - timedelta(days=29)), 'end_date': str(end_date)} if end_date else {}
+    code = fixtures['employee'].employee_id
+    return {
+        'employee.search': {'q': fixtures['name_query']},
+        'attendancerecord.by_date': {'date': str(end_date)},
+        'attendancerecord.by_employee': {'employee_id': code},
+        'attendancerecord.export': {'export_format': 'ndjson'},
+        'leaverequest.export': {'export_format': 'ndjson'},
+        'task.export': {'export_format': 'ndjson'},
+        'task.by_status': {'status': 'In Progress'},
+        'task.by_priority': {'priority': 'High'},
+        'task.employee_tasks_with_files': {'employee_id': code},
+        'reports.overview': date_range,
+        'reports.attendance': date_range,
+        'reports.leave': date_range,
+        'reports.tasks': date_range,
+    }
+
+
+def write_bodies(fixtures):
+    """Write routes that leave the dataset's shape alone, with the body of their i-th request"""
+    from django.core.files.uploadedfile import SimpleUploadedFile
+
+    end_date = str(fixtures['end_date'])
+    bulk = [{'employee_id': code, 'date': end_date, 'status': 'Present', 'hours': 8} for code in fixtures['bulk_codes']]
+    return {
+        ('attendancerecord.bulk', 'post'): (lambda i: bulk, False),
+        ('task.update_progress', 'post'): (lambda i: {'progress': 10 + i % 80, 'notes': 'benchmark'}, False),
+        ('task.upload_file', 'post'): (lambda i: {
+            'file': SimpleUploadedFile(f'bench_{i}.txt', b'x' * 4096, content_type='text/plain'),
+            'description': 'benchmark',
+        }, True),
+        ('leaverequest.approve', 'post'): (lambda i: {}, False),
+    }
+
+
+def build_scenarios(fixtures, read_only):
+    """Every router route (reads, plus the writes in ``write_bodies``), auth and chatbot"""
+    from ems_api.urls import router
+
+    params = route_params(fixtures)
+    writes = write_bodies(fixtures)
+    scenarios, skipped = [], {}
+    for prefix, viewset, basename in router.registry:
+        routes = []
+        if hasattr(viewset, 'list'):
+            routes.append(('list', False, '', ['get']))
+        if hasattr(viewset, 'retrieve'):
+            routes.append(('retrieve', True, '', ['get']))
+        for name in ('create', 'update', 'partial_update', 'destroy'):
+            if hasattr(viewset, name):
+                skipped[f'{basename}.{name}'] = 'changes the dataset'
+        for extra in viewset.get_extra_actions():
+            routes.append((extra.__name__, extra.detail, f'{extra.url_path}/', list(extra.mapping)))
+
+        for action, detail, suffix, methods in routes:
+            name = f'{basename}.{action}'
+            pk = fixtures['pks'].get(basename)
+            if detail and pk is None:
+                skipped[name] = 'no row to point at'
+                continue
+            path = f"/api/{prefix}/{f'{pk}/' if detail else ''}{suffix}"
+            for method in methods:
+                if method == 'get':
+                    scenarios.append(Scenario(name, 'get', path, params.get(name, {}),
+                                              max_requests=5 if action == 'export' else None))
+                elif (name, method) in writes and not read_only:
+                    body, multipart = writes[(name, method)]
+                    scenarios.append(Scenario(name, method, path, body=body, multipart=multipart, write=True))
+                else:
+                    skipped[name] = 'read-only run' if (name, method) in writes else 'changes the dataset'
+
+    messages = lambda i: {'message': CHATBOT_MESSAGES[i % len(CHATBOT_MESSAGES)]}
+    scenarios += [
+        Scenario('auth_login', 'post', '/api/auth/login/',
+                 body=lambda i: {'username': BENCH_USERNAME, 'password': BENCH_PASSWORD}, max_requests=10),
+        Scenario('auth_user', 'get', '/api/auth/user/'),
+        Scenario('chatbot', 'post', '/api/chatbot/', body=messages),
+        Scenario('chatbot_async', 'post', '/api/chatbot/async/', body=messages),
+        Scenario('chatbot_stream', 'post', '/api/chatbot/stream/', body=messages),
+    ]
+    return scenarios, skipped
+
+
+def percentiles(samples):
+    """p50/p95/p99/max/mean of ``samples`` (seconds) in milliseconds"""
+    if not samples:
+        return {}
+    samples = sorted(samples)
+
+    def percentile(p):
+        return round(samples[min(len(samples) - 1, int(len(samples) * p))] * 1000, 2)
+
+    return {
+        'p50': percentile(0.50),
+        'p95': percentile(0.95),
+        'p99': percentile(0.99),
+        'max': round(samples[-1] * 1000, 2),
+        'mean': round(statistics.mean(samples) * 1000, 2),
+    }
+
+
+def client_request(client, scenario, index):
+    from asgiref.sync import async_to_sync
+
+    if scenario.method == 'get':
+        response = client.get(scenario.path, scenario.params)
+    elif scenario.multipart:
+        response = client.post(scenario.path, scenario.body(index))
+    else:
+        response = client.generic(scenario.method.upper(), scenario.path, json.dumps(scenario.body(index)),
+                                  content_type='application/json')
+    if response.streaming:
+        # Exports and SSE: the time to produce the whole body is the latency
+        if response.is_async:
+            async_to_sync(drain)(response.streaming_content)
+        else:
+            for _ in response.streaming_content:
+                pass
+    return response.status_code
+
+
+async def drain(chunks):
+    async for _ in chunks:
+        pass
+
+
+def query_totals(families):
+    """[sum, count] of the ems_http_request_queries histogram per route"""
+    totals = {}
+    for family in families:
+        if family.name != 'ems_http_request_queries':
+            continue
+        for sample in family.samples:
+            entry = totals.setdefault(sample.labels.get('route'), [0.0, 0.0])
+            if sample.name.endswith('_sum'):
+                entry[0] = sample.value
+            elif sample.name.endswith('_count'):
+                entry[1] = sample.value
+    return totals
+
+
+def queries_per_request(before, after, route):
+    """Mean queries per request of ``route`` between two ``query_totals`` snapshots"""
+    old, new = before.get(route, [0.0, 0.0]), after.get(route, [0.0, 0.0])
+    counted = new[1] - old[1]
+    return round((new[0] - old[0]) / counted, 2) if counted else None
+
+
+def run_client(scenarios, fixtures, requests, warmup):
+    """
+    Time each route sequentially through the test client.
+
+    Queries are read from the request metrics, which also see the queries
+    async views run in other threads.
+    """
+    from django.test import Client
+    from ems_api.instrumentation import registry
+
+    client = Client(HTTP_AUTHORIZATION=f"Token {fixtures['token']}")
+    results = {}
+    for scenario in scenarios:
+        total = min(requests, scenario.max_requests or requests)
+        for index in range(warmup):
+            client_request(client, scenario, index)
+        latencies, statuses = [], {}
+        queries_before = query_totals(registry.collect())
+        started = time.perf_counter()
+        for index in range(total):
+            request_started = time.perf_counter()
+            code = client_request(client, scenario, warmup + index)
+            latencies.append(time.perf_counter() - request_started)
+            statuses[str(code)] = statuses.get(str(code), 0) + 1
+        elapsed = time.perf_counter() - started
+        results[scenario.name] = {
+            'method': scenario.method.upper(),
+            'path': scenario.path,
+            'requests': total,
+            'statuses': statuses,
+            'queries_per_request': queries_per_request(queries_before, query_totals(registry.collect()), scenario.name),
+            'throughput_rps': round(total / elapsed, 2),
+            'latency_ms': percentiles(latencies),
+        }
+        print_route(scenario.name, results[scenario.name], statuses)
+    return results
+
+
+def print_route(name, result, statuses):
+    latency = result['latency_ms']
+    print(f"  {name:<40} {latency.get('p50', 0):>9.2f} {latency.get('p95', 0):>9.2f} {latency.get('p99', 0):>9.2f} "
+          f"{str(result['queries_per_request']):>8} {statuses}")
+
+
+def start_server():
+    """Run a single uvicorn worker in a background thread; returns its base URL"""
+    import uvicorn
+
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    config = uvicorn.Config('ems_backend.asgi:application', host='127.0.0.1', port=port,
+                            log_level='warning', lifespan='off')
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return f'http://127.0.0.1:{port}'
+
+
+async def fetch_query_totals(client, base_url):
+    """``query_totals`` from the server's /api/metrics/"""
+    from prometheus_client.parser import text_string_to_metric_families
+
+    response = await client.get(f'{base_url}/api/metrics/')
+    if response.status_code != 200:
+        return {}
+    return query_totals(text_string_to_metric_families(response.text))
+
+
+async def run_load(base_url, token, scenarios, total, concurrency, timeout):
+    """A round-robin mix of ``scenarios`` with ``concurrency`` requests in flight"""
+    import httpx
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = {scenario.name: [] for scenario in scenarios}
+    statuses = {scenario.name: {} for scenario in scenarios}
+
+    async def send(client, scenario, index):
+        url = base_url + scenario.path
+        if scenario.method == 'get':
+            return await client.get(url, params=scenario.params)
+        return await client.request(scenario.method.upper(), url, json=scenario.body(index))
+
+    async def one(client, index):
+        scenario = scenarios[index % len(scenarios)]
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                code = str((await send(client, scenario, index)).status_code)
+            except httpx.HTTPError as e:
+                code = type(e).__name__
+            latencies[scenario.name].append(time.perf_counter() - started)
+            statuses[scenario.name][code] = statuses[scenario.name].get(code, 0) + 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    headers = {'Authorization': f'Token {token}'}
+    async with httpx.AsyncClient(timeout=timeout, limits=limits, headers=headers) as client:
+        # Warm up imports, caches and the search index outside the timed run
+        for index, scenario in enumerate(scenarios):
+            await send(client, scenario, index)
+        queries_before = await fetch_query_totals(client, base_url)
+        started = time.perf_counter()
+        await asyncio.gather(*(one(client, index) for index in range(total)))
+        elapsed = time.perf_counter() - started
+        queries_after = await fetch_query_totals(client, base_url)
+
+    routes = {}
+    for scenario in scenarios:
+        routes[scenario.name] = {
+            'requests': len(latencies[scenario.name]),
+            'statuses': statuses[scenario.name],
+            'queries_per_request': queries_per_request(queries_before, queries_after, scenario.name),
+            'latency_ms': percentiles(latencies[scenario.name]),
+        }
+    all_latencies = [sample for samples in latencies.values() for sample in samples]
+    return {
+        'url': base_url,
+        'requests': total,
+        'concurrency': concurrency,
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(total / elapsed, 2),
+        'latency_ms': percentiles(all_latencies),
+        'scenarios': routes,
+    }
+
+
+def environment():
+    import django
+    from django.db import connection
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def compare(results, baseline_path, threshold):
+    """Print per-route changes against a baseline run; returns the regressions"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = []
+    print(f"\n=== Compared with {baseline_path} (threshold {threshold}x) ===")
+    print(f"{'phase':<7}{'route':<40}{'metric':>10}{'baseline':>11}{'current':>11}{'change':>9}")
+    for phase in ('client', 'http'):
+        current_routes = (results.get(phase) or {}).get('scenarios', {})
+        baseline_routes = (baseline.get(phase) or {}).get('scenarios', {})
+        for name, current in sorted(current_routes.items()):
+            base = baseline_routes.get(name)
+            if base is None:
+                continue
+            rows = [(metric, base['latency_ms'].get(metric), current['latency_ms'].get(metric))
+                    for metric in ('p50', 'p95', 'p99')]
+            rows.append(('queries', base.get('queries_per_request'), current.get('queries_per_request')))
+            for metric, old, new in rows:
+                if old is None or new is None:
+                    continue
+                if metric == 'queries':
+                    regressed = new > old
+                else:
+                    regressed = new > old * threshold and new - old > NOISE_FLOOR_MS
+                change = f"{new / old:.2f}x" if old else 'n/a'
+                flag = '  REGRESSION' if regressed else ''
+                print(f"{phase:<7}{name:<40}{metric:>10}{old:>11}{new:>11}{change:>9}{flag}")
+                if regressed:
+                    regressions.append({'phase': phase, 'route': name, 'metric': metric,
+                                        'baseline': old, 'current': new})
+    print(f"\n{len(regressions)} regression(s)")
+    return regressions
+
+
+def main():
+    args = parse_args()
+    os.environ['CHATBOT_MODEL'] = 'fake'
+    os.environ['CHATBOT_FAKE_LATENCY'] = str(args.chatbot_latency)
+    os.environ['CHATBOT_FAKE_TOKEN_DELAY'] = '0'
+    os.environ.setdefault('EMS_LOG_LEVEL', 'ERROR')
+    # Every request is measured here; the slow request log would only add noise
+    setup_django(args, media=True, REQUEST_SLOW_THRESHOLD_MS=0)
+
+    results = {'environment': None, 'dataset': {}}
+    if not args.skip_seed:
+        print("Seeding synthetic organisation...")
+        results['dataset']['seed_seconds'] = seed(args)
+    results['dataset'].update({
+        'options': None if args.skip_seed else {
+            'employees': args.employees, 'years': args.years, 'leaves_per_employee': args.leaves_per_employee,
+            'tasks_per_employee': args.tasks_per_employee, 'seed': args.seed,
+        },
+        'rows': dataset_counts(),
+    })
+    results['environment'] = environment()
+
+    fixtures = prepare_fixtures(args)
+    scenarios, skipped = build_scenarios(fixtures, args.read_only)
+    if args.only:
+        pattern = re.compile(args.only)
+        scenarios = [scenario for scenario in scenarios if pattern.search(scenario.name)]
+    results['skipped'] = dict(sorted(skipped.items()))
+
+    # Reads first: the write routes then run against the seeded data
+    scenarios.sort(key=lambda scenario: scenario.write)
+    print(f"\n=== Test client: {args.requests} requests per route (ms) ===")
+    print(f"  {'route':<40} {'p50':>9} {'p95':>9} {'p99':>9} {'queries':>8} statuses")
+    results['client'] = {
+        'requests_per_route': args.requests,
+        'warmup': args.warmup,
+        'scenarios': run_client(scenarios, fixtures, args.requests, args.warmup),
+    }
+
+    if args.load:
+        load_mix = [scenario for scenario in scenarios if not scenario.write and scenario.max_requests is None]
+        if not load_mix:
+            sys.exit('No read routes selected for the load phase')
+        base_url = args.url.rstrip('/') if args.url else start_server()
+        print(f"\n=== HTTP load: {args.load_requests} requests over {len(load_mix)} routes, "
+              f"concurrency {args.concurrency}, {base_url} ===")
+        results['http'] = asyncio.run(run_load(base_url, args.token or fixtures['token'], load_mix,
+                                               args.load_requests, args.concurrency, args.timeout))
+        http = results['http']
+        print(f"  Throughput {http['throughput_rps']} req/s, latency (ms) {http['latency_ms']}")
+        print(f"  {'route':<40} {'p50':>9} {'p95':>9} {'p99':>9} {'queries':>8} statuses")
+        for name, route in http['scenarios'].items():
+            print_route(name, route, route['statuses'])
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"\nResults written to {args.json}")
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+"""
+Benchmark ChatbotTools.get_department_summary against the per-department
+fan-out it replaced.
+
+The old implementation looped over the distinct departments and ran the
+attendance, leave and task summaries for each one (about 14 queries per
+department). The current one runs four GROUP BY queries in total. The script
+loads a synthetic organisation with ``--departments`` departments (50 by
+default) into a throwaway SQLite file, checks that both versions return the
+same numbers and prints query counts and median timings.
+
+Pass --use-configured-db to run against the database in settings.py instead
+(use an empty benchmark database: the script loads data into it).
+
+Usage:
+    python benchmark_department_summary.py
+    python benchmark_department_summary.py --departments 50 --employees 2000 --json department_summary.json
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+from benchmark_setup import add_database_arguments, setup_django
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--departments', type=int, default=50, help='Departments to generate')
+    parser.add_argument('--employees', type=int, default=1000, help='Employees to generate')
+    parser.add_argument('--days', type=int, default=60, help='Days of attendance per employee')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per implementation (median is reported)')
+    add_database_arguments(parser)
+    parser.add_argument('--json', help='Write results to this JSON file')
+    return parser.parse_args()
+
+
+def generate_data(department_count, employee_count, days):
+    from ems_api.models import Employee, AttendanceRecord, LeaveRequest, Task
+    from ems_api.rollups import rebuild_attendance_rollups
+
+    random.seed(42)
+    departments = [f"Dept {i:02d}" for i in range(department_count)]
+    Task.objects.all().delete()
+    LeaveRequest.objects.all().delete()
+    AttendanceRecord.objects.all().delete()
+    Employee.objects.all().delete()
+    Employee.objects.bulk_create([
+        Employee(
+            employee_id=f"d{i:05d}"[:10],
+            name=f"Bench Employee {i}",
+            email=f"dept_bench{i}@example.com",
+            department=departments[i % department_count],
+            designation='Engineer',
+            joining_date=date(2020, 1, 1),
+            status='Active',
+            phone='0000000000',
+        )
+        for i in range(employee_count)
+    ], batch_size=1000)
+    employees = list(Employee.objects.all())
+
+    start = date(2025, 1, 1)
+    statuses = [value for value, _ in AttendanceRecord.ATTENDANCE_STATUS_CHOICES]
+    AttendanceRecord.objects.bulk_create([
+        AttendanceRecord(employee=employee, date=start + timedelta(days=day), hours=8,
+                         status=random.choices(statuses, [0.85, 0.05, 0.07, 0.03])[0])
+        for employee in employees
+        for day in range(days)
+    ], batch_size=2000)
+    rebuild_attendance_rollups()
+
+    LeaveRequest.objects.bulk_create([
+        LeaveRequest(employee=employee, leave_type=random.choice(LeaveRequest.LEAVE_TYPE_CHOICES)[0],
+                     start_date=start, end_date=start + timedelta(days=1), days=2, reason='Benchmark',
+                     status=random.choice(LeaveRequest.LEAVE_STATUS_CHOICES)[0])
+        for employee in employees
+        for _ in range(2)
+    ], batch_size=2000)
+
+    Task.objects.bulk_create([
+        Task(title=f"Task {index}", description='Benchmark', assigned_to=employee, assigned_by=employees[0],
+             due_date=start + timedelta(days=30), priority=random.choice(Task.PRIORITY_CHOICES)[0],
+             status=random.choice(Task.STATUS_CHOICES)[0], department=employee.department)
+        for index, employee in enumerate(employees * 3)
+    ], batch_size=2000)
+    print(f"Loaded {len(employees)} employees in {department_count} departments, "
+          f"{len(employees) * days} attendance rows, {len(employees) * 2} leave requests, {len(employees) * 3} tasks")
+
+
+def legacy_department_summary():
+    """The per-department fan-out get_department_summary used before"""
+    from django.db.models import Sum
+    from ems_api.models import Employee, AttendanceDailyRollup, LeaveRequest, Task
+
+    summary = {}
+    for dept in Employee.objects.values_list('department', flat=True).distinct():
+        rollups = AttendanceDailyRollup.objects.filter(department__icontains=dept)
+        totals = rollups.aggregate(total=Sum('total'), present=Sum('present'), absent=Sum('absent'), late=Sum('late'))
+        total_records = totals['total'] or 0
+
+        requests = LeaveRequest.objects.filter(employee__department__icontains=dept)
+        tasks = Task.objects.filter(assigned_to__department__icontains=dept)
+        summary[dept] = {
+            'employee_count': Employee.objects.filter(department=dept).count(),
+            'attendance': {
+                'total_records': total_records,
+                'present': totals['present'] or 0,
+                'absent': totals['absent'] or 0,
+                'late': totals['late'] or 0,
+                'attendance_rate': round(((totals['present'] or 0) / total_records * 100), 2) if total_records > 0 else 0
+            },
+            'leave': {
+                'total_requests': requests.count(),
+                'pending': requests.filter(status='Pending').count(),
+                'approved': requests.filter(status='Approved').count(),
+                'rejected': requests.filter(status='Rejected').count()
+            },
+            'tasks': {
+                'total_tasks': tasks.count(),
+                'not_started': tasks.filter(status='Not Started').count(),
+                'in_progress': tasks.filter(status='In Progress').count(),
+                'completed': tasks.filter(status='Completed').count(),
+                'on_hold': tasks.filter(status='On Hold').count(),
+                'high_priority': tasks.filter(priority='High').count(),
+                'medium_priority': tasks.filter(priority='Medium').count(),
+                'low_priority': tasks.filter(priority='Low').count()
+            }
+        }
+    return summary
+
+
+def matches_legacy(legacy, current):
+    """True when ``current`` has every value ``legacy`` reports (it may add keys, e.g. half_day)"""
+    if isinstance(legacy, dict):
+        return isinstance(current, dict) and legacy.keys() <= current.keys() and all(
+            matches_legacy(value, current[key]) for key, value in legacy.items()
+        )
+    return legacy == current
+
+
+def measure(func, repeat):
+    """Return (result, query count, median seconds) for ``func``"""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    with CaptureQueriesContext(connection) as queries:
+        result = func()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return result, len(queries), statistics.median(timings)
+
+
+def main():
+    args = parse_args()
+    setup_django(args)
+    generate_data(args.departments, args.employees, args.days)
+
+    from ems_api.chatbot_tools import ChatbotTools
+
+    legacy, legacy_queries, legacy_time = measure(legacy_department_summary, args.repeat)
+    current, current_queries, current_time = measure(ChatbotTools.get_department_summary, args.repeat)
+    if 'error' in current:
+        sys.exit(current['error'])
+    matches = matches_legacy(legacy, current)
+
+    results = {
+        'departments': args.departments,
+        'employees': args.employees,
+        'results_match': matches,
+        'legacy': {'queries': legacy_queries, 'median_ms': round(legacy_time * 1000, 2)},
+        'single_pass': {'queries': current_queries, 'median_ms': round(current_time * 1000, 2)},
+        'speedup': round(legacy_time / current_time, 1) if current_time else None,
+    }
+
+    print(f"\n{'implementation':<16}{'queries':>10}{'median ms':>12}")
+    print(f"{'legacy':<16}{legacy_queries:>10}{results['legacy']['median_ms']:>12}")
+    print(f"{'single pass':<16}{current_queries:>10}{results['single_pass']['median_ms']:>12}")
+    print(f"\nSpeedup: {results['speedup']}x; results match: {matches}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
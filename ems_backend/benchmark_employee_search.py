@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+"""
+Benchmark the in-memory employee search index against the icontains query
+it replaced.
+
+The script loads ``--employees`` generated employees (100k by default) into a
+throwaway SQLite file, builds the index and times lookups for four kinds of
+query: a full name token, a three letter prefix, a misspelled name (fuzzy)
+and an employee id. The old ``name | email | employee_id`` icontains query is
+timed on the same terms; it cannot answer misspellings.
+
+Pass --use-configured-db to run against the database in settings.py instead
+(use an empty benchmark database: the script loads data into it).
+
+Usage:
+    python benchmark_employee_search.py
+    python benchmark_employee_search.py --employees 100000 --queries 500 --json employee_search.json
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+from datetime import date
+
+from benchmark_setup import add_database_arguments, setup_django
+
+FIRST_NAMES = [
+    'John', 'Priya', 'Rahul', 'Anita', 'Michael', 'Sara', 'Vikram', 'Neha', 'David', 'Kavya',
+    'Arjun', 'Meera', 'Robert', 'Divya', 'Karthik', 'Lakshmi', 'Daniel', 'Pooja', 'Suresh', 'Emily',
+]
+LAST_NAMES = [
+    'Sharma', 'Patel', 'Smith', 'Iyer', 'Reddy', 'Johnson', 'Nair', 'Gupta', 'Williams', 'Menon',
+    'Kumar', 'Brown', 'Rao', 'Singh', 'Davis', 'Pillai', 'Joshi', 'Miller', 'Verma', 'Krishnan',
+]
+DEPARTMENTS = ['Engineering', 'Sales', 'Marketing', 'Finance', 'Human Resources', 'Operations', 'Support']
+DESIGNATIONS = ['Engineer', 'Senior Engineer', 'Manager', 'Analyst', 'Executive', 'Lead', 'Consultant']
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--employees', type=int, default=100000, help='Employees to generate')
+    parser.add_argument('--queries', type=int, default=500, help='Index lookups per query kind')
+    parser.add_argument('--legacy-queries', type=int, default=20, help='icontains lookups per query kind')
+    add_database_arguments(parser)
+    parser.add_argument('--json', help='Write results to this JSON file')
+    return parser.parse_args()
+
+
+def generate_employees(count):
+    from ems_api.models import Employee
+
+    random.seed(42)
+    Employee.objects.all().delete()
+    employees = []
+    for i in range(count):
+        first, last = random.choice(FIRST_NAMES), random.choice(LAST_NAMES)
+        employees.append(Employee(
+            employee_id=f"S{i:07d}",
+            name=f"{first} {last}",
+            email=f"{first.lower()}.{last.lower()}{i}@example.com",
+            department=random.choice(DEPARTMENTS),
+            designation=random.choice(DESIGNATIONS),
+            joining_date=date(2020, 1, 1),
+            status='Active',
+            phone='0000000000',
+        ))
+    Employee.objects.bulk_create(employees, batch_size=5000)
+    print(f"Loaded {count} employees")
+
+
+def misspell(word):
+    """Swap two adjacent inner letters: "Sharma" -> "Shamra\""""
+    index = random.randrange(1, len(word) - 2)
+    return word[:index] + word[index + 1] + word[index] + word[index + 2:]
+
+
+def build_queries(count, employee_count):
+    random.seed(7)
+    # Misspellings of short names are too ambiguous to be a fair fuzzy query
+    long_names = [name for name in LAST_NAMES if len(name) >= 5]
+    return {
+        'exact': [random.choice(LAST_NAMES) for _ in range(count)],
+        'prefix': [random.choice(FIRST_NAMES)[:3] for _ in range(count)],
+        'fuzzy': [misspell(random.choice(long_names)) for _ in range(count)],
+        'employee_id': [f"S{random.randrange(employee_count):07d}" for _ in range(count)],
+    }
+
+
+def legacy_search(query):
+    """The icontains query ChatbotTools.search_employees ran before"""
+    from ems_api.models import Employee
+
+    employees = (
+        Employee.objects.filter(name__icontains=query)
+        | Employee.objects.filter(email__icontains=query)
+        | Employee.objects.filter(employee_id__icontains=query)
+    )
+    return list(employees.values('id', 'employee_id', 'name', 'email', 'department', 'designation', 'status'))
+
+
+def time_lookups(func, queries):
+    """Return (p50 us, p99 us, queries with results) for ``func`` over ``queries``"""
+    timings, hits = [], 0
+    for query in queries:
+        started = time.perf_counter()
+        results = func(query)
+        timings.append((time.perf_counter() - started) * 1_000_000)
+        hits += bool(results)
+    timings.sort()
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    return round(statistics.median(timings), 1), round(p99, 1), hits
+
+
+def main():
+    args = parse_args()
+    setup_django(args)
+    generate_employees(args.employees)
+
+    from ems_api.search import employee_index
+
+    started = time.perf_counter()
+    employee_index.build()
+    build_seconds = time.perf_counter() - started
+    # Lookups below measure the index alone, not the throttled version check
+    employee_index.refresh_seconds = float('inf')
+
+    results = {'employees': args.employees, 'build_seconds': round(build_seconds, 3),
+               'index': employee_index.stats(), 'queries': {}}
+    print(f"Index built in {build_seconds:.2f}s: {results['index']['tokens']} tokens, "
+          f"{results['index']['trigrams']} trigrams")
+
+    print(f"\n{'query kind':<14}{'index p50 us':>14}{'index p99 us':>14}{'hits':>8}"
+          f"{'icontains p50 us':>18}{'hits':>8}")
+    for kind, queries in build_queries(args.queries, args.employees).items():
+        p50, p99, hits = time_lookups(employee_index.search, queries)
+        legacy_queries = queries[:args.legacy_queries]
+        legacy_p50, _, legacy_hits = time_lookups(legacy_search, legacy_queries)
+        results['queries'][kind] = {
+            'index': {'p50_us': p50, 'p99_us': p99, 'hit_rate': round(hits / len(queries), 3)},
+            'icontains': {'p50_us': legacy_p50, 'hit_rate': round(legacy_hits / len(legacy_queries), 3)},
+        }
+        print(f"{kind:<14}{p50:>14}{p99:>14}{hits / len(queries):>8.0%}"
+              f"{legacy_p50:>18}{legacy_hits / len(legacy_queries):>8.0%}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
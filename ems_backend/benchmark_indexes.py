@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+"""
+Benchmark the hot-path composite indexes (migration 0009) on a generated
+attendance table.
+
+The script builds a fresh database at migration 0008, loads a synthetic
+organisation with ``--rows`` attendance records (1M by default), then prints
+the query plan and median timing of each hot filter before and after applying
+0009_add_hot_path_indexes.
+
+By default it works on a throwaway SQLite file. Pass --use-configured-db to
+run against the database in settings.py instead (use an empty benchmark
+database: the script migrates it back and forth and loads data into it).
+
+Usage:
+    python benchmark_indexes.py
+    python benchmark_indexes.py --rows 200000 --json index_benchmark.json
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+from benchmark_setup import add_database_arguments, setup_django
+
+BEFORE_MIGRATION = '0008_attendancedailyrollup'
+AFTER_MIGRATION = '0009_add_hot_path_indexes'
+DEPARTMENTS = ['Engineering', 'HR', 'Sales', 'Finance', 'Marketing', 'Operations', 'Support', 'Legal', 'IT', 'Admin']
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000, help='Attendance rows to generate')
+    parser.add_argument('--employees', type=int, default=1000, help='Employees to generate')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per query (median is reported)')
+    add_database_arguments(parser)
+    parser.add_argument('--json', help='Write results to this JSON file')
+    return parser.parse_args()
+
+
+def migrate_to(target):
+    from django.core.management import call_command
+    call_command('migrate', 'ems_api', target, verbosity=0)
+
+
+def historical_models():
+    """
+    Employee and AttendanceRecord as of BEFORE_MIGRATION.
+
+    The current models may have columns added by later migrations that the
+    benchmark schema lacks; 0009 only adds indexes, so these stay valid after it.
+    """
+    from django.db import connection
+    from django.db.migrations.executor import MigrationExecutor
+
+    state = MigrationExecutor(connection).loader.project_state(('ems_api', BEFORE_MIGRATION))
+    return state.apps.get_model('ems_api', 'Employee'), state.apps.get_model('ems_api', 'AttendanceRecord')
+
+
+def generate_data(rows, employee_count):
+    """Insert employees and attendance with executemany; returns sample parameters for queries"""
+    from django.db import connection, transaction
+
+    Employee, AttendanceRecord = historical_models()
+
+    random.seed(42)
+    Employee.objects.all().delete()
+    Employee.objects.bulk_create([
+        Employee(
+            employee_id=f"b{i:05d}"[:10],
+            name=f"Bench Employee {i}",
+            email=f"bench{i}@example.com",
+            department=DEPARTMENTS[i % len(DEPARTMENTS)],
+            designation='Engineer',
+            joining_date=date(2020, 1, 1),
+            status='Active' if i % 10 else 'Inactive',
+            phone='0000000000',
+        )
+        for i in range(employee_count)
+    ], batch_size=1000)
+    employee_ids = list(Employee.objects.values_list('id', flat=True))
+
+    days = max(1, rows // len(employee_ids))
+    start = date(2020, 1, 1)
+    table = AttendanceRecord._meta.db_table
+    sql = (
+        f"INSERT INTO {table} (date, employee_id, hours, status) VALUES (%s, %s, %s, %s)"
+    )
+    statuses = ['Present', 'Absent', 'Late', 'Half Day']
+    weights = [0.85, 0.05, 0.07, 0.03]
+
+    inserted = 0
+    started = time.perf_counter()
+    with transaction.atomic(), connection.cursor() as cursor:
+        batch = []
+        for day in range(days):
+            current = start + timedelta(days=day)
+            for employee_id in employee_ids:
+                if inserted + len(batch) >= rows:
+                    break
+                status = random.choices(statuses, weights)[0]
+                batch.append((current, employee_id, 0 if status == 'Absent' else 8, status))
+                if len(batch) >= 10000:
+                    cursor.executemany(sql, batch)
+                    inserted += len(batch)
+                    batch = []
+        if batch:
+            cursor.executemany(sql, batch)
+            inserted += len(batch)
+    print(f"Inserted {inserted} attendance rows for {len(employee_ids)} employees "
+          f"over {days} days in {time.perf_counter() - started:.1f}s")
+
+    sample_date = start + timedelta(days=days // 2)
+    sample_id = AttendanceRecord.objects.filter(date=sample_date).order_by('-id').values_list('id', flat=True).first()
+    return {
+        'date': sample_date,
+        'start': sample_date - timedelta(days=30),
+        'employee_id': employee_ids[len(employee_ids) // 2],
+        'cursor_id': sample_id,
+    }
+
+
+def hot_queries(params):
+    """Query shapes used by views.py, reports and chatbot_tools"""
+    from ems_api.pagination import AttendanceKeysetPagination
+
+    Employee, AttendanceRecord = historical_models()
+
+    return [
+        ('attendance by date', lambda: AttendanceRecord.objects.filter(date=params['date'])),
+        ('attendance by employee history', lambda: AttendanceRecord.objects.filter(
+            employee_id=params['employee_id']).order_by('-date')[:50]),
+        ('attendance by (employee, date)', lambda: AttendanceRecord.objects.filter(
+            employee_id=params['employee_id'], date=params['date'])),
+        ('attendance late in last 30 days', lambda: AttendanceRecord.objects.filter(
+            status='Late', date__gte=params['start'], date__lte=params['date'])),
+        ('attendance by department and date', lambda: AttendanceRecord.objects.filter(
+            employee__department='Engineering', date=params['date'])),
+        ('attendance keyset page', lambda: AttendanceRecord.objects.filter(
+            AttendanceKeysetPagination().keyset_filter([params['date'], params['cursor_id']], reverse=False)
+        ).order_by('-date', '-id')[:50]),
+        ('employees by department and status', lambda: Employee.objects.filter(
+            department='Engineering', status='Active')),
+    ]
+
+
+def measure(queries, repeat):
+    results = {}
+    for label, build in queries:
+        plan = build().explain()
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            list(build())
+            timings.append((time.perf_counter() - started) * 1000)
+        results[label] = {'plan': plan, 'median_ms': round(statistics.median(timings), 3)}
+    return results
+
+
+def main():
+    args = parse_args()
+    setup_django(args, migrate=False)
+
+    print(f"Migrating to {BEFORE_MIGRATION} (no hot-path indexes)...")
+    migrate_to(BEFORE_MIGRATION)
+    if args.use_configured_db:
+        Employee, _ = historical_models()
+        if Employee.objects.exists():
+            sys.exit("Refusing to run: the configured database already contains employees. Use an empty benchmark database.")
+    params = generate_data(args.rows, args.employees)
+    queries = hot_queries(params)
+
+    print("Measuring without indexes...")
+    before = measure(queries, args.repeat)
+
+    print(f"Applying {AFTER_MIGRATION}...")
+    started = time.perf_counter()
+    migrate_to(AFTER_MIGRATION)
+    print(f"Indexes built in {time.perf_counter() - started:.1f}s")
+
+    print("Measuring with indexes...")
+    after = measure(queries, args.repeat)
+
+    print("\n=== Results (median ms) ===")
+    print(f"{'query':40} {'before':>10} {'after':>10} {'speedup':>9}")
+    for label, _ in queries:
+        b, a = before[label]['median_ms'], after[label]['median_ms']
+        speedup = f"{b / a:.1f}x" if a else 'n/a'
+        print(f"{label:40} {b:>10.3f} {a:>10.3f} {speedup:>9}")
+
+    print("\n=== Query plans ===")
+    for label, _ in queries:
+        print(f"\n{label}")
+        print(f"  before: {before[label]['plan']}")
+        print(f"  after:  {after[label]['plan']}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({
+                'rows': args.rows,
+                'employees': args.employees,
+                'repeat': args.repeat,
+                'before': before,
+                'after': after,
+            }, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
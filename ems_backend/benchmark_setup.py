@@ -0,0 +1,44 @@
+"""
+Django setup shared by the benchmark_*.py scripts.
+
+By default a benchmark works on a throwaway SQLite file; ``--use-configured-db``
+runs it against the database in settings.py instead.
+"""
+import os
+import sys
+import tempfile
+
+# Add the project directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ems_backend.settings')
+
+
+def add_database_arguments(parser):
+    """Add ``--sqlite-path`` and ``--use-configured-db`` to an argument parser or group"""
+    parser.add_argument('--sqlite-path', help='SQLite file to use (default: a new temporary file)')
+    parser.add_argument('--use-configured-db', action='store_true', help='Use DATABASES from settings.py')
+
+
+def setup_django(args, migrate=True, media=False, **overrides):
+    """
+    Set up Django on the benchmark database and migrate it (unless ``migrate`` is false).
+
+    ``media`` also keeps uploaded files next to a throwaway database, and
+    ``overrides`` are settings applied before setup.
+    """
+    import django
+    from django.conf import settings
+
+    if not args.use_configured_db:
+        directory = tempfile.mkdtemp(prefix='ems_bench_')
+        path = args.sqlite_path or os.path.join(directory, 'bench.sqlite3')
+        settings.DATABASES['default'] = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': path}
+        if media:
+            settings.MEDIA_ROOT = os.path.join(directory, 'media')
+        print(f"Using SQLite database at {path}")
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+    django.setup()
+    if migrate:
+        from django.core.management import call_command
+        call_command('migrate', verbosity=0)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+"""
+Benchmark the per-request cost of token authentication.
+
+Runs ``GET /api/auth/user/`` (CurrentUserView, which does no queries of its
+own) through DRF with the stock ``TokenAuthentication`` and with
+``CachedTokenAuthentication``, and reports queries per request and p50/p99
+latency. ``--tokens`` distinct users/tokens are used round robin, so the
+cached run measures LRU hits once every token has been seen.
+
+Pass --use-configured-db to run against the database in settings.py instead
+(the script creates benchmark users in it).
+
+Usage:
+    python benchmark_token_auth.py
+    python benchmark_token_auth.py --requests 20000 --tokens 500 --json token_auth.json
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+
+from benchmark_setup import add_database_arguments, setup_django
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=5000, help='Requests per authentication class')
+    parser.add_argument('--tokens', type=int, default=100, help='Distinct users/tokens')
+    add_database_arguments(parser)
+    parser.add_argument('--json', help='Write results to this JSON file')
+    return parser.parse_args()
+
+
+def create_tokens(count):
+    from django.contrib.auth.models import User
+    from rest_framework.authtoken.models import Token
+
+    keys = []
+    for i in range(count):
+        user, _ = User.objects.get_or_create(username=f'auth_bench_{i}')
+        token, _ = Token.objects.get_or_create(user=user)
+        keys.append(token.key)
+    return keys
+
+
+def run(auth_class, keys, requests):
+    """Return (queries per request, p50 us, p99 us) for ``requests`` authenticated GETs"""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from rest_framework.test import APIRequestFactory
+    from ems_api.views import CurrentUserView
+
+    view = CurrentUserView.as_view(authentication_classes=[auth_class])
+    factory = APIRequestFactory()
+    timings = []
+    with CaptureQueriesContext(connection) as queries:
+        for i in range(requests):
+            request = factory.get('/api/auth/user/', HTTP_AUTHORIZATION=f'Token {keys[i % len(keys)]}')
+            started = time.perf_counter()
+            response = view(request)
+            timings.append((time.perf_counter() - started) * 1_000_000)
+            if response.status_code != 200:
+                sys.exit(f"Unexpected status {response.status_code} with {auth_class.__name__}")
+    timings.sort()
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    return len(queries) / requests, round(statistics.median(timings), 1), round(p99, 1)
+
+
+def main():
+    args = parse_args()
+    setup_django(args)
+
+    from rest_framework.authentication import TokenAuthentication
+    from ems_api.authentication import CachedTokenAuthentication, token_cache
+
+    keys = create_tokens(args.tokens)
+    token_cache.clear()
+    results = {'requests': args.requests, 'tokens': args.tokens}
+    print(f"\n{'authentication':<30}{'queries/request':>16}{'p50 us':>10}{'p99 us':>10}")
+    for name, auth_class in (('TokenAuthentication', TokenAuthentication),
+                             ('CachedTokenAuthentication', CachedTokenAuthentication)):
+        queries, p50, p99 = run(auth_class, keys, args.requests)
+        results[name] = {'queries_per_request': round(queries, 4), 'p50_us': p50, 'p99_us': p99}
+        print(f"{name:<30}{queries:>16.3f}{p50:>10}{p99:>10}")
+    results['token_cache'] = token_cache.stats()
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
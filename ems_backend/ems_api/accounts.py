@@ -0,0 +1,132 @@
+"""
+Auth users of employees.
+
+Every employee signs in as a Django ``User`` whose username is their
+employee ID. Unless an admin chooses a password, the employee ID is also the
+initial password. Hashing it (PBKDF2, slow by design) is a background job:
+``create_employee_user`` creates the user without a usable password and
+queues ``set_initial_password``, which a worker runs after the transaction
+commits (or the request itself, with ``JOB_QUEUE_EAGER``). Until then the
+employee cannot sign in; the API returns the job's ``job_id`` so clients can
+follow it at ``/api/jobs/{job_id}/``. Passwords an admin types
+are hashed inline, because job payloads are stored in the database.
+
+``sync_employee_users`` (``manage.py sync_employee_auth``) creates missing
+users the same way, so their passwords are hashed in parallel by the worker
+pool.
+"""
+
+from typing import Dict, Optional, Tuple
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from rest_framework.authtoken.models import Token
+
+from . import jobs
+from .models import BackgroundJob, Employee
+
+
+def name_parts(name: str) -> Tuple[str, str]:
+    """First and last name for the auth user of an employee called ``name``"""
+    parts = name.split(' ') if name else []
+    return (parts[0] if parts else ''), ' '.join(parts[1:])
+
+
+def create_employee_user(employee: Employee, password: Optional[str] = None,
+                         requested_by=None) -> Tuple[User, Optional[BackgroundJob]]:
+    """
+    Create the auth user of ``employee`` (not yet linked).
+
+    Without ``password`` the initial password is set by a background job,
+    which is returned with the user (None when ``password`` was given).
+    """
+    first_name, last_name = name_parts(employee.name)
+    user = User.objects.create_user(
+        username=employee.employee_id,
+        email=employee.email,
+        password=password,
+        first_name=first_name,
+        last_name=last_name,
+    )
+    job = None
+    if password is None:
+        job = jobs.enqueue('accounts.set_initial_password', {'user_id': user.pk}, user=requested_by)
+    return user, job
+
+
+@jobs.register('accounts.set_initial_password', priority=10)
+def set_initial_password(user_id: int) -> bool:
+    """Make the linked employee's ID the password of a user that has none yet"""
+    user = User.objects.filter(pk=user_id).only('pk', 'password').first()
+    if user is None or user.has_usable_password():
+        return False
+    employee_id = Employee.objects.filter(user_id=user_id).values_list('employee_id', flat=True).first()
+    if employee_id is None:
+        return False
+    # Guarded on the old hash: a password set meanwhile is not overwritten
+    return bool(User.objects.filter(pk=user_id, password=user.password).update(password=make_password(employee_id)))
+
+
+@jobs.register('accounts.sync_employee_auth', timeout=1800)
+def sync_employee_users() -> Dict[str, int]:
+    """Create missing Users, update active state, and clean orphans; returns what changed"""
+    created_users = 0
+    updated_users = 0
+    deactivated_users = 0
+    cleaned_tokens = 0
+    orphan_users_deleted = 0
+
+    # Create or update users for employees
+    for employee in Employee.objects.select_related('user').iterator():
+        first_name, last_name = name_parts(employee.name)
+
+        if employee.user is None:
+            # Linked in the same transaction as the password job, which looks the employee up by user
+            with transaction.atomic():
+                user, _ = create_employee_user(employee)
+                user.is_active = (employee.status == 'Active')
+                user.save()
+                employee.user = user
+                employee.save(update_fields=['user'])
+            created_users += 1
+        else:
+            # Update existing linked user fields and active status
+            user = employee.user
+            changed = False
+            if user.email != employee.email:
+                user.email = employee.email
+                changed = True
+            if user.first_name != first_name:
+                user.first_name = first_name
+                changed = True
+            if user.last_name != last_name:
+                user.last_name = last_name
+                changed = True
+            desired_active = (employee.status == 'Active')
+            if user.is_active != desired_active:
+                user.is_active = desired_active
+                changed = True
+            if changed:
+                user.save()
+                updated_users += 1
+            if not desired_active:
+                # Revoke tokens for inactive users
+                cleaned_tokens += Token.objects.filter(user=user).delete()[0]
+                deactivated_users += 1
+
+    # Clean up orphan auth users that look like employees but are not linked
+    # Heuristic: username starts with 'emp' and has no Employee link
+    for user in User.objects.filter(username__startswith='emp').iterator():
+        if not Employee.objects.filter(user=user).exists() and not Employee.objects.filter(employee_id=user.username).exists():
+            cleaned_tokens += Token.objects.filter(user=user).delete()[0]
+            user.delete()
+            orphan_users_deleted += 1
+
+    return {
+        'created': created_users,
+        'updated': updated_users,
+        'deactivated': deactivated_users,
+        'tokens_revoked': cleaned_tokens,
+        'orphan_users_deleted': orphan_users_deleted,
+    }
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Employee, AttendanceRecord, LeaveRequest, Task
+from .models import Employee, AttendanceRecord, AttendanceDailyRollup, LeaveRequest, Task, BackgroundJob
 
 
 @admin.register(Employee)
@@ -18,6 +18,23 @@ class AttendanceRecordAdmin(admin.ModelAdmin):
     ordering = ('-date', 'employee__name')
 
 
+@admin.register(AttendanceDailyRollup)
+class AttendanceDailyRollupAdmin(admin.ModelAdmin):
+    list_display = ('date', 'department', 'total', 'present', 'absent', 'late', 'half_day', 'total_hours')
+    list_filter = ('department', 'date')
+    ordering = ('-date', 'department')
+
+    # Derived from attendance records; edits would be overwritten by the next refresh
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(LeaveRequest)
 class LeaveRequestAdmin(admin.ModelAdmin):
     list_display = ('employee', 'leave_type', 'start_date', 'end_date', 'days', 'status', 'applied_date')
@@ -32,3 +49,11 @@ class TaskAdmin(admin.ModelAdmin):
     list_filter = ('status', 'priority', 'department', 'assigned_date')
     search_fields = ('title', 'assigned_to__name', 'assigned_by__name')
     ordering = ('-assigned_date', 'priority')
+
+
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'priority', 'attempts', 'max_attempts', 'created_at', 'finished_at')
+    list_filter = ('status', 'name')
+    search_fields = ('job_id', 'name')
+    ordering = ('-created_at',)
@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class EmsApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ems_api'
+
+    def ready(self):
+        from . import authentication, blobs, chatbot_cache, instrumentation, rollups, search
+        # Modules that register background job handlers (ems_api.jobs), so workers know them
+        from . import accounts, chatbot_export, thumbnails  # noqa: F401
+        instrumentation.connect_signals()
+        authentication.connect_signals()
+        blobs.connect_signals()
+        chatbot_cache.connect_signals()
+        rollups.connect_signals()
+        # After the data version receivers: the search index adopts the bumped version
+        search.connect_signals()
@@ -0,0 +1,239 @@
+"""
+Token authentication with a cache in front of the token lookup.
+
+DRF's ``TokenAuthentication`` runs ``Token.objects.select_related('user')``
+on every request; with the frontend polling that is the most frequent query
+the API runs. ``CachedTokenAuthentication`` keeps validated tokens in an
+in-process LRU (``TOKEN_AUTH_CACHE_SIZE`` entries, ``TOKEN_AUTH_CACHE_TTL``
+seconds) and, when ``TOKEN_AUTH_SHARED_CACHE`` names a Django cache, in that
+cache too so other workers can skip the query.
+
+Entries are dropped when their token is deleted (logout, deactivation,
+``purge_tokens``, ``sync_employee_auth``) or their user is saved or deleted,
+through model signals, once when the change is made and again after it
+commits. Signals only run in the process that made the change, so an
+in-process LRU on its own cannot revoke tokens cached by other workers: they
+keep accepting them until ``TOKEN_AUTH_CACHE_TTL`` expires. With a shared
+cache, an invalidation also writes a revocation marker for each token there.
+Every cached hit, in any process, checks the token's marker (one shared cache
+read instead of a query) and is discarded when the marker changed since the
+entry was cached, so revocations apply everywhere at once.
+"""
+
+import copy
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import partial
+from typing import Any, Dict, Optional, Set, Tuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+DEFAULT_CACHE_SIZE = 10000
+DEFAULT_CACHE_TTL = 60
+DEFAULT_SHARED_CACHE_TTL = 300
+SHARED_KEY_PREFIX = 'ems:auth-token:'
+REVOKED_KEY_PREFIX = 'ems:auth-token-revoked:'
+
+
+def _digest(key: str) -> str:
+    # Token keys are credentials: the shared cache only sees a digest
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def _shared_key(key: str) -> str:
+    return SHARED_KEY_PREFIX + _digest(key)
+
+
+def _revoked_key(key: str) -> str:
+    return REVOKED_KEY_PREFIX + _digest(key)
+
+
+class TokenCache:
+    """
+    Thread-safe LRU of ``key -> (user, token)`` with a TTL, an optional shared cache and hit/miss counters.
+
+    With a shared cache every entry remembers the token's revocation marker
+    as it was read before the token was looked up, and is only served while
+    the marker is unchanged.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_CACHE_SIZE, ttl: float = DEFAULT_CACHE_TTL,
+                 shared_alias: Optional[str] = None, shared_ttl: float = DEFAULT_SHARED_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.shared_alias = shared_alias or None
+        self.shared_ttl = shared_ttl
+        self._entries: 'OrderedDict[str, Tuple[float, Any, Any, Optional[str]]]' = OrderedDict()
+        self._keys_by_user: Dict[Any, Set[str]] = {}
+        self._lock = threading.Lock()
+        # Bumped by every invalidation, so a lookup that raced with one is not cached
+        self.generation = 0
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl > 0
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias] if self.shared_alias else None
+
+    def get(self, key: str) -> Tuple[Optional[Tuple[Any, Any]], Optional[str]]:
+        """
+        The cached ``(user, token)`` of ``key`` (None on a miss) and the key's revocation marker.
+
+        Pass the marker to ``set`` after looking the token up, so an entry
+        revoked meanwhile is never served.
+        """
+        if not self.enabled:
+            return None, None
+        shared = self.shared
+        revision = shared.get(_revoked_key(key)) if shared is not None else None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[0] < time.monotonic() or entry[3] != revision):
+                self._drop(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return (entry[1], entry[2]), revision
+        if shared is not None:
+            cached = shared.get(_shared_key(key))
+            if cached is not None and cached[2] == revision:
+                with self._lock:
+                    self.shared_hits += 1
+                self._store(key, cached[0], cached[1], revision)
+                return (cached[0], cached[1]), revision
+        with self._lock:
+            self.misses += 1
+        return None, revision
+
+    def set(self, key: str, user, token, generation: Optional[int] = None, revision: Optional[str] = None) -> None:
+        if not self.enabled or (generation is not None and generation != self.generation):
+            return
+        # Keep copies: the request goes on using (and may modify) the originals
+        user, token = copy.copy(user), copy.copy(token)
+        token.user = user
+        self._store(key, user, token, revision)
+        if self.shared is not None:
+            self.shared.set(_shared_key(key), (user, token, revision), self.shared_ttl)
+
+    def _store(self, key: str, user, token, revision: Optional[str]) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, user, token, revision)
+            self._keys_by_user.setdefault(user.pk, set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._drop(next(iter(self._entries)))
+
+    def _drop(self, key: str) -> None:
+        _, user, _, _ = self._entries.pop(key)
+        keys = self._keys_by_user.get(user.pk)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[user.pk]
+
+    def invalidate(self, *keys: str) -> None:
+        with self._lock:
+            self.generation += 1
+            for key in keys:
+                if key in self._entries:
+                    self._drop(key)
+        if self.shared is not None and keys:
+            # Outlives every entry cached before it, in this process or another
+            marker_ttl = max(self.ttl, self.shared_ttl)
+            self.shared.set_many({_revoked_key(key): uuid.uuid4().hex for key in keys}, marker_ttl)
+            self.shared.delete_many([_shared_key(key) for key in keys])
+
+    def invalidate_user(self, user_id) -> None:
+        """Drop every cached token of a user (also those only in the shared cache)"""
+        with self._lock:
+            keys = set(self._keys_by_user.get(user_id, ()))
+        if self.shared is not None:
+            keys.update(Token.objects.filter(user_id=user_id).values_list('key', flat=True))
+        self.invalidate(*keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                'token_cache_size': len(self._entries),
+                'token_cache_hits': self.hits,
+                'token_cache_shared_hits': self.shared_hits,
+                'token_cache_misses': self.misses,
+                'token_cache_hit_rate': round((self.hits + self.shared_hits) / lookups, 4) if lookups else 0.0,
+            }
+
+
+token_cache = TokenCache(
+    max_size=getattr(settings, 'TOKEN_AUTH_CACHE_SIZE', DEFAULT_CACHE_SIZE),
+    ttl=getattr(settings, 'TOKEN_AUTH_CACHE_TTL', DEFAULT_CACHE_TTL),
+    shared_alias=getattr(settings, 'TOKEN_AUTH_SHARED_CACHE', None),
+    shared_ttl=getattr(settings, 'TOKEN_AUTH_SHARED_CACHE_TTL', DEFAULT_SHARED_CACHE_TTL),
+)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """``TokenAuthentication`` that only queries the database on a cache miss"""
+
+    def authenticate_credentials(self, key):
+        generation = token_cache.generation
+        cached, revision = token_cache.get(key)
+        if cached is None:
+            user, token = super().authenticate_credentials(key)
+            token_cache.set(key, user, token, generation, revision)
+            return user, token
+        user, token = cached
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+        # Views may set attributes on request.user; never hand out the shared instances
+        user, token = copy.copy(user), copy.copy(token)
+        token.user = user
+        return user, token
+
+
+def _invalidate_now_and_on_commit(invalidate, *args, using=None) -> None:
+    invalidate(*args)
+    if transaction.get_connection(using).in_atomic_block:
+        # Lookups until the commit still find the old rows; drop whatever they cache
+        transaction.on_commit(partial(invalidate, *args), using=using)
+
+
+def _token_deleted(sender, instance, using=None, **kwargs):
+    _invalidate_now_and_on_commit(token_cache.invalidate, instance.key, using=using)
+
+
+def _user_changed(sender, instance, update_fields=None, using=None, **kwargs):
+    # Logins only touch last_login, which the cached user does not need
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    _invalidate_now_and_on_commit(token_cache.invalidate_user, instance.pk, using=using)
+
+
+def connect_signals() -> None:
+    user_model = get_user_model()
+    post_delete.connect(_token_deleted, sender=Token, dispatch_uid='token_cache_token_delete')
+    post_save.connect(_user_changed, sender=user_model, dispatch_uid='token_cache_user_save')
+    post_delete.connect(_user_changed, sender=user_model, dispatch_uid='token_cache_user_delete')
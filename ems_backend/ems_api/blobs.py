@@ -0,0 +1,242 @@
+"""
+Content-addressed storage for task attachment files.
+
+Every distinct file is stored once, under its SHA-256 at
+``attachment_blobs/ab/cd/<sha256>`` in ``default_storage``, and described by
+an ``AttachmentBlob`` row. ``TaskAttachment.blob`` points at it and
+``AttachmentBlob.ref_count`` counts those attachments: ``create_attachment``
+adds one in the transaction that creates the attachment, and deleting an
+attachment (directly or through its task or uploader) takes one away.
+A duplicate upload therefore costs a row, not a copy.
+
+Digests are computed while the bytes arrive: ``SHA256UploadHandler`` (first
+in ``FILE_UPLOAD_HANDLERS``) hashes multipart files as Django streams them in,
+and chunked uploads (``ems_api.uploads``) are hashed on completion.
+
+Unreferenced blobs are left in place, so an attachment deleted and
+re-uploaded shortly after costs nothing; ``manage.py gc_attachment_blobs``
+deletes those unreferenced for longer than a grace period. The collector
+locks the blob row and re-checks it before deleting, and ``create_attachment``
+increments the count with an ``UPDATE`` on the same row, so an upload racing
+the collector either keeps the blob alive or stores the file again.
+Collection and moving legacy attachments in (which reads and hashes each
+file) can also run as background jobs (``gc_attachment_blobs --background``).
+"""
+
+import hashlib
+import os
+from datetime import timedelta
+from typing import Dict, Iterator, Optional, Tuple
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.files.uploadhandler import FileUploadHandler
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.signals import post_delete
+from django.utils import timezone
+
+from . import jobs
+from .models import AttachmentBlob, TaskAttachment
+
+
+BLOB_PREFIX = 'attachment_blobs'
+HASH_BLOCK_SIZE = 256 * 1024
+
+
+def blob_path(sha256: str) -> str:
+    """Storage path of the blob with this digest (two directory levels keep directories small)"""
+    return f"{BLOB_PREFIX}/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+class SHA256UploadHandler(FileUploadHandler):
+    """
+    Hashes multipart file fields as they stream in and passes the data on.
+
+    The digest of each field's last file lands in ``request.upload_sha256``,
+    so the view does not have to read the file again.
+    """
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        self.request.upload_sha256 = {}
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.digest = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.digest.update(raw_data)
+        return raw_data
+
+    def file_complete(self, file_size):
+        self.request.upload_sha256[self.field_name] = self.digest.hexdigest()
+        return None
+
+
+def file_sha256(file) -> str:
+    digest = hashlib.sha256()
+    for chunk in file.chunks(HASH_BLOCK_SIZE):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def uploaded_file_sha256(request, field_name: str, file) -> str:
+    """Digest recorded by ``SHA256UploadHandler``, or computed now if it did not see the file"""
+    digests: Dict[str, str] = getattr(request, 'upload_sha256', None) or {}
+    return digests.get(field_name) or file_sha256(file)
+
+
+def _write_blob(content, sha256: str) -> str:
+    path = blob_path(sha256)
+    if default_storage.exists(path):
+        return path
+    saved = default_storage.save(path, content)
+    if saved != path:
+        # Another upload of the same content stored it first
+        default_storage.delete(saved)
+    return path
+
+
+def reference_blob(content, sha256: str, size: int) -> AttachmentBlob:
+    """
+    The blob for ``sha256`` with one more reference, storing ``content`` only if no copy exists.
+
+    Call inside the transaction that creates the referencing attachment.
+    """
+    now = timezone.now()
+    if AttachmentBlob.objects.filter(sha256=sha256).update(ref_count=F('ref_count') + 1, updated_at=now):
+        blob = AttachmentBlob.objects.get(sha256=sha256)
+        if not default_storage.exists(blob.file_path):
+            blob.file_path = _write_blob(content, sha256)
+            blob.save(update_fields=['file_path', 'updated_at'])
+        return blob
+    path = _write_blob(content, sha256)
+    blob, created = AttachmentBlob.objects.get_or_create(
+        sha256=sha256, defaults={'file_path': path, 'file_size': size, 'ref_count': 1},
+    )
+    if not created:
+        # Created by a concurrent upload between the UPDATE and here
+        AttachmentBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1, updated_at=now)
+        blob.refresh_from_db()
+    return blob
+
+
+def create_attachment(content, sha256: str, **fields) -> TaskAttachment:
+    """Create a ``TaskAttachment`` whose file is the (possibly already stored) blob for ``sha256``"""
+    with transaction.atomic():
+        blob = reference_blob(content, sha256, fields['file_size'])
+        return TaskAttachment.objects.create(blob=blob, file_path=blob.file_path, **fields)
+
+
+def _release_blob(sender, instance, **kwargs):
+    if instance.blob_id:
+        AttachmentBlob.objects.filter(pk=instance.blob_id, ref_count__gt=0).update(
+            ref_count=F('ref_count') - 1, updated_at=timezone.now(),
+        )
+
+
+def connect_signals() -> None:
+    post_delete.connect(_release_blob, sender=TaskAttachment, dispatch_uid='attachment_blob_release')
+
+
+def recount_references() -> int:
+    """Set every blob's ``ref_count`` from its attachments; returns how many were wrong"""
+    fixed = 0
+    for blob in AttachmentBlob.objects.annotate(actual=Count('attachments')).exclude(ref_count=F('actual')).iterator():
+        AttachmentBlob.objects.filter(pk=blob.pk).update(ref_count=blob.actual, updated_at=timezone.now())
+        fixed += 1
+    return fixed
+
+
+def collect_garbage(grace: timedelta, dry_run: bool = False) -> Tuple[int, int]:
+    """Delete blobs unreferenced for longer than ``grace``; returns (blobs, bytes) freed"""
+    cutoff = timezone.now() - grace
+    candidates = AttachmentBlob.objects.filter(ref_count=0, updated_at__lt=cutoff)
+    blobs = freed = 0
+    for pk in list(candidates.values_list('pk', flat=True)):
+        with transaction.atomic():
+            blob = candidates.select_for_update().filter(pk=pk).first()
+            # Referenced again since the scan, or the count has drifted (see --recount)
+            if blob is None or blob.attachments.exists():
+                continue
+            if not dry_run:
+                # File first: an upload blocked on this row stores it again once the row is gone
+                default_storage.delete(blob.file_path)
+                blob.delete()
+        blobs += 1
+        freed += blob.file_size
+    return blobs, freed
+
+
+def _walk(directory: str) -> Iterator[str]:
+    dirs, files = default_storage.listdir(directory)
+    for name in files:
+        yield f"{directory}/{name}"
+    for name in dirs:
+        yield from _walk(f"{directory}/{name}")
+
+
+def orphan_files(grace: timedelta) -> Iterator[str]:
+    """Blob files with no ``AttachmentBlob`` row (left by failed transactions), older than ``grace``"""
+    if not default_storage.exists(BLOB_PREFIX):
+        return
+    cutoff = timezone.now() - grace
+    for path in _walk(BLOB_PREFIX):
+        if AttachmentBlob.objects.filter(file_path=path).exists():
+            continue
+        try:
+            if default_storage.get_modified_time(path) >= cutoff:
+                continue
+        except NotImplementedError:
+            pass
+        yield path
+
+
+def adopt_attachment(attachment: TaskAttachment) -> Optional[AttachmentBlob]:
+    """
+    Move an attachment stored before blobs existed into the blob store.
+
+    Returns the blob, or None if the attachment's file is missing. The old
+    file is deleted; a duplicate of an existing blob is not stored again.
+    """
+    old_path = attachment.file_path
+    if not default_storage.exists(old_path):
+        return None
+    with default_storage.open(old_path, 'rb') as f:
+        sha256 = file_sha256(File(f))
+    with transaction.atomic():
+        attachment = TaskAttachment.objects.select_for_update().get(pk=attachment.pk)
+        if attachment.blob_id:
+            return attachment.blob
+        with default_storage.open(old_path, 'rb') as f:
+            blob = reference_blob(File(f, name=os.path.basename(old_path)), sha256, default_storage.size(old_path))
+        attachment.blob = blob
+        attachment.file_path = blob.file_path
+        attachment.save(update_fields=['blob', 'file_path'])
+        transaction.on_commit(lambda: default_storage.delete(old_path))
+    return blob
+
+
+@jobs.register('blobs.adopt_attachment', timeout=1800)
+def adopt_attachment_job(attachment_id: int) -> Optional[str]:
+    """``adopt_attachment`` by id; returns the blob's digest (None if the attachment or its file is gone)"""
+    attachment = TaskAttachment.objects.filter(pk=attachment_id).first()
+    if attachment is None:
+        return None
+    blob = adopt_attachment(attachment)
+    return blob.sha256 if blob else None
+
+
+@jobs.register('blobs.collect_garbage', priority=-10, timeout=3600)
+def collect_garbage_job(grace_hours: float = 24, recount: bool = False,
+                        remove_orphan_files: bool = False) -> Dict[str, int]:
+    grace = timedelta(hours=grace_hours)
+    recounted = recount_references() if recount else 0
+    blobs, freed = collect_garbage(grace)
+    orphans = 0
+    if remove_orphan_files:
+        for path in orphan_files(grace):
+            default_storage.delete(path)
+            orphans += 1
+    return {'recounted': recounted, 'blobs': blobs, 'bytes': freed, 'orphan_files': orphans}
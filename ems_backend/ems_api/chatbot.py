@@ -1,10 +1,152 @@
 import google.generativeai as genai
+import asyncio
 import os
+import re
 import datetime
-from typing import Dict, List, Any
+import threading
+import time
+from collections import deque
+from typing import AsyncIterator, Dict, List, Any, Optional, Tuple
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.db import close_old_connections
 import json
+import logging
 from .chatbot_tools import ChatbotTools
+from .chatbot_context import build_prompt_context, estimate_tokens
+from .chatbot_fake import FakeGenerativeModel
+from .chatbot_cache import data_version, normalize_message, response_cache
+
+logger = logging.getLogger(__name__)
+
+
+LIVE_DATA_FILES = ['chatbot_live_data.json', 'chatbot_complete_training_data.json']
+# Start of the apology returned when the model call fails; such answers are not cached
+ERROR_RESPONSE_PREFIX = "I apologize, but I encountered an error"
+
+# Process-wide counters, read by ChatbotMetricsView
+_metrics_lock = threading.Lock()
+CHATBOT_METRICS = {
+    'chatbot_inits': 0,
+    'chatbot_init_seconds': 0.0,
+    'chatbot_reuses': 0,
+    'chatbot_init_seconds_avoided': 0.0,
+    'live_data_loads': 0,
+    'live_data_load_seconds': 0.0,
+    'live_data_cache_hits': 0,
+    'live_data_load_seconds_avoided': 0.0,
+    'prompts': 0,
+    'prompt_chars': 0,
+    'prompt_tokens': 0,
+    'prompt_tokens_max': 0,
+    'stream_requests': 0,
+    'stream_errors': 0,
+    'stream_ttft_seconds': 0.0,
+    'stream_ttft_seconds_max': 0.0,
+}
+# Recent streaming time-to-first-token samples, for percentiles
+_ttft_samples = deque(maxlen=1000)
+
+
+def _record(**increments):
+    with _metrics_lock:
+        for key, value in increments.items():
+            CHATBOT_METRICS[key] += value
+
+
+def get_chatbot_metrics() -> Dict[str, Any]:
+    """Snapshot of the chatbot counters, with timings rounded for display"""
+    with _metrics_lock:
+        metrics = dict(CHATBOT_METRICS)
+        samples = sorted(_ttft_samples)
+    for key, value in metrics.items():
+        if isinstance(value, float):
+            metrics[key] = round(value, 6)
+    if samples:
+        metrics['stream_ttft_ms'] = {
+            'p50': round(samples[int(len(samples) * 0.50)] * 1000, 1),
+            'p95': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 1),
+            'samples': len(samples),
+        }
+    metrics.update(response_cache.stats())
+    metrics['live_data_source'] = live_data_snapshot.source
+    return metrics
+
+
+class LiveDataSnapshot:
+    """
+    In-memory copy of the chatbot live data file.
+
+    ``get()`` only stats the file; the JSON is re-read when its mtime or size
+    changes (e.g. after ``manage.py clear_chatbot_history``) or after
+    ``refresh()``.
+    """
+
+    def __init__(self, filenames=LIVE_DATA_FILES):
+        self.filenames = filenames
+        self.source = None
+        self._data = {}
+        self._signature = None
+        self._load_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def _locate(self):
+        """Return (path, signature) of the first existing data file"""
+        for filename in self.filenames:
+            path = os.path.join(settings.BASE_DIR, 'ems_backend', filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            return path, (path, stat.st_mtime_ns, stat.st_size)
+        return None, None
+
+    def get(self) -> Dict[str, Any]:
+        path, signature = self._locate()
+        if signature is not None and signature == self._signature:
+            _record(live_data_cache_hits=1, live_data_load_seconds_avoided=self._load_seconds)
+            return self._data
+        with self._lock:
+            if signature is None or signature != self._signature:
+                self._load(path, signature)
+        return self._data
+
+    def signature(self):
+        """(path, mtime, size) of the current data file, without loading it"""
+        return self._locate()[1]
+
+    def refresh(self) -> Dict[str, Any]:
+        """Force a reload on the next ``get()``"""
+        with self._lock:
+            self._signature = None
+        return self.get()
+
+    def _load(self, path, signature):
+        started = time.perf_counter()
+        data = {}
+        if path:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except Exception as e:
+                print(f"Error loading live data: {e}")
+                signature = None
+        self._load_seconds = time.perf_counter() - started
+        self._data = data
+        self._signature = signature
+        self.source = path
+        _record(live_data_loads=1, live_data_load_seconds=self._load_seconds)
+
+
+live_data_snapshot = LiveDataSnapshot()
+
+
+def _run_tool(func, kwargs):
+    """Run a ChatbotTools lookup in a worker thread and release its DB connection"""
+    try:
+        return func(**kwargs)
+    finally:
+        close_old_connections()
 
 class EMSGeminiChatbot:
     """
@@ -12,16 +154,19 @@ class EMSGeminiChatbot:
     """
     
     def __init__(self):
-        # Initialize Gemini API
-        api_key = os.getenv('GEMINI_API_KEY')
-        if not api_key:
-            raise ValueError("GEMINI_API_KEY environment variable not set")
-        
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-1.5-flash')
-        
-        # Load live data from the latest training file
-        self.live_data = self.load_live_data()
+        self.model_name = getattr(settings, 'CHATBOT_MODEL', 'gemini-1.5-flash')
+        if self.model_name == 'fake':
+            # Local stand-in for tests and load tests; no API key or network needed
+            self.model = FakeGenerativeModel(latency=getattr(settings, 'CHATBOT_FAKE_LATENCY', 0.5),
+                                             token_delay=getattr(settings, 'CHATBOT_FAKE_TOKEN_DELAY', 0.02))
+        else:
+            # Initialize Gemini API
+            api_key = os.getenv('GEMINI_API_KEY')
+            if not api_key:
+                raise ValueError("GEMINI_API_KEY environment variable not set")
+            
+            genai.configure(api_key=api_key)
+            self.model = genai.GenerativeModel(self.model_name)
         
         # System prompt for EMS context
         self.system_prompt = """
@@ -56,29 +201,81 @@ class EMSGeminiChatbot:
         Note: This is a fresh chat session. Previous conversation history has been cleared.
         """
     
+    @property
+    def live_data(self) -> Dict[str, Any]:
+        """Latest live data, re-read only when the data file changed"""
+        return live_data_snapshot.get()
+    
+    def build_prompt(self, user_message: str, context: Dict[str, Any] = None) -> str:
+        """
+        Build the Gemini prompt from the live data slices relevant to this message
+        """
+        intent = (context or {}).get('query_type') or self.analyze_query_intent(user_message)
+        prompt_context = build_prompt_context(self.live_data, user_message, intent, context)
+        full_prompt = self.system_prompt + "\n\n" + prompt_context['text'] + f"User: {user_message}\n\nAssistant:"
+        
+        prompt_tokens = estimate_tokens(full_prompt)
+        _record(prompts=1, prompt_chars=len(full_prompt), prompt_tokens=prompt_tokens)
+        with _metrics_lock:
+            CHATBOT_METRICS['prompt_tokens_max'] = max(CHATBOT_METRICS['prompt_tokens_max'], prompt_tokens)
+        logger.info(
+            "Chatbot prompt: intent=%s chars=%d est_tokens=%d context_tokens=%d sections=%s entities=%s",
+            intent, len(full_prompt), prompt_tokens, prompt_context['estimated_tokens'],
+            prompt_context['sections'], prompt_context['entities']
+        )
+        return full_prompt
+    
     def generate_response(self, user_message: str, context: Dict[str, Any] = None) -> str:
         """
         Generate a response using Gemini AI
         """
         try:
-            # Build the full prompt with context
-            full_prompt = self.system_prompt + "\n\n"
-            
-            # Add live data context
-            if self.live_data:
-                full_prompt += f"Live Database Data: {json.dumps(self.live_data, indent=2)}\n\n"
-            
-            if context:
-                full_prompt += f"Context: {json.dumps(context, indent=2)}\n\n"
-            
-            full_prompt += f"User: {user_message}\n\nAssistant:"
+            full_prompt = self.build_prompt(user_message, context)
             
             # Generate response
             response = self.model.generate_content(full_prompt)
             return response.text.strip()
             
         except Exception as e:
-            return f"I apologize, but I encountered an error: {str(e)}. Please try again later."
+            return f"{ERROR_RESPONSE_PREFIX}: {str(e)}. Please try again later."
+    
+    async def agenerate_response(self, user_message: str, context: Dict[str, Any] = None,
+                                 timeout: Optional[float] = None) -> str:
+        """
+        Async ``generate_response``; raises asyncio.TimeoutError when the model
+        does not answer within ``timeout`` seconds
+        """
+        try:
+            full_prompt = self.build_prompt(user_message, context)
+            response = await asyncio.wait_for(self.model.generate_content_async(full_prompt), timeout)
+            return response.text.strip()
+        except asyncio.TimeoutError:
+            raise
+        except Exception as e:
+            return f"{ERROR_RESPONSE_PREFIX}: {str(e)}. Please try again later."
+    
+    async def astream_response(self, user_message: str, context: Dict[str, Any] = None,
+                               timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """
+        Yield the answer text chunk by chunk as the model produces it; raises
+        asyncio.TimeoutError when the answer is not complete within ``timeout``
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout if timeout else None
+        
+        def remaining():
+            return max(deadline - loop.time(), 0) if deadline is not None else None
+        
+        full_prompt = self.build_prompt(user_message, context)
+        response = await asyncio.wait_for(self.model.generate_content_async(full_prompt, stream=True), remaining())
+        chunks = response.__aiter__()
+        while True:
+            try:
+                chunk = await asyncio.wait_for(chunks.__anext__(), remaining())
+            except StopAsyncIteration:
+                break
+            if chunk.text:
+                yield chunk.text
     
     def get_ems_context(self, query_type: str = None) -> Dict[str, Any]:
         """
@@ -100,103 +297,121 @@ class EMSGeminiChatbot:
             
         return context
     
+    def plan_database_calls(self, intent: str, user_message: str) -> List[tuple]:
+        """
+        Decide which ChatbotTools lookups a message needs.
+
+        Returns ``(key, function, kwargs)`` entries. ``chat`` runs them in order,
+        ``achat`` runs them concurrently; ``merge_database_results`` combines the
+        results the same way in both cases.
+        """
+        calls = []
+        message_lower = user_message.lower()
+        departments = ['engineering', 'hr', 'sales', 'finance', 'marketing']
+        
+        def department_call(key, func):
+            for dept in departments:
+                if dept in message_lower:
+                    calls.append((key, func, {'department': dept}))
+                    break
+        
+        # Employee queries
+        if intent == 'employee_management':
+            # Check for specific employee ID patterns (emp001, emp002, etc.)
+            emp_ids = re.findall(r'emp\d{3}', message_lower)
+            
+            if emp_ids:
+                # Get specific employee by ID
+                for emp_id in emp_ids:
+                    calls.append((f'employee_{emp_id}', ChatbotTools.get_employee_by_id, {'employee_id': emp_id}))
+            elif 'all' in message_lower or 'list' in message_lower:
+                calls.append(('employees', ChatbotTools.get_all_employees, {}))
+            elif 'department' in message_lower:
+                department_call('employees_by_department', ChatbotTools.get_employees_by_department)
+            elif 'search' in message_lower or 'find' in message_lower:
+                # One ranked index lookup over all candidate terms
+                skip_words = ['search', 'find', 'for', 'employee', 'with', 'name', 'show', 'me', 'get', 'details', 'about']
+                terms = [word for word in message_lower.split() if word not in skip_words and len(word) > 2]
+                if terms:
+                    calls.append(('search_results', ChatbotTools.search_employees, {'query': ' '.join(terms)}))
+        
+        # Attendance queries
+        elif intent == 'attendance':
+            if 'summary' in message_lower or 'statistics' in message_lower:
+                calls.append(('attendance_summary', ChatbotTools.get_attendance_summary, {}))
+            elif 'records' in message_lower or 'history' in message_lower:
+                calls.append(('attendance_records', ChatbotTools.get_attendance_records, {}))
+            elif 'department' in message_lower:
+                department_call('attendance_summary', ChatbotTools.get_attendance_summary)
+        
+        # Leave queries
+        elif intent == 'leave_management':
+            if 'summary' in message_lower or 'statistics' in message_lower:
+                calls.append(('leave_summary', ChatbotTools.get_leave_summary, {}))
+            elif 'requests' in message_lower or 'pending' in message_lower:
+                calls.append(('leave_requests', ChatbotTools.get_leave_requests, {}))
+            elif 'department' in message_lower:
+                department_call('leave_summary', ChatbotTools.get_leave_summary)
+        
+        # Task queries
+        elif intent == 'task_management':
+            if 'summary' in message_lower or 'statistics' in message_lower:
+                calls.append(('task_summary', ChatbotTools.get_task_summary, {}))
+            elif 'tasks' in message_lower or 'assignments' in message_lower:
+                calls.append(('tasks', ChatbotTools.get_tasks, {}))
+            elif 'department' in message_lower:
+                department_call('task_summary', ChatbotTools.get_task_summary)
+        
+        # Report queries
+        elif intent == 'reports':
+            calls.append(('department_summary', ChatbotTools.get_department_summary, {}))
+        
+        return calls
+    
+    @staticmethod
+    def merge_database_results(calls: List[tuple], results: List[Any]) -> Dict[str, Any]:
+        """Combine tool results into the ``database_data`` dict returned to clients"""
+        data = {}
+        for (key, _, _), result in zip(calls, results):
+            if key == 'search_results':
+                if 'search_results' not in data and result and 'error' not in result[0]:
+                    data['search_results'] = result
+            elif key.startswith('employee_emp') and 'error' in result:
+                data[f'{key}_error'] = result
+            else:
+                data[key] = result
+        return data
+    
     def get_database_data(self, intent: str, user_message: str) -> Dict[str, Any]:
         """
         Get relevant database data based on user intent and message
         """
         try:
-            data = {}
-            message_lower = user_message.lower()
-            
-            # Employee queries
-            if intent == 'employee_management':
-                # Check for specific employee ID patterns (emp001, emp002, etc.)
-                import re
-                emp_id_pattern = r'emp\d{3}'
-                emp_ids = re.findall(emp_id_pattern, message_lower)
-                
-                if emp_ids:
-                    # Get specific employee by ID
-                    for emp_id in emp_ids:
-                        employee_data = ChatbotTools.get_employee_by_id(emp_id)
-                        if 'error' not in employee_data:
-                            data[f'employee_{emp_id}'] = employee_data
-                        else:
-                            data[f'employee_{emp_id}_error'] = employee_data
-                elif 'all' in message_lower or 'list' in message_lower:
-                    data['employees'] = ChatbotTools.get_all_employees()
-                elif 'department' in message_lower:
-                    # Extract department name from message
-                    departments = ['engineering', 'hr', 'sales', 'finance', 'marketing']
-                    for dept in departments:
-                        if dept in message_lower:
-                            data['employees_by_department'] = ChatbotTools.get_employees_by_department(dept)
-                            break
-                elif 'search' in message_lower or 'find' in message_lower:
-                    # Extract search term - improved search logic
-                    words = message_lower.split()
-                    search_terms = []
-                    skip_words = ['search', 'find', 'for', 'employee', 'with', 'name', 'show', 'me', 'get', 'details', 'about']
-                    
-                    for word in words:
-                        if word not in skip_words and len(word) > 2:
-                            search_terms.append(word)
-                    
-                    if search_terms:
-                        for term in search_terms:
-                            search_results = ChatbotTools.search_employees(term)
-                            if search_results and 'error' not in search_results[0]:
-                                data['search_results'] = search_results
-                                break
-            
-            # Attendance queries
-            elif intent == 'attendance':
-                if 'summary' in message_lower or 'statistics' in message_lower:
-                    data['attendance_summary'] = ChatbotTools.get_attendance_summary()
-                elif 'records' in message_lower or 'history' in message_lower:
-                    data['attendance_records'] = ChatbotTools.get_attendance_records()
-                elif 'department' in message_lower:
-                    departments = ['engineering', 'hr', 'sales', 'finance', 'marketing']
-                    for dept in departments:
-                        if dept in message_lower:
-                            data['attendance_summary'] = ChatbotTools.get_attendance_summary(department=dept)
-                            break
-            
-            # Leave queries
-            elif intent == 'leave_management':
-                if 'summary' in message_lower or 'statistics' in message_lower:
-                    data['leave_summary'] = ChatbotTools.get_leave_summary()
-                elif 'requests' in message_lower or 'pending' in message_lower:
-                    data['leave_requests'] = ChatbotTools.get_leave_requests()
-                elif 'department' in message_lower:
-                    departments = ['engineering', 'hr', 'sales', 'finance', 'marketing']
-                    for dept in departments:
-                        if dept in message_lower:
-                            data['leave_summary'] = ChatbotTools.get_leave_summary(department=dept)
-                            break
-            
-            # Task queries
-            elif intent == 'task_management':
-                if 'summary' in message_lower or 'statistics' in message_lower:
-                    data['task_summary'] = ChatbotTools.get_task_summary()
-                elif 'tasks' in message_lower or 'assignments' in message_lower:
-                    data['tasks'] = ChatbotTools.get_tasks()
-                elif 'department' in message_lower:
-                    departments = ['engineering', 'hr', 'sales', 'finance', 'marketing']
-                    for dept in departments:
-                        if dept in message_lower:
-                            data['task_summary'] = ChatbotTools.get_task_summary(department=dept)
-                            break
-            
-            # Report queries
-            elif intent == 'reports':
-                data['department_summary'] = ChatbotTools.get_department_summary()
-            
-            return data
+            calls = self.plan_database_calls(intent, user_message)
+            results = [func(**kwargs) for _, func, kwargs in calls]
+            return self.merge_database_results(calls, results)
             
         except Exception as e:
             return {'error': f'Failed to fetch database data: {str(e)}'}
     
+    async def aget_database_data(self, intent: str, user_message: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Async ``get_database_data``: the lookups run concurrently in worker threads
+        """
+        try:
+            calls = self.plan_database_calls(intent, user_message)
+            if not calls:
+                return {}
+            results = await asyncio.wait_for(
+                asyncio.gather(*(sync_to_async(_run_tool, thread_sensitive=False)(func, kwargs) for _, func, kwargs in calls)),
+                timeout
+            )
+            return self.merge_database_results(calls, results)
+        except asyncio.TimeoutError:
+            return {'error': f'Timed out fetching database data after {timeout}s'}
+        except Exception as e:
+            return {'error': f'Failed to fetch database data: {str(e)}'}
+    
     def analyze_query_intent(self, message: str) -> str:
         """
         Analyze user message to determine intent
@@ -231,58 +446,242 @@ class EMSGeminiChatbot:
             "Can you help me with task progress tracking?"
         ]
     
-    def chat(self, user_message: str, conversation_history: List[Dict] = None) -> Dict[str, Any]:
+    def build_context(self, intent: str, database_data: Dict[str, Any],
+                      conversation_history: List[Dict] = None) -> Dict[str, Any]:
         """
-        Main chat method that handles user messages
+        Request context sent with the prompt and returned to the client
         """
-        # Analyze intent
-        intent = self.analyze_query_intent(user_message)
-        
-        # Get relevant context
         context = self.get_ems_context(intent)
-        
-        # Get database data based on intent
-        database_data = self.get_database_data(intent, user_message)
         if database_data:
             context["database_data"] = database_data
         
         # Add conversation history if available
         if conversation_history:
             context["conversation_history"] = conversation_history[-5:]  # Last 5 messages
-        
-        # Generate response
-        response = self.generate_response(user_message, context)
-        
-        # Prepare response data
-        response_data = {
+        return context
+    
+    def build_response_data(self, response: str, intent: str, context: Dict[str, Any],
+                            database_data: Dict[str, Any]) -> Dict[str, Any]:
+        return {
             "response": response,
             "intent": intent,
             "suggested_questions": self.get_suggested_questions(),
             "timestamp": str(datetime.datetime.now()),
             "context": context,
-            "database_data": database_data
+            "database_data": database_data,
+            "cached": False
         }
-        
+    
+    def response_cache_key(self, user_message: str, intent: str) -> Optional[tuple]:
+        """
+        Cache key for an answer: normalized message, intent and the data version
+        (table write counters plus the live data file signature)
+        """
+        if not response_cache.enabled:
+            return None
+        return (normalize_message(user_message), intent, data_version(), live_data_snapshot.signature())
+    
+    def cached_response(self, key: Optional[tuple], intent: str,
+                        conversation_history: List[Dict] = None) -> Optional[Dict[str, Any]]:
+        """Response data for a cached answer, or None on a miss"""
+        cached = response_cache.get(key) if key else None
+        if cached is None:
+            return None
+        context = self.build_context(intent, cached['database_data'], conversation_history)
+        response_data = self.build_response_data(cached['response'], intent, context, cached['database_data'])
+        response_data['cached'] = True
         return response_data
     
-    def load_live_data(self) -> Dict[str, Any]:
+    def cache_response(self, key: Optional[tuple], response: str, database_data: Dict[str, Any]) -> None:
+        # Model failures and timed-out lookups are retried rather than cached
+        if key and not response.startswith(ERROR_RESPONSE_PREFIX) and 'error' not in database_data:
+            response_cache.set(key, {'response': response, 'database_data': database_data})
+    
+    def chat(self, user_message: str, conversation_history: List[Dict] = None) -> Dict[str, Any]:
         """
-        Load the latest live data from the training file
+        Main chat method that handles user messages
         """
+        # Analyze intent
+        intent = self.analyze_query_intent(user_message)
+        
+        # Repeated questions are answered from the cache while the data is unchanged
+        cache_key = self.response_cache_key(user_message, intent)
+        cached = self.cached_response(cache_key, intent, conversation_history)
+        if cached:
+            return cached
+        
+        # Get database data based on intent
+        database_data = self.get_database_data(intent, user_message)
+        context = self.build_context(intent, database_data, conversation_history)
+        
+        # Generate response
+        response = self.generate_response(user_message, context)
+        self.cache_response(cache_key, response, database_data)
+        return self.build_response_data(response, intent, context, database_data)
+    
+    async def achat(self, user_message: str, conversation_history: List[Dict] = None,
+                    timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Async ``chat`` for the ASGI endpoint.
+
+        Database lookups run concurrently in worker threads and the model call
+        is awaited, so a waiting chat holds no thread. ``timeout`` bounds the
+        whole request; database lookups get at most ``CHATBOT_TOOL_TIMEOUT`` of
+        it. Raises asyncio.TimeoutError when the model does not answer in time.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout if timeout else None
+        intent = self.analyze_query_intent(user_message)
+        
+        cache_key = await self.aresponse_cache_key(user_message, intent)
+        cached = self.cached_response(cache_key, intent, conversation_history)
+        if cached:
+            return cached
+        
+        tool_timeout = getattr(settings, 'CHATBOT_TOOL_TIMEOUT', None)
+        if deadline is not None:
+            tool_timeout = min(tool_timeout or timeout, timeout)
+        database_data = await self.aget_database_data(intent, user_message, tool_timeout)
+        context = self.build_context(intent, database_data, conversation_history)
+        
+        remaining = max(deadline - loop.time(), 0) if deadline is not None else None
+        response = await self.agenerate_response(user_message, context, remaining)
+        self.cache_response(cache_key, response, database_data)
+        return self.build_response_data(response, intent, context, database_data)
+    
+    async def aresponse_cache_key(self, user_message: str, intent: str) -> Optional[tuple]:
+        if not response_cache.enabled:
+            return None
+        return await sync_to_async(_run_tool, thread_sensitive=False)(
+            self.response_cache_key, {'user_message': user_message, 'intent': intent}
+        )
+    
+    async def astream_chat(self, user_message: str, conversation_history: List[Dict] = None,
+                           timeout: Optional[float] = None) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Streaming ``achat``: yields ``(event, data)`` pairs for the SSE endpoint.
+
+        ``token`` events carry answer text as it is generated, followed by one
+        ``database_data`` event with the tool results and a ``done`` event with
+        the intent, suggested questions and timings. Failures end the stream
+        with an ``error`` event instead. Time to first token is recorded in the
+        chatbot metrics.
+        """
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout if timeout else None
+        _record(stream_requests=1)
+        
+        intent = self.analyze_query_intent(user_message)
+        tool_timeout = getattr(settings, 'CHATBOT_TOOL_TIMEOUT', None)
+        if deadline is not None:
+            tool_timeout = min(tool_timeout or timeout, timeout)
+        
+        ttft = None
+        chunk_count = 0
+        cached = None
         try:
-            # Try to load the new live data file first
-            live_data_path = os.path.join(settings.BASE_DIR, 'ems_backend', 'chatbot_live_data.json')
-            if os.path.exists(live_data_path):
-                with open(live_data_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            
-            # Fallback to the original training data
-            training_data_path = os.path.join(settings.BASE_DIR, 'ems_backend', 'chatbot_complete_training_data.json')
-            if os.path.exists(training_data_path):
-                with open(training_data_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            
-            return {}
+            cache_key = await self.aresponse_cache_key(user_message, intent)
+            cached = self.cached_response(cache_key, intent, conversation_history)
+            if cached:
+                # A cached answer goes out as a single chunk
+                database_data = cached['database_data']
+                ttft = time.perf_counter() - started
+                self._record_ttft(ttft)
+                chunk_count = 1
+                yield 'token', {'text': cached['response']}
+            else:
+                database_data = await self.aget_database_data(intent, user_message, tool_timeout)
+                context = self.build_context(intent, database_data, conversation_history)
+                remaining = max(deadline - loop.time(), 0) if deadline is not None else None
+                chunks = []
+                async for text in self.astream_response(user_message, context, remaining):
+                    if ttft is None:
+                        ttft = time.perf_counter() - started
+                        self._record_ttft(ttft)
+                    chunk_count += 1
+                    chunks.append(text)
+                    yield 'token', {'text': text}
+                self.cache_response(cache_key, ''.join(chunks).strip(), database_data)
+        except asyncio.TimeoutError:
+            _record(stream_errors=1)
+            yield 'error', {
+                'error': 'Chatbot request timed out',
+                'response': f'I apologize, but I could not answer within {timeout:g} seconds. Please try again.'
+            }
+            return
         except Exception as e:
-            print(f"Error loading live data: {e}")
-            return {}
+            _record(stream_errors=1)
+            yield 'error', {
+                'error': 'Internal server error',
+                'response': f'I apologize, but I encountered an error: {str(e)}. Please try again later.'
+            }
+            return
+        
+        yield 'database_data', database_data
+        total = time.perf_counter() - started
+        logger.info(
+            "Chatbot stream: intent=%s cached=%s ttft_ms=%.1f total_ms=%.1f chunks=%d",
+            intent, bool(cached), (ttft or total) * 1000, total * 1000, chunk_count
+        )
+        yield 'done', {
+            'intent': intent,
+            'suggested_questions': self.get_suggested_questions(),
+            'timestamp': str(datetime.datetime.now()),
+            'ttft_ms': round((ttft or total) * 1000, 1),
+            'total_ms': round(total * 1000, 1),
+            'chunks': chunk_count,
+            'cached': bool(cached),
+        }
+    
+    @staticmethod
+    def _record_ttft(seconds: float) -> None:
+        with _metrics_lock:
+            CHATBOT_METRICS['stream_ttft_seconds'] += seconds
+            CHATBOT_METRICS['stream_ttft_seconds_max'] = max(CHATBOT_METRICS['stream_ttft_seconds_max'], seconds)
+            _ttft_samples.append(seconds)
+    
+    def load_live_data(self) -> Dict[str, Any]:
+        """
+        Reload the live data file, e.g. after retraining
+        """
+        return live_data_snapshot.refresh()
+
+
+_chatbot: Optional[EMSGeminiChatbot] = None
+_chatbot_lock = threading.Lock()
+
+
+def get_chatbot() -> EMSGeminiChatbot:
+    """
+    Return the process-wide chatbot, creating it on first use.
+
+    DRF builds a new view instance per request, so the Gemini client and
+    system prompt are kept here instead. Raises ValueError when
+    GEMINI_API_KEY is not configured.
+    """
+    global _chatbot
+    chatbot = _chatbot
+    if chatbot is None:
+        with _chatbot_lock:
+            if _chatbot is None:
+                started = time.perf_counter()
+                _chatbot = EMSGeminiChatbot()
+                _record(chatbot_inits=1, chatbot_init_seconds=time.perf_counter() - started)
+                return _chatbot
+            chatbot = _chatbot
+    with _metrics_lock:
+        inits = CHATBOT_METRICS['chatbot_inits']
+        CHATBOT_METRICS['chatbot_reuses'] += 1
+        CHATBOT_METRICS['chatbot_init_seconds_avoided'] += CHATBOT_METRICS['chatbot_init_seconds'] / inits if inits else 0
+    return chatbot
+
+
+def reset_chatbot(reload_live_data: bool = True) -> None:
+    """Drop the cached chatbot and answers (and optionally the live data) so they are rebuilt"""
+    global _chatbot
+    with _chatbot_lock:
+        _chatbot = None
+    response_cache.clear()
+    if reload_live_data:
+        live_data_snapshot.refresh()
@@ -0,0 +1,155 @@
+"""
+Response cache for repeated chatbot questions.
+
+Answers are cached per (normalized message, intent, data version). The data
+version combines a write counter per table (``DataVersion`` rows bumped by
+model signals and bulk write paths) with the live data file signature, so a
+cached answer is never served after employees, attendance, leave or tasks
+change. A transaction bumps each table it changed once, after it commits,
+and a table's counter is spread over ``DATA_VERSION_SHARDS`` rows, so
+writers do not queue on a single hot row. Entries also expire after
+``CHATBOT_RESPONSE_CACHE_TTL`` seconds and the least recently used entries
+are evicted beyond ``CHATBOT_RESPONSE_CACHE_SIZE``.
+"""
+
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import F, Sum
+from django.db.models.signals import post_delete, post_save
+
+from .models import DataVersion, Employee, AttendanceRecord, LeaveRequest, Task
+from .oncommit import CommitBatch
+
+
+# Tables whose changes invalidate cached answers
+TRACKED_MODELS = {
+    Employee: 'employees',
+    AttendanceRecord: 'attendance',
+    LeaveRequest: 'leaves',
+    Task: 'tasks',
+}
+DEFAULT_CACHE_SIZE = 256
+DEFAULT_CACHE_TTL = 300
+# Counter rows per table; each bump updates a random one
+DATA_VERSION_SHARDS = 8
+
+
+def bump_data_version(*names: str, using: str = None) -> None:
+    """
+    Mark tables as changed; call after writes that skip model signals (bulk_create, update).
+
+    Inside a transaction the bump is deferred to commit and made once per
+    table, so the counter rows are not locked for the rest of the transaction.
+    """
+    pending_versions.add(names, using=using)
+
+
+def _increment(names, using: str) -> None:
+    shard = random.randrange(DATA_VERSION_SHARDS)
+    versions = DataVersion.objects.using(using)
+    for name in sorted(names):
+        counter = versions.filter(name=name, shard=shard)
+        if not counter.update(version=F('version') + 1):
+            _, created = versions.get_or_create(name=name, shard=shard, defaults={'version': 1})
+            if not created:
+                # Another writer created the row first
+                counter.update(version=F('version') + 1)
+
+
+# Tables changed by each thread's open transaction; an extra bump after a rollback is harmless
+pending_versions = CommitBatch(_increment)
+
+
+def data_version() -> Tuple[Tuple[str, int], ...]:
+    """Current write counters of the tracked tables (one query)"""
+    return tuple(
+        DataVersion.objects.filter(name__in=TRACKED_MODELS.values())
+        .values_list('name').annotate(version=Sum('version')).order_by('name')
+    )
+
+
+def _bump_on_change(sender, using=None, **kwargs):
+    """Bump the table's version for a saved or deleted row (once per transaction)"""
+    if kwargs.get('raw'):
+        return
+    bump_data_version(TRACKED_MODELS[sender], using=using)
+
+
+def connect_signals() -> None:
+    for model in TRACKED_MODELS:
+        post_save.connect(_bump_on_change, sender=model, dispatch_uid=f'data_version_save_{model.__name__}')
+        post_delete.connect(_bump_on_change, sender=model, dispatch_uid=f'data_version_delete_{model.__name__}')
+
+
+def normalize_message(message: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace so trivial variants share an entry"""
+    return ' '.join(re.sub(r'[^\w\s-]', ' ', message.lower()).split())
+
+
+class ResponseCache:
+    """Thread-safe LRU cache with a per-entry TTL and hit/miss counters"""
+
+    def __init__(self, max_size: int = DEFAULT_CACHE_SIZE, ttl: float = DEFAULT_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: 'OrderedDict[Hashable, Tuple[float, Dict[str, Any]]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl > 0
+
+    def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Dict[str, Any]) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'response_cache_size': len(self._entries),
+                'response_cache_hits': self.hits,
+                'response_cache_misses': self.misses,
+                'response_cache_evictions': self.evictions,
+                'response_cache_hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+response_cache = ResponseCache(
+    max_size=getattr(settings, 'CHATBOT_RESPONSE_CACHE_SIZE', DEFAULT_CACHE_SIZE),
+    ttl=getattr(settings, 'CHATBOT_RESPONSE_CACHE_TTL', DEFAULT_CACHE_TTL),
+)
@@ -0,0 +1,302 @@
+"""
+Prompt context assembly for the EMS chatbot.
+
+Instead of pasting the whole live data snapshot into every prompt, the
+assembler picks the sections relevant to the detected intent, narrows them to
+the employees, departments and dates mentioned in the message, and trims the
+result to a token budget. Tables are serialized as compact column/row lists.
+"""
+
+import datetime
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+
+
+# Rough token estimate: ~4 characters per token for English/JSON text
+CHARS_PER_TOKEN = 4
+DEFAULT_TOKEN_BUDGET = 4000
+
+# Live data sections included for each intent (employee rows are added whenever employees are named)
+INTENT_SECTIONS = {
+    'employee_management': ['employees'],
+    'attendance': ['attendance'],
+    'leave_management': ['leaves'],
+    'task_management': ['tasks'],
+    'reports': [],
+    'general': [],
+}
+EMPLOYEE_KEYS = {
+    'employees': 'employee_id',
+    'attendance': 'employee__employee_id',
+    'leaves': 'employee__employee_id',
+    'tasks': 'assigned_to__employee_id',
+}
+DATE_KEYS = {
+    'attendance': ('date', 'date'),
+    'leaves': ('start_date', 'end_date'),
+    'tasks': ('due_date', 'due_date'),
+}
+COLUMN_ALIASES = {
+    'employee__employee_id': 'employee_id',
+    'employee__name': 'employee_name',
+    'assigned_to__employee_id': 'assigned_to',
+    'assigned_to__name': 'assigned_to_name',
+    'assigned_by__employee_id': 'assigned_by',
+}
+# Columns that add little to answers but a lot of tokens
+DROPPED_COLUMNS = {'description', 'email'}
+LIVE_DATA_PREFIX = "Live Database Data (filtered to this question): "
+SEPARATOR = '\n\n'
+
+EMPLOYEE_ID_PATTERN = re.compile(r'\bemp\d+\b', re.IGNORECASE)
+ISO_DATE_PATTERN = re.compile(r'\b(\d{4}-\d{2}-\d{2})\b')
+MONTHS = {
+    name: number
+    for number, names in enumerate([
+        ('january', 'jan'), ('february', 'feb'), ('march', 'mar'), ('april', 'apr'),
+        ('may',), ('june', 'jun'), ('july', 'jul'), ('august', 'aug'),
+        ('september', 'sep', 'sept'), ('october', 'oct'), ('november', 'nov'), ('december', 'dec'),
+    ], start=1)
+    for name in names
+}
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def compact_json(value: Any) -> str:
+    return json.dumps(value, separators=(',', ':'), default=str, ensure_ascii=False)
+
+
+def get_token_budget() -> int:
+    return getattr(settings, 'CHATBOT_CONTEXT_TOKEN_BUDGET', DEFAULT_TOKEN_BUDGET)
+
+
+def _data_years(live_data: Dict[str, Any]) -> List[int]:
+    years = set()
+    for section, (start_key, _) in DATE_KEYS.items():
+        for row in live_data.get(section) or []:
+            value = str(row.get(start_key) or '')[:4]
+            if value.isdigit():
+                years.add(int(value))
+    return sorted(years)
+
+
+def extract_entities(message: str, live_data: Dict[str, Any], today: Optional[datetime.date] = None) -> Dict[str, Any]:
+    """
+    Find employee ids, employee names, departments and dates mentioned in a message.
+
+    Dates come back as ``(start, end)`` ISO string ranges so a month mention
+    ("July") and a single day ("2025-07-14", "yesterday") filter the same way.
+    """
+    message_lower = message.lower()
+    words = set(re.findall(r'[a-z0-9]+', message_lower))
+    employees = live_data.get('employees') or []
+    today = today or datetime.date.today()
+
+    employee_ids = {match.lower() for match in EMPLOYEE_ID_PATTERN.findall(message)}
+    for employee in employees:
+        name = (employee.get('name') or '').lower()
+        first_name = name.split(' ')[0] if name else ''
+        if name and (name in message_lower or (len(first_name) > 2 and first_name in words)):
+            employee_ids.add(str(employee.get('employee_id', '')).lower())
+
+    departments = (live_data.get('statistics') or {}).get('departments') or sorted(
+        {employee.get('department') for employee in employees if employee.get('department')}
+    )
+    mentioned_departments = {
+        department for department in departments
+        if re.search(rf'\b{re.escape(department.lower())}\b', message_lower)
+    }
+
+    dates = [(value, value) for value in ISO_DATE_PATTERN.findall(message)]
+    if 'today' in words:
+        dates.append((today.isoformat(), today.isoformat()))
+    if 'yesterday' in words:
+        yesterday = (today - datetime.timedelta(days=1)).isoformat()
+        dates.append((yesterday, yesterday))
+    for word in words:
+        month = MONTHS.get(word)
+        # "may" is usually the verb unless it reads like a date ("in May", "May 2025")
+        if word == 'may' and not re.search(r'\b(?:in|during|of|for|since)\s+may\b|\bmay\s+\d{4}\b', message_lower):
+            continue
+        if month:
+            year_match = re.search(rf'\b{word}\s+(\d{{4}})\b', message_lower)
+            # Without a year, the month matches in every year the data covers
+            years = [int(year_match.group(1))] if year_match else _data_years(live_data) or [today.year]
+            for year in years:
+                last_day = (datetime.date(year + month // 12, month % 12 + 1, 1) - datetime.timedelta(days=1)).day
+                dates.append((f'{year:04d}-{month:02d}-01', f'{year:04d}-{month:02d}-{last_day:02d}'))
+
+    return {
+        'employee_ids': sorted(employee_ids),
+        'departments': sorted(mentioned_departments),
+        'dates': dates,
+    }
+
+
+def _filter_rows(section: str, rows: List[Dict[str, Any]], entities: Dict[str, Any],
+                 departments_by_employee: Dict[str, str]) -> List[Dict[str, Any]]:
+    employee_key = EMPLOYEE_KEYS.get(section)
+    employee_ids = set(entities['employee_ids'])
+    departments = {department.lower() for department in entities['departments']}
+
+    if employee_ids:
+        rows = [row for row in rows if str(row.get(employee_key, '')).lower() in employee_ids]
+    elif departments:
+        def department_of(row):
+            return row.get('department') or departments_by_employee.get(str(row.get(employee_key, '')).lower(), '')
+        rows = [row for row in rows if str(department_of(row)).lower() in departments]
+
+    if entities['dates'] and section in DATE_KEYS:
+        start_key, end_key = DATE_KEYS[section]
+        rows = [
+            row for row in rows
+            if any(str(row.get(end_key) or '') >= start and str(row.get(start_key) or '') <= end
+                   for start, end in entities['dates'])
+        ]
+
+    # Most recent first, so trimming to the budget keeps the latest rows
+    if section in DATE_KEYS:
+        rows = sorted(rows, key=lambda row: str(row.get(DATE_KEYS[section][0]) or ''), reverse=True)
+    return rows
+
+
+def _table(rows: List[Dict[str, Any]], budget_chars: int) -> Optional[Dict[str, Any]]:
+    """Column/row table of as many rows as fit in ``budget_chars`` (including its omitted_rows note)"""
+    if not rows:
+        return None
+    keys = [key for key in rows[0] if key not in DROPPED_COLUMNS]
+    table = {'columns': [COLUMN_ALIASES.get(key, key) for key in keys], 'rows': []}
+    used = len(compact_json(table)) + len(compact_json({'omitted_rows': len(rows)}))
+    for row in rows:
+        values = [row.get(key) for key in keys]
+        size = len(compact_json(values)) + 1
+        if used + size > budget_chars:
+            break
+        table['rows'].append(values)
+        used += size
+    omitted = len(rows) - len(table['rows'])
+    if omitted:
+        table['omitted_rows'] = omitted
+    return table
+
+
+def _trim_value(value: Any, budget_chars: int) -> Any:
+    """Trim lists inside tool results / conversation history to fit ``budget_chars``"""
+    if len(compact_json(value)) <= budget_chars:
+        return value
+    if isinstance(value, list):
+        kept, used = [], 2
+        for item in value:
+            size = len(compact_json(item)) + 1
+            if used + size > budget_chars:
+                break
+            kept.append(item)
+            used += size
+        if len(kept) < len(value):
+            kept.append({'omitted_items': len(value) - len(kept)})
+        return kept
+    if isinstance(value, dict):
+        share = max(budget_chars // max(len(value), 1), 64)
+        return {key: _trim_value(item, share) for key, item in value.items()}
+    text = compact_json(value)
+    return text[:budget_chars] + '...'
+
+
+def _entry_size(key: str, value: Any) -> int:
+    """Characters ``"key":value,`` adds to a compact JSON object"""
+    return len(compact_json(key)) + len(compact_json(value)) + 2
+
+
+def build_prompt_context(live_data: Dict[str, Any], user_message: str, intent: str,
+                         context: Optional[Dict[str, Any]] = None,
+                         token_budget: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Assemble the data part of the chatbot prompt.
+
+    The request context (tool results, recent history) is placed first and may
+    use up to half of the budget; the rest goes to live data slices for the
+    intent and the mentioned entities. The text's ``estimate_tokens`` never
+    exceeds the budget. Returns the prompt ``text`` plus size statistics for
+    logging.
+    """
+    token_budget = token_budget or get_token_budget()
+    # estimate_tokens rounds up by one token
+    budget_chars = (token_budget - 1) * CHARS_PER_TOKEN
+    live_data = live_data or {}
+    parts = []
+
+    context_chars = budget_chars // 2
+    if context:
+        trimmed = _trim_value(context, context_chars)
+        parts.append(f"Context: {compact_json(trimmed)}")
+    # The prefix, braces and separator around the live data count too
+    remaining = budget_chars - sum(len(part) for part in parts) - len(LIVE_DATA_PREFIX) - len(SEPARATOR) - 2
+
+    entities = extract_entities(user_message, live_data)
+    sections = list(INTENT_SECTIONS.get(intent, []))
+    if entities['employee_ids'] or entities['departments']:
+        if 'employees' not in sections:
+            sections.insert(0, 'employees')
+        if intent in ('general', 'employee_management', 'reports'):
+            sections += [name for name in ('attendance', 'leaves', 'tasks') if name not in sections]
+
+    departments_by_employee = {
+        str(employee.get('employee_id', '')).lower(): employee.get('department', '')
+        for employee in live_data.get('employees') or []
+    }
+    selected = {}
+    statistics = live_data.get('statistics')
+    if statistics:
+        selected['statistics'] = statistics
+        remaining -= _entry_size('statistics', statistics)
+
+    counts = {}
+    for index, section in enumerate(sections):
+        rows = _filter_rows(section, live_data.get(section) or [], entities, departments_by_employee)
+        # Later sections get an equal share of what is left, less their key
+        share = remaining // (len(sections) - index) - _entry_size(section, None) + len(compact_json(None))
+        table = _table(rows, share)
+        counts[section] = len(table['rows']) if table else 0
+        if table:
+            selected[section] = table
+            remaining -= _entry_size(section, table)
+
+    def assemble():
+        live = [f"{LIVE_DATA_PREFIX}{compact_json(selected)}"] if selected else []
+        return SEPARATOR.join(live + parts)
+
+    text = assemble()
+    # A hard cap: whatever the estimates above missed comes off the last section,
+    # then the statistics, then the request context
+    for section in reversed(sections):
+        table = selected.get(section)
+        while table and estimate_tokens(text) > token_budget:
+            if table['rows']:
+                table['rows'].pop()
+                table['omitted_rows'] = table.get('omitted_rows', 0) + 1
+                counts[section] -= 1
+            else:
+                del selected[section]
+                table = None
+            text = assemble()
+    if 'statistics' in selected and estimate_tokens(text) > token_budget:
+        del selected['statistics']
+        text = assemble()
+    while parts and estimate_tokens(text) > token_budget:
+        context_chars = context_chars * 3 // 4
+        trimmed = _trim_value(context, context_chars) if context_chars >= 16 else None
+        parts = [f"Context: {compact_json(trimmed)}"] if trimmed else []
+        text = assemble()
+    return {
+        'text': text + '\n\n' if text else '',
+        'chars': len(text),
+        'estimated_tokens': estimate_tokens(text),
+        'entities': entities,
+        'sections': counts,
+    }
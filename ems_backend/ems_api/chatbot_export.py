@@ -0,0 +1,400 @@
+"""
+Chatbot knowledge exports (``chatbot_live_data.json`` and
+``chatbot_complete_training_data.json``).
+
+Rows are streamed from ``values().iterator()`` straight into the output
+file, one compact JSON object per line, so memory stays flat however large
+the tables grow. The file is written next to the target and renamed over it,
+so the chatbot never reads a half-written snapshot.
+
+With ``--incremental`` the commands also keep a segmented store next to the
+output (``<output>.segments/``):
+
+- each segment is an NDJSON file of ``[id, row]`` lines sorted by id; a later
+  segment overrides an earlier one and ``[id, null]`` marks a deleted row
+- ``manifest.json`` records per table its segments, the id and
+  ``Task.last_updated`` high-water marks and the data versions (see
+  chatbot_cache.py) seen by the last export
+- a table whose data version, and that of the tables it joins, is unchanged
+  is skipped; tasks changed on their own are read past the ``last_updated``
+  high-water mark; other changed tables have no update timestamp and are
+  compared with the store in one streamed pass. Only new, changed and
+  deleted rows are written to a new segment
+- ``compact`` merges a table's segments into one (also done automatically
+  past ``MAX_SEGMENTS``)
+
+The output file is then streamed from the store.
+
+``chatbot.export_snapshot`` jobs (``--background`` on the commands) run the
+same exports in a ``run_worker`` process.
+"""
+
+import heapq
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import jobs
+from .chatbot_cache import data_version
+from .models import Employee, AttendanceRecord, LeaveRequest, Task
+
+
+MANIFEST = 'manifest.json'
+STORE_FORMAT = 1
+MAX_SEGMENTS = 16
+CHUNK_SIZE = 2000
+# Rows committed late with an older last_updated are re-read within this window
+HIGH_WATER_OVERLAP = timedelta(minutes=5)
+
+
+class ExportTable(NamedTuple):
+    name: str
+    model: Any
+    fields: Tuple[str, ...]
+    # Data versions of tables whose values are joined into the rows
+    joins: Tuple[str, ...] = ()
+    updated_field: Optional[str] = None
+
+
+LIVE_TABLES = (
+    ExportTable('employees', Employee, (
+        'employee_id', 'name', 'email', 'department', 'designation',
+        'status', 'joining_date', 'salary', 'date_of_birth', 'age',
+    )),
+    ExportTable('attendance', AttendanceRecord, (
+        'employee__employee_id', 'employee__name', 'date', 'check_in',
+        'check_out', 'hours', 'status',
+    ), joins=('employees',)),
+    ExportTable('leaves', LeaveRequest, (
+        'employee__employee_id', 'employee__name', 'leave_type',
+        'start_date', 'end_date', 'days', 'status', 'reason',
+    ), joins=('employees',)),
+    ExportTable('tasks', Task, (
+        'title', 'description', 'assigned_to__employee_id',
+        'assigned_to__name', 'assigned_by__employee_id', 'priority',
+        'status', 'progress', 'due_date', 'department',
+    ), joins=('employees',), updated_field='last_updated'),
+)
+
+TRAINING_TABLES = (
+    ExportTable('employees', Employee, (
+        'employee_id', 'name', 'email', 'department', 'designation', 'status', 'joining_date', 'salary',
+    )),
+    ExportTable('attendance', AttendanceRecord, (
+        'employee__employee_id', 'date', 'check_in', 'check_out', 'hours', 'status',
+    ), joins=('employees',)),
+    ExportTable('leaves', LeaveRequest, (
+        'employee__employee_id', 'leave_type', 'start_date', 'end_date', 'days', 'status',
+    ), joins=('employees',)),
+    ExportTable('tasks', Task, (
+        'title', 'assigned_to__employee_id', 'assigned_by__employee_id', 'priority', 'status', 'progress',
+        'due_date', 'department',
+    ), joins=('employees',), updated_field='last_updated'),
+)
+
+
+def encode(value: Any) -> str:
+    return json.dumps(value, default=str, ensure_ascii=False, separators=(',', ':'))
+
+
+class HighWater:
+    """Largest id and update timestamp seen while streaming a table"""
+
+    def __init__(self, state: Optional[Dict[str, Any]] = None):
+        state = state or {}
+        self.id = state.get('high_water_id')
+        self.updated = parse_datetime(state['high_water_updated']) if state.get('high_water_updated') else None
+
+    def see(self, pk: int, updated=None):
+        if self.id is None or pk > self.id:
+            self.id = pk
+        if updated is not None and (self.updated is None or updated > self.updated):
+            self.updated = updated
+
+    def state(self) -> Dict[str, Any]:
+        return {
+            'high_water_id': self.id,
+            'high_water_updated': self.updated.isoformat() if self.updated else None,
+        }
+
+
+def db_rows(table: ExportTable, queryset=None, marks: Optional[HighWater] = None) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """``(id, row)`` pairs in id order, read in chunks"""
+    queryset = table.model.objects.all() if queryset is None else queryset
+    columns = ['id', *table.fields] + ([table.updated_field] if table.updated_field else [])
+    for row in queryset.order_by('id').values(*columns).iterator(chunk_size=CHUNK_SIZE):
+        pk = row.pop('id')
+        updated = row.pop(table.updated_field) if table.updated_field else None
+        if marks is not None:
+            marks.see(pk, updated)
+        yield pk, row
+
+
+def outer_join(left: Iterable[Tuple[int, Any]], right: Iterable[Tuple[int, Any]]) -> Iterator[Tuple[int, Any, Any]]:
+    """Join two id-sorted ``(id, value)`` streams; a missing side is None"""
+    left, right = iter(left), iter(right)
+    a, b = next(left, None), next(right, None)
+    while a is not None or b is not None:
+        if b is None or (a is not None and a[0] < b[0]):
+            yield a[0], a[1], None
+            a = next(left, None)
+        elif a is None or b[0] < a[0]:
+            yield b[0], None, b[1]
+            b = next(right, None)
+        else:
+            yield a[0], a[1], b[1]
+            a, b = next(left, None), next(right, None)
+
+
+class SegmentedStore:
+    """Per-table NDJSON segments plus a manifest; see the module docstring"""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.manifest = self._read_manifest()
+
+    def _read_manifest(self) -> Dict[str, Any]:
+        try:
+            with open(os.path.join(self.path, MANIFEST), 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            manifest = None
+        if not manifest or manifest.get('format') != STORE_FORMAT:
+            manifest = {'format': STORE_FORMAT, 'tables': {}}
+        return manifest
+
+    def save(self):
+        self.manifest['updated_at'] = timezone.now().isoformat()
+        path = os.path.join(self.path, MANIFEST)
+        with open(f'{path}.tmp', 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(f'{path}.tmp', path)
+
+    # Segments
+
+    def _segment_rows(self, filename: str) -> Iterator[Tuple[int, Any]]:
+        with open(os.path.join(self.path, filename), 'r', encoding='utf-8') as f:
+            for line in f:
+                pk, row = json.loads(line)
+                yield pk, row
+
+    def _tagged_rows(self, filename: str, tag: int) -> Iterator[Tuple[int, int, Any]]:
+        for pk, row in self._segment_rows(filename):
+            yield pk, tag, row
+
+    def _write_segment(self, name: str, entries: Iterable[Tuple[int, Any]]) -> Tuple[Optional[str], int, int]:
+        """Write id-sorted entries to a new segment; return (filename or None if empty, rows, deletes)"""
+        state = self.manifest['tables'].setdefault(name, {'segments': [], 'next_segment': 1})
+        filename = f"{name}.{state['next_segment']:06d}.ndjson"
+        path = os.path.join(self.path, filename)
+        rows = deletes = 0
+        with open(f'{path}.tmp', 'w', encoding='utf-8') as f:
+            for pk, row in entries:
+                f.write(encode([pk, row]) + '\n')
+                if row is None:
+                    deletes += 1
+                else:
+                    rows += 1
+        if not rows and not deletes:
+            os.remove(f'{path}.tmp')
+            return None, 0, 0
+        os.replace(f'{path}.tmp', path)
+        state['next_segment'] += 1
+        return filename, rows, deletes
+
+    def rows(self, name: str, include_deleted: bool = False) -> Iterator[Tuple[int, Any]]:
+        """Current ``(id, row)`` pairs of a table in id order; later segments win"""
+        segments = self.manifest['tables'].get(name, {}).get('segments', [])
+        streams = [self._tagged_rows(filename, -index) for index, filename in enumerate(segments)]
+        previous = None
+        for pk, _, row in heapq.merge(*streams, key=lambda entry: entry[:2]):
+            if pk == previous:
+                continue
+            previous = pk
+            if row is not None or include_deleted:
+                yield pk, row
+
+    def compact(self, name: str) -> bool:
+        """Merge a table's segments into one; False if there was nothing to merge"""
+        state = self.manifest['tables'].get(name)
+        if not state or len(state['segments']) < 2:
+            return False
+        old = list(state['segments'])
+        filename, rows, _ = self._write_segment(name, self.rows(name))
+        state['segments'] = [filename] if filename else []
+        state['rows'] = rows
+        self.save()
+        for segment in old:
+            os.remove(os.path.join(self.path, segment))
+        return True
+
+    # Updates
+
+    def update(self, table: ExportTable, versions: Dict[str, int]) -> Dict[str, Any]:
+        """Bring one table up to date; returns what was done"""
+        state = self.manifest['tables'].get(table.name)
+        current = {name: versions.get(name, 0) for name in (table.name, *table.joins)}
+        if state and state.get('versions') == current:
+            return {'mode': 'unchanged', 'rows': 0, 'deletes': 0}
+
+        marks = HighWater(state)
+        # Rows the table has after this update, counted by the chosen path
+        counter = {'rows': 0}
+        if not state or not state.get('segments'):
+            mode, entries = 'full', db_rows(table, marks=marks)
+        elif table.updated_field and all(state['versions'].get(name) == current[name] for name in table.joins):
+            mode, entries = 'high_water', self._changed_since(table, state, marks, counter)
+        else:
+            mode, entries = 'compare', self._compare(table, marks, counter)
+
+        filename, rows, deletes = self._write_segment(table.name, entries)
+        state = self.manifest['tables'][table.name]
+        if filename:
+            state['segments'].append(filename)
+        state.update(marks.state())
+        state['versions'] = current
+        state['rows'] = rows if mode == 'full' else counter['rows']
+        self.save()
+        if len(state['segments']) > MAX_SEGMENTS:
+            self.compact(table.name)
+        return {'mode': mode, 'rows': rows, 'deletes': deletes}
+
+    def _compare(self, table: ExportTable, marks: HighWater, counter: Dict[str, int]) -> Iterator[Tuple[int, Any]]:
+        """Rows that differ between the database and the store, in one streamed pass"""
+        for pk, row, stored in outer_join(db_rows(table, marks=marks), self.rows(table.name)):
+            if row is None:
+                yield pk, None
+                continue
+            counter['rows'] += 1
+            if stored is None or encode(row) != encode(stored):
+                yield pk, row
+
+    def _changed_since(self, table: ExportTable, state: Dict[str, Any], marks: HighWater,
+                       counter: Dict[str, int]) -> Iterator[Tuple[int, Any]]:
+        """Rows past the high-water marks, plus deletes when the row count says there were any"""
+        queryset = table.model.objects.all()
+        if marks.id is not None:
+            since = marks.updated - HIGH_WATER_OVERLAP if marks.updated else None
+            changed = queryset.filter(id__gt=marks.id)
+            if since is not None:
+                changed = changed | queryset.filter(**{f'{table.updated_field}__gte': since})
+            queryset = changed
+        previous_id = marks.id
+        changes = list(db_rows(table, queryset, marks=marks))
+        inserted = sum(1 for pk, _ in changes if previous_id is None or pk > previous_id)
+        counter['rows'] = state.get('rows', 0) + inserted
+
+        deletes: List[Tuple[int, Any]] = []
+        if table.model.objects.count() != counter['rows']:
+            database_ids = ((pk, True) for pk in table.model.objects.order_by('id').values_list('id', flat=True)
+                            .iterator(chunk_size=CHUNK_SIZE))
+            stored_ids = ((pk, True) for pk, _ in self.rows(table.name))
+            deletes = [(pk, None) for pk, in_database, _ in outer_join(database_ids, stored_ids) if in_database is None]
+            counter['rows'] -= len(deletes)
+        return heapq.merge(changes, deletes, key=lambda entry: entry[0])
+
+
+class SnapshotStatistics:
+    """The ``statistics`` block of the live data file, counted while streaming"""
+
+    def __init__(self):
+        self.counts = {'employees': 0, 'attendance': 0, 'leaves': 0, 'tasks': 0}
+        self.active_employees = 0
+        self.departments: Dict[str, None] = {}
+
+    def add(self, section: str, row: Dict[str, Any]):
+        self.counts[section] = self.counts.get(section, 0) + 1
+        if section == 'employees':
+            self.active_employees += row.get('status') == 'Active'
+            self.departments.setdefault(row.get('department'), None)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'total_employees': self.counts['employees'],
+            'active_employees': self.active_employees,
+            'total_attendance_records': self.counts['attendance'],
+            'total_leave_requests': self.counts['leaves'],
+            'total_tasks': self.counts['tasks'],
+            'departments': sorted(department for department in self.departments if department is not None),
+        }
+
+
+def write_snapshot(output: str, sections: Iterable[Tuple[str, Iterable[Dict[str, Any]]]],
+                   header: Optional[Dict[str, Any]] = None, statistics: bool = False) -> Dict[str, int]:
+    """Stream ``sections`` into a JSON object at ``output``; returns row counts per section"""
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    stats = SnapshotStatistics()
+    counts = {}
+    entries = [f'{encode(key)}:{encode(value)}' for key, value in (header or {}).items()]
+    with open(f'{output}.tmp', 'w', encoding='utf-8') as f:
+        f.write('{' + ',\n'.join(entries))
+        separator = ',\n' if entries else '\n'
+        for name, rows in sections:
+            f.write(f'{separator}{encode(name)}:[')
+            count = 0
+            for row in rows:
+                f.write(('\n' if count == 0 else ',\n') + encode(row))
+                stats.add(name, row)
+                count += 1
+            f.write('\n]')
+            counts[name] = count
+            separator = ',\n'
+        if statistics:
+            f.write(f'{separator}"statistics":{encode(stats.as_dict())}')
+        f.write('\n}\n')
+    os.replace(f'{output}.tmp', output)
+    return counts
+
+
+def export_snapshot(output: str, tables: Tuple[ExportTable, ...], header: Optional[Dict[str, Any]] = None,
+                    statistics: bool = False, store_path: Optional[str] = None,
+                    compact: bool = False) -> Tuple[Dict[str, int], Dict[str, Any]]:
+    """
+    Write the snapshot at ``output``. Without ``store_path`` rows are streamed
+    from the database; with it the store is updated first and rows are
+    streamed from the store. Returns (row counts, per-table update report).
+    """
+    if store_path is None:
+        sections = ((table.name, (row for _, row in db_rows(table))) for table in tables)
+        return write_snapshot(output, sections, header, statistics), {}
+
+    store = SegmentedStore(store_path)
+    versions = dict(data_version())
+    report = {table.name: store.update(table, versions) for table in tables}
+    for table in tables:
+        if compact and store.compact(table.name):
+            report[table.name]['compacted'] = True
+    sections = ((table.name, (row for _, row in store.rows(table.name))) for table in tables)
+    return write_snapshot(output, sections, header, statistics), report
+
+
+def default_store_path(output: str) -> str:
+    return f'{os.path.splitext(output)[0]}.segments'
+
+
+def export_named_snapshot(kind: str, output: str, store_path: Optional[str] = None,
+                          compact: bool = False) -> Tuple[Dict[str, int], Dict[str, Any]]:
+    """The chatbot's live data ('live', with header and statistics) or training data ('training') export"""
+    if kind == 'live':
+        header = {
+            'timestamp': datetime.now().isoformat(),
+            'data_source': 'live_database',
+        }
+        return export_snapshot(output, LIVE_TABLES, header=header, statistics=True,
+                               store_path=store_path, compact=compact)
+    if kind == 'training':
+        return export_snapshot(output, TRAINING_TABLES, store_path=store_path, compact=compact)
+    raise ValueError(f"Unknown snapshot kind '{kind}'")
+
+
+@jobs.register('chatbot.export_snapshot', priority=-10, max_attempts=2, timeout=3600)
+def export_snapshot_job(kind: str, output: str, store_path: Optional[str] = None, compact: bool = False) -> Dict[str, Any]:
+    counts, report = export_named_snapshot(kind, output, store_path, compact)
+    return {'output': output, 'counts': counts, 'report': report}
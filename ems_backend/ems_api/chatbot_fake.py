@@ -0,0 +1,58 @@
+"""
+Local stand-in for the Gemini model.
+
+Set ``CHATBOT_MODEL=fake`` to run the chatbot without an API key or network
+access, e.g. in tests and load tests. ``CHATBOT_FAKE_LATENCY`` (seconds)
+simulates the model round-trip; when streaming it is the time to the first
+chunk and ``CHATBOT_FAKE_TOKEN_DELAY`` the gap between later chunks.
+"""
+
+import asyncio
+import re
+import time
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeStreamer:
+    """
+    Async iterable of word-sized ``FakeResponse`` chunks, like the response of
+    ``generate_content_async(prompt, stream=True)``
+    """
+
+    def __init__(self, text: str, first_chunk_delay: float = 0.5, token_delay: float = 0.02):
+        self.chunks = re.findall(r'\S+\s*', text) or [text]
+        self.first_chunk_delay = first_chunk_delay
+        self.token_delay = token_delay
+
+    async def __aiter__(self):
+        for index, chunk in enumerate(self.chunks):
+            await asyncio.sleep(self.first_chunk_delay if index == 0 else self.token_delay)
+            yield FakeResponse(chunk)
+
+
+class FakeGenerativeModel:
+    """Mimics ``genai.GenerativeModel.generate_content`` / ``generate_content_async``"""
+
+    def __init__(self, latency: float = 0.5, token_delay: float = 0.02, streamer=FakeStreamer):
+        self.latency = latency
+        self.token_delay = token_delay
+        # Swap in another streamer class to script chunk timings or failures
+        self.streamer = streamer
+
+    def reply(self, prompt: str) -> str:
+        question = prompt.rsplit('User:', 1)[-1].replace('Assistant:', '').strip()
+        return f"(fake model) You asked: {question}. The prompt carried {len(prompt)} characters of context."
+
+    def generate_content(self, prompt: str) -> FakeResponse:
+        time.sleep(self.latency)
+        return FakeResponse(self.reply(prompt))
+
+    async def generate_content_async(self, prompt: str, stream: bool = False):
+        if stream:
+            return self.streamer(self.reply(prompt), self.latency, self.token_delay)
+        await asyncio.sleep(self.latency)
+        return FakeResponse(self.reply(prompt))
@@ -13,7 +13,53 @@ from typing import List, Dict, Any, Optional
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ems_backend.settings')
 django.setup()
 
-from .models import Employee, AttendanceRecord, LeaveRequest, Task
+from django.db.models import Count
+
+from . import search
+from .models import Employee, AttendanceRecord, AttendanceDailyRollup, LeaveRequest, Task
+from .reports import (
+    aggregate_summary, attendance_aggregates, grouped_summary, leave_aggregates, task_aggregates,
+)
+
+
+def _empty(aggregates: Dict[str, Any]) -> Dict[str, int]:
+    return {key: 0 for key in aggregates}
+
+
+# The summaries below shape the shared report aggregates (reports.py) for the chatbot
+def _attendance_summary(values: Dict[str, Any]) -> Dict[str, Any]:
+    total_records = values['total']
+    return {
+        'total_records': total_records,
+        'present': values['present'],
+        'absent': values['absent'],
+        'late': values['late'],
+        'half_day': values['half_day'],
+        'attendance_rate': round((values['present'] / total_records * 100), 2) if total_records > 0 else 0
+    }
+
+
+def _leave_summary(values: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'total_requests': values['total'],
+        'pending': values['pending'],
+        'approved': values['approved'],
+        'rejected': values['rejected']
+    }
+
+
+def _task_summary(values: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'total_tasks': values['total'],
+        'not_started': values['not_started'],
+        'in_progress': values['in_progress'],
+        'completed': values['completed'],
+        'on_hold': values['on_hold'],
+        'high_priority': values['high_priority'],
+        'medium_priority': values['medium_priority'],
+        'low_priority': values['low_priority']
+    }
+
 
 class ChatbotTools:
     """Tools for chatbot to access EMS data"""
@@ -131,27 +177,17 @@ class ChatbotTools:
     def get_attendance_summary(department: Optional[str] = None, date: Optional[str] = None) -> Dict[str, Any]:
         """Get attendance summary statistics"""
         try:
-            records = AttendanceRecord.objects.all()
+            # Summaries come from the daily (date, department) rollups
+            rollups = AttendanceDailyRollup.objects.all()
             
             if department:
-                records = records.filter(employee__department__icontains=department)
+                rollups = rollups.filter(department__icontains=department)
             
             if date:
                 target_date = datetime.strptime(date, '%Y-%m-%d').date()
-                records = records.filter(date=target_date)
-            
-            total_records = records.count()
-            present_count = records.filter(status='Present').count()
-            absent_count = records.filter(status='Absent').count()
-            late_count = records.filter(status='Late').count()
+                rollups = rollups.filter(date=target_date)
             
-            return {
-                'total_records': total_records,
-                'present': present_count,
-                'absent': absent_count,
-                'late': late_count,
-                'attendance_rate': round((present_count / total_records * 100), 2) if total_records > 0 else 0
-            }
+            return _attendance_summary(aggregate_summary(rollups, attendance_aggregates()))
         except Exception as e:
             return {'error': f'Failed to fetch attendance summary: {str(e)}'}
     
@@ -198,17 +234,7 @@ class ChatbotTools:
             if department:
                 requests = requests.filter(employee__department__icontains=department)
             
-            total_requests = requests.count()
-            pending_count = requests.filter(status='Pending').count()
-            approved_count = requests.filter(status='Approved').count()
-            rejected_count = requests.filter(status='Rejected').count()
-            
-            return {
-                'total_requests': total_requests,
-                'pending': pending_count,
-                'approved': approved_count,
-                'rejected': rejected_count
-            }
+            return _leave_summary(aggregate_summary(requests, leave_aggregates()))
         except Exception as e:
             return {'error': f'Failed to fetch leave summary: {str(e)}'}
     
@@ -260,76 +286,43 @@ class ChatbotTools:
             if department:
                 tasks = tasks.filter(assigned_to__department__icontains=department)
             
-            total_tasks = tasks.count()
-            not_started = tasks.filter(status='Not Started').count()
-            in_progress = tasks.filter(status='In Progress').count()
-            completed = tasks.filter(status='Completed').count()
-            on_hold = tasks.filter(status='On Hold').count()
-            
-            high_priority = tasks.filter(priority='High').count()
-            medium_priority = tasks.filter(priority='Medium').count()
-            low_priority = tasks.filter(priority='Low').count()
-            
-            return {
-                'total_tasks': total_tasks,
-                'not_started': not_started,
-                'in_progress': in_progress,
-                'completed': completed,
-                'on_hold': on_hold,
-                'high_priority': high_priority,
-                'medium_priority': medium_priority,
-                'low_priority': low_priority
-            }
+            return _task_summary(aggregate_summary(tasks, task_aggregates()))
         except Exception as e:
             return {'error': f'Failed to fetch task summary: {str(e)}'}
     
     @staticmethod
     def get_department_summary() -> Dict[str, Any]:
-        """Get summary statistics by department"""
+        """
+        Get summary statistics by department.
+        
+        Four GROUP BY queries (employees, attendance rollups, leave, tasks)
+        regardless of how many departments there are.
+        """
         try:
-            departments = Employee.objects.values_list('department', flat=True).distinct()
-            summary = {}
+            employees = grouped_summary(Employee.objects.all(), 'department', {'total': Count('pk')})['groups']
+            attendance = grouped_summary(AttendanceDailyRollup.objects.all(), 'department', attendance_aggregates())['groups']
+            leave = grouped_summary(LeaveRequest.objects.all(), 'employee__department', leave_aggregates())['groups']
+            tasks = grouped_summary(Task.objects.all(), 'assigned_to__department', task_aggregates())['groups']
             
-            for dept in departments:
-                emp_count = Employee.objects.filter(department=dept).count()
-                attendance_summary = ChatbotTools.get_attendance_summary(department=dept)
-                leave_summary = ChatbotTools.get_leave_summary(department=dept)
-                task_summary = ChatbotTools.get_task_summary(department=dept)
-                
-                summary[dept] = {
-                    'employee_count': emp_count,
-                    'attendance': attendance_summary,
-                    'leave': leave_summary,
-                    'tasks': task_summary
+            return {
+                dept: {
+                    'employee_count': values['total'],
+                    'attendance': _attendance_summary(attendance.get(dept, _empty(attendance_aggregates()))),
+                    'leave': _leave_summary(leave.get(dept, _empty(leave_aggregates()))),
+                    'tasks': _task_summary(tasks.get(dept, _empty(task_aggregates())))
                 }
-            
-            return summary
+                for dept, values in employees.items()
+            }
         except Exception as e:
             return {'error': f'Failed to fetch department summary: {str(e)}'}
     
     @staticmethod
-    def search_employees(query: str) -> List[Dict[str, Any]]:
-        """Search employees by name, email, or employee ID"""
+    def search_employees(query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Search employees by id, name, email, department or designation (ranked, see search.py)"""
         try:
-            employees = Employee.objects.filter(
-                name__icontains=query
-            ) | Employee.objects.filter(
-                email__icontains=query
-            ) | Employee.objects.filter(
-                employee_id__icontains=query
-            )
-            
             return [
-                {
-                    'id': emp.id,
-                    'employee_id': emp.employee_id,
-                    'name': emp.name,
-                    'email': emp.email,
-                    'department': emp.department,
-                    'designation': emp.designation,
-                    'status': emp.status
-                }
-                for emp in employees
+                {key: value for key, value in result.items() if key != 'score'}
+                for result in search.search_employees(query, limit)
             ]
         except Exception as e:
             return [{'error': f'Failed to search employees: {str(e)}'}]
@@ -1,12 +1,17 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views import View
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
+import asyncio
 import json
 import os
-from .chatbot import EMSGeminiChatbot
+from .chatbot import get_chatbot, get_chatbot_metrics, reset_chatbot
+from .chatbot_context import compact_json
 
 @method_decorator(csrf_exempt, name='dispatch')
 class ChatbotView(APIView):
@@ -19,7 +24,8 @@ class ChatbotView(APIView):
         super().__init__(**kwargs)
         self.chatbot = None
         try:
-            self.chatbot = EMSGeminiChatbot()
+            # Shared per process; only the first request pays for initialization
+            self.chatbot = get_chatbot()
         except ValueError as e:
             # Log the error but don't fail the view
             print(f"Chatbot initialization error: {e}")
@@ -105,6 +111,130 @@ class ChatbotView(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+UNAVAILABLE_SUGGESTIONS = [
+    "How do I add a new employee?",
+    "How can I track daily attendance?",
+    "What's the process for approving leave requests?"
+]
+
+
+def parse_chat_request(request):
+    """
+    The chatbot, message and conversation history of a chat request to the async endpoints.
+
+    Returns ``((chatbot, message, history), None)``, or ``(None, response)``
+    with the JSON error to send when the chatbot is unavailable or the body
+    is not a chat request.
+    """
+    try:
+        chatbot = get_chatbot()
+    except ValueError as e:
+        print(f"Chatbot initialization error: {e}")
+        return None, JsonResponse({
+            'error': 'Chatbot service is not available. Please check GEMINI_API_KEY configuration.',
+            'response': 'I apologize, but the chatbot service is currently unavailable. Please contact your administrator.',
+            'suggested_questions': UNAVAILABLE_SUGGESTIONS
+        }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    
+    try:
+        data = json.loads(request.body or b'{}')
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None, JsonResponse({
+            'error': 'Invalid JSON data',
+            'response': 'Please send valid JSON data.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if not isinstance(data, dict):
+        return None, JsonResponse({
+            'error': 'Invalid request body',
+            'response': 'Please send a JSON object with a message.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    user_message = str(data.get('message', '')).strip()
+    if not user_message:
+        return None, JsonResponse({
+            'error': 'Message is required',
+            'response': 'Please provide a message to chat with me.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    conversation_history = data.get('conversation_history') or []
+    if not isinstance(conversation_history, list):
+        return None, JsonResponse({
+            'error': 'conversation_history must be a list',
+            'response': 'Please send the conversation history as a list of messages.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    return (chatbot, user_message, conversation_history), None
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncChatbotView(View):
+    """
+    Async chatbot endpoint for ASGI servers (``uvicorn ems_backend.asgi:application``).
+
+    Same request and response body as ChatbotView, but the model call is
+    awaited and the database lookups run concurrently, so one worker can hold
+    many chats in flight. Requests are cut off after CHATBOT_REQUEST_TIMEOUT.
+    """
+    
+    async def post(self, request):
+        chat, error = parse_chat_request(request)
+        if error is not None:
+            return error
+        chatbot, user_message, conversation_history = chat
+        
+        timeout = settings.CHATBOT_REQUEST_TIMEOUT
+        try:
+            response_data = await chatbot.achat(user_message, conversation_history, timeout=timeout)
+        except asyncio.TimeoutError:
+            return JsonResponse({
+                'error': 'Chatbot request timed out',
+                'response': f'I apologize, but I could not answer within {timeout:g} seconds. Please try again.'
+            }, status=status.HTTP_504_GATEWAY_TIMEOUT)
+        except Exception as e:
+            return JsonResponse({
+                'error': 'Internal server error',
+                'response': f'I apologize, but I encountered an error: {str(e)}. Please try again later.'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        
+        return JsonResponse(response_data, status=status.HTTP_200_OK)
+
+
+def sse_event(event: str, data) -> str:
+    """Format one Server-Sent Event with a JSON payload"""
+    return f"event: {event}\ndata: {compact_json(data)}\n\n"
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class ChatbotStreamView(View):
+    """
+    Streaming chatbot endpoint (``text/event-stream``) for ASGI servers.
+
+    Takes the same body as ChatbotView. The answer arrives as ``token`` events
+    while the model generates it, then ``database_data`` and ``done`` events;
+    an ``error`` event ends the stream early. Validation errors are returned as
+    plain JSON before the stream starts. Under WSGI the events are buffered and
+    sent at the end.
+    """
+    
+    async def post(self, request):
+        chat, error = parse_chat_request(request)
+        if error is not None:
+            return error
+        chatbot, user_message, conversation_history = chat
+        
+        events = chatbot.astream_chat(user_message, conversation_history,
+                                      timeout=settings.CHATBOT_REQUEST_TIMEOUT)
+        
+        async def stream():
+            async for event, payload in events:
+                yield sse_event(event, payload)
+        
+        response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Let nginx pass events through as they are produced
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
 @method_decorator(csrf_exempt, name='dispatch')
 class ChatbotHealthView(APIView):
     """
@@ -120,7 +250,7 @@ class ChatbotHealthView(APIView):
             # Check if Gemini API key is configured
             api_key = os.getenv('GEMINI_API_KEY')
             
-            if not api_key:
+            if not api_key and settings.CHATBOT_MODEL != 'fake':
                 return Response({
                     'status': 'unhealthy',
                     'message': 'GEMINI_API_KEY not configured',
@@ -129,12 +259,13 @@ class ChatbotHealthView(APIView):
             
             # Try to initialize chatbot
             try:
-                chatbot = EMSGeminiChatbot()
+                chatbot = get_chatbot()
                 return Response({
                     'status': 'healthy',
                     'message': 'Chatbot service is operational',
                     'service': 'EMS Gemini Chatbot',
-                    'model': 'gemini-1.5-flash'
+                    'model': chatbot.model_name,
+                    'metrics': get_chatbot_metrics()
                 }, status=status.HTTP_200_OK)
             except Exception as e:
                 return Response({
@@ -149,3 +280,27 @@ class ChatbotHealthView(APIView):
                 'message': 'Health check failed',
                 'details': str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class ChatbotRefreshView(APIView):
+    """
+    Rebuild the shared chatbot and reload its live data snapshot
+    """
+    permission_classes = [IsAdminUser]
+    
+    def post(self, request):
+        reset_chatbot()
+        return Response({
+            'message': 'Chatbot live data reloaded',
+            'metrics': get_chatbot_metrics()
+        }, status=status.HTTP_200_OK)
+
+
+class ChatbotMetricsView(APIView):
+    """
+    Initialization and live data cache counters for this process
+    """
+    permission_classes = [AllowAny]
+    
+    def get(self, request):
+        return Response(get_chatbot_metrics(), status=status.HTTP_200_OK)
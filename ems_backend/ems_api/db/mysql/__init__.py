@@ -0,0 +1 @@
+# Timed/pooled MySQL backend
@@ -0,0 +1,11 @@
+"""
+MySQL (mysql-connector-python) backend with timed connects and optional
+pooling; see ems_api/db/pool.py.
+"""
+from mysql.connector.django.base import DatabaseWrapper as MySQLDatabaseWrapper
+
+from ..pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, MySQLDatabaseWrapper):
+    pass
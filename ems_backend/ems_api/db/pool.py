@@ -0,0 +1,282 @@
+"""
+Connection setup timing and an optional connection pool for the database
+backends in this package (``ems_api.db.mysql``, ``ems_api.db.sqlite3``).
+
+Each backend is the stock Django wrapper plus ``PooledDatabaseWrapperMixin``:
+
+- every physical connection is timed (connect, auth and ``init_command``)
+  and counted per database alias
+- when the database settings carry a ``POOL`` dict, ``close()`` returns the
+  connection to a per-process pool instead of closing it, and the next
+  ``connect()`` takes an idle one (health-checked with ``SELECT 1`` if it
+  sat idle longer than ``HEALTH_CHECK_AFTER``)
+
+``POOL`` keys: ``MIN_SIZE`` idle connections never closed for idleness,
+``MAX_SIZE`` connections open at once (in use plus idle), ``IDLE_TIMEOUT``
+seconds before an idle connection above ``MIN_SIZE`` is closed,
+``TIMEOUT`` seconds to wait for a free connection at ``MAX_SIZE`` and
+``HEALTH_CHECK_AFTER``. Use it with ``CONN_MAX_AGE = 0`` so Django hands
+connections back at the end of each request.
+
+``database_metrics()`` reports all of it for the metrics endpoint.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+from django.db import connections
+from django.db.utils import OperationalError
+
+
+DEFAULT_POOL = {
+    'MIN_SIZE': 1,
+    'MAX_SIZE': 10,
+    'IDLE_TIMEOUT': 300.0,
+    'TIMEOUT': 10.0,
+    'HEALTH_CHECK_AFTER': 30.0,
+}
+
+_lock = threading.Lock()
+_connect_stats: Dict[str, Dict[str, float]] = {}
+_pools: Dict[str, 'ConnectionPool'] = {}
+
+
+def record_connect(alias: str, seconds: float) -> None:
+    """Count one new physical connection and the time it took to set up"""
+    with _lock:
+        stats = _connect_stats.setdefault(alias, {'connects': 0, 'connect_seconds_total': 0.0,
+                                                  'connect_seconds_max': 0.0, 'connect_seconds_last': 0.0})
+        stats['connects'] += 1
+        stats['connect_seconds_total'] += seconds
+        stats['connect_seconds_last'] = seconds
+        stats['connect_seconds_max'] = max(stats['connect_seconds_max'], seconds)
+
+
+class ConnectionPool:
+    """Thread-safe pool of raw DB-API connections for one database alias"""
+
+    def __init__(self, alias: str, min_size: int = 1, max_size: int = 10, idle_timeout: float = 300.0,
+                 timeout: float = 10.0, health_check_after: float = 30.0):
+        if max_size < 1 or min_size > max_size:
+            raise ValueError(f"Invalid pool size for '{alias}': MIN_SIZE={min_size}, MAX_SIZE={max_size}")
+        self.alias = alias
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.health_check_after = health_check_after
+        self.pid = os.getpid()
+        # (connection, returned at) pairs; the most recently returned is reused first
+        self._idle: deque = deque()
+        self._open = 0
+        self._condition = threading.Condition()
+        self.stats = {
+            'acquired': 0,
+            'reused': 0,
+            'created': 0,
+            'closed_idle': 0,
+            'closed_broken': 0,
+            'waits': 0,
+            'wait_seconds_total': 0.0,
+            'timeouts': 0,
+        }
+
+    def acquire(self, connect: Callable[[], Any], check: Callable[[Any], None]):
+        """Return an idle connection, or a new one from ``connect()`` while below MAX_SIZE"""
+        deadline = time.monotonic() + self.timeout
+        with self._condition:
+            self.stats['acquired'] += 1
+            waited_from = None
+            while True:
+                self._close_expired()
+                if self._idle:
+                    connection, returned_at = self._idle.pop()
+                    break
+                if self._open < self.max_size:
+                    connection, returned_at = None, None
+                    self._open += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.stats['timeouts'] += 1
+                    if waited_from is not None:
+                        self.stats['wait_seconds_total'] += time.monotonic() - waited_from
+                    raise OperationalError(
+                        f"Timed out after {self.timeout}s waiting for a '{self.alias}' connection "
+                        f"({self.max_size} in use)"
+                    )
+                if waited_from is None:
+                    waited_from = time.monotonic()
+                    self.stats['waits'] += 1
+                self._condition.wait(remaining)
+            if waited_from is not None:
+                self.stats['wait_seconds_total'] += time.monotonic() - waited_from
+
+        if connection is not None:
+            if time.monotonic() - returned_at < self.health_check_after:
+                self._count('reused')
+                return connection
+            try:
+                check(connection)
+                self._count('reused')
+                return connection
+            except Exception:
+                self._discard(connection, 'closed_broken', reserve=True)
+        try:
+            connection = connect()
+        except Exception:
+            self._forget()
+            raise
+        self._count('created')
+        return connection
+
+    def release(self, connection, reset: Callable[[Any], None]) -> None:
+        """Take a connection back; it is closed instead if ``reset`` fails"""
+        try:
+            reset(connection)
+        except Exception:
+            self._discard(connection, 'closed_broken')
+            return
+        with self._condition:
+            self._idle.append((connection, time.monotonic()))
+            self._close_expired()
+            self._condition.notify()
+
+    def _close_expired(self) -> None:
+        """Close connections idle past IDLE_TIMEOUT, keeping MIN_SIZE open (lock held)"""
+        now = time.monotonic()
+        # The oldest idle connections are at the left
+        while self._idle and self._open > self.min_size and now - self._idle[0][1] > self.idle_timeout:
+            connection, _ = self._idle.popleft()
+            self._open -= 1
+            self.stats['closed_idle'] += 1
+            _close_quietly(connection)
+
+    def _discard(self, connection, reason: str, reserve: bool = False) -> None:
+        """Close a broken connection; with ``reserve`` its slot is kept for a replacement"""
+        _close_quietly(connection)
+        with self._condition:
+            self.stats[reason] += 1
+            if not reserve:
+                self._open -= 1
+                self._condition.notify()
+
+    def _forget(self) -> None:
+        with self._condition:
+            self._open -= 1
+            self._condition.notify()
+
+    def _count(self, name: str) -> None:
+        with self._condition:
+            self.stats[name] += 1
+
+    def close_all(self) -> None:
+        with self._condition:
+            while self._idle:
+                connection, _ = self._idle.pop()
+                self._open -= 1
+                _close_quietly(connection)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._condition:
+            stats = dict(self.stats)
+            stats.update({
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'open': self._open,
+                'idle': len(self._idle),
+                'in_use': self._open - len(self._idle),
+                'wait_seconds_total': round(stats['wait_seconds_total'], 6),
+            })
+            return stats
+
+
+def _close_quietly(connection) -> None:
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+def get_pool(alias: str, options: Dict[str, Any]) -> ConnectionPool:
+    """The pool for ``alias`` in this process (a forked worker starts its own)"""
+    with _lock:
+        pool = _pools.get(alias)
+        if pool is None or pool.pid != os.getpid():
+            config = {**DEFAULT_POOL, **options}
+            pool = _pools[alias] = ConnectionPool(
+                alias,
+                min_size=int(config['MIN_SIZE']),
+                max_size=int(config['MAX_SIZE']),
+                idle_timeout=float(config['IDLE_TIMEOUT']),
+                timeout=float(config['TIMEOUT']),
+                health_check_after=float(config['HEALTH_CHECK_AFTER']),
+            )
+        return pool
+
+
+class PooledDatabaseWrapperMixin:
+    """Times physical connects and, with a ``POOL`` setting, pools connections"""
+
+    @property
+    def pool(self) -> Optional[ConnectionPool]:
+        options = self.settings_dict.get('POOL')
+        if options is None:
+            return None
+        return get_pool(self.alias, options)
+
+    def _timed_connect(self, conn_params):
+        started = time.perf_counter()
+        connection = super().get_new_connection(conn_params)
+        record_connect(self.alias, time.perf_counter() - started)
+        return connection
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return self._timed_connect(conn_params)
+        return pool.acquire(lambda: self._timed_connect(conn_params), self._check_pooled_connection)
+
+    def _close(self):
+        pool = self.pool
+        if pool is None or self.connection is None:
+            return super()._close()
+        pool.release(self.connection, self._reset_pooled_connection)
+
+    @staticmethod
+    def _check_pooled_connection(connection) -> None:
+        cursor = connection.cursor()
+        try:
+            cursor.execute('SELECT 1')
+            cursor.fetchall()
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def _reset_pooled_connection(connection) -> None:
+        # Never hand an open transaction to the next request
+        connection.rollback()
+
+
+def database_metrics() -> Dict[str, Any]:
+    """Settings, connection setup timings and pool stats per configured database"""
+    metrics = {}
+    for alias in connections:
+        settings_dict = connections.settings[alias]
+        with _lock:
+            stats = dict(_connect_stats.get(alias, {'connects': 0, 'connect_seconds_total': 0.0,
+                                                    'connect_seconds_max': 0.0, 'connect_seconds_last': 0.0}))
+            pool = _pools.get(alias)
+        stats['connect_seconds_avg'] = stats['connect_seconds_total'] / stats['connects'] if stats['connects'] else 0.0
+        metrics[alias] = {
+            'engine': settings_dict['ENGINE'],
+            'conn_max_age': settings_dict.get('CONN_MAX_AGE'),
+            'conn_health_checks': settings_dict.get('CONN_HEALTH_CHECKS'),
+            'pooled': 'POOL' in settings_dict,
+            **{key: round(value, 6) if isinstance(value, float) else value for key, value in stats.items()},
+            'pool': pool.snapshot() if pool is not None and pool.pid == os.getpid() else None,
+        }
+    return metrics
@@ -0,0 +1 @@
+# Timed/pooled SQLite backend
@@ -0,0 +1,11 @@
+"""
+SQLite backend with timed connects and optional pooling (for development and
+tests of the pool); see ems_api/db/pool.py.
+"""
+from django.db.backends.sqlite3.base import DatabaseWrapper as SQLiteDatabaseWrapper
+
+from ..pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, SQLiteDatabaseWrapper):
+    pass
@@ -0,0 +1,184 @@
+"""
+Attachment downloads straight from storage.
+
+``attachment_response`` answers ``GET``/``HEAD`` for a ``TaskAttachment``:
+
+- ``ETag`` is the blob's SHA-256 (or a size and upload time tag for
+  attachments stored before blobs), ``Last-Modified`` the upload time; a
+  matching ``If-None-Match``/``If-Modified-Since`` gets a 304 and failed
+  ``If-Match``/``If-Unmodified-Since`` a 412, before storage is touched
+- a single ``Range: bytes=...`` (honouring ``If-Range``) gets a 206 with just
+  those bytes, an unsatisfiable one a 416; multi-range requests get the whole
+  file
+- the body is streamed from ``default_storage`` in ``BLOCK_SIZE`` pieces;
+  under WSGI a full file goes out through ``FileResponse``, so servers with
+  ``wsgi.file_wrapper`` can ``sendfile`` it. Under ASGI the blocks are read
+  one at a time in a worker thread (``streaming.streaming_body``) rather
+  than the whole file being buffered first
+
+With ``ATTACHMENT_DOWNLOAD_MODE`` set to ``x-accel`` (nginx) or ``x-sendfile``
+(Apache mod_xsendfile, lighttpd) only the headers are built here and the
+proxy reads the file, including ranges, without it passing through Python.
+nginx needs an ``internal`` location at ``ATTACHMENT_ACCEL_REDIRECT_PREFIX``
+aliased to ``MEDIA_ROOT``.
+"""
+
+import re
+from typing import Iterator, Optional, Tuple
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+
+from .models import TaskAttachment
+from .streaming import is_asgi, streaming_body
+
+
+BLOCK_SIZE = 64 * 1024
+DOWNLOAD_MODES = ('stream', 'x-accel', 'x-sendfile')
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def download_mode() -> str:
+    mode = getattr(settings, 'ATTACHMENT_DOWNLOAD_MODE', 'stream')
+    if mode not in DOWNLOAD_MODES:
+        raise ValueError(f"ATTACHMENT_DOWNLOAD_MODE must be one of {', '.join(DOWNLOAD_MODES)}, not '{mode}'")
+    return mode
+
+
+def attachment_etag(attachment: TaskAttachment) -> str:
+    if attachment.blob_id:
+        return f'"{attachment.blob.sha256}"'
+    return f'"{attachment.pk}-{attachment.file_size}-{int(attachment.uploaded_at.timestamp())}"'
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    First and last byte of a single ``bytes=`` range, or None to send the whole file.
+
+    Raises ``RangeNotSatisfiable`` when the range starts past the end.
+    """
+    match = RANGE_RE.match(header.strip())
+    if match is None:
+        # Malformed or several ranges: ignoring the header is allowed
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            raise RangeNotSatisfiable
+        return max(0, size - suffix), size - 1
+    first = int(first)
+    if first >= size:
+        raise RangeNotSatisfiable
+    if not last:
+        return first, size - 1
+    if int(last) < first:
+        return None
+    return first, min(int(last), size - 1)
+
+
+def if_range_matches(request, etag: str, last_modified: int) -> bool:
+    """Whether a Range should be honoured under the request's ``If-Range`` (if any)"""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith('"'):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def iter_range(file, first: int, length: int) -> Iterator[bytes]:
+    try:
+        file.seek(first)
+        while length > 0:
+            block = file.read(min(BLOCK_SIZE, length))
+            if not block:
+                break
+            length -= len(block)
+            yield block
+    finally:
+        file.close()
+
+
+def attachment_response(request, attachment: TaskAttachment, as_attachment: bool = True):
+    """
+    The file of ``attachment`` (or a 304/206/412/416), served according to ``ATTACHMENT_DOWNLOAD_MODE``.
+
+    Raises ``FileNotFoundError`` when streaming a file that is not in storage.
+    """
+    etag = attachment_etag(attachment)
+    last_modified = int(attachment.uploaded_at.timestamp())
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    mode = download_mode()
+    if mode == 'x-sendfile':
+        try:
+            path = default_storage.path(attachment.file_path)
+        except NotImplementedError:
+            # Storage without local paths: nothing for the proxy to read
+            mode = 'stream'
+    if mode == 'x-accel':
+        response = HttpResponse()
+        prefix = getattr(settings, 'ATTACHMENT_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+        response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(attachment.file_path)
+    elif mode == 'x-sendfile':
+        response = HttpResponse()
+        response['X-Sendfile'] = path
+    else:
+        response = _stream_response(request, attachment, etag, last_modified)
+        if response.status_code == 416:
+            return response
+
+    response['Content-Type'] = attachment.file_type or 'application/octet-stream'
+    response['Content-Disposition'] = content_disposition_header(as_attachment, attachment.file_name)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def _stream_response(request, attachment: TaskAttachment, etag: str, last_modified: int):
+    file = default_storage.open(attachment.file_path, 'rb')
+    size = file.size
+
+    byte_range = None
+    header = request.META.get('HTTP_RANGE')
+    if header and if_range_matches(request, etag, last_modified):
+        try:
+            byte_range = parse_range(header, size)
+        except RangeNotSatisfiable:
+            file.close()
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    if request.method == 'HEAD':
+        file.close()
+        response = HttpResponse()
+        response['Content-Length'] = str(size)
+    elif byte_range is None and not is_asgi(request):
+        response = FileResponse(file)
+        response.block_size = BLOCK_SIZE
+        response['Content-Length'] = str(size)
+    else:
+        first, last = byte_range or (0, size - 1)
+        # Plain file reads, so any worker thread will do
+        body = streaming_body(request, iter_range(file, first, last - first + 1), thread_sensitive=False)
+        response = StreamingHttpResponse(body, status=206 if byte_range else 200)
+        if byte_range:
+            response['Content-Range'] = f'bytes {first}-{last}/{size}'
+        response['Content-Length'] = str(last - first + 1)
+    response['Accept-Ranges'] = 'bytes'
+    return response
@@ -0,0 +1,180 @@
+"""
+Bulk attendance ingestion.
+
+Badge readers and imports send thousands of attendance rows at once. Rows are
+validated column by column in plain Python (no per-row serializer), employee
+ids are resolved with a single query and the valid rows are upserted on the
+``(date, employee)`` unique key with batched ``bulk_create(update_conflicts=True)``.
+"""
+
+import codecs
+import csv
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Tuple
+
+from django.db import connection, transaction
+from django.utils.dateparse import parse_date, parse_time
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+from .chatbot_cache import bump_data_version
+from .models import Employee, AttendanceRecord
+from .rollups import refresh_attendance_rollups
+
+
+MAX_BULK_RECORDS = 10000
+UPSERT_BATCH_SIZE = 1000
+UPDATE_FIELDS = ['check_in', 'check_out', 'hours', 'status']
+STATUS_VALUES = {value for value, _ in AttendanceRecord.ATTENDANCE_STATUS_CHOICES}
+MAX_HOURS = Decimal('99.99')
+
+
+class CSVParser(BaseParser):
+    """Parse a ``text/csv`` body with a header row into a list of dicts"""
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', 'utf-8')
+        try:
+            return read_csv_rows(stream, encoding)
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise ParseError(f'CSV parse error - {e}')
+
+
+def read_csv_rows(stream, encoding: str = 'utf-8') -> List[Dict[str, str]]:
+    reader = csv.DictReader(codecs.getreader(encoding)(stream))
+    return [{key.strip(): value for key, value in row.items() if key} for row in reader]
+
+
+def _blank(value: Any) -> bool:
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _parse_column(rows, name, parse, errors, required=False):
+    """Parse one column for every row, recording per-row errors"""
+    parsed = []
+    for index, row in enumerate(rows):
+        value = row.get(name)
+        if _blank(value):
+            if required:
+                errors.setdefault(index, {})[name] = 'This field is required.'
+            parsed.append(None)
+            continue
+        try:
+            result = parse(value)
+        except (TypeError, ValueError, InvalidOperation):
+            result = None
+        if result is None:
+            errors.setdefault(index, {})[name] = f"Invalid value '{value}'."
+        parsed.append(result)
+    return parsed
+
+
+def _parse_date(value):
+    return parse_date(str(value).strip())
+
+
+def _parse_time(value):
+    return parse_time(str(value).strip())
+
+
+def _parse_hours(value):
+    hours = Decimal(str(value).strip()).quantize(Decimal('0.01'))
+    return hours if 0 <= hours <= MAX_HOURS else None
+
+
+def _parse_status(value):
+    value = str(value).strip()
+    return value if value in STATUS_VALUES else None
+
+
+def _hours_between(check_in, check_out) -> Decimal:
+    minutes = (check_out.hour * 60 + check_out.minute) - (check_in.hour * 60 + check_in.minute)
+    return (Decimal(minutes) / 60).quantize(Decimal('0.01'))
+
+
+def validate_attendance_rows(rows: List[Dict[str, Any]]) -> Tuple[List[AttendanceRecord], List[Dict[str, Any]]]:
+    """
+    Validate raw attendance rows and build unsaved ``AttendanceRecord`` objects.
+
+    Each row needs ``employee_id`` (the EMP code) and ``date``; ``check_in``,
+    ``check_out``, ``hours`` and ``status`` are optional. When ``hours`` is
+    missing it is derived from check-in/check-out. Returns the valid records
+    and a list of ``{'row': index, 'errors': {field: message}}`` reports.
+    """
+    errors: Dict[int, Dict[str, str]] = {}
+    malformed = {index for index, row in enumerate(rows) if not isinstance(row, dict)}
+    rows = [{} if index in malformed else row for index, row in enumerate(rows)]
+
+    codes = [None if _blank(row.get('employee_id')) else str(row['employee_id']).strip() for row in rows]
+    dates = _parse_column(rows, 'date', _parse_date, errors, required=True)
+    check_ins = _parse_column(rows, 'check_in', _parse_time, errors)
+    check_outs = _parse_column(rows, 'check_out', _parse_time, errors)
+    hours = _parse_column(rows, 'hours', _parse_hours, errors)
+    statuses = _parse_column(rows, 'status', _parse_status, errors)
+
+    # One query resolves every employee code in the payload
+    employees = dict(
+        Employee.objects.filter(employee_id__in={code for code in codes if code}).values_list('employee_id', 'id')
+    )
+
+    records = []
+    seen = {}
+    for index, code in enumerate(codes):
+        row_errors = errors.setdefault(index, {})
+        if code is None:
+            row_errors['employee_id'] = 'This field is required.'
+        elif code not in employees:
+            row_errors['employee_id'] = f"Employee '{code}' not found."
+        check_in, check_out = check_ins[index], check_outs[index]
+        if check_in and check_out and check_in >= check_out:
+            row_errors['check_out'] = 'Check-out time must be after check-in time'
+        if row_errors:
+            continue
+
+        key = (dates[index], code)
+        if key in seen:
+            row_errors['non_field_errors'] = f'Duplicate of row {seen[key]} (same employee and date).'
+            continue
+        seen[key] = index
+
+        row_hours = hours[index]
+        if row_hours is None:
+            row_hours = _hours_between(check_in, check_out) if check_in and check_out else Decimal('0')
+        records.append(AttendanceRecord(
+            employee_id=employees[code],
+            date=dates[index],
+            check_in=check_in,
+            check_out=check_out,
+            hours=row_hours,
+            status=statuses[index] or 'Present',
+        ))
+
+    for index in malformed:
+        errors[index] = {'non_field_errors': 'Expected an object.'}
+    reports = [{'row': index, 'errors': row_errors} for index, row_errors in sorted(errors.items()) if row_errors]
+    return records, reports
+
+
+def upsert_attendance_records(records: List[AttendanceRecord], batch_size: int = UPSERT_BATCH_SIZE) -> int:
+    """
+    Insert or update attendance on the ``(date, employee)`` key in batches and
+    refresh the daily rollups the rows touched.
+    """
+    if not records:
+        return 0
+    options = {'update_conflicts': True, 'update_fields': UPDATE_FIELDS}
+    # MySQL upserts on any unique key and rejects an explicit conflict target
+    if connection.features.supports_update_conflicts_with_target:
+        options['unique_fields'] = ['date', 'employee']
+
+    with transaction.atomic():
+        for start in range(0, len(records), batch_size):
+            AttendanceRecord.objects.bulk_create(records[start:start + batch_size], **options)
+        departments = Employee.objects.filter(
+            pk__in={record.employee_id for record in records}
+        ).values_list('department', flat=True).distinct()
+        refresh_attendance_rollups({record.date for record in records}, departments)
+        # bulk_create sends no post_save signals
+        bump_data_version('attendance')
+    return len(records)
@@ -0,0 +1,303 @@
+"""
+Per-request latency, SQL and serializer instrumentation.
+
+``RequestMetricsMiddleware`` opens a ``RequestRecorder`` for every request
+(held in a context variable, so sync and async views and the threads they
+hand queries to all see the same one). While it is open:
+
+- every SQL statement on every connection is counted and timed by an
+  execute wrapper added to each connection when it is created
+- serializers with ``TimedSerializerMixin`` add the time spent in their
+  outermost ``to_representation`` (nested serializers are not counted twice;
+  lazy queries they trigger are included)
+
+When the response is ready the numbers go into Prometheus histograms labelled
+by route: ``<router basename>.<action>`` for viewsets (``employee.list``,
+``task.update_progress``) and the URL name for other views (``auth_login``).
+A streamed body (exports, attachment ranges, chatbot events) is produced
+after the view returns, so its queries and bytes are recorded while the
+server reads it and the request is observed once the response is closed.
+``GET /api/metrics/`` serves them in the Prometheus text format. Like the
+other metrics endpoints the numbers are per server process.
+
+Requests slower than ``REQUEST_SLOW_THRESHOLD_MS`` are logged at WARNING with
+their ``REQUEST_SLOW_TOP_QUERIES`` slowest statements.
+"""
+
+import heapq
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SLOW_THRESHOLD_MS = 500
+DEFAULT_SLOW_TOP_QUERIES = 5
+MAX_LOGGED_SQL = 500
+
+# Own registry: the endpoint only shows these metrics, and re-imports in
+# tests or autoreload never hit "Duplicated timeseries" errors
+registry = CollectorRegistry(auto_describe=True)
+
+REQUEST_SECONDS = Histogram(
+    'ems_http_request_duration_seconds', 'Wall time from the middleware to the response',
+    ['route', 'method', 'status'], registry=registry,
+)
+REQUEST_QUERIES = Histogram(
+    'ems_http_request_queries', 'SQL statements executed per request',
+    ['route'], buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, 233), registry=registry,
+)
+REQUEST_SQL_SECONDS = Histogram(
+    'ems_http_request_sql_duration_seconds', 'Total SQL time per request',
+    ['route'], registry=registry,
+)
+REQUEST_SERIALIZER_SECONDS = Histogram(
+    'ems_http_request_serializer_duration_seconds', 'Time spent in serializers per request',
+    ['route'], registry=registry,
+)
+RESPONSE_BYTES = Histogram(
+    'ems_http_response_size_bytes', 'Response body size (bytes actually sent for streamed responses)',
+    ['route'], buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216), registry=registry,
+)
+SLOW_REQUESTS = Counter(
+    'ems_http_slow_requests', 'Requests slower than REQUEST_SLOW_THRESHOLD_MS',
+    ['route'], registry=registry,
+)
+
+
+class RequestRecorder:
+    """SQL and serializer totals for one request, plus its slowest statements"""
+
+    def __init__(self, top_queries: int = DEFAULT_SLOW_TOP_QUERIES):
+        self.top_queries = top_queries
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self.serializing = False
+        # Min-heap of (seconds, sequence, sql), at most ``top_queries`` long
+        self._slowest: List[Tuple[float, int, str]] = []
+        # Async views may run several lookups in threads at once
+        self._lock = threading.Lock()
+
+    def record_query(self, sql: str, seconds: float) -> None:
+        with self._lock:
+            self.queries += 1
+            self.sql_seconds += seconds
+            if self.top_queries <= 0:
+                return
+            entry = (seconds, self.queries, sql)
+            if len(self._slowest) < self.top_queries:
+                heapq.heappush(self._slowest, entry)
+            elif seconds > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, entry)
+
+    def slowest_queries(self) -> List[Tuple[float, str]]:
+        with self._lock:
+            return [(seconds, sql) for seconds, _, sql in sorted(self._slowest, reverse=True)]
+
+
+_current: ContextVar[Optional[RequestRecorder]] = ContextVar('ems_request_recorder', default=None)
+
+
+def current_recorder() -> Optional[RequestRecorder]:
+    return _current.get()
+
+
+def _record_query(execute, sql, params, many, context):
+    recorder = _current.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        recorder.record_query(sql, time.perf_counter() - started)
+
+
+def _add_query_wrapper(sender, connection, **kwargs):
+    # connection_created fires on every reconnect of the same wrapper
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+def connect_signals() -> None:
+    connection_created.connect(_add_query_wrapper, dispatch_uid='instrumentation_query_wrapper')
+
+
+class TimedSerializerMixin:
+    """Adds time spent in ``to_representation`` to the current request's serializer time"""
+
+    def to_representation(self, instance):
+        recorder = _current.get()
+        if recorder is None or recorder.serializing:
+            return super().to_representation(instance)
+        recorder.serializing = True
+        started = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            recorder.serializer_seconds += time.perf_counter() - started
+            recorder.serializing = False
+
+
+def route_label(request) -> str:
+    """``<basename>.<action>`` for router viewsets, the URL name otherwise"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    view = match.func
+    basename = getattr(view, 'initkwargs', {}).get('basename')
+    actions = getattr(view, 'actions', None)
+    if basename and actions:
+        method = request.method.lower()
+        return f"{basename}.{actions.get(method, method)}"
+    return match.view_name or match._func_path
+
+
+def response_size(response) -> Optional[int]:
+    if not response.streaming:
+        return len(response.content)
+    length = response.get('Content-Length')
+    return int(length) if length and length.isdigit() else None
+
+
+class RecordedStream:
+    """
+    Streaming content that runs each step under the request's recorder and
+    counts the bytes sent; ``on_close(sent)`` runs once, when the server
+    closes the response.
+    """
+
+    def __init__(self, content, recorder: RequestRecorder, on_close):
+        self.content = content
+        self.recorder = recorder
+        self.on_close = on_close
+        self.sent = 0
+        self.closed = False
+
+    def __iter__(self):
+        iterator = iter(self.content)
+        while True:
+            token = _current.set(self.recorder)
+            try:
+                chunk = next(iterator, None)
+            finally:
+                _current.reset(token)
+            if chunk is None:
+                return
+            self.sent += len(chunk)
+            yield chunk
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.on_close(self.sent)
+
+
+class AsyncRecordedStream(RecordedStream):
+    """``RecordedStream`` for async streaming content (ASGI)"""
+
+    __iter__ = None
+
+    async def __aiter__(self):
+        iterator = self.content.__aiter__()
+        while True:
+            token = _current.set(self.recorder)
+            try:
+                chunk = await iterator.__anext__()
+            except StopAsyncIteration:
+                return
+            finally:
+                _current.reset(token)
+            self.sent += len(chunk)
+            yield chunk
+
+
+class RequestMetricsMiddleware:
+    """Records latency, SQL, serializer time and response size per route"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_threshold = getattr(settings, 'REQUEST_SLOW_THRESHOLD_MS', DEFAULT_SLOW_THRESHOLD_MS) / 1000
+        self.top_queries = getattr(settings, 'REQUEST_SLOW_TOP_QUERIES', DEFAULT_SLOW_TOP_QUERIES)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = RequestRecorder(self.top_queries)
+        token = _current.set(recorder)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, recorder, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        recorder = RequestRecorder(self.top_queries)
+        token = _current.set(recorder)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, recorder, time.perf_counter() - started)
+
+    def finish(self, request, response, recorder: RequestRecorder, seconds: float):
+        """
+        Observe the request now, or a streamed one once the server has closed it.
+
+        ``FileResponse`` bodies are left alone so WSGI servers can still
+        ``sendfile`` them; they run no queries and carry a Content-Length.
+        """
+        if not response.streaming or getattr(response, 'file_to_stream', None) is not None:
+            self.observe(request, response, recorder, seconds, response_size(response))
+            return response
+        stream_class = AsyncRecordedStream if response.is_async else RecordedStream
+        response.streaming_content = stream_class(
+            response.streaming_content, recorder,
+            lambda sent: self.observe(request, response, recorder, seconds, sent),
+        )
+        return response
+
+    def observe(self, request, response, recorder: RequestRecorder, seconds: float, size: Optional[int]) -> None:
+        """``seconds`` is the time to the response; a streamed body's transfer time is not included"""
+        route = route_label(request)
+        REQUEST_SECONDS.labels(route, request.method, str(response.status_code)).observe(seconds)
+        REQUEST_QUERIES.labels(route).observe(recorder.queries)
+        REQUEST_SQL_SECONDS.labels(route).observe(recorder.sql_seconds)
+        REQUEST_SERIALIZER_SECONDS.labels(route).observe(recorder.serializer_seconds)
+        if size is not None:
+            RESPONSE_BYTES.labels(route).observe(size)
+        if self.slow_threshold > 0 and seconds >= self.slow_threshold:
+            SLOW_REQUESTS.labels(route).inc()
+            self.log_slow_request(request, response, route, recorder, seconds)
+
+    def log_slow_request(self, request, response, route: str, recorder: RequestRecorder, seconds: float) -> None:
+        lines = [
+            f"Slow request {request.method} {request.path} ({route}) -> {response.status_code}: "
+            f"{seconds * 1000:.1f} ms, {recorder.queries} queries in {recorder.sql_seconds * 1000:.1f} ms, "
+            f"serializers {recorder.serializer_seconds * 1000:.1f} ms"
+        ]
+        for query_seconds, sql in recorder.slowest_queries():
+            if len(sql) > MAX_LOGGED_SQL:
+                sql = sql[:MAX_LOGGED_SQL] + '...'
+            lines.append(f"  {query_seconds * 1000:.1f} ms  {sql}")
+        logger.warning('\n'.join(lines))
+
+
+def render_metrics() -> bytes:
+    return generate_latest(registry)
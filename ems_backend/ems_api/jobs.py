@@ -0,0 +1,241 @@
+"""
+Background jobs kept in the database, run by ``manage.py run_worker``.
+
+Handlers are functions registered under a name with ``@register``.
+``enqueue(name, payload)`` stores a ``BackgroundJob`` row with the handler's
+keyword arguments in the caller's transaction, so workers only see the job
+once the changes it works on have committed, and never if they roll back.
+
+- A worker claims the visible job with the highest priority (oldest first
+  among equals) with a conditional ``UPDATE`` on the status and
+  ``visible_at`` it read. When two workers race for the same row, only one
+  update matches, so no ``SELECT ... SKIP LOCKED`` is needed.
+- Claiming hides the job for its visibility timeout
+  (``JOB_VISIBILITY_TIMEOUT``, or the handler's own ``timeout``). If the
+  worker dies, or the job overruns, the job becomes visible again and
+  another worker takes it over as a new attempt. The first worker's outcome
+  is then ignored.
+- A handler that raises is retried after ``JOB_RETRY_DELAY`` seconds,
+  doubling with every attempt, until ``max_attempts`` is reached. The job
+  then ends ``Failed`` with the traceback in ``last_error``.
+
+Handlers may therefore run more than once and must be idempotent. Payloads
+sit in the database as JSON, so never put passwords or tokens in them. With
+``JOB_QUEUE_EAGER`` (on by default when ``DEBUG`` is) the first attempt runs in
+the enqueuing process when its transaction commits, for installs without a
+worker.
+
+``GET /api/jobs/{job_id}/`` reports a job's status.
+"""
+
+import logging
+import os
+import socket
+import traceback
+from datetime import timedelta
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, transaction
+from django.db.models import Count, F, Min
+from django.utils import timezone
+
+from .models import BackgroundJob
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_VISIBILITY_TIMEOUT = 300
+DEFAULT_RETRY_DELAY = 10
+MAX_RETRY_DELAY = 3600
+DEFAULT_POLL_INTERVAL = 1.0
+# Candidates read per claim; more than one so a lost race moves on to the next job
+CLAIM_BATCH = 10
+
+
+class JobHandler(NamedTuple):
+    func: Callable[..., Any]
+    priority: int
+    max_attempts: int
+    # Visibility timeout in seconds; None for JOB_VISIBILITY_TIMEOUT
+    timeout: Optional[float]
+
+
+HANDLERS: Dict[str, JobHandler] = {}
+
+
+def register(name: str, priority: int = 0, max_attempts: int = 3, timeout: Optional[float] = None):
+    """Register the decorated function as the handler of jobs named ``name`` (the function is unchanged)"""
+    def decorator(func):
+        HANDLERS[name] = JobHandler(func, priority, max_attempts, timeout)
+        return func
+    return decorator
+
+
+def visibility_timeout(name: str) -> float:
+    handler = HANDLERS.get(name)
+    if handler is not None and handler.timeout:
+        return handler.timeout
+    return getattr(settings, 'JOB_VISIBILITY_TIMEOUT', DEFAULT_VISIBILITY_TIMEOUT)
+
+
+def retry_delay(attempts: int) -> float:
+    base = getattr(settings, 'JOB_RETRY_DELAY', DEFAULT_RETRY_DELAY)
+    return min(base * 2 ** max(attempts - 1, 0), MAX_RETRY_DELAY)
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def enqueue(name: str, payload: Optional[Dict[str, Any]] = None, priority: Optional[int] = None,
+            delay: float = 0, user=None) -> BackgroundJob:
+    """
+    Queue a ``name`` job that calls its handler with ``payload`` as keyword arguments.
+
+    Call it inside the transaction whose changes the job works on. ``user``
+    (the requesting user, if any) can then see the job's status.
+    """
+    handler = HANDLERS.get(name)
+    if handler is None:
+        raise ValueError(f"No background job handler registered as '{name}'")
+    job = BackgroundJob.objects.create(
+        name=name,
+        payload=payload or {},
+        priority=handler.priority if priority is None else priority,
+        max_attempts=handler.max_attempts,
+        visible_at=timezone.now() + timedelta(seconds=delay),
+        created_by=user if user is not None and user.is_authenticated else None,
+    )
+    if getattr(settings, 'JOB_QUEUE_EAGER', False) and not delay:
+        transaction.on_commit(lambda: run_job(job.pk))
+    return job
+
+
+def claim(worker: str, job_pk: Optional[int] = None) -> Optional[BackgroundJob]:
+    """Take the next visible job (or only job ``job_pk``) for ``worker``; None when there is none"""
+    now = timezone.now()
+    visible = BackgroundJob.objects.filter(status__in=('Queued', 'Running'), visible_at__lte=now)
+    if job_pk is not None:
+        visible = visible.filter(pk=job_pk)
+    candidates = visible.order_by('-priority', 'visible_at', 'id').values_list(
+        'pk', 'name', 'status', 'visible_at', 'attempts', 'max_attempts', 'locked_by',
+    )[:CLAIM_BATCH]
+    for pk, name, status, visible_at, attempts, max_attempts, locked_by in candidates:
+        # Matches only while nobody else has claimed or finished the job since it was read
+        unchanged = BackgroundJob.objects.filter(pk=pk, status=status, visible_at=visible_at)
+        timed_out = ''
+        if status == 'Running':
+            timed_out = f"Attempt {attempts} timed out on {locked_by or 'an unknown worker'}"
+            if attempts >= max_attempts:
+                unchanged.update(status='Failed', locked_by='', last_error=timed_out, finished_at=now)
+                logger.warning("Job %s (%s) failed: %s", pk, name, timed_out)
+                continue
+        changes = {
+            'status': 'Running',
+            'locked_by': worker,
+            'attempts': F('attempts') + 1,
+            'visible_at': now + timedelta(seconds=visibility_timeout(name)),
+            'started_at': now,
+        }
+        if timed_out:
+            changes['last_error'] = timed_out
+        if unchanged.update(**changes):
+            return BackgroundJob.objects.get(pk=pk)
+    return None
+
+
+def execute(job: BackgroundJob, worker: str) -> str:
+    """Run a job ``worker`` has claimed and record the outcome; returns the job's new status"""
+    # The claim: a worker that took the job over after a timeout has a higher attempt number
+    held = BackgroundJob.objects.filter(pk=job.pk, status='Running', locked_by=worker, attempts=job.attempts)
+    handler = HANDLERS.get(job.name)
+    try:
+        if handler is None:
+            raise LookupError(f"No background job handler registered as '{job.name}'")
+        result = handler.func(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        now = timezone.now()
+        if handler is not None and job.attempts < job.max_attempts:
+            new_status = 'Queued'
+            changes = {'visible_at': now + timedelta(seconds=retry_delay(job.attempts))}
+        else:
+            new_status = 'Failed'
+            changes = {'finished_at': now}
+        if not held.update(status=new_status, locked_by='', last_error=error, **changes):
+            return _lost(job)
+        log = logger.warning if new_status == 'Queued' else logger.error
+        log("Job %s (%s) attempt %s/%s failed:\n%s", job.pk, job.name, job.attempts, job.max_attempts, error)
+        return new_status
+
+    if not held.update(status='Succeeded', locked_by='', result=result, finished_at=timezone.now()):
+        return _lost(job)
+    return 'Succeeded'
+
+
+def _lost(job: BackgroundJob) -> str:
+    logger.warning("Job %s (%s) outlived its visibility timeout and was taken over", job.pk, job.name)
+    return BackgroundJob.objects.filter(pk=job.pk).values_list('status', flat=True).first() or 'Lost'
+
+
+def run_job(job_pk: int) -> Optional[str]:
+    """Claim and run job ``job_pk`` in this process if it is visible; returns its new status"""
+    worker = f"{worker_name()}:inline"
+    job = claim(worker, job_pk=job_pk)
+    return execute(job, worker) if job is not None else None
+
+
+def work(worker: str, stop, poll_interval: float = DEFAULT_POLL_INTERVAL, burst: bool = False) -> int:
+    """
+    Claim and run jobs until ``stop`` (a threading or multiprocessing Event) is set.
+
+    With ``burst`` it returns as soon as no job is visible. Returns the number of jobs run.
+    """
+    processed = 0
+    while not stop.is_set():
+        close_old_connections()
+        try:
+            job = claim(worker)
+        except DatabaseError:
+            logger.exception("Could not claim a job")
+            job = None
+        if job is None:
+            if burst:
+                break
+            stop.wait(poll_interval)
+            continue
+        try:
+            execute(job, worker)
+        except DatabaseError:
+            # The outcome could not be recorded; the job becomes visible again after its timeout
+            logger.exception("Could not record the outcome of job %s (%s)", job.pk, job.name)
+        processed += 1
+    close_old_connections()
+    return processed
+
+
+def retry(job: BackgroundJob) -> bool:
+    """Queue a failed job again with a fresh set of attempts; False if it has not failed"""
+    return bool(BackgroundJob.objects.filter(pk=job.pk, status='Failed').update(
+        status='Queued', attempts=0, visible_at=timezone.now(), finished_at=None,
+    ))
+
+
+def purge_finished(older_than: timedelta) -> int:
+    """Delete succeeded and failed jobs that finished more than ``older_than`` ago"""
+    cutoff = timezone.now() - older_than
+    deleted, _ = BackgroundJob.objects.filter(status__in=('Succeeded', 'Failed'), finished_at__lt=cutoff).delete()
+    return deleted
+
+
+def queue_stats() -> Dict[str, Any]:
+    """Jobs per status and how long the oldest visible queued job has been waiting"""
+    counts = dict(BackgroundJob.objects.values_list('status').annotate(count=Count('id')).order_by())
+    now = timezone.now()
+    oldest = BackgroundJob.objects.filter(status='Queued', visible_at__lte=now).aggregate(oldest=Min('visible_at'))['oldest']
+    return {
+        'counts': {status: counts.get(status, 0) for status, _ in BackgroundJob.STATUS_CHOICES},
+        'oldest_queued_seconds': round((now - oldest).total_seconds(), 1) if oldest else 0,
+        'handlers': sorted(HANDLERS),
+    }
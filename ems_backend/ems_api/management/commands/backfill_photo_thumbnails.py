@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from ems_api.models import Employee
+from ems_api.thumbnails import generate_thumbnails, schedule_thumbnails, thumbnail_urls
+
+
+class Command(BaseCommand):
+    help = "Generate profile photo thumbnails for employees whose current photo has none"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Regenerate existing thumbnails too')
+        parser.add_argument('--background', action='store_true',
+                            help='Queue one background job per employee for run_worker instead')
+
+    def handle(self, *args, **options):
+        generated = failed = queued = 0
+        employees = Employee.objects.exclude(profile_photo='').exclude(profile_photo__isnull=True)
+        for employee in employees.only('pk', 'profile_photo', 'profile_photo_thumbnails').iterator():
+            if not options['force'] and thumbnail_urls(employee) is not None:
+                continue
+            if options['background']:
+                schedule_thumbnails(employee.pk)
+                queued += 1
+            elif generate_thumbnails(employee.pk):
+                generated += 1
+            else:
+                failed += 1
+        if options['background']:
+            self.stdout.write(self.style.SUCCESS(f"Queued thumbnail jobs for {queued} employees."))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Backfill complete. Generated thumbnails for {generated} employees, {failed} photos missing or unreadable."
+        ))
@@ -1,8 +1,8 @@
-from django.core.management.base import BaseCommand
-from ems_api.models import Employee, AttendanceRecord, LeaveRequest, Task
-import json
 import os
-from datetime import datetime
+
+from django.core.management.base import BaseCommand
+from ems_api import jobs
+from ems_api.chatbot_export import default_store_path, export_named_snapshot
 
 
 class Command(BaseCommand):
@@ -10,51 +10,44 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument('--output', default='ems_backend/chatbot_live_data.json', help='Output JSON path')
+        parser.add_argument('--incremental', action='store_true',
+                            help='Keep a segmented store next to the output and only read/write changed rows')
+        parser.add_argument('--store', help='Segmented store directory (default: <output>.segments)')
+        parser.add_argument('--compact', action='store_true',
+                            help='Merge the store segments into one per table (implies --incremental)')
+        parser.add_argument('--background', action='store_true',
+                            help='Queue the export as a background job for run_worker instead')
 
     def handle(self, *args, **options):
         output = options['output']
-        os.makedirs(os.path.dirname(output), exist_ok=True)
-
-        # Build comprehensive knowledge payload from live database
-        data = {
-            'timestamp': datetime.now().isoformat(),
-            'data_source': 'live_database',
-            'employees': list(Employee.objects.values(
-                'employee_id', 'name', 'email', 'department', 'designation', 
-                'status', 'joining_date', 'salary', 'date_of_birth', 'age'
-            )),
-            'attendance': list(AttendanceRecord.objects.values(
-                'employee__employee_id', 'employee__name', 'date', 'check_in', 
-                'check_out', 'hours', 'status'
-            )),
-            'leaves': list(LeaveRequest.objects.values(
-                'employee__employee_id', 'employee__name', 'leave_type', 
-                'start_date', 'end_date', 'days', 'status', 'reason'
-            )),
-            'tasks': list(Task.objects.values(
-                'title', 'description', 'assigned_to__employee_id', 
-                'assigned_to__name', 'assigned_by__employee_id', 'priority', 
-                'status', 'progress', 'due_date', 'department'
-            )),
-            'statistics': {
-                'total_employees': Employee.objects.count(),
-                'active_employees': Employee.objects.filter(status='Active').count(),
-                'total_attendance_records': AttendanceRecord.objects.count(),
-                'total_leave_requests': LeaveRequest.objects.count(),
-                'total_tasks': Task.objects.count(),
-                'departments': list(Employee.objects.values_list('department', flat=True).distinct()),
-            }
-        }
-
-        with open(output, 'w', encoding='utf-8') as f:
-            json.dump(data, f, default=str, ensure_ascii=False, indent=2)
+        incremental = options['incremental'] or options['compact'] or options['store']
+        store = (options['store'] or default_store_path(output)) if incremental else None
 
+        if options['background']:
+            # Absolute paths: the worker may run in another directory
+            job = jobs.enqueue('chatbot.export_snapshot', {
+                'kind': 'live',
+                'output': os.path.abspath(output),
+                'store_path': os.path.abspath(store) if store else None,
+                'compact': options['compact'],
+            })
+            self.stdout.write(self.style.SUCCESS(f"Live data export queued as job {job.job_id}"))
+            return
+
+        # Build comprehensive knowledge payload from live database, streamed row by row
+        counts, report = export_named_snapshot('live', output, store_path=store, compact=options['compact'])
+
+        for table, result in report.items():
+            self.stdout.write(
+                f"  {table}: {result['mode']}, {result['rows']} rows and {result['deletes']} deletes written"
+                + (', compacted' if result.get('compacted') else '')
+            )
         self.stdout.write(
             self.style.SUCCESS(
                 f"Chatbot history cleared and retrained with live data at {output}\n"
-                f"Total records: {data['statistics']['total_employees']} employees, "
-                f"{data['statistics']['total_attendance_records']} attendance records, "
-                f"{data['statistics']['total_leave_requests']} leave requests, "
-                f"{data['statistics']['total_tasks']} tasks"
+                f"Total records: {counts['employees']} employees, "
+                f"{counts['attendance']} attendance records, "
+                f"{counts['leaves']} leave requests, "
+                f"{counts['tasks']} tasks"
             )
         )
@@ -0,0 +1,83 @@
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+
+from ems_api import jobs
+from ems_api.blobs import adopt_attachment, collect_garbage, orphan_files, recount_references
+from ems_api.models import TaskAttachment
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete attachment blobs no task attachment has referenced for --grace-hours. "
+        "Optionally recount references, remove blob files without a row, and move attachments "
+        "stored before blobs existed into the blob store (deduplicating them)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-hours', type=float, default=24,
+                            help='Keep unreferenced blobs this long (re-uploads reuse them meanwhile)')
+        parser.add_argument('--recount', action='store_true',
+                            help='Recompute reference counts from the attachments first')
+        parser.add_argument('--orphan-files', action='store_true',
+                            help='Also delete blob files that have no blob row')
+        parser.add_argument('--adopt-legacy', action='store_true',
+                            help='Move attachments without a blob into the blob store first')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be deleted')
+        parser.add_argument('--background', action='store_true',
+                            help='Queue the work as background jobs for run_worker (one per legacy attachment)')
+
+    def handle(self, *args, **options):
+        if options['grace_hours'] < 0:
+            raise CommandError('--grace-hours cannot be negative')
+        grace = timedelta(hours=options['grace_hours'])
+        dry_run = options['dry_run']
+
+        legacy = TaskAttachment.objects.filter(blob__isnull=True)
+        if options['background']:
+            if dry_run:
+                raise CommandError('--background cannot be combined with --dry-run')
+            self.queue_jobs(options, legacy)
+            return
+
+        if options['adopt_legacy'] and dry_run:
+            self.stdout.write(f"Would move {legacy.count()} attachments into the blob store.")
+        elif options['adopt_legacy']:
+            adopted = missing = 0
+            for attachment in legacy.iterator():
+                if adopt_attachment(attachment) is None:
+                    missing += 1
+                else:
+                    adopted += 1
+            self.stdout.write(f"Moved {adopted} attachments into the blob store ({missing} had no file).")
+        if options['recount'] and not dry_run:
+            self.stdout.write(f"Corrected {recount_references()} reference counts.")
+
+        blobs, freed = collect_garbage(grace, dry_run=dry_run)
+        verb = 'Would delete' if dry_run else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(f"{verb} {blobs} unreferenced blobs ({freed} bytes)."))
+
+        if options['orphan_files']:
+            orphans = 0
+            for path in orphan_files(grace):
+                if not dry_run:
+                    default_storage.delete(path)
+                orphans += 1
+            self.stdout.write(self.style.SUCCESS(f"{verb} {orphans} orphaned blob files."))
+
+    def queue_jobs(self, options, legacy):
+        adopting = 0
+        if options['adopt_legacy']:
+            for attachment_id in legacy.values_list('pk', flat=True).iterator():
+                jobs.enqueue('blobs.adopt_attachment', {'attachment_id': attachment_id})
+                adopting += 1
+        # Queued last at a lower priority, so adoptions queued now tend to run first
+        job = jobs.enqueue('blobs.collect_garbage', {
+            'grace_hours': options['grace_hours'],
+            'recount': options['recount'],
+            'remove_orphan_files': options['orphan_files'],
+        })
+        self.stdout.write(self.style.SUCCESS(
+            f"Queued {adopting} attachment moves and garbage collection (job {job.job_id})."
+        ))
@@ -0,0 +1,18 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ems_api.uploads import purge_stale_uploads
+
+
+class Command(BaseCommand):
+    help = "Abort chunked task attachment uploads that received nothing for --hours and delete their partial files."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=float, default=24, help='Idle hours before an upload is abandoned')
+
+    def handle(self, *args, **options):
+        if options['hours'] < 0:
+            raise CommandError('--hours cannot be negative')
+        purged = purge_stale_uploads(timedelta(hours=options['hours']))
+        self.stdout.write(self.style.SUCCESS(f"Purged {purged} stale uploads."))
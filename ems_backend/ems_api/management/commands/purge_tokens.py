@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from rest_framework.authtoken.models import Token
 
@@ -8,5 +9,10 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
         deleted, _ = Token.objects.all().delete()
         self.stdout.write(self.style.SUCCESS(f"Purged {deleted} tokens."))
+        # The delete signals revoked them in the shared cache; per-process caches alone only expire
+        if not settings.TOKEN_AUTH_SHARED_CACHE:
+            self.stdout.write(
+                f"Running servers stop accepting them within TOKEN_AUTH_CACHE_TTL ({settings.TOKEN_AUTH_CACHE_TTL:g}s)."
+            )
 
 
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from ems_api.reports import parse_report_date
+from ems_api.rollups import rebuild_attendance_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily (date, department) attendance rollups from raw attendance records"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='First date to rebuild (YYYY-MM-DD). Defaults to the earliest record.')
+        parser.add_argument('--end', help='Last date to rebuild (YYYY-MM-DD). Defaults to the latest record.')
+
+    def handle(self, *args, **options):
+        try:
+            start_date = parse_report_date(options['start'], 'start')
+            end_date = parse_report_date(options['end'], 'end')
+        except ValueError as e:
+            raise CommandError(str(e))
+        if start_date and end_date and start_date > end_date:
+            raise CommandError('--start must be on or before --end')
+
+        rebuilt = rebuild_attendance_rollups(start_date, end_date)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {rebuilt} attendance rollup rows "
+            f"({start_date or 'beginning'} to {end_date or 'latest'})"
+        ))
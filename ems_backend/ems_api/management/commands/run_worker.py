@@ -0,0 +1,98 @@
+import logging
+import multiprocessing
+import signal
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+logger = logging.getLogger('ems_api.jobs')
+
+# Seconds between purges of old finished jobs by the supervising process
+PURGE_INTERVAL = 3600
+
+
+def _work_process(stop, poll_interval):
+    """Entry point of a pool process; with the spawn start method Django is not set up yet"""
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+    from ems_api import jobs
+
+    # Ctrl+C and service managers signal the whole process group: the supervisor stops
+    # this process through ``stop`` once it has finished its current job
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    jobs.work(jobs.worker_name(), stop, poll_interval)
+
+
+class Command(BaseCommand):
+    help = (
+        "Run background jobs (ems_api.jobs) in a pool of worker processes until interrupted. "
+        "Crashed processes are restarted; on SIGINT/SIGTERM running jobs finish first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=getattr(settings, 'JOB_WORKER_PROCESSES', 2),
+                            help='Worker processes (default JOB_WORKER_PROCESSES)')
+        parser.add_argument('--poll-interval', type=float, default=getattr(settings, 'JOB_POLL_INTERVAL', 1.0),
+                            help='Seconds to wait before checking an empty queue again')
+        parser.add_argument('--once', action='store_true',
+                            help='Run the jobs that are due in this process, then exit (e.g. from cron)')
+
+    def handle(self, *args, **options):
+        from ems_api import jobs
+
+        if options['processes'] < 1:
+            raise CommandError('--processes must be at least 1')
+        retention = timedelta(days=getattr(settings, 'JOB_RETENTION_DAYS', 7))
+
+        if options['once']:
+            processed = jobs.work(jobs.worker_name(), threading.Event(), burst=True)
+            purged = jobs.purge_finished(retention)
+            self.stdout.write(self.style.SUCCESS(f"Ran {processed} jobs, purged {purged} finished jobs."))
+            return
+
+        stop = multiprocessing.Event()
+        stopping = []
+        # Only a flag here: setting the Event inside a signal handler can deadlock on its lock
+        signal.signal(signal.SIGINT, lambda signum, frame: stopping.append(signum))
+        signal.signal(signal.SIGTERM, lambda signum, frame: stopping.append(signum))
+
+        def start():
+            # Forked children must not share this process's database connections
+            connections.close_all()
+            process = multiprocessing.Process(target=_work_process, args=(stop, options['poll_interval']),
+                                              name='ems-job-worker')
+            process.start()
+            return process
+
+        pool = [start() for _ in range(options['processes'])]
+        self.stdout.write(self.style.SUCCESS(
+            f"Started {len(pool)} job worker processes ({', '.join(str(p.pid) for p in pool)}); Ctrl+C to stop"
+        ))
+
+        next_purge = time.monotonic()
+        while not stopping:
+            for index, process in enumerate(pool):
+                if not process.is_alive():
+                    logger.warning("Job worker %s exited with code %s; starting another", process.pid, process.exitcode)
+                    pool[index] = start()
+            if time.monotonic() >= next_purge:
+                purged = jobs.purge_finished(retention)
+                if purged:
+                    logger.info("Purged %s finished jobs", purged)
+                connections.close_all()
+                next_purge = time.monotonic() + PURGE_INTERVAL
+            time.sleep(1)
+
+        self.stdout.write("Stopping: waiting for running jobs to finish...")
+        stop.set()
+        for process in pool:
+            process.join()
+        self.stdout.write(self.style.SUCCESS("Job workers stopped."))
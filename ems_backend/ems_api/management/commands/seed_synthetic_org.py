@@ -0,0 +1,193 @@
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from ems_api.chatbot_cache import bump_data_version
+from ems_api.models import Employee, AttendanceRecord, LeaveRequest, Task, TaskAttachment, TaskProgressUpdate
+from ems_api.reports import parse_report_date
+from ems_api.rollups import rebuild_attendance_rollups
+
+
+DEPARTMENTS = ['Engineering', 'HR', 'Sales', 'Finance', 'Marketing', 'Operations', 'Support', 'Legal', 'IT', 'Admin']
+DESIGNATIONS = ['Associate', 'Engineer', 'Senior Engineer', 'Analyst', 'Specialist', 'Manager', 'Lead']
+FIRST_NAMES = ['Aarav', 'Priya', 'Rahul', 'Neha', 'Vikram', 'Ananya', 'Karan', 'Isha', 'Rohan', 'Meera',
+               'Arjun', 'Kavya', 'Siddharth', 'Pooja', 'Aditya', 'Sneha', 'Nikhil', 'Divya', 'Manish', 'Ritika']
+LAST_NAMES = ['Sharma', 'Patel', 'Verma', 'Gupta', 'Iyer', 'Reddy', 'Nair', 'Mehta', 'Kapoor', 'Joshi',
+              'Singh', 'Desai', 'Menon', 'Chopra', 'Bose', 'Kulkarni', 'Malhotra', 'Pillai', 'Saxena', 'Das']
+ATTENDANCE_STATUSES = ['Present', 'Absent', 'Late', 'Half Day']
+ATTENDANCE_WEIGHTS = [0.85, 0.04, 0.08, 0.03]
+TASK_STATUSES = ['Not Started', 'In Progress', 'Completed', 'On Hold']
+BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a synthetic organisation (employees, weekday attendance, leave requests, tasks with "
+        "attachments and progress updates) for benchmarks. The same options and --seed give the same data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=200, help='Employees to create')
+        parser.add_argument('--departments', type=int, default=8, help=f'Departments to spread them over (max {len(DEPARTMENTS)})')
+        parser.add_argument('--years', type=float, default=1, help='Years of weekday attendance ending at --end-date')
+        parser.add_argument('--end-date', default='2025-06-30', help='Last attendance date (YYYY-MM-DD)')
+        parser.add_argument('--leaves-per-employee', type=int, default=6)
+        parser.add_argument('--tasks-per-employee', type=int, default=4)
+        parser.add_argument('--attachments-per-task', type=int, default=1)
+        parser.add_argument('--updates-per-task', type=int, default=2)
+        parser.add_argument('--seed', type=int, default=42, help='Random seed')
+        parser.add_argument('--flush', action='store_true',
+                            help='Delete existing employees (and everything attached to them) first')
+
+    def handle(self, *args, **options):
+        try:
+            end_date = parse_report_date(options['end_date'], 'end-date')
+        except ValueError as e:
+            raise CommandError(str(e))
+        if options['employees'] < 2:
+            raise CommandError('--employees must be at least 2')
+        if not 1 <= options['departments'] <= len(DEPARTMENTS):
+            raise CommandError(f'--departments must be between 1 and {len(DEPARTMENTS)}')
+        if Employee.objects.exists() and not options['flush']:
+            raise CommandError('The database already contains employees. Pass --flush to replace them.')
+
+        rng = random.Random(options['seed'])
+        departments = DEPARTMENTS[:options['departments']]
+        start_date = end_date - timedelta(days=int(options['years'] * 365) - 1)
+
+        with transaction.atomic():
+            if options['flush']:
+                Employee.objects.all().delete()
+            employees = self.create_employees(rng, options['employees'], departments, start_date)
+            attendance = self.create_attendance(rng, employees, start_date, end_date)
+            leaves = self.create_leaves(rng, employees, options['leaves_per_employee'], start_date, end_date)
+            tasks, attachments, updates = self.create_tasks(
+                rng, employees, options['tasks_per_employee'], options['attachments_per_task'],
+                options['updates_per_task'], end_date,
+            )
+            # bulk_create skips the model signals
+            bump_data_version('employees', 'attendance', 'leaves', 'tasks')
+        # A flush also removed the attendance of earlier seeds, outside this date range
+        rollups = rebuild_attendance_rollups() if options['flush'] else rebuild_attendance_rollups(start_date, end_date)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(employees)} employees in {len(departments)} departments, {attendance} attendance records "
+            f"({start_date} to {end_date}), {leaves} leave requests, {tasks} tasks, {attachments} attachments, "
+            f"{updates} progress updates and {rollups} attendance rollups"
+        ))
+
+    def create_employees(self, rng, count, departments, start_date):
+        today = date.today()
+        employees = []
+        for i in range(count):
+            date_of_birth = date(rng.randint(1965, 2000), rng.randint(1, 12), rng.randint(1, 28))
+            employees.append(Employee(
+                employee_id=f"SYN{i:06d}",
+                name=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                email=f"synthetic.{i}@example.com",
+                department=departments[i % len(departments)],
+                designation=rng.choice(DESIGNATIONS),
+                joining_date=start_date - timedelta(days=rng.randint(0, 3650)),
+                status='Inactive' if rng.random() < 0.05 else 'Active',
+                phone=f"+91 9{i:09d}",
+                salary=Decimal(rng.randrange(30000, 150000, 500)),
+                date_of_birth=date_of_birth,
+                # Employee.save() computes this; bulk_create does not call it
+                age=today.year - date_of_birth.year - ((today.month, today.day) < (date_of_birth.month, date_of_birth.day)),
+            ))
+        Employee.objects.bulk_create(employees, batch_size=BATCH_SIZE)
+        return list(Employee.objects.order_by('id'))
+
+    def create_attendance(self, rng, employees, start_date, end_date):
+        created = 0
+        batch = []
+        current = start_date
+        while current <= end_date:
+            if current.weekday() < 5:
+                for employee in employees:
+                    status = rng.choices(ATTENDANCE_STATUSES, ATTENDANCE_WEIGHTS)[0]
+                    hours = {'Absent': 0, 'Half Day': 4}.get(status, rng.choice([7.5, 8, 8.5, 9]))
+                    batch.append(AttendanceRecord(
+                        date=current, employee=employee, status=status, hours=Decimal(str(hours)),
+                    ))
+                if len(batch) >= BATCH_SIZE:
+                    AttendanceRecord.objects.bulk_create(batch)
+                    created += len(batch)
+                    batch = []
+            current += timedelta(days=1)
+        AttendanceRecord.objects.bulk_create(batch)
+        return created + len(batch)
+
+    def create_leaves(self, rng, employees, per_employee, start_date, end_date):
+        span = (end_date - start_date).days
+        leaves = []
+        for employee in employees:
+            for _ in range(per_employee):
+                start = start_date + timedelta(days=rng.randint(0, span))
+                days = rng.randint(1, 5)
+                status = rng.choices(['Pending', 'Approved', 'Rejected'], [0.2, 0.7, 0.1])[0]
+                leaves.append(LeaveRequest(
+                    employee=employee,
+                    leave_type=rng.choice(LeaveRequest.LEAVE_TYPE_CHOICES)[0],
+                    start_date=start,
+                    end_date=start + timedelta(days=days - 1),
+                    days=days,
+                    status=status,
+                    reason='Synthetic leave request',
+                    approved_by=None if status == 'Pending' else rng.choice(employees),
+                ))
+        LeaveRequest.objects.bulk_create(leaves, batch_size=BATCH_SIZE)
+        return len(leaves)
+
+    def create_tasks(self, rng, employees, per_employee, attachments_per_task, updates_per_task, end_date):
+        tasks = []
+        for employee in employees:
+            for n in range(per_employee):
+                status = rng.choice(TASK_STATUSES)
+                tasks.append(Task(
+                    title=f"Synthetic task {n + 1} for {employee.employee_id}",
+                    description='Generated for benchmarks',
+                    assigned_to=employee,
+                    assigned_by=rng.choice(employees),
+                    due_date=end_date + timedelta(days=rng.randint(-60, 60)),
+                    priority=rng.choice(Task.PRIORITY_CHOICES)[0],
+                    status=status,
+                    progress={'Not Started': 0, 'Completed': 100}.get(status, rng.randrange(10, 95, 5)),
+                    department=employee.department,
+                    estimated_hours=Decimal(rng.randint(2, 40)),
+                ))
+        Task.objects.bulk_create(tasks, batch_size=BATCH_SIZE)
+        # bulk_create only returns primary keys on some backends (not MySQL)
+        tasks = list(Task.objects.select_related('assigned_to').order_by('id'))
+
+        attachments, updates = [], []
+        for task in tasks:
+            for n in range(attachments_per_task):
+                attachments.append(TaskAttachment(
+                    task=task,
+                    file_name=f"notes_{task.id}_{n + 1}.pdf",
+                    file_path=f"task_attachments/synthetic/notes_{task.id}_{n + 1}.pdf",
+                    file_size=rng.randint(10_000, 5_000_000),
+                    file_type='application/pdf',
+                    uploaded_by=task.assigned_to,
+                    description='Synthetic attachment',
+                ))
+            progress = 0
+            for _ in range(updates_per_task):
+                new_progress = min(100, progress + rng.randrange(5, 40, 5))
+                updates.append(TaskProgressUpdate(
+                    task=task,
+                    updated_by=task.assigned_to,
+                    previous_progress=progress,
+                    new_progress=new_progress,
+                    previous_status='Not Started' if progress == 0 else 'In Progress',
+                    new_status='Completed' if new_progress == 100 else 'In Progress',
+                    update_notes='Synthetic progress update',
+                ))
+                progress = new_progress
+        TaskAttachment.objects.bulk_create(attachments, batch_size=BATCH_SIZE)
+        TaskProgressUpdate.objects.bulk_create(updates, batch_size=BATCH_SIZE)
+        return len(tasks), len(attachments), len(updates)
@@ -1,30 +1,48 @@
-from django.core.management.base import BaseCommand
-from ems_api.models import Employee, AttendanceRecord, LeaveRequest, Task
-import json
 import os
 
+from django.core.management.base import BaseCommand
+from ems_api import jobs
+from ems_api.chatbot_export import default_store_path, export_named_snapshot
+
 
 class Command(BaseCommand):
     help = "Regenerate chatbot knowledge base from live database. Preserves system instructions, overwrites old data."
 
     def add_arguments(self, parser):
         parser.add_argument('--output', default='ems_backend/chatbot_complete_training_data.json', help='Output JSON path')
+        parser.add_argument('--incremental', action='store_true',
+                            help='Keep a segmented store next to the output and only read/write changed rows')
+        parser.add_argument('--store', help='Segmented store directory (default: <output>.segments)')
+        parser.add_argument('--compact', action='store_true',
+                            help='Merge the store segments into one per table (implies --incremental)')
+        parser.add_argument('--background', action='store_true',
+                            help='Queue the export as a background job for run_worker instead')
 
     def handle(self, *args, **options):
         output = options['output']
-        os.makedirs(os.path.dirname(output), exist_ok=True)
-
-        # Build knowledge payload
-        data = {
-            'employees': list(Employee.objects.values('employee_id', 'name', 'email', 'department', 'designation', 'status', 'joining_date', 'salary')),
-            'attendance': list(AttendanceRecord.objects.values('employee__employee_id', 'date', 'check_in', 'check_out', 'hours', 'status')),
-            'leaves': list(LeaveRequest.objects.values('employee__employee_id', 'leave_type', 'start_date', 'end_date', 'days', 'status')),
-            'tasks': list(Task.objects.values('title', 'assigned_to__employee_id', 'assigned_by__employee_id', 'priority', 'status', 'progress', 'due_date', 'department')),
-        }
-
-        with open(output, 'w', encoding='utf-8') as f:
-            json.dump(data, f, default=str, ensure_ascii=False, indent=2)
-
-        self.stdout.write(self.style.SUCCESS(f"Chatbot training data regenerated at {output}"))
-
-
+        incremental = options['incremental'] or options['compact'] or options['store']
+        store = (options['store'] or default_store_path(output)) if incremental else None
+
+        if options['background']:
+            # Absolute paths: the worker may run in another directory
+            job = jobs.enqueue('chatbot.export_snapshot', {
+                'kind': 'training',
+                'output': os.path.abspath(output),
+                'store_path': os.path.abspath(store) if store else None,
+                'compact': options['compact'],
+            })
+            self.stdout.write(self.style.SUCCESS(f"Training data export queued as job {job.job_id}"))
+            return
+
+        # Stream the knowledge payload row by row
+        counts, report = export_named_snapshot('training', output, store_path=store, compact=options['compact'])
+
+        for table, result in report.items():
+            self.stdout.write(
+                f"  {table}: {result['mode']}, {result['rows']} rows and {result['deletes']} deletes written"
+                + (', compacted' if result.get('compacted') else '')
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Chatbot training data regenerated at {output} "
+            f"({', '.join(f'{count} {name}' for name, count in counts.items())})"
+        ))
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:39
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def populate_rollups(apps, schema_editor):
+    AttendanceRecord = apps.get_model('ems_api', 'AttendanceRecord')
+    AttendanceDailyRollup = apps.get_model('ems_api', 'AttendanceDailyRollup')
+    rows = AttendanceRecord.objects.values('date', 'employee__department').annotate(
+        total=Count('pk'),
+        present=Count('pk', filter=Q(status='Present')),
+        absent=Count('pk', filter=Q(status='Absent')),
+        late=Count('pk', filter=Q(status='Late')),
+        half_day=Count('pk', filter=Q(status='Half Day')),
+        total_hours=Sum('hours'),
+    ).order_by()
+    AttendanceDailyRollup.objects.bulk_create([
+        AttendanceDailyRollup(
+            date=row['date'],
+            department=row['employee__department'],
+            total=row['total'],
+            present=row['present'],
+            absent=row['absent'],
+            late=row['late'],
+            half_day=row['half_day'],
+            total_hours=row['total_hours'] or 0,
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ems_api', '0007_add_profile_photo_to_employee'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceDailyRollup',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('department', models.CharField(max_length=50)),
+                ('total', models.IntegerField(default=0)),
+                ('present', models.IntegerField(default=0)),
+                ('absent', models.IntegerField(default=0)),
+                ('late', models.IntegerField(default=0)),
+                ('half_day', models.IntegerField(default=0)),
+                ('total_hours', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'attendance_daily_rollups',
+                'ordering': ['date', 'department'],
+                'unique_together': {('date', 'department')},
+            },
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ems_api', '0010_dataversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskAttachmentUpload',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('upload_id', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('file_name', models.CharField(max_length=255)),
+                ('file_type', models.CharField(max_length=100)),
+                ('file_size', models.BigIntegerField()),
+                ('received', models.BigIntegerField(default=0)),
+                ('sha256', models.CharField(blank=True, max_length=64)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('Uploading', 'Uploading'), ('Completed', 'Completed')], default='Uploading', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('attachment', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='upload', to='ems_api.taskattachment')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='uploads', to='ems_api.task')),
+                ('uploaded_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attachment_uploads', to='ems_api.employee')),
+            ],
+            options={
+                'db_table': 'task_attachment_uploads',
+                'indexes': [models.Index(fields=['status', 'updated_at'], name='upload_status_updated_idx')],
+            },
+        ),
+    ]
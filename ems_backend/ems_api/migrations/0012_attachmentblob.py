@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ems_api', '0011_taskattachmentupload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttachmentBlob',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('file_path', models.CharField(max_length=500)),
+                ('file_size', models.BigIntegerField()),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'attachment_blobs',
+                'indexes': [models.Index(fields=['ref_count', 'updated_at'], name='blob_refs_updated_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='taskattachment',
+            name='blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='attachments', to='ems_api.attachmentblob'),
+        ),
+    ]
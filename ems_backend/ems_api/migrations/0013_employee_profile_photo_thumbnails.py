@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ems_api', '0012_attachmentblob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='profile_photo_thumbnails',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
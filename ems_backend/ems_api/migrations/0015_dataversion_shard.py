@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ems_api', '0014_backgroundjob'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='dataversion',
+            options={'ordering': ['name', 'shard']},
+        ),
+        migrations.AddField(
+            model_name='dataversion',
+            name='shard',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='dataversion',
+            name='name',
+            field=models.CharField(max_length=50),
+        ),
+        migrations.AlterUniqueTogether(
+            name='dataversion',
+            unique_together={('name', 'shard')},
+        ),
+    ]
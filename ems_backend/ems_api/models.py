@@ -1,7 +1,9 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 from datetime import date
+import uuid
 
 def validate_joining_date(value):
     """Validate that joining date is not in the future and not before 2000"""
@@ -41,6 +43,8 @@ class Employee(models.Model):
     manager = models.CharField(max_length=100, null=True, blank=True)
     user = models.OneToOneField(User, on_delete=models.CASCADE, null=True, blank=True)
     profile_photo = models.ImageField(upload_to='profile_photos/', null=True, blank=True)
+    # Pre-sized variants of profile_photo, written by ems_api.thumbnails
+    profile_photo_thumbnails = models.JSONField(default=dict, blank=True, editable=False)
     date_of_birth = models.DateField(
         null=True, 
         blank=True,
@@ -62,6 +66,9 @@ class Employee(models.Model):
     
     class Meta:
         db_table = 'employees'
+        indexes = [
+            models.Index(fields=['department', 'status'], name='employee_dept_status_idx'),
+        ]
 
 
 class AttendanceRecord(models.Model):
@@ -86,6 +93,34 @@ class AttendanceRecord(models.Model):
     class Meta:
         db_table = 'attendance_records'
         unique_together = ['date', 'employee']
+        indexes = [
+            # Keyset pagination walks (date, id); per-employee history walks (employee, date)
+            models.Index(fields=['date', 'id'], name='attendance_date_id_idx'),
+            models.Index(fields=['employee', 'date'], name='attendance_emp_date_idx'),
+            models.Index(fields=['status', 'date'], name='attendance_status_date_idx'),
+        ]
+
+
+class AttendanceDailyRollup(models.Model):
+    """Pre-aggregated attendance counts per (date, department), see rollups.py"""
+    id = models.AutoField(primary_key=True)
+    date = models.DateField()
+    department = models.CharField(max_length=50)
+    total = models.IntegerField(default=0)
+    present = models.IntegerField(default=0)
+    absent = models.IntegerField(default=0)
+    late = models.IntegerField(default=0)
+    half_day = models.IntegerField(default=0)
+    total_hours = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.date} - {self.department} - {self.total} records"
+    
+    class Meta:
+        db_table = 'attendance_daily_rollups'
+        unique_together = ['date', 'department']
+        ordering = ['date', 'department']
 
 
 class LeaveRequest(models.Model):
@@ -118,6 +153,10 @@ class LeaveRequest(models.Model):
     
     class Meta:
         db_table = 'leave_requests'
+        indexes = [
+            models.Index(fields=['status', 'applied_date'], name='leave_status_applied_idx'),
+            models.Index(fields=['applied_date', 'id'], name='leave_applied_id_idx'),
+        ]
 
 
 class Task(models.Model):
@@ -153,6 +192,33 @@ class Task(models.Model):
     
     class Meta:
         db_table = 'tasks'
+        indexes = [
+            models.Index(fields=['status'], name='task_status_idx'),
+            models.Index(fields=['priority'], name='task_priority_idx'),
+            models.Index(fields=['assigned_to', 'status'], name='task_assignee_status_idx'),
+            models.Index(fields=['last_updated', 'id'], name='task_updated_id_idx'),
+        ]
+
+
+class AttachmentBlob(models.Model):
+    """One stored copy of an attachment's content, shared by every attachment with the same SHA-256"""
+    id = models.AutoField(primary_key=True)
+    sha256 = models.CharField(max_length=64, unique=True)
+    file_path = models.CharField(max_length=500)
+    file_size = models.BigIntegerField()
+    # Attachments pointing at this blob; kept by ems_api.blobs, 0 means collectable
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.sha256} ({self.ref_count} refs)"
+    
+    class Meta:
+        db_table = 'attachment_blobs'
+        indexes = [
+            models.Index(fields=['ref_count', 'updated_at'], name='blob_refs_updated_idx'),
+        ]
 
 
 class TaskAttachment(models.Model):
@@ -160,6 +226,8 @@ class TaskAttachment(models.Model):
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='attachments')
     file_name = models.CharField(max_length=255)
     file_path = models.CharField(max_length=500)
+    # Content-addressed storage; null for attachments stored before blobs existed
+    blob = models.ForeignKey(AttachmentBlob, on_delete=models.PROTECT, null=True, blank=True, related_name='attachments')
     file_size = models.BigIntegerField()
     file_type = models.CharField(max_length=100)
     uploaded_by = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='uploaded_files')
@@ -173,6 +241,40 @@ class TaskAttachment(models.Model):
         db_table = 'task_attachments'
 
 
+class TaskAttachmentUpload(models.Model):
+    """A chunked attachment upload in progress; becomes a TaskAttachment on completion"""
+    STATUS_CHOICES = [
+        ('Uploading', 'Uploading'),
+        ('Completed', 'Completed'),
+    ]
+
+    id = models.AutoField(primary_key=True)
+    upload_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='uploads')
+    uploaded_by = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='attachment_uploads')
+    file_name = models.CharField(max_length=255)
+    file_type = models.CharField(max_length=100)
+    file_size = models.BigIntegerField()
+    # Bytes received so far, i.e. the offset of the next chunk
+    received = models.BigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True)
+    description = models.TextField(null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='Uploading')
+    attachment = models.OneToOneField(TaskAttachment, on_delete=models.SET_NULL, null=True, blank=True,
+                                      related_name='upload')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.file_name} ({self.received}/{self.file_size}) - {self.status}"
+
+    class Meta:
+        db_table = 'task_attachment_uploads'
+        indexes = [
+            models.Index(fields=['status', 'updated_at'], name='upload_status_updated_idx'),
+        ]
+
+
 class TaskProgressUpdate(models.Model):
     id = models.AutoField(primary_key=True)
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='progress_updates')
@@ -190,3 +292,66 @@ class TaskProgressUpdate(models.Model):
     class Meta:
         db_table = 'task_progress_updates'
         ordering = ['-updated_at']
+
+
+class DataVersion(models.Model):
+    """
+    Write counter per table, bumped on every change; cached chatbot answers are keyed on it.
+
+    Each table's counter is split over several ``shard`` rows so concurrent
+    writers rarely update the same row; the table's version is their sum.
+    """
+    id = models.AutoField(primary_key=True)
+    name = models.CharField(max_length=50)
+    shard = models.PositiveSmallIntegerField(default=0)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.name}[{self.shard}] v{self.version}"
+    
+    class Meta:
+        db_table = 'data_versions'
+        ordering = ['name', 'shard']
+        unique_together = ['name', 'shard']
+
+
+class BackgroundJob(models.Model):
+    """Deferred work run by ``manage.py run_worker``; queued and claimed through ems_api.jobs"""
+    STATUS_CHOICES = [
+        ('Queued', 'Queued'),
+        ('Running', 'Running'),
+        ('Succeeded', 'Succeeded'),
+        ('Failed', 'Failed'),
+    ]
+    
+    id = models.AutoField(primary_key=True)
+    job_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    # Name the handler was registered under, and its keyword arguments
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='Queued')
+    # Higher runs first
+    priority = models.IntegerField(default=0)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    # Workers ignore the job until then: the retry backoff while queued, the visibility timeout while running
+    visible_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='background_jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.name} ({self.job_id}) - {self.status}"
+    
+    class Meta:
+        db_table = 'background_jobs'
+        indexes = [
+            models.Index(fields=['status', 'visible_at'], name='job_status_visible_idx'),
+            models.Index(fields=['status', 'finished_at'], name='job_status_finished_idx'),
+        ]
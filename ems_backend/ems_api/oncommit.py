@@ -0,0 +1,48 @@
+"""
+Work collected during a transaction and done once after it commits.
+
+Model signal receivers that maintain derived data (rollup buckets, data
+version counters) would otherwise repeat their work for every row a
+transaction saves. ``CommitBatch`` gathers their items per thread and
+database, and the first commit callback to run hands all of them to the
+handler at once.
+"""
+
+import threading
+from functools import partial
+from typing import Callable, Hashable, Iterable, Set
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+
+class CommitBatch:
+    """
+    Items added by each thread, handled together when its transaction commits.
+
+    Every ``add`` registers its own ``on_commit`` callback, so a batch is
+    handled even when the callbacks of an earlier savepoint were dropped by a
+    rollback; callbacks that find the batch already handled do nothing. Items
+    added in a transaction that rolled back stay pending until the next
+    commit, so ``handler`` must be safe to repeat (recompute or bump, never
+    apply a delta). Outside a transaction items are handled immediately.
+    """
+
+    def __init__(self, handler: Callable[[Set[Hashable], str], None]):
+        self.handler = handler
+        self._local = threading.local()
+
+    def pending(self, using: str = DEFAULT_DB_ALIAS) -> Set[Hashable]:
+        batches = self._local.__dict__.setdefault('batches', {})
+        return batches.setdefault(using, set())
+
+    def add(self, items: Iterable[Hashable], using: str = None) -> None:
+        using = using or DEFAULT_DB_ALIAS
+        self.pending(using).update(items)
+        transaction.on_commit(partial(self.flush, using), using=using)
+
+    def flush(self, using: str = DEFAULT_DB_ALIAS) -> None:
+        pending = self.pending(using)
+        if pending:
+            items = set(pending)
+            pending.clear()
+            self.handler(items, using)
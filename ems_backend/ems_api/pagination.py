@@ -0,0 +1,144 @@
+"""
+Keyset (cursor) pagination for the large EMS listings.
+
+Instead of OFFSET, the cursor carries the ordering values of the row at the
+edge of the current page and the next page is fetched with a
+``WHERE (date, id) < (:date, :id)`` style filter. Fetching page N therefore
+costs the same as fetching page 1.
+"""
+
+import base64
+import json
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over a compound ordering that must be unique and non-null,
+    e.g. ``('-date', '-id')``. Subclasses set ``ordering``.
+
+    Clients may opt in to a different page size with ``?page_size=``, capped at
+    ``max_page_size``.
+    """
+    ordering = ('-id',)
+    page_size = 50
+    max_page_size = 500
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    @property
+    def fields(self):
+        return [name.lstrip('-') for name in self.ordering]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.model = queryset.model
+
+        position, reverse = self.decode_cursor(request)
+        ordering = self.reversed_ordering() if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.keyset_filter(position, reverse))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        # Links point past the last row (next) or before the first row (previous)
+        self.next_position = None
+        self.previous_position = None
+        if rows:
+            if has_more or reverse:
+                self.next_position = self.row_position(rows[-1])
+            if position is not None and (has_more or not reverse):
+                self.previous_position = self.row_position(rows[0])
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_link(self.next_position, reverse=False),
+            'previous': self.get_link(self.previous_position, reverse=True),
+            'results': data,
+        })
+
+    def get_page_size(self, request):
+        try:
+            requested = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if requested <= 0:
+            return self.page_size
+        return min(requested, self.max_page_size)
+
+    def reversed_ordering(self):
+        return tuple(name[1:] if name.startswith('-') else f'-{name}' for name in self.ordering)
+
+    def keyset_filter(self, position, reverse):
+        """Rows strictly after ``position`` in the (possibly reversed) ordering"""
+        clauses = []
+        for index, name in enumerate(self.ordering):
+            field = self.fields[index]
+            descending = name.startswith('-') != reverse
+            lookup = 'lt' if descending else 'gt'
+            equal = {self.fields[i]: position[i] for i in range(index)}
+            clauses.append(Q(**equal, **{f'{field}__{lookup}': position[index]}))
+        # The redundant bound on the leading column lets the database seek the index range
+        leading = self.fields[0]
+        leading_lookup = 'lte' if self.ordering[0].startswith('-') != reverse else 'gte'
+        return Q(**{f'{leading}__{leading_lookup}': position[0]}) & reduce(or_, clauses)
+
+    def row_position(self, row):
+        return [getattr(row, field) for field in self.fields]
+
+    def encode_cursor(self, position, reverse):
+        payload = {
+            'p': [value.isoformat() if hasattr(value, 'isoformat') else value for value in position],
+            'r': int(reverse),
+        }
+        return base64.urlsafe_b64encode(json.dumps(payload).encode('ascii')).decode('ascii')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('ascii'))
+            values = payload['p']
+            if len(values) != len(self.fields):
+                raise ValueError('cursor does not match ordering')
+            position = [
+                self.model._meta.get_field(field).to_python(value)
+                for field, value in zip(self.fields, values)
+            ]
+            return position, bool(payload.get('r'))
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_link(self, position, reverse):
+        if position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(position, reverse))
+
+
+class AttendanceKeysetPagination(KeysetPagination):
+    ordering = ('-date', '-id')
+
+
+class LeaveRequestKeysetPagination(KeysetPagination):
+    ordering = ('-applied_date', '-id')
+
+
+class TaskKeysetPagination(KeysetPagination):
+    ordering = ('-last_updated', '-id')
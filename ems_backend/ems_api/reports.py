@@ -0,0 +1,237 @@
+"""
+Aggregate reporting queries for the EMS Reports page.
+
+Every report is computed with grouped ``annotate()``/``aggregate()`` queries so
+the database does the counting and only the resulting numbers leave the server.
+The aggregate definitions (``*_aggregates()``) and ``aggregate_summary`` /
+``grouped_summary`` are shared with the chatbot summaries in chatbot_tools.py.
+"""
+
+from datetime import date
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Optional
+
+from django.db.models import Count, Q, Sum
+from django.utils.dateparse import parse_date
+
+from .models import Employee, AttendanceRecord, AttendanceDailyRollup, LeaveRequest, Task
+
+
+def parse_report_date(value: Optional[str], name: str) -> Optional[date]:
+    """Parse an optional YYYY-MM-DD query parameter, raising ValueError when malformed"""
+    if not value:
+        return None
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValueError(f"Invalid {name} '{value}'. Expected format YYYY-MM-DD")
+    return parsed
+
+
+def choice_key(value: str) -> str:
+    """Turn a choice value such as 'Half Day' into a response key ('half_day')"""
+    return value.lower().replace(' ', '_')
+
+
+def choice_counts(field: str, choices: Iterable, suffix: str = '') -> Dict[str, Count]:
+    """Build one conditional ``Count`` per choice of ``field``"""
+    return {
+        f"{choice_key(value)}{suffix}": Count('pk', filter=Q(**{field: value}))
+        for value, _ in choices
+    }
+
+
+def _number(value: Any) -> Any:
+    """Normalise aggregate output (None/Decimal) to JSON friendly numbers"""
+    if value is None:
+        return 0
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def aggregate_summary(queryset, aggregates: Dict[str, Any]) -> Dict[str, Any]:
+    """Compute every aggregate in ``aggregates`` over ``queryset`` in one query"""
+    return {key: _number(value) for key, value in queryset.aggregate(**aggregates).items()}
+
+
+def grouped_summary(queryset, group_by: str, aggregates: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run a single GROUP BY query and roll the rows up into overall totals.
+
+    Returns ``{'totals': {...}, 'groups': {group_value: {...}}}`` where every
+    aggregate in ``aggregates`` is additive (counts and sums).
+    """
+    rows = queryset.values(group_by).annotate(**aggregates).order_by(group_by)
+
+    totals = {key: 0 for key in aggregates}
+    groups = {}
+    for row in rows:
+        group = row.pop(group_by)
+        values = {key: _number(row[key]) for key in aggregates}
+        groups[group] = values
+        for key, value in values.items():
+            totals[key] += value
+    return {'totals': totals, 'groups': groups}
+
+
+def attendance_aggregates() -> Dict[str, Any]:
+    """Status counts and hours summed over ``AttendanceDailyRollup`` rows"""
+    return {
+        'total': Sum('total'),
+        **{
+            choice_key(value): Sum(choice_key(value))
+            for value, _ in AttendanceRecord.ATTENDANCE_STATUS_CHOICES
+        },
+        'total_hours': Sum('total_hours'),
+    }
+
+
+def leave_aggregates() -> Dict[str, Any]:
+    """Status and leave type counts plus total days over ``LeaveRequest`` rows"""
+    return {
+        'total': Count('pk'),
+        **choice_counts('status', LeaveRequest.LEAVE_STATUS_CHOICES),
+        **choice_counts('leave_type', LeaveRequest.LEAVE_TYPE_CHOICES),
+        'total_days': Sum('days'),
+    }
+
+
+def task_aggregates() -> Dict[str, Any]:
+    """Status and priority counts plus summed progress over ``Task`` rows"""
+    return {
+        'total': Count('pk'),
+        **choice_counts('status', Task.STATUS_CHOICES),
+        **choice_counts('priority', Task.PRIORITY_CHOICES, suffix='_priority'),
+        'progress_total': Sum('progress'),
+    }
+
+
+def _percentage(part, whole) -> float:
+    return round(part / whole * 100, 2) if whole else 0
+
+
+def employee_report(department: Optional[str] = None) -> Dict[str, Any]:
+    """Headcount, status split, average salary and department distribution"""
+    employees = Employee.objects.all()
+    if department:
+        employees = employees.filter(department=department)
+
+    summary = grouped_summary(employees, 'department', {
+        'total': Count('pk'),
+        **choice_counts('status', Employee.EMPLOYEE_STATUS_CHOICES),
+        'salary_total': Sum('salary'),
+        'salary_count': Count('salary'),
+    })
+    totals = summary['totals']
+
+    return {
+        'total': totals['total'],
+        'active': totals['active'],
+        'inactive': totals['inactive'],
+        'avg_salary': round(totals['salary_total'] / totals['salary_count'], 2) if totals['salary_count'] else 0,
+        'departments': {dept: values['total'] for dept, values in summary['groups'].items()},
+    }
+
+
+def attendance_report(start_date: Optional[date] = None, end_date: Optional[date] = None,
+                      department: Optional[str] = None) -> Dict[str, Any]:
+    """Attendance status counts and working hours, overall and per department"""
+    # Read the (date, department) rollups rather than scanning raw attendance records
+    rollups = AttendanceDailyRollup.objects.all()
+    if start_date:
+        rollups = rollups.filter(date__gte=start_date)
+    if end_date:
+        rollups = rollups.filter(date__lte=end_date)
+    if department:
+        rollups = rollups.filter(department=department)
+
+    summary = grouped_summary(rollups, 'department', attendance_aggregates())
+
+    def describe(values):
+        return {
+            **values,
+            'total_hours': round(values['total_hours'], 2),
+            'avg_hours_per_day': round(values['total_hours'] / values['total'], 2) if values['total'] else 0,
+            'attendance_rate': _percentage(values['present'], values['total']),
+        }
+
+    return {
+        **describe(summary['totals']),
+        'by_department': {dept: describe(values) for dept, values in summary['groups'].items()},
+    }
+
+
+def leave_report(start_date: Optional[date] = None, end_date: Optional[date] = None,
+                 department: Optional[str] = None) -> Dict[str, Any]:
+    """Leave request counts by status and type, plus total days requested"""
+    requests = LeaveRequest.objects.all()
+    if start_date:
+        requests = requests.filter(end_date__gte=start_date)
+    if end_date:
+        requests = requests.filter(start_date__lte=end_date)
+    if department:
+        requests = requests.filter(employee__department=department)
+
+    summary = grouped_summary(requests, 'employee__department', leave_aggregates())
+    type_keys = [choice_key(value) for value, _ in LeaveRequest.LEAVE_TYPE_CHOICES]
+
+    def describe(values):
+        result = {key: value for key, value in values.items() if key not in type_keys}
+        result['types'] = {
+            label: values[choice_key(value)] for value, label in LeaveRequest.LEAVE_TYPE_CHOICES
+        }
+        return result
+
+    return {
+        **describe(summary['totals']),
+        'by_department': {dept: describe(values) for dept, values in summary['groups'].items()},
+    }
+
+
+def task_report(start_date: Optional[date] = None, end_date: Optional[date] = None,
+                department: Optional[str] = None) -> Dict[str, Any]:
+    """Task status and priority breakdown with average progress"""
+    tasks = Task.objects.all()
+    if start_date:
+        tasks = tasks.filter(assigned_date__gte=start_date)
+    if end_date:
+        tasks = tasks.filter(assigned_date__lte=end_date)
+    if department:
+        tasks = tasks.filter(department=department)
+
+    summary = grouped_summary(tasks, 'department', task_aggregates())
+
+    def describe(values):
+        result = dict(values)
+        progress_total = result.pop('progress_total')
+        result['avg_progress'] = round(progress_total / values['total'], 2) if values['total'] else 0
+        result['completion_rate'] = _percentage(values['completed'], values['total'])
+        result['priorities'] = {
+            label: values[f"{choice_key(value)}_priority"] for value, label in Task.PRIORITY_CHOICES
+        }
+        return result
+
+    return {
+        **describe(summary['totals']),
+        'by_department': {dept: describe(values) for dept, values in summary['groups'].items()},
+    }
+
+
+def overview_report(start_date: Optional[date] = None, end_date: Optional[date] = None,
+                    department: Optional[str] = None) -> Dict[str, Any]:
+    """All headline numbers for the Reports overview tab"""
+    attendance = attendance_report(start_date, end_date, department)
+    leave = leave_report(start_date, end_date, department)
+    tasks = task_report(start_date, end_date, department)
+    for section in (attendance, leave, tasks):
+        section.pop('by_department')
+
+    return {
+        'employees': employee_report(department),
+        'attendance': attendance,
+        'leave': leave,
+        'tasks': tasks,
+    }
@@ -0,0 +1,179 @@
+"""
+Daily attendance rollups.
+
+``AttendanceDailyRollup`` keeps one row per (date, department) with status
+counts and total hours, so summaries read O(days x departments) rows instead
+of scanning every record. Model signals on attendance records and employee
+department changes refresh the buckets a transaction touched once it commits;
+``bulk_create`` and queryset ``update`` send no signals, so those write paths
+call ``refresh_attendance_rollups`` themselves.
+"""
+
+from collections import defaultdict
+from datetime import date
+from typing import Iterable, Optional
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.utils import timezone
+
+from .models import AttendanceRecord, AttendanceDailyRollup, Employee
+from .oncommit import CommitBatch
+from .reports import choice_counts
+
+
+ROLLUP_AGGREGATES = {
+    'total': Count('pk'),
+    **choice_counts('status', AttendanceRecord.ATTENDANCE_STATUS_CHOICES),
+    'total_hours': Sum('hours'),
+}
+ROLLUP_FIELDS = ['total', 'present', 'absent', 'late', 'half_day', 'total_hours']
+
+
+def _build_rollups(records):
+    """Group attendance records by (date, department) into unsaved rollup rows"""
+    rows = records.values('date', 'employee__department').annotate(**ROLLUP_AGGREGATES).order_by()
+    return [
+        AttendanceDailyRollup(
+            date=row['date'],
+            department=row['employee__department'],
+            total=row['total'],
+            present=row['present'],
+            absent=row['absent'],
+            late=row['late'],
+            half_day=row['half_day'],
+            total_hours=row['total_hours'] or 0,
+        )
+        for row in rows
+    ]
+
+
+def refresh_attendance_rollups(dates: Iterable[date], departments: Iterable[str]) -> int:
+    """
+    Recompute the rollup buckets for the given dates and departments.
+
+    Called by attendance write paths with the (date, department) pairs they
+    changed, including the previous values when a record moved buckets.
+
+    The bucket rows are locked before the records are counted, so concurrent
+    refreshes of a bucket run one after the other and the last one counts
+    every record committed before it (Django runs MySQL at READ COMMITTED).
+    Missing buckets are inserted empty first so that they can be locked too.
+    """
+    dates = sorted({d for d in dates if d})
+    departments = sorted({d for d in departments if d})
+    if not dates or not departments:
+        return 0
+
+    buckets = AttendanceDailyRollup.objects.filter(date__in=dates, department__in=departments)
+    with transaction.atomic():
+        # Inserted and locked in one order so two refreshes cannot deadlock
+        AttendanceDailyRollup.objects.bulk_create(
+            [AttendanceDailyRollup(date=day, department=department) for day in dates for department in departments],
+            ignore_conflicts=True,
+        )
+        locked = {(bucket.date, bucket.department): bucket
+                  for bucket in buckets.select_for_update().order_by('date', 'department')}
+
+        records = AttendanceRecord.objects.filter(date__in=dates, employee__department__in=departments)
+        rollups = _build_rollups(records)
+        now = timezone.now()
+        for rollup in rollups:
+            rollup.pk = locked.pop((rollup.date, rollup.department)).pk
+            rollup.updated_at = now
+        AttendanceDailyRollup.objects.bulk_update(rollups, ROLLUP_FIELDS + ['updated_at'])
+        # Buckets left without records are not kept
+        AttendanceDailyRollup.objects.filter(pk__in=[bucket.pk for bucket in locked.values()]).delete()
+    return len(rollups)
+
+
+def rebuild_attendance_rollups(start_date: Optional[date] = None, end_date: Optional[date] = None) -> int:
+    """Rebuild every rollup bucket in a date range (all dates when no range is given)"""
+    records = AttendanceRecord.objects.all()
+    rollups_qs = AttendanceDailyRollup.objects.all()
+    if start_date:
+        records = records.filter(date__gte=start_date)
+        rollups_qs = rollups_qs.filter(date__gte=start_date)
+    if end_date:
+        records = records.filter(date__lte=end_date)
+        rollups_qs = rollups_qs.filter(date__lte=end_date)
+
+    with transaction.atomic():
+        # Lock the existing buckets first so refreshes running meanwhile wait for the rebuild
+        list(rollups_qs.select_for_update().values_list('pk', flat=True))
+        rollups = _build_rollups(records)
+        rollups_qs.delete()
+        AttendanceDailyRollup.objects.bulk_create(rollups, batch_size=1000)
+    return len(rollups)
+
+
+def _refresh_buckets(buckets, using):
+    """Refresh (date, department) buckets; a department of None stands for every department on that date"""
+    dates_by_department = defaultdict(set)
+    for day, department in buckets:
+        dates_by_department[department].add(day)
+    any_department = dates_by_department.pop(None, None)
+    if any_department:
+        departments = set(Employee.objects.values_list('department', flat=True).distinct())
+        departments.update(AttendanceDailyRollup.objects.filter(date__in=any_department)
+                           .values_list('department', flat=True).distinct())
+        refresh_attendance_rollups(any_department, departments)
+    for department, dates in sorted(dates_by_department.items()):
+        refresh_attendance_rollups(dates, [department])
+
+
+changed_buckets = CommitBatch(_refresh_buckets)
+
+
+def _remember_attendance_bucket(sender, instance, raw=False, **kwargs):
+    """Note the bucket an existing record is about to leave"""
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    instance._previous_rollup_bucket = (
+        AttendanceRecord.objects.filter(pk=instance.pk).values_list('date', 'employee__department').first()
+    )
+
+
+def _attendance_saved(sender, instance, raw=False, using=None, **kwargs):
+    buckets = [(instance.date, None if raw else instance.employee.department)]
+    previous = instance.__dict__.pop('_previous_rollup_bucket', None)
+    if previous:
+        buckets.append(previous)
+    changed_buckets.add(buckets, using=using)
+
+
+def _attendance_deleted(sender, instance, using=None, **kwargs):
+    # Records deleted with their employee (or by a queryset) do not have it loaded;
+    # refreshing every department on the date avoids a lookup per record
+    department = instance.employee.department if AttendanceRecord.employee.is_cached(instance) else None
+    changed_buckets.add([(instance.date, department)], using=using)
+
+
+def _remember_department(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Note the department of an existing employee whose department is about to change"""
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and 'department' not in update_fields:
+        return
+    previous = Employee.objects.filter(pk=instance.pk).values_list('department', flat=True).first()
+    if previous is not None and previous != instance.department:
+        instance._previous_rollup_department = previous
+
+
+def _department_changed(sender, instance, using=None, **kwargs):
+    """Move the employee's attendance from the old department's buckets to the new one's"""
+    previous = instance.__dict__.pop('_previous_rollup_department', None)
+    if previous is None:
+        return
+    dates = instance.attendance_records.values_list('date', flat=True).distinct()
+    changed_buckets.add([(day, department) for day in dates for department in (previous, instance.department)],
+                        using=using)
+
+
+def connect_signals() -> None:
+    pre_save.connect(_remember_attendance_bucket, sender=AttendanceRecord, dispatch_uid='rollup_attendance_pre_save')
+    post_save.connect(_attendance_saved, sender=AttendanceRecord, dispatch_uid='rollup_attendance_save')
+    post_delete.connect(_attendance_deleted, sender=AttendanceRecord, dispatch_uid='rollup_attendance_delete')
+    pre_save.connect(_remember_department, sender=Employee, dispatch_uid='rollup_employee_pre_save')
+    post_save.connect(_department_changed, sender=Employee, dispatch_uid='rollup_employee_save')
@@ -0,0 +1,414 @@
+"""
+In-memory employee search index.
+
+``search_employees`` used to OR three ``icontains`` filters, which are
+leading-wildcard LIKE scans. The index below tokenizes employee id, name,
+email, department and designation once and answers queries from memory:
+
+- exact token matches score highest, then prefix matches (``"jo"`` finds
+  John), then fuzzy matches: candidates sharing character trigrams, kept
+  within one or two edits (``"jhon"`` finds John)
+- every field has a weight, so an id or name hit outranks a department hit
+- results carry the fields the chatbot and the ``search`` API return, so a
+  lookup needs no database query
+
+The index is built on first use and kept in sync by Employee
+post_save/post_delete signals. Writes made by other processes are noticed
+through the ``employees`` data version (see chatbot_cache.py), checked at most
+every ``EMPLOYEE_SEARCH_REFRESH_SECONDS``, and trigger a rebuild.
+"""
+
+import bisect
+import heapq
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from .chatbot_cache import data_version
+from .models import Employee
+
+
+# Field weights: a hit on the id or name matters more than one on the department
+FIELD_WEIGHTS = {
+    'employee_id': 5.0,
+    'name': 4.0,
+    'email': 3.0,
+    'designation': 2.0,
+    'department': 1.5,
+}
+# Fields kept with every entry and returned with results
+RESULT_FIELDS = ['id', 'employee_id', 'name', 'email', 'department', 'designation', 'status']
+
+EXACT_SCORE = 1.0
+PREFIX_SCORE = 0.6
+FUZZY_SCORE = 0.5
+# Fuzzy matches are within one edit of the term (two for terms of six letters
+# or more). A term of n letters has n + 1 padded trigrams and one edit changes
+# at most four of them (a swap), which bounds the trigrams a candidate shares
+# Prefix expansion and trigram candidates are capped so short or very common
+# query terms stay cheap
+MAX_PREFIX_TOKENS = 200
+MAX_TRIGRAM_POSTINGS = 5000
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+DEFAULT_REFRESH_SECONDS = 5.0
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text: Any) -> List[str]:
+    return TOKEN_PATTERN.findall(str(text or '').lower())
+
+
+def trigrams(token: str) -> set:
+    padded = f'  {token} '
+    return {padded[index:index + 3] for index in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance (a swap counts as one edit); ``limit + 1`` once it is exceeded"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def employee_version() -> int:
+    return dict(data_version()).get('employees', 0)
+
+
+class EmployeeSearchIndex:
+    """
+    Token index over employee rows.
+
+    ``postings`` maps a token to ``(-weight, name, pk)`` entries kept sorted, so
+    a single-term query only reads the first ``limit`` entries of each
+    matching token. Tokens without punctuation are also kept in a sorted
+    list for prefix lookups, and alphabetic ones in a trigram map for fuzzy
+    lookups; ids, numbers and whole email addresses only match exactly or by
+    prefix.
+    """
+
+    def __init__(self, refresh_seconds: float = DEFAULT_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.RLock()
+        self._reset()
+        self.built = False
+        self.version = None
+        self.checked_at = 0.0
+        self.build_seconds = 0.0
+        self.rebuilds = 0
+
+    def _reset(self):
+        self.docs: Dict[int, Dict[str, Any]] = {}
+        self.doc_tokens: Dict[int, Dict[str, float]] = {}
+        self.postings: Dict[str, List[Tuple[float, str, int]]] = {}
+        self.sorted_tokens: List[str] = []
+        self.trigram_tokens: Dict[str, set] = defaultdict(set)
+
+    # Index maintenance
+
+    @staticmethod
+    def _name_key(row: Dict[str, Any]) -> str:
+        return str(row.get('name') or '').lower()
+
+    @staticmethod
+    def _is_word(token: str) -> bool:
+        return bool(TOKEN_PATTERN.fullmatch(token))
+
+    @staticmethod
+    def _is_fuzzy(token: str) -> bool:
+        return len(token) >= 3 and token.isalpha()
+
+    def _token_weights(self, row: Dict[str, Any]) -> Dict[str, float]:
+        weights = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            value = row.get(field)
+            # Only the local part of an email: every address shares the domain
+            text = str(value or '').split('@')[0] if field == 'email' else value
+            for token in tokenize(text):
+                weights[token] = max(weights.get(token, 0), weight)
+            # Whole values too, so "emp-001" or a full email address match exactly
+            whole = str(value or '').lower()
+            if whole and whole not in weights and not self._is_word(whole):
+                weights[whole] = weight
+        return weights
+
+    def _add_token(self, token: str):
+        if self._is_word(token):
+            bisect.insort(self.sorted_tokens, token)
+        if self._is_fuzzy(token):
+            for trigram in trigrams(token):
+                self.trigram_tokens[trigram].add(token)
+
+    def _drop_token(self, token: str):
+        del self.postings[token]
+        index = bisect.bisect_left(self.sorted_tokens, token)
+        if index < len(self.sorted_tokens) and self.sorted_tokens[index] == token:
+            del self.sorted_tokens[index]
+        for trigram in trigrams(token):
+            tokens = self.trigram_tokens.get(trigram)
+            if tokens is not None:
+                tokens.discard(token)
+                if not tokens:
+                    del self.trigram_tokens[trigram]
+
+    def _add(self, row: Dict[str, Any]):
+        pk = row['id']
+        name = self._name_key(row)
+        weights = self._token_weights(row)
+        self.docs[pk] = {field: row.get(field) for field in RESULT_FIELDS}
+        self.doc_tokens[pk] = weights
+        for token, weight in weights.items():
+            if token not in self.postings:
+                self.postings[token] = []
+                self._add_token(token)
+            bisect.insort(self.postings[token], (-weight, name, pk))
+
+    def _remove(self, pk: int):
+        doc = self.docs.pop(pk, None)
+        if doc is None:
+            return
+        name = self._name_key(doc)
+        for token, weight in self.doc_tokens.pop(pk).items():
+            postings = self.postings.get(token)
+            if postings is None:
+                continue
+            entry = (-weight, name, pk)
+            index = bisect.bisect_left(postings, entry)
+            if index < len(postings) and postings[index] == entry:
+                del postings[index]
+            if not postings:
+                self._drop_token(token)
+
+    def build(self, rows: Optional[Iterable[Dict[str, Any]]] = None, version: Optional[int] = None):
+        """(Re)build the whole index, from ``rows`` or the Employee table"""
+        started = time.perf_counter()
+        if rows is None:
+            version = employee_version()
+            rows = Employee.objects.values(*RESULT_FIELDS).iterator(chunk_size=5000)
+        fresh = EmployeeSearchIndex(self.refresh_seconds)
+        postings = defaultdict(list)
+        for row in rows:
+            pk = row['id']
+            name = self._name_key(row)
+            weights = fresh._token_weights(row)
+            fresh.docs[pk] = {field: row.get(field) for field in RESULT_FIELDS}
+            fresh.doc_tokens[pk] = weights
+            for token, weight in weights.items():
+                postings[token].append((-weight, name, pk))
+        for entries in postings.values():
+            entries.sort()
+        fresh.postings = dict(postings)
+        fresh.sorted_tokens = sorted(token for token in fresh.postings if self._is_word(token))
+        for token in fresh.sorted_tokens:
+            if self._is_fuzzy(token):
+                for trigram in trigrams(token):
+                    fresh.trigram_tokens[trigram].add(token)
+
+        with self._lock:
+            self.docs, self.doc_tokens = fresh.docs, fresh.doc_tokens
+            self.postings, self.sorted_tokens = fresh.postings, fresh.sorted_tokens
+            self.trigram_tokens = fresh.trigram_tokens
+            self.built = True
+            self.version = version
+            self.checked_at = time.monotonic()
+            self.build_seconds = time.perf_counter() - started
+            self.rebuilds += 1
+
+    def update(self, row: Dict[str, Any]):
+        with self._lock:
+            if self.built:
+                self._remove(row['id'])
+                self._add(row)
+
+    def remove(self, pk: int):
+        with self._lock:
+            if self.built:
+                self._remove(pk)
+
+    def note_local_write(self):
+        """Adopt the version bumped by a write this process already applied"""
+        current = employee_version()
+        with self._lock:
+            if self.version is not None and current in (self.version, self.version + 1):
+                self.version = current
+
+    def ensure_fresh(self):
+        """Build on first use; rebuild when another process changed employees"""
+        now = time.monotonic()
+        if self.built and now - self.checked_at < self.refresh_seconds:
+            return
+        if not self.built:
+            self.build()
+            return
+        current = employee_version()
+        if current != self.version:
+            self.build()
+        else:
+            self.checked_at = now
+
+    # Queries
+
+    def _term_matches(self, term: str) -> Dict[str, float]:
+        """Index tokens matching one query term, with their match quality"""
+        matches = {}
+        if term in self.postings:
+            matches[term] = EXACT_SCORE
+        start = bisect.bisect_left(self.sorted_tokens, term)
+        for token in self.sorted_tokens[start:start + MAX_PREFIX_TOKENS]:
+            if not token.startswith(term):
+                break
+            if token != term:
+                # Closer prefixes ("jo" -> "john" over "jo" -> "jonathan") score higher
+                matches[token] = PREFIX_SCORE * (0.5 + 0.5 * len(term) / len(token))
+        if matches or not self._is_fuzzy(term):
+            return matches
+
+        shared = defaultdict(int)
+        for trigram in trigrams(term):
+            tokens = self.trigram_tokens.get(trigram)
+            if tokens and len(tokens) <= MAX_TRIGRAM_POSTINGS:
+                for token in tokens:
+                    shared[token] += 1
+        max_edits = 1 if len(term) < 6 else 2
+        min_shared = max(1, len(term) + 1 - 4 * max_edits)
+        for token, count in shared.items():
+            if count >= min_shared:
+                distance = edit_distance(term, token, max_edits)
+                if distance <= max_edits:
+                    matches[token] = FUZZY_SCORE * (1 - distance / max(len(term), len(token)))
+        return matches
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT) -> List[Dict[str, Any]]:
+        """
+        Ranked employees for ``query``. Each term adds the score of its best
+        matching token per employee; ties go by name. Results are the stored
+        fields plus ``score``.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        whole = str(query or '').strip().lower()
+        if whole and whole not in terms and not self._is_word(whole):
+            terms.insert(0, whole)
+        if not terms or limit < 1:
+            return []
+
+        with self._lock:
+            term_matches = [self._term_matches(term) for term in terms]
+            term_matches = [matches for matches in term_matches if matches]
+            if len(term_matches) == 1:
+                ranked = self._top_single(term_matches[0], limit)
+            else:
+                ranked = self._top_combined(term_matches, limit)
+            return [{**self.docs[pk], 'score': round(score, 3)} for score, pk in ranked]
+
+    def _top_single(self, matches: Dict[str, float], limit: int) -> List[Tuple[float, int]]:
+        """Top ``limit`` employees from the sorted postings of the matching tokens"""
+        # Only a token's first ``limit`` entries can reach the top ``limit``
+        candidates = [
+            (negative_weight * quality, name, pk)
+            for token, quality in matches.items()
+            for negative_weight, name, pk in self.postings[token][:limit]
+        ]
+        candidates.sort()
+        ranked, seen = [], set()
+        # Sorted by score, so an employee's first entry is its best
+        for negative_score, _, pk in candidates:
+            if pk not in seen:
+                seen.add(pk)
+                ranked.append((-negative_score, pk))
+                if len(ranked) == limit:
+                    break
+        return ranked
+
+    def _top_combined(self, term_matches: List[Dict[str, float]], limit: int) -> List[Tuple[float, int]]:
+        """
+        Sum each term's best score per employee and take the top ``limit`` of
+        the employees matching the most terms, so "john sales" prefers Johns in
+        Sales but still answers when no employee matches every term.
+        """
+        scores: Dict[int, float] = defaultdict(float)
+        coverage: Dict[int, int] = defaultdict(int)
+        names: Dict[int, str] = {}
+        for matches in term_matches:
+            best: Dict[int, float] = {}
+            for token, quality in matches.items():
+                for negative_weight, name, pk in self.postings[token]:
+                    score = -negative_weight * quality
+                    if score > best.get(pk, 0):
+                        best[pk] = score
+                        names[pk] = name
+            for pk, score in best.items():
+                scores[pk] += score
+                coverage[pk] += 1
+        if not scores:
+            return []
+        most = max(coverage.values())
+        top = heapq.nsmallest(limit, ((-score, names[pk], pk) for pk, score in scores.items() if coverage[pk] == most))
+        return [(-negative_score, pk) for negative_score, _, pk in top]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'employees': len(self.docs),
+                'tokens': len(self.postings),
+                'trigrams': len(self.trigram_tokens),
+                'version': self.version,
+                'build_seconds': round(self.build_seconds, 4),
+                'rebuilds': self.rebuilds,
+            }
+
+
+employee_index = EmployeeSearchIndex(
+    refresh_seconds=getattr(settings, 'EMPLOYEE_SEARCH_REFRESH_SECONDS', DEFAULT_REFRESH_SECONDS)
+)
+
+
+def search_employees(query: str, limit: int = DEFAULT_LIMIT) -> List[Dict[str, Any]]:
+    employee_index.ensure_fresh()
+    return employee_index.search(query, limit)
+
+
+def _sync_saved(sender, instance, raw=False, **kwargs):
+    # Processes that never searched (scripts, workers) have nothing to keep in sync
+    if raw or not employee_index.built:
+        return
+    row = {field: getattr(instance, 'pk' if field == 'id' else field) for field in RESULT_FIELDS}
+
+    def apply():
+        employee_index.update(row)
+        employee_index.note_local_write()
+    transaction.on_commit(apply, using=kwargs.get('using'))
+
+
+def _sync_deleted(sender, instance, **kwargs):
+    if not employee_index.built:
+        return
+    pk = instance.pk
+
+    def apply():
+        employee_index.remove(pk)
+        employee_index.note_local_write()
+    transaction.on_commit(apply, using=kwargs.get('using'))
+
+
+def connect_signals() -> None:
+    # Connected after the data version receivers, so the version is already bumped on commit
+    post_save.connect(_sync_saved, sender=Employee, dispatch_uid='employee_search_save')
+    post_delete.connect(_sync_deleted, sender=Employee, dispatch_uid='employee_search_delete')
@@ -1,14 +1,50 @@
+import re
+
 from rest_framework import serializers
 from django.core.exceptions import ValidationError
-from .models import Employee, AttendanceRecord, LeaveRequest, Task, TaskAttachment, TaskProgressUpdate
+from django.db.models import Prefetch
+from django.urls import reverse
+from .instrumentation import TimedSerializerMixin
+from .models import Employee, AttendanceRecord, LeaveRequest, Task, TaskAttachment, TaskAttachmentUpload, TaskProgressUpdate, BackgroundJob
+from . import thumbnails, uploads
 from datetime import datetime
 
 
-class EmployeeSerializer(serializers.ModelSerializer):
+class EagerLoadingMixin:
+    """
+    Declare the related rows a serializer reads so querysets can load them up front.
+
+    Viewsets and actions pass their querysets through ``setup_eager_loading`` so
+    listing N rows costs a constant number of queries instead of N + 1.
+    """
+    select_related_fields = ()
+    prefetch_related_fields = ()
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        if cls.select_related_fields:
+            queryset = queryset.select_related(*cls.select_related_fields)
+        if cls.prefetch_related_fields:
+            queryset = queryset.prefetch_related(*cls.prefetch_related_fields)
+        return queryset
+
+
+class EmployeeSerializer(TimedSerializerMixin, EagerLoadingMixin, serializers.ModelSerializer):
+    # {size: {'webp': url, 'jpeg': url}} of the current photo, null until generated
+    profile_photo_thumbnails = serializers.SerializerMethodField()
+    
     class Meta:
         model = Employee
         fields = '__all__'
     
+    def get_profile_photo_thumbnails(self, obj):
+        urls = thumbnails.thumbnail_urls(obj)
+        request = self.context.get('request')
+        if urls and request:
+            urls = {size: {fmt: request.build_absolute_uri(url) for fmt, url in formats.items()}
+                    for size, formats in urls.items()}
+        return urls
+    
     def validate_employee_id(self, value):
         """Validate employee ID format and uniqueness"""
         if not value.startswith('emp') or len(value) != 6:
@@ -52,11 +88,13 @@ class EmployeeSerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
 
 
-class AttendanceRecordSerializer(serializers.ModelSerializer):
+class AttendanceRecordSerializer(TimedSerializerMixin, EagerLoadingMixin, serializers.ModelSerializer):
     employee_name = serializers.CharField(source='employee.name', read_only=True)
     employee_id = serializers.CharField(source='employee.employee_id', read_only=True)
     department = serializers.CharField(source='employee.department', read_only=True)
     
+    select_related_fields = ('employee',)
+    
     class Meta:
         model = AttendanceRecord
         fields = '__all__'
@@ -69,12 +107,14 @@ class AttendanceRecordSerializer(serializers.ModelSerializer):
         return data
 
 
-class LeaveRequestSerializer(serializers.ModelSerializer):
+class LeaveRequestSerializer(TimedSerializerMixin, EagerLoadingMixin, serializers.ModelSerializer):
     employee_name = serializers.CharField(source='employee.name', read_only=True)
     employee_id = serializers.CharField(source='employee.employee_id', read_only=True)
     department = serializers.CharField(source='employee.department', read_only=True)
     approved_by_name = serializers.CharField(source='approved_by.name', read_only=True)
     
+    select_related_fields = ('employee', 'approved_by')
+    
     class Meta:
         model = LeaveRequest
         fields = '__all__'
@@ -89,36 +129,90 @@ class LeaveRequestSerializer(serializers.ModelSerializer):
         return data
 
 
-class TaskAttachmentSerializer(serializers.ModelSerializer):
+class TaskAttachmentSerializer(TimedSerializerMixin, EagerLoadingMixin, serializers.ModelSerializer):
     uploaded_by_name = serializers.CharField(source='uploaded_by.name', read_only=True)
+    sha256 = serializers.CharField(source='blob.sha256', read_only=True, default=None)
+    download_url = serializers.SerializerMethodField()
+    
+    select_related_fields = ('uploaded_by', 'blob')
     
     class Meta:
         model = TaskAttachment
         fields = '__all__'
+        read_only_fields = ['blob']
+    
+    def get_download_url(self, obj):
+        url = reverse('taskattachment-download', args=[obj.pk])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
     
     def validate_file_size(self, value):
-        """Validate file size (max 10MB)"""
-        max_size = 10 * 1024 * 1024  # 10MB in bytes
+        """Validate file size (max TASK_ATTACHMENT_MAX_SIZE)"""
+        max_size = uploads.max_upload_size()
         if value > max_size:
-            raise serializers.ValidationError("File size cannot exceed 10MB")
+            raise serializers.ValidationError(f"File size cannot exceed {max_size} bytes")
         return value
 
 
-class TaskProgressUpdateSerializer(serializers.ModelSerializer):
+class TaskAttachmentUploadSerializer(TimedSerializerMixin, EagerLoadingMixin, serializers.ModelSerializer):
+    offset = serializers.IntegerField(source='received', read_only=True)
+    chunk_size = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = TaskAttachmentUpload
+        fields = [
+            'upload_id', 'task', 'file_name', 'file_size', 'file_type', 'sha256', 'description',
+            'offset', 'chunk_size', 'status', 'attachment', 'created_at', 'updated_at',
+        ]
+        read_only_fields = ['task', 'status', 'attachment']
+        extra_kwargs = {'file_type': {'required': False}}
+    
+    def get_chunk_size(self, obj):
+        return uploads.chunk_size()
+    
+    def validate_file_size(self, value):
+        """Validate file size (max TASK_ATTACHMENT_MAX_SIZE)"""
+        max_size = uploads.max_upload_size()
+        if value < 0:
+            raise serializers.ValidationError("File size cannot be negative")
+        if value > max_size:
+            raise serializers.ValidationError(f"File size cannot exceed {max_size} bytes")
+        return value
+    
+    def validate_sha256(self, value):
+        if value and not re.fullmatch(r'[0-9a-fA-F]{64}', value):
+            raise serializers.ValidationError("sha256 must be a 64 character hex digest")
+        return value.lower()
+    
+    def validate(self, data):
+        if not data.get('file_type'):
+            data['file_type'] = uploads.guess_file_type(data['file_name'])
+        return data
+
+
+class TaskProgressUpdateSerializer(TimedSerializerMixin, EagerLoadingMixin, serializers.ModelSerializer):
     updated_by_name = serializers.CharField(source='updated_by.name', read_only=True)
     task_title = serializers.CharField(source='task.title', read_only=True)
     
+    select_related_fields = ('updated_by', 'task')
+    
     class Meta:
         model = TaskProgressUpdate
         fields = '__all__'
 
 
-class TaskSerializer(serializers.ModelSerializer):
+class TaskSerializer(TimedSerializerMixin, EagerLoadingMixin, serializers.ModelSerializer):
     assigned_to_name = serializers.CharField(source='assigned_to.name', read_only=True)
     assigned_by_name = serializers.CharField(source='assigned_by.name', read_only=True)
     attachments = TaskAttachmentSerializer(many=True, read_only=True)
     progress_updates = TaskProgressUpdateSerializer(many=True, read_only=True)
     
+    select_related_fields = ('assigned_to', 'assigned_by')
+    prefetch_related_fields = (
+        Prefetch('attachments', queryset=TaskAttachmentSerializer.setup_eager_loading(TaskAttachment.objects.all())),
+        Prefetch('progress_updates', queryset=TaskProgressUpdateSerializer.setup_eager_loading(TaskProgressUpdate.objects.all())),
+    )
+    
     class Meta:
         model = Task
         fields = '__all__'
@@ -130,3 +224,13 @@ class TaskSerializer(serializers.ModelSerializer):
         if 'estimated_hours' in data and data['estimated_hours'] and data['estimated_hours'] < 0:
             raise serializers.ValidationError("Estimated hours cannot be negative")
         return data
+
+
+class BackgroundJobSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = BackgroundJob
+        fields = [
+            'job_id', 'name', 'status', 'priority', 'attempts', 'max_attempts', 'visible_at',
+            'result', 'last_error', 'created_at', 'started_at', 'finished_at',
+        ]
+        read_only_fields = fields
@@ -0,0 +1,49 @@
+"""
+Streaming response bodies that stay streamed under ASGI.
+
+Django's ASGI handler drains a ``StreamingHttpResponse`` built on a plain
+iterator with ``sync_to_async(list)``, so the whole body is collected in
+memory before its first byte is sent. ``streaming_body`` gives ASGI servers
+an async iterator instead, which pulls one item at a time from the blocking
+iterator in a worker thread; WSGI servers get the iterator unchanged.
+"""
+
+from typing import AsyncIterator, Iterable, Iterator, TypeVar, Union
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+
+
+T = TypeVar('T')
+
+
+def is_asgi(request) -> bool:
+    """Whether ``request`` (Django's or DRF's) is served by an ASGI server"""
+    return isinstance(getattr(request, '_request', request), ASGIRequest)
+
+
+async def aiterate(iterator: Iterator[T], thread_sensitive: bool = True) -> AsyncIterator[T]:
+    """
+    Yield the items of a blocking ``iterator``, running each step in a worker thread.
+
+    Iterators that query the database need ``thread_sensitive`` so every step
+    runs in the request's thread and uses its connection.
+    """
+    step = sync_to_async(next, thread_sensitive=thread_sensitive)
+    done = object()
+    try:
+        while True:
+            item = await step(iterator, done)
+            if item is done:
+                return
+            yield item
+    finally:
+        close = getattr(iterator, 'close', None)
+        if close is not None:
+            await sync_to_async(close, thread_sensitive=thread_sensitive)()
+
+
+def streaming_body(request, content: Iterable[T], thread_sensitive: bool = True) -> Union[Iterator[T], AsyncIterator[T]]:
+    """``content`` as the body of a ``StreamingHttpResponse`` answering ``request``"""
+    iterator = iter(content)
+    return aiterate(iterator, thread_sensitive) if is_asgi(request) else iterator
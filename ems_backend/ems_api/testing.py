@@ -0,0 +1,50 @@
+"""
+Test helpers for the EMS API.
+
+``assert_constant_queries`` guards against N+1 regressions: it runs the same
+call at several data sizes and fails if the number of SQL queries changes.
+"""
+
+from typing import Callable, Iterable
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def assert_constant_queries(action: Callable[[], object], grow: Callable[[int], object],
+                            sizes: Iterable[int] = (1, 10, 50), using=connection):
+    """
+    Assert that ``action`` issues the same number of queries at every size.
+
+    ``grow(n)`` must make sure at least ``n`` rows exist for the action to
+    return; ``action()`` performs the request or serialization under test.
+    Returns the (constant) query count.
+    """
+    counts = []
+    captured = []
+    for size in sizes:
+        grow(size)
+        with CaptureQueriesContext(using) as context:
+            action()
+        counts.append((size, len(context.captured_queries)))
+        captured.append(context.captured_queries)
+
+    distinct = {count for _, count in counts}
+    if len(distinct) > 1:
+        largest = captured[-1]
+        details = '\n'.join(f"  {query['sql']}" for query in largest)
+        raise AssertionError(
+            f"Query count grows with row count: {', '.join(f'{size} rows -> {count} queries' for size, count in counts)}\n"
+            f"Queries at {counts[-1][0]} rows:\n{details}"
+        )
+    return counts[0][1]
+
+
+class QueryCountAssertionsMixin:
+    """TestCase mixin exposing ``assertConstantQueries``"""
+
+    def assertConstantQueries(self, action, grow, sizes=(1, 10, 50)):
+        try:
+            return assert_constant_queries(action, grow, sizes)
+        except AssertionError as e:
+            self.fail(str(e))
@@ -1,3 +1,766 @@
-from django.test import TestCase
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from . import blobs, jobs, reports, search
+from .authentication import TokenCache, token_cache
+from .chatbot import get_chatbot, reset_chatbot
+from .chatbot_cache import bump_data_version, data_version
+from .instrumentation import registry
+from .models import (
+    AttachmentBlob, AttendanceDailyRollup, AttendanceRecord, BackgroundJob, Employee, LeaveRequest, Task, TaskAttachment,
+    TaskProgressUpdate,
+)
+from .testing import QueryCountAssertionsMixin
+
+
+@jobs.register('tests.echo')
+def echo_job(**payload):
+    return payload
+
+
+@jobs.register('tests.fail', max_attempts=3)
+def failing_job():
+    raise RuntimeError('handler failed')
+
+
+def make_employee(number, department='Engineering', **fields):
+    return Employee.objects.create(
+        employee_id=f'emp{number:03d}',
+        name=fields.pop('name', f'Employee {number}'),
+        email=f'emp{number:03d}@example.com',
+        department=department,
+        designation=fields.pop('designation', 'Developer'),
+        joining_date=date(2020, 1, 1),
+        phone='5550100',
+        **fields,
+    )
+
+
+class ListQueryCountTests(QueryCountAssertionsMixin, TestCase):
+    """List endpoints and actions issue the same number of queries however many rows they return"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('admin', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.employee = make_employee(1, user=self.user)
+        self.manager = make_employee(2, department='Sales')
+
+    def grow_employees(self, n):
+        while Employee.objects.count() < n:
+            number = Employee.objects.count() + 1
+            user = User.objects.create_user(f'emp{number:03d}')
+            make_employee(number, department=('Engineering', 'Sales')[number % 2], user=user, manager='Employee 2')
+
+    def grow_attendance(self, n, employee=None):
+        """At least ``n`` attendance records (of ``employee`` when given), one per employee and day"""
+        records = AttendanceRecord.objects.filter(employee=employee) if employee else AttendanceRecord.objects
+        while records.count() < n:
+            count = records.count()
+            AttendanceRecord.objects.create(
+                employee=employee or (self.employee, self.manager)[count % 2],
+                date=date(2025, 7, 1) - timedelta(days=count),
+                hours='8.00',
+                status=('Present', 'Late', 'Absent')[count % 3],
+            )
+
+    def grow_leave_requests(self, n, employee=None):
+        requests = LeaveRequest.objects.filter(employee=employee) if employee else LeaveRequest.objects
+        while requests.count() < n:
+            LeaveRequest.objects.create(
+                employee=employee or self.employee,
+                approved_by=self.manager,
+                leave_type='Sick Leave',
+                start_date=date(2025, 7, 3),
+                end_date=date(2025, 7, 4),
+                days=2,
+            )
+
+    def grow_tasks(self, n, employee=None):
+        """At least ``n`` tasks, each with an attachment and a progress update"""
+        tasks = Task.objects.filter(assigned_to=employee) if employee else Task.objects
+        while tasks.count() < n:
+            count = Task.objects.count()
+            task = Task.objects.create(
+                title=f'Task {count}',
+                description='Write the report',
+                assigned_to=employee or self.employee,
+                assigned_by=self.manager,
+                due_date=date(2025, 8, 1),
+                department='Engineering',
+            )
+            blob = AttachmentBlob.objects.create(sha256=f'{count:064x}', file_path=f'blobs/{count}',
+                                                 file_size=1, ref_count=1)
+            TaskAttachment.objects.create(task=task, file_name='report.pdf', file_path=blob.file_path, blob=blob,
+                                          file_size=1, file_type='application/pdf', uploaded_by=self.manager)
+            TaskProgressUpdate.objects.create(task=task, updated_by=self.employee, previous_progress=0,
+                                              new_progress=50, previous_status='Not Started',
+                                              new_status='In Progress')
+
+    def assertListConstant(self, url, grow):
+        def action():
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.content[:500])
+        self.assertConstantQueries(action, grow)
+
+    def test_employee_list(self):
+        self.assertListConstant('/api/employees/', self.grow_employees)
+
+    def test_attendance_list(self):
+        self.assertListConstant('/api/attendance/', self.grow_attendance)
+
+    def test_attendance_by_date(self):
+        def grow(n):
+            self.grow_employees(n)
+            for employee in Employee.objects.exclude(attendance_records__date=date(2025, 7, 1)):
+                AttendanceRecord.objects.create(employee=employee, date=date(2025, 7, 1), hours='8.00')
+        self.assertListConstant('/api/attendance/by_date/?date=2025-07-01', grow)
+
+    def test_attendance_by_employee(self):
+        self.assertListConstant('/api/attendance/by_employee/?employee_id=emp001',
+                                lambda n: self.grow_attendance(n, self.employee))
+
+    def test_leave_request_list(self):
+        self.assertListConstant('/api/leave-requests/', self.grow_leave_requests)
+
+    def test_pending_leave_requests(self):
+        self.assertListConstant('/api/leave-requests/pending/', self.grow_leave_requests)
+
+    def test_task_list(self):
+        self.assertListConstant('/api/tasks/', self.grow_tasks)
+
+    def test_tasks_by_status(self):
+        self.assertListConstant('/api/tasks/by_status/?status=Not Started', self.grow_tasks)
+
+    def test_tasks_by_priority(self):
+        self.assertListConstant('/api/tasks/by_priority/?priority=Medium', self.grow_tasks)
+
+    def test_task_attachment_list(self):
+        self.assertListConstant('/api/task-attachments/', self.grow_tasks)
+
+    def test_employee_attendance(self):
+        self.assertListConstant(f'/api/employees/{self.employee.pk}/attendance/',
+                                lambda n: self.grow_attendance(n, self.employee))
+
+    def test_employee_tasks(self):
+        self.assertListConstant(f'/api/employees/{self.employee.pk}/tasks/',
+                                lambda n: self.grow_tasks(n, self.employee))
+
+    def test_employee_leave_requests(self):
+        self.assertListConstant(f'/api/employees/{self.employee.pk}/leave_requests/',
+                                lambda n: self.grow_leave_requests(n, self.employee))
+
+
+class AttendanceRollupSignalTests(TransactionTestCase):
+    """Rollups follow plain ORM writes once they commit"""
+
+    def rollups(self):
+        return {(rollup.date, rollup.department): rollup.total for rollup in AttendanceDailyRollup.objects.all()}
+
+    def test_create_update_and_delete_refresh_buckets(self):
+        employee = make_employee(1)
+        record = AttendanceRecord.objects.create(employee=employee, date=date(2025, 7, 1), hours='8.00')
+        self.assertEqual(reports.attendance_report()['total'], 1)
+
+        record.date = date(2025, 7, 2)
+        record.save()
+        self.assertEqual(self.rollups(), {(date(2025, 7, 2), 'Engineering'): 1})
+
+        AttendanceRecord.objects.all().delete()
+        self.assertEqual(reports.attendance_report()['total'], 0)
+        self.assertEqual(self.rollups(), {})
+
+    def test_transaction_refreshes_once_and_rollback_leaves_buckets(self):
+        employee = make_employee(1)
+        with transaction.atomic():
+            for day in range(3):
+                AttendanceRecord.objects.create(employee=employee, date=date(2025, 7, 1) + timedelta(days=day))
+            self.assertEqual(self.rollups(), {})
+        self.assertEqual(len(self.rollups()), 3)
+
+        with transaction.atomic():
+            AttendanceRecord.objects.create(employee=employee, date=date(2025, 7, 9))
+            transaction.set_rollback(True)
+        self.assertEqual(len(self.rollups()), 3)
+
+    def test_department_change_and_employee_delete_move_buckets(self):
+        employee = make_employee(1)
+        make_employee(2, department='Sales')
+        AttendanceRecord.objects.create(employee=employee, date=date(2025, 7, 1))
+
+        employee.department = 'Sales'
+        employee.save()
+        self.assertEqual(self.rollups(), {(date(2025, 7, 1), 'Sales'): 1})
+
+        Employee.objects.get(pk=employee.pk).delete()
+        self.assertEqual(self.rollups(), {})
+
+
+class TokenAuthCacheTests(TestCase):
+    """Cached tokens stop working as soon as they are revoked"""
+
+    def setUp(self):
+        token_cache.clear()
+        caches['default'].clear()
+        self.user = User.objects.create_user('emp001')
+        self.employee = make_employee(1, user=self.user)
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def assertCachedThenRejected(self, revoke):
+        self.assertEqual(self.client.get('/api/auth/user/').status_code, 200)
+        hits = token_cache.hits
+        self.assertEqual(self.client.get('/api/auth/user/').status_code, 200)
+        self.assertEqual(token_cache.hits, hits + 1)
+        revoke()
+        self.assertEqual(self.client.get('/api/auth/user/').status_code, 401)
+
+    def test_logout_invalidates(self):
+        self.assertCachedThenRejected(lambda: self.client.post('/api/auth/logout/'))
+
+    def test_deactivation_invalidates(self):
+        admin = APIClient()
+        admin.force_authenticate(User.objects.create_user('admin', is_staff=True))
+
+        def deactivate():
+            response = admin.patch(f'/api/employees/{self.employee.pk}/', {'status': 'Inactive'}, format='json')
+            self.assertEqual(response.status_code, 200, response.content)
+        self.assertCachedThenRejected(deactivate)
+
+    def test_user_delete_invalidates(self):
+        self.assertCachedThenRejected(lambda: User.objects.filter(pk=self.user.pk).delete())
+
+    def test_lookup_racing_a_revocation_is_not_cached(self):
+        generation = token_cache.generation
+        cached, revision = token_cache.get(self.token.key)
+        self.assertIsNone(cached)
+        # The token was looked up, then revoked before the result was cached
+        token_cache.invalidate(self.token.key)
+        token_cache.set(self.token.key, self.user, self.token, generation, revision)
+        self.assertIsNone(token_cache.get(self.token.key)[0])
+
+    def test_shared_cache_revokes_other_workers(self):
+        worker, other_worker = TokenCache(shared_alias='default'), TokenCache(shared_alias='default')
+        for cache in (worker, other_worker):
+            cached, revision = cache.get(self.token.key)
+            cache.set(self.token.key, self.user, self.token, cache.generation, revision)
+        self.assertIsNotNone(other_worker.get(self.token.key)[0])
+
+        worker.invalidate(self.token.key)
+        self.assertIsNone(other_worker.get(self.token.key)[0])
+
+        # A lookup that read the marker before the revocation caches nothing usable either
+        generation = other_worker.generation
+        _, revision = other_worker.get(self.token.key)
+        worker.invalidate(self.token.key)
+        other_worker.set(self.token.key, self.user, self.token, generation, revision)
+        self.assertIsNone(other_worker.get(self.token.key)[0])
+        self.assertIsNone(worker.get(self.token.key)[0])
+
+
+@override_settings(JOB_RETRY_DELAY=0, JOB_QUEUE_EAGER=False)
+class BackgroundJobTests(TestCase):
+    def expire(self, job):
+        """Make a claimed job look as if it outlived its visibility timeout"""
+        BackgroundJob.objects.filter(pk=job.pk).update(visible_at=timezone.now() - timedelta(seconds=1))
+
+    def test_failing_handler_is_retried_until_failed(self):
+        job = jobs.enqueue('tests.fail')
+        outcomes = []
+        for _ in range(3):
+            claimed = jobs.claim('worker-1')
+            self.assertEqual(claimed.pk, job.pk)
+            outcomes.append(jobs.execute(claimed, 'worker-1'))
+        self.assertEqual(outcomes, ['Queued', 'Queued', 'Failed'])
+
+        job.refresh_from_db()
+        self.assertEqual(job.attempts, 3)
+        self.assertIsNotNone(job.finished_at)
+        self.assertIn('RuntimeError: handler failed', job.last_error)
+        self.assertIsNone(jobs.claim('worker-1'))
+
+    def test_timed_out_job_is_taken_over(self):
+        job = jobs.enqueue('tests.echo', {'value': 1})
+        first = jobs.claim('worker-1')
+        self.assertIsNone(jobs.claim('worker-2'))
+
+        self.expire(first)
+        second = jobs.claim('worker-2')
+        self.assertEqual(second.pk, job.pk)
+        self.assertEqual(second.attempts, 2)
+        self.assertEqual(second.locked_by, 'worker-2')
+        self.assertEqual(second.last_error, 'Attempt 1 timed out on worker-1')
+        self.assertEqual(jobs.execute(second, 'worker-2'), 'Succeeded')
+
+    def test_timed_out_last_attempt_fails(self):
+        job = jobs.enqueue('tests.echo')
+        BackgroundJob.objects.filter(pk=job.pk).update(max_attempts=1)
+        self.expire(jobs.claim('worker-1'))
+
+        self.assertIsNone(jobs.claim('worker-2'))
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'Failed')
+        self.assertEqual(job.last_error, 'Attempt 1 timed out on worker-1')
+
+    def test_execute_reports_status_when_claim_was_superseded(self):
+        jobs.enqueue('tests.echo', {'value': 1})
+        first = jobs.claim('worker-1')
+        self.expire(first)
+        second = jobs.claim('worker-2')
+
+        # The takeover is still running: the first worker's result is dropped
+        self.assertEqual(jobs.execute(first, 'worker-1'), 'Running')
+        self.assertEqual(jobs.execute(second, 'worker-2'), 'Succeeded')
+        # ...and it does not overwrite the outcome once the takeover has finished
+        self.assertEqual(jobs.execute(first, 'worker-1'), 'Succeeded')
+        second.refresh_from_db()
+        self.assertEqual(second.result, {'value': 1})
+        self.assertEqual(second.locked_by, '')
+
+    @override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+    def test_employee_create_returns_password_job(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('admin', is_staff=True))
+        response = client.post('/api/employees/', {
+            'employee_id': 'emp100',
+            'name': 'New Hire',
+            'email': 'new.hire@example.com',
+            'department': 'Engineering',
+            'designation': 'Developer',
+            'joining_date': '2025-07-01',
+            'phone': '5550100',
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        job_id = response.json()['password_job']
+        user = User.objects.get(username='emp100')
+        self.assertFalse(user.has_usable_password())
+        self.assertEqual(client.get(f'/api/jobs/{job_id}/').json()['status'], 'Queued')
+
+        self.assertEqual(jobs.run_job(BackgroundJob.objects.get(job_id=job_id).pk), 'Succeeded')
+        user.refresh_from_db()
+        self.assertTrue(user.check_password('emp100'))
+
+        response = client.post('/api/employees/', {
+            'employee_id': 'emp101',
+            'name': 'Second Hire',
+            'email': 'second.hire@example.com',
+            'department': 'Engineering',
+            'designation': 'Developer',
+            'joining_date': '2025-07-01',
+            'phone': '5550100',
+            'password': 'chosen-password',
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertIsNone(response.json()['password_job'])
+
+    @override_settings(JOB_QUEUE_EAGER=True, PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+    def test_eager_queue_lets_new_employee_sign_in_without_worker(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('admin', is_staff=True))
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post('/api/employees/', {
+                'employee_id': 'emp100',
+                'name': 'New Hire',
+                'email': 'new.hire@example.com',
+                'department': 'Engineering',
+                'designation': 'Developer',
+                'joining_date': '2025-07-01',
+                'phone': '5550100',
+            }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(BackgroundJob.objects.get(job_id=response.json()['password_job']).status, 'Succeeded')
+
+        response = APIClient().post('/api/auth/login/', {'username': 'emp100', 'password': 'emp100'}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+
+
+@override_settings(CHATBOT_MODEL='fake', CHATBOT_FAKE_LATENCY=0, CHATBOT_FAKE_TOKEN_DELAY=0,
+                   CHATBOT_REQUEST_TIMEOUT=5)
+class AsyncChatbotTests(TestCase):
+    """The ASGI chatbot paths against the fake model"""
+
+    def setUp(self):
+        # The chatbot and its answers are process-wide; rebuild them with the fake model
+        reset_chatbot(reload_live_data=False)
+        self.addCleanup(reset_chatbot, reload_live_data=False)
+
+    @staticmethod
+    def parse_event(block: str):
+        """(event, data) of one Server-Sent Event: an ``event:`` line and a JSON ``data:`` line"""
+        event, data = block.split('\n')
+        return event.removeprefix('event: '), json.loads(data.removeprefix('data: '))
+
+    async def stream(self, message):
+        response = await self.async_client.post('/api/chatbot/stream/', {'message': message},
+                                                content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertTrue(body.endswith('\n\n'), body)
+        return [self.parse_event(block) for block in body[:-2].split('\n\n')]
+
+    async def test_achat(self):
+        data = await get_chatbot().achat('How many employees are there?', timeout=5)
+        self.assertTrue(data['response'].startswith('(fake model) You asked: How many employees are there?'))
+        self.assertFalse(data['cached'])
+        again = await get_chatbot().achat('How many employees are there?', timeout=5)
+        self.assertTrue(again['cached'])
+        self.assertEqual(again['response'], data['response'])
+
+    async def test_astream_chat_events(self):
+        events = [event async for event in get_chatbot().astream_chat('Show pending leave requests', timeout=5)]
+        names = [name for name, _ in events]
+        self.assertEqual(names[-2:], ['database_data', 'done'])
+        self.assertEqual(set(names[:-2]), {'token'})
+        self.assertGreater(len(names), 3)
+        answer = ''.join(data['text'] for name, data in events if name == 'token')
+        self.assertTrue(answer.startswith('(fake model) You asked: Show pending leave requests'))
+        self.assertEqual(events[-1][1]['chunks'], len(names) - 2)
+
+    async def test_async_view(self):
+        response = await self.async_client.post('/api/chatbot/async/', {'message': 'List all tasks'},
+                                                content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('(fake model)', response.json()['response'])
+
+        response = await self.async_client.post('/api/chatbot/async/', {'message': ' '},
+                                                content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    async def test_invalid_bodies_are_rejected(self):
+        bodies = {
+            '[1, 2]': 'Invalid request body',
+            '"hello"': 'Invalid request body',
+            '{"message": "hi", "conversation_history": "hello"}': 'conversation_history must be a list',
+            '{"message": ': 'Invalid JSON data',
+            '{}': 'Message is required',
+        }
+        for url in ('/api/chatbot/async/', '/api/chatbot/stream/'):
+            for body, error in bodies.items():
+                with self.subTest(url=url, body=body):
+                    response = await self.async_client.post(url, body, content_type='application/json')
+                    self.assertEqual(response.status_code, 400)
+                    self.assertEqual(response.json()['error'], error)
+
+    @override_settings(CHATBOT_FAKE_LATENCY=2, CHATBOT_REQUEST_TIMEOUT=0.1)
+    async def test_async_view_timeout(self):
+        reset_chatbot(reload_live_data=False)
+        response = await self.async_client.post('/api/chatbot/async/', {'message': 'List all tasks'},
+                                                content_type='application/json')
+        self.assertEqual(response.status_code, 504)
+        self.assertEqual(response.json()['error'], 'Chatbot request timed out')
+
+    async def test_stream_view_framing(self):
+        events = await self.stream('How is attendance today?')
+        self.assertEqual([name for name, _ in events][-2:], ['database_data', 'done'])
+        answer = ''.join(data['text'] for name, data in events if name == 'token')
+        self.assertIn('How is attendance today?', answer)
+
+    @override_settings(CHATBOT_FAKE_LATENCY=2, CHATBOT_REQUEST_TIMEOUT=0.1)
+    async def test_stream_view_timeout(self):
+        reset_chatbot(reload_live_data=False)
+        events = await self.stream('How is attendance today?')
+        self.assertEqual(events, [('error', {
+            'error': 'Chatbot request timed out',
+            'response': 'I apologize, but I could not answer within 0.1 seconds. Please try again.',
+        })])
+
+
+class AttachmentUploadTests(TestCase):
+    """Resumable uploads, the content-addressed blob store and attachment downloads"""
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=os.path.join(directory, 'media'),
+                                     TASK_UPLOAD_STAGING_DIR=os.path.join(directory, 'staging'))
+        override.enable()
+        self.addCleanup(override.disable)
+
+        user = User.objects.create_user('emp001')
+        self.employee = make_employee(1, user=user)
+        self.task = Task.objects.create(title='Report', description='Write the report', assigned_to=self.employee,
+                                        assigned_by=self.employee, due_date=date(2025, 8, 1),
+                                        department='Engineering')
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        self.data = bytes(range(256)) * 40
+
+    def start(self, size=None, **fields):
+        response = self.client.post(f'/api/tasks/{self.task.pk}/uploads/', {
+            'file_name': 'report.pdf', 'file_size': len(self.data) if size is None else size, **fields,
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()['upload_id']
+
+    def put_chunk(self, upload_id, offset, chunk, **headers):
+        return self.client.put(f'/api/task-uploads/{upload_id}/chunk/', chunk,
+                               content_type='application/octet-stream', HTTP_UPLOAD_OFFSET=str(offset), **headers)
+
+    def offset(self, upload_id):
+        return self.client.get(f'/api/task-uploads/{upload_id}/').json()['offset']
+
+    def upload(self, data):
+        """Send ``data`` in two chunks and complete it; returns the attachment"""
+        upload_id = self.start(len(data))
+        half = len(data) // 2
+        self.assertEqual(self.put_chunk(upload_id, 0, data[:half]).status_code, 200)
+        self.assertEqual(self.put_chunk(upload_id, half, data[half:]).json(), {'offset': len(data), 'complete': True})
+        response = self.client.post(f'/api/task-uploads/{upload_id}/complete/')
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()
+
+    def test_chunks_resume_from_offset(self):
+        upload_id = self.start()
+        self.assertEqual(self.put_chunk(upload_id, 0, self.data[:1000]).json()['offset'], 1000)
+
+        # A retried chunk the server already has
+        response = self.put_chunk(upload_id, 0, self.data[:1000])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['offset'], 1000)
+        self.assertEqual(self.offset(upload_id), 1000)
+
+        self.assertEqual(self.put_chunk(upload_id, 1000, self.data[1000:]).json()['complete'], True)
+        attachment = self.client.post(f'/api/task-uploads/{upload_id}/complete/').json()
+        with default_storage.open(attachment['file_path']) as f:
+            self.assertEqual(f.read(), self.data)
+
+    def test_chunk_past_file_size(self):
+        upload_id = self.start()
+        self.put_chunk(upload_id, 0, self.data[:1000])
+        response = self.put_chunk(upload_id, 1000, self.data[1000:] + b'extra')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['offset'], 1000)
+        self.assertEqual(self.offset(upload_id), 1000)
+
+    def test_chunk_checksum_mismatch(self):
+        upload_id = self.start()
+        response = self.put_chunk(upload_id, 0, self.data[:1000], HTTP_X_CHUNK_SHA256='0' * 64)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'Chunk checksum mismatch', 'offset': 0})
+        self.assertEqual(self.offset(upload_id), 0)
+
+        response = self.put_chunk(upload_id, 0, self.data[:1000],
+                                  HTTP_X_CHUNK_SHA256=hashlib.sha256(self.data[:1000]).hexdigest())
+        self.assertEqual(response.json()['offset'], 1000)
+
+    def test_file_checksum_mismatch_restarts_upload(self):
+        upload_id = self.start(sha256='f' * 64)
+        self.put_chunk(upload_id, 0, self.data)
+        response = self.client.post(f'/api/task-uploads/{upload_id}/complete/')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['offset'], 0)
+        self.assertEqual(self.offset(upload_id), 0)
+        self.assertFalse(TaskAttachment.objects.exists())
+
+    def test_complete_is_repeatable(self):
+        upload_id = self.start(sha256=hashlib.sha256(self.data).hexdigest())
+        self.put_chunk(upload_id, 0, self.data)
+        first = self.client.post(f'/api/task-uploads/{upload_id}/complete/')
+        again = self.client.post(f'/api/task-uploads/{upload_id}/complete/')
+        self.assertEqual((first.status_code, again.status_code), (201, 200))
+        self.assertEqual(again.json()['id'], first.json()['id'])
+        self.assertEqual(TaskAttachment.objects.count(), 1)
+
+    def test_identical_files_share_a_blob(self):
+        chunked = self.upload(self.data)
+        response = self.client.post(f'/api/tasks/{self.task.pk}/upload_file/', {
+            'file': SimpleUploadedFile('copy.pdf', self.data, 'application/pdf'),
+        }, format='multipart')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.json()['file_path'], chunked['file_path'])
+
+        blob = AttachmentBlob.objects.get()
+        self.assertEqual((blob.sha256, blob.ref_count), (hashlib.sha256(self.data).hexdigest(), 2))
+        self.assertEqual(len(os.listdir(os.path.dirname(default_storage.path(blob.file_path)))), 1)
+
+        self.client.delete(f"/api/task-attachments/{chunked['id']}/")
+        blob.refresh_from_db()
+        self.assertEqual(blob.ref_count, 1)
+        self.assertEqual(blobs.collect_garbage(timedelta(0)), (0, 0))
+
+        TaskAttachment.objects.all().delete()
+        blob.refresh_from_db()
+        self.assertEqual(blob.ref_count, 0)
+        self.assertEqual(blobs.collect_garbage(timedelta(0)), (1, len(self.data)))
+        self.assertFalse(default_storage.exists(blob.file_path))
+
+    def test_download_ranges_and_conditional_requests(self):
+        url = f"/api/task-attachments/{self.upload(self.data)['id']}/download/"
+        response = self.client.get(url)
+        self.assertEqual(b''.join(response.streaming_content), self.data)
+        etag = response['ETag']
+        self.assertEqual(etag, f'"{hashlib.sha256(self.data).hexdigest()}"')
+
+        response = self.client.get(url, HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(self.data)}')
+        self.assertEqual(b''.join(response.streaming_content), self.data[100:200])
+
+        response = self.client.get(url, HTTP_RANGE='bytes=-10', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        response.close()
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        response = self.client.get(url, HTTP_RANGE=f'bytes={len(self.data)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.data)}')
+
+
+class EmployeeSearchTests(TransactionTestCase):
+    """The search API against a fresh index, kept in sync by signals on real commits"""
+
+    def setUp(self):
+        self.index = search.EmployeeSearchIndex(refresh_seconds=3600)
+        patcher = mock.patch.object(search, 'employee_index', self.index)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', is_staff=True))
+        self.john = make_employee(1, name='John Smith')
+        self.jonathan = make_employee(2, department='Sales', name='Jonathan Doe', designation='Manager')
+        self.alice = make_employee(3, department='Marketing', name='Alice Johnson')
+
+    def names(self, query, **params):
+        response = self.client.get('/api/employees/search/', {'q': query, **params})
+        self.assertEqual(response.status_code, 200, response.content)
+        return [row['name'] for row in response.json()['results']]
+
+    def test_ranking_prefix_and_fuzzy_matches(self):
+        # An exact name token outranks a prefix of a longer one
+        self.assertEqual(self.names('john'), ['John Smith', 'Alice Johnson'])
+        self.assertEqual(self.names('jon'), ['Jonathan Doe'])
+        self.assertEqual(self.names('jhon'), ['John Smith'])
+        self.assertEqual(self.names('jonhson'), ['Alice Johnson'])
+        self.assertEqual(self.names('emp002'), ['Jonathan Doe'])
+        self.assertEqual(self.names('manager'), ['Jonathan Doe'])
+        # Equal scores go by name
+        self.assertEqual(self.names('alice smith'), ['Alice Johnson', 'John Smith'])
+        self.assertEqual(len(self.names('emp', limit=2)), 2)
+        self.assertEqual(self.names('xyzzy'), [])
+
+    def test_bad_parameters(self):
+        for params, error in (({}, 'q parameter is required'), ({'q': '  '}, 'q parameter is required'),
+                              ({'q': 'john', 'limit': 'ten'}, 'limit must be an integer')):
+            with self.subTest(params=params):
+                response = self.client.get('/api/employees/search/', params)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()['error'], error)
+
+    def test_saves_renames_and_deletes_sync_without_rebuild(self):
+        self.assertEqual(self.names('john'), ['John Smith', 'Alice Johnson'])
+        self.assertEqual(self.index.rebuilds, 1)
+
+        make_employee(4, name='Johnny Cash')
+        self.john.name = 'Jack Smith'
+        self.john.save()
+        self.jonathan.delete()
+
+        self.assertEqual(self.names('john'), ['Johnny Cash', 'Alice Johnson'])
+        self.assertEqual(self.names('jack'), ['Jack Smith'])
+        self.assertEqual(self.names('jonathan'), [])
+        # Each write adopted the version it bumped, so the index is not rebuilt
+        self.assertEqual(self.index.rebuilds, 1)
+        self.assertEqual(self.index.version, search.employee_version())
+
+    def test_write_by_another_process_triggers_rebuild(self):
+        self.assertEqual(self.names('beatrice'), [])
+        # Another process renames Alice; this one only sees the version bump
+        Employee.objects.filter(pk=self.alice.pk).update(name='Beatrice Keys')
+        bump_data_version('employees')
+        # A local write right after must not adopt the other process's bump as its own
+        self.john.save()
+        self.assertEqual(self.names('beatrice'), [])
+
+        self.index.checked_at = 0
+        self.assertEqual(self.names('beatrice'), ['Beatrice Keys'])
+        self.assertEqual(self.index.rebuilds, 2)
+
+
+class DataVersionTests(TransactionTestCase):
+    """Real commits: on_commit callbacks never run inside TestCase's transaction"""
+
+    def test_transaction_bumps_each_table_once_at_commit(self):
+        employee = make_employee(1)
+        before = dict(data_version())
+        with CaptureQueriesContext(connection) as queries:
+            with transaction.atomic():
+                for _ in range(3):
+                    employee.save()
+                bump_data_version('employees', 'attendance')
+                self.assertFalse([query for query in queries.captured_queries if 'data_versions' in query['sql']])
+
+        after = dict(data_version())
+        self.assertEqual(after['employees'], before['employees'] + 1)
+        self.assertEqual(after['attendance'], before.get('attendance', 0) + 1)
+
+        with transaction.atomic():
+            employee.save()
+            transaction.set_rollback(True)
+        self.assertEqual(dict(data_version()), after)
+
+    def test_bump_survives_rolled_back_savepoint(self):
+        employee = make_employee(1)
+        before = dict(data_version())['employees']
+        with transaction.atomic():
+            # The savepoint's commit callback is dropped with it; the later save must still bump
+            try:
+                with transaction.atomic():
+                    employee.save()
+                    raise IntegrityError
+            except IntegrityError:
+                pass
+            employee.save()
+        self.assertEqual(dict(data_version())['employees'], before + 1)
+
+        with transaction.atomic():
+            employee.save()
+            try:
+                with transaction.atomic():
+                    employee.save()
+                    raise IntegrityError
+            except IntegrityError:
+                pass
+        self.assertEqual(dict(data_version())['employees'], before + 2)
+
+
+class StreamingMetricsTests(TestCase):
+    @staticmethod
+    def sample(name, route):
+        return registry.get_sample_value(name, {'route': route}) or 0
+
+    def test_streamed_export_records_queries_and_bytes(self):
+        employee = make_employee(1)
+        for day in range(3):
+            AttendanceRecord.objects.create(employee=employee, date=date(2025, 7, 1) + timedelta(days=day))
+        route = 'attendancerecord.export'
+        requests = self.sample('ems_http_request_queries_count', route)
+        queries = self.sample('ems_http_request_queries_sum', route)
+        sent = self.sample('ems_http_response_size_bytes_sum', route)
+
+        response = self.client.get('/api/attendance/export/?export_format=csv')
+        # Observed once the server has sent the body and closed the response
+        self.assertEqual(self.sample('ems_http_request_queries_count', route), requests)
+        body = b''.join(response.streaming_content)
+
+        self.assertEqual(self.sample('ems_http_request_queries_count', route), requests + 1)
+        self.assertGreaterEqual(self.sample('ems_http_request_queries_sum', route), queries + 1)
+        self.assertEqual(self.sample('ems_http_response_size_bytes_sum', route), sent + len(body))
+        self.assertEqual(body.count(b'\n'), 4)
@@ -0,0 +1,139 @@
+"""
+Pre-sized profile photo variants.
+
+Every uploaded profile photo gets square WebP and JPEG versions at the sizes
+in ``THUMBNAIL_SIZES`` (cropped to the centre, EXIF rotation applied),
+stored as ``profile_photos/thumbs/<employee pk>/<size>_<token>.<ext>``. The
+token changes with the source photo, so browsers can cache a variant forever.
+
+``schedule_thumbnails`` queues ``generate_thumbnails`` as a background job
+(``ems_api.jobs``), so the upload request does not wait for Pillow.
+``Employee.profile_photo_thumbnails`` records the source photo they were made
+from; ``thumbnail_urls`` ignores variants of a photo that has since been
+replaced, and the serializer then has none until the new ones are ready. ``manage.py backfill_photo_thumbnails`` generates missing variants.
+"""
+
+import hashlib
+import io
+import logging
+from typing import Dict, Optional
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Q
+
+from . import jobs
+from .models import Employee
+
+
+logger = logging.getLogger(__name__)
+
+# Edge length in pixels; small fits 40px list avatars and medium the 96px profile avatar at 2x
+THUMBNAIL_SIZES = {
+    'small': 80,
+    'medium': 192,
+    'large': 400,
+}
+THUMBNAIL_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+THUMBNAIL_DIR = 'profile_photos/thumbs'
+
+
+def _source_token(name: str) -> str:
+    return hashlib.sha1(name.encode()).hexdigest()[:10]
+
+
+def render_variants(source) -> Dict[str, Dict[str, bytes]]:
+    """Encoded bytes of every size and format of the image in ``source`` (a binary file)"""
+    from PIL import Image, ImageOps
+
+    largest = max(THUMBNAIL_SIZES.values())
+    with Image.open(source) as image:
+        # JPEG: decode at a reduced scale straight away when the photo is much larger
+        image.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(image)
+        if image.mode in ('RGBA', 'LA', 'P'):
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        elif image.mode != 'RGB':
+            image = image.convert('RGB')
+
+        rendered = {}
+        for size_name, edge in sorted(THUMBNAIL_SIZES.items(), key=lambda item: -item[1]):
+            image = ImageOps.fit(image, (edge, edge), Image.LANCZOS) if image.size != (edge, edge) else image
+            rendered[size_name] = {}
+            for extension, (pil_format, options) in THUMBNAIL_FORMATS.items():
+                buffer = io.BytesIO()
+                image.save(buffer, pil_format, **options)
+                rendered[size_name][extension] = buffer.getvalue()
+        return rendered
+
+
+@jobs.register('thumbnails.generate')
+def generate_thumbnails(employee_pk: int) -> bool:
+    """Write the variants of an employee's current photo; False if there is none or it is not an image"""
+    employee = Employee.objects.filter(pk=employee_pk).only('pk', 'profile_photo', 'profile_photo_thumbnails').first()
+    if employee is None:
+        return False
+    source_name = employee.profile_photo.name if employee.profile_photo else ''
+    previous = employee.profile_photo_thumbnails or {}
+    if not source_name:
+        _set_thumbnails(employee, '', {}, previous)
+        return False
+
+    try:
+        with default_storage.open(source_name, 'rb') as source:
+            rendered = render_variants(source)
+    except Exception:
+        logger.warning("Could not make thumbnails of %s for employee %s", source_name, employee_pk, exc_info=True)
+        return False
+
+    token = _source_token(source_name)
+    variants = {}
+    for size_name, formats in rendered.items():
+        variants[size_name] = {}
+        for extension, data in formats.items():
+            path = f"{THUMBNAIL_DIR}/{employee_pk}/{size_name}_{token}.{extension}"
+            if default_storage.exists(path):
+                default_storage.delete(path)
+            variants[size_name][extension] = default_storage.save(path, ContentFile(data))
+    return _set_thumbnails(employee, source_name, variants, previous)
+
+
+def _set_thumbnails(employee: Employee, source_name: str, variants: dict, previous: dict) -> bool:
+    """Record ``variants`` unless the photo changed meanwhile, then delete whichever set is unused"""
+    thumbnails = {'source': source_name, 'variants': variants} if variants else {}
+    if source_name:
+        unchanged = Q(profile_photo=source_name)
+    else:
+        unchanged = Q(profile_photo='') | Q(profile_photo__isnull=True)
+    # A queryset update: thumbnails are no reason to bump data versions or reindex
+    updated = Employee.objects.filter(unchanged, pk=employee.pk).update(profile_photo_thumbnails=thumbnails)
+    stale, kept = (previous, thumbnails) if updated else (thumbnails, {})
+    for path in _paths(stale) - _paths(kept):
+        default_storage.delete(path)
+    return bool(updated and variants)
+
+
+def _paths(thumbnails: dict) -> set:
+    return {path for formats in thumbnails.get('variants', {}).values() for path in formats.values()}
+
+
+def thumbnail_urls(employee: Employee) -> Optional[Dict[str, Dict[str, str]]]:
+    """``{size: {format: url}}`` for the employee's current photo, or None while there are none"""
+    thumbnails = employee.profile_photo_thumbnails or {}
+    if not employee.profile_photo or thumbnails.get('source') != employee.profile_photo.name:
+        return None
+    return {
+        size_name: {extension: default_storage.url(path) for extension, path in formats.items()}
+        for size_name, formats in thumbnails.get('variants', {}).items()
+    }
+
+
+def schedule_thumbnails(employee_pk: int, user=None) -> None:
+    """Queue generation of the employee's thumbnails; it starts once the current transaction commits"""
+    jobs.enqueue('thumbnails.generate', {'employee_pk': employee_pk}, user=user)
@@ -0,0 +1,233 @@
+"""
+Chunked, resumable uploads for task attachments.
+
+Protocol (paths under /api/):
+
+- ``POST tasks/{id}/uploads/`` with ``file_name``, ``file_size`` and optional
+  ``file_type``, ``sha256`` (hex digest of the whole file) and
+  ``description`` starts an upload and returns its ``upload_id``
+- ``PUT task-uploads/{upload_id}/chunk/`` sends the next bytes as the raw
+  request body, with ``Upload-Offset: <offset>`` (or ``?offset=``) equal to
+  the bytes received so far and optionally ``X-Chunk-SHA256``. It answers with
+  the new offset, or 409 and the expected offset when they disagree
+- ``GET task-uploads/{upload_id}/`` returns the offset to resume from after a
+  disconnect
+- ``POST task-uploads/{upload_id}/complete/`` (optional ``sha256``) verifies
+  the size and checksum and creates the ``TaskAttachment``
+- ``DELETE task-uploads/{upload_id}/`` aborts and removes the partial file
+
+Chunks are streamed from the request into a staging file under
+``TASK_UPLOAD_STAGING_DIR`` in ``BLOCK_SIZE`` pieces, so memory use does not
+depend on chunk or file size. On completion the staging file goes to the
+attachment blob store (``ems_api.blobs``): the file system storage moves it
+into place, others copy it in chunks, and nothing is written when the same
+content is already stored. A chunk cut off by a disconnect keeps the bytes that arrived
+(unless it carried ``X-Chunk-SHA256``, which cannot be checked then), so the
+client resumes from ``GET``'s offset. Abandoned uploads are removed by
+``manage.py purge_task_uploads``.
+"""
+
+import hashlib
+import mimetypes
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+
+from . import blobs
+from .models import TaskAttachment, TaskAttachmentUpload
+
+
+BLOCK_SIZE = 256 * 1024
+DEFAULT_MAX_SIZE = 2 * 1024 ** 3
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+class UploadConflict(Exception):
+    """A chunk's offset does not match the bytes received (or another request got there first)"""
+
+    def __init__(self, message: str, offset: int):
+        super().__init__(message)
+        self.offset = offset
+
+
+class StagedFile(File):
+    """A finished staging file; ``temporary_file_path`` lets FileSystemStorage move it instead of copying"""
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def max_upload_size() -> int:
+    return getattr(settings, 'TASK_ATTACHMENT_MAX_SIZE', DEFAULT_MAX_SIZE)
+
+
+def chunk_size() -> int:
+    return getattr(settings, 'TASK_UPLOAD_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+
+
+def staging_path(upload: TaskAttachmentUpload) -> str:
+    directory = getattr(settings, 'TASK_UPLOAD_STAGING_DIR', os.path.join(settings.BASE_DIR, 'upload_staging'))
+    return os.path.join(directory, f'{upload.upload_id}.part')
+
+
+def guess_file_type(file_name: str) -> str:
+    return mimetypes.guess_type(file_name)[0] or 'application/octet-stream'
+
+
+def write_chunk(upload: TaskAttachmentUpload, stream, offset: int, chunk_sha256: str = '') -> int:
+    """
+    Append the bytes from ``stream`` at ``offset`` and return the new offset.
+
+    Raises ``UploadConflict`` when ``offset`` is not the number of bytes
+    received and ``ValueError`` when the chunk runs past ``file_size`` or
+    fails its ``chunk_sha256``; the upload is left at ``offset`` then.
+    """
+    if upload.status != 'Uploading':
+        raise UploadConflict('Upload already completed', upload.received)
+    if offset != upload.received:
+        raise UploadConflict(f'Expected offset {upload.received}, got {offset}', upload.received)
+
+    path = staging_path(upload)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    remaining = upload.file_size - offset
+    digest = hashlib.sha256()
+    written = 0
+    keep = True
+    with open(path, 'r+b' if os.path.exists(path) else 'wb') as staging:
+        # Drop anything past the acknowledged offset (e.g. from a racing request)
+        staging.seek(offset)
+        staging.truncate()
+        try:
+            while True:
+                block = stream.read(BLOCK_SIZE) if stream is not None else b''
+                if not block:
+                    break
+                if written + len(block) > remaining:
+                    raise ValueError(f'Chunk runs past the declared file size of {upload.file_size} bytes')
+                digest.update(block)
+                staging.write(block)
+                written += len(block)
+            if chunk_sha256 and digest.hexdigest() != chunk_sha256.lower():
+                raise ValueError('Chunk checksum mismatch')
+        except ValueError:
+            keep = False
+            raise
+        except Exception:
+            # Disconnected mid-chunk: keep what arrived unless it cannot be verified
+            keep = not chunk_sha256
+            raise
+        finally:
+            if not keep:
+                staging.seek(offset)
+                staging.truncate()
+                written = 0
+            if written:
+                _advance(upload, offset, written)
+    return upload.received
+
+
+def _advance(upload: TaskAttachmentUpload, offset: int, written: int) -> None:
+    """Record ``written`` more bytes, unless another request moved the upload on meanwhile"""
+    updated = TaskAttachmentUpload.objects.filter(pk=upload.pk, received=offset, status='Uploading').update(
+        received=offset + written, updated_at=timezone.now(),
+    )
+    if not updated:
+        upload.refresh_from_db(fields=['received', 'status'])
+        raise UploadConflict('Upload was modified by another request', upload.received)
+    upload.received = offset + written
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def complete_upload(upload: TaskAttachmentUpload, sha256: str = '') -> TaskAttachment:
+    """
+    Verify size and checksum, move the file into storage and create the attachment.
+
+    Completing an already completed upload returns its attachment, so a client
+    can retry ``complete`` whose response it lost. A checksum mismatch restarts
+    the upload from offset 0 and raises ``ValueError``.
+    """
+    with transaction.atomic():
+        upload = TaskAttachmentUpload.objects.select_for_update().select_related('task').get(pk=upload.pk)
+        if upload.status == 'Completed' and upload.attachment_id:
+            return upload.attachment
+        if upload.received != upload.file_size:
+            raise ValueError(f'Upload incomplete: {upload.received} of {upload.file_size} bytes received')
+        expected = (sha256 or upload.sha256).lower()
+        if upload.sha256 and sha256 and upload.sha256 != sha256.lower():
+            raise ValueError('sha256 differs from the one given when the upload started')
+
+        path = staging_path(upload)
+        actual = file_sha256(path) if upload.file_size else hashlib.sha256().hexdigest()
+        attachment = None
+        if not expected or actual == expected:
+            attachment = _store(upload, path, actual)
+    if attachment is None:
+        # Reset outside the transaction, which the exception would roll back
+        _restart(upload, path)
+        raise ValueError('Checksum mismatch: the upload has been reset, send the file again from offset 0')
+    _remove_staging(path)
+    return attachment
+
+
+def _store(upload: TaskAttachmentUpload, path: str, sha256: str) -> TaskAttachment:
+    """Create the attachment from the staging file (inside ``complete_upload``'s transaction)"""
+    fields = {
+        'task': upload.task,
+        'file_name': upload.file_name,
+        'file_size': upload.file_size,
+        'file_type': upload.file_type,
+        'uploaded_by_id': upload.uploaded_by_id,
+        'description': upload.description,
+    }
+    if upload.file_size:
+        with open(path, 'rb') as staged:
+            attachment = blobs.create_attachment(StagedFile(staged), sha256, **fields)
+    else:
+        attachment = blobs.create_attachment(ContentFile(b''), sha256, **fields)
+    upload.status = 'Completed'
+    upload.sha256 = sha256
+    upload.attachment = attachment
+    upload.save(update_fields=['status', 'sha256', 'attachment', 'updated_at'])
+    return attachment
+
+
+def _restart(upload: TaskAttachmentUpload, path: str) -> None:
+    _remove_staging(path)
+    upload.received = 0
+    upload.save(update_fields=['received', 'updated_at'])
+
+
+def _remove_staging(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def abort_upload(upload: TaskAttachmentUpload) -> None:
+    """Delete an upload and its partial file (a completed upload's attachment is kept)"""
+    _remove_staging(staging_path(upload))
+    upload.delete()
+
+
+def purge_stale_uploads(older_than: timedelta) -> int:
+    """Abort uploads with no chunk received for ``older_than``; returns how many"""
+    cutoff = timezone.now() - older_than
+    stale = TaskAttachmentUpload.objects.filter(status='Uploading', updated_at__lt=cutoff)
+    count = 0
+    for upload in stale.iterator():
+        abort_upload(upload)
+        count += 1
+    return count
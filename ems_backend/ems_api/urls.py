@@ -6,11 +6,16 @@ from .views import (
     LeaveRequestViewSet, 
     TaskViewSet,
     TaskAttachmentViewSet,
+    TaskAttachmentUploadViewSet,
+    BackgroundJobViewSet,
+    ReportViewSet,
     LoginView,
     LogoutView,
-    CurrentUserView
+    CurrentUserView,
+    DatabaseMetricsView,
+    RequestMetricsView
 )
-from .chatbot_views import ChatbotView, ChatbotHealthView
+from .chatbot_views import ChatbotView, AsyncChatbotView, ChatbotStreamView, ChatbotHealthView, ChatbotRefreshView, ChatbotMetricsView
 
 router = DefaultRouter()
 router.register(r'employees', EmployeeViewSet)
@@ -18,12 +23,21 @@ router.register(r'attendance', AttendanceRecordViewSet)
 router.register(r'leave-requests', LeaveRequestViewSet)
 router.register(r'tasks', TaskViewSet)
 router.register(r'task-attachments', TaskAttachmentViewSet)
+router.register(r'task-uploads', TaskAttachmentUploadViewSet)
+router.register(r'reports', ReportViewSet, basename='reports')
+router.register(r'jobs', BackgroundJobViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
     path('auth/login/', LoginView.as_view(), name='auth_login'),
     path('auth/logout/', LogoutView.as_view(), name='auth_logout'),
     path('auth/user/', CurrentUserView.as_view(), name='auth_user'),
+    path('metrics/', RequestMetricsView.as_view(), name='metrics'),
+    path('db/metrics/', DatabaseMetricsView.as_view(), name='db_metrics'),
     path('chatbot/', ChatbotView.as_view(), name='chatbot'),
+    path('chatbot/async/', AsyncChatbotView.as_view(), name='chatbot_async'),
+    path('chatbot/stream/', ChatbotStreamView.as_view(), name='chatbot_stream'),
     path('chatbot/health/', ChatbotHealthView.as_view(), name='chatbot_health'),
+    path('chatbot/refresh/', ChatbotRefreshView.as_view(), name='chatbot_refresh'),
+    path('chatbot/metrics/', ChatbotMetricsView.as_view(), name='chatbot_metrics'),
 ]
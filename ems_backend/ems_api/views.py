@@ -1,27 +1,88 @@
-from rest_framework import viewsets, permissions, status
+from rest_framework import mixins, viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from rest_framework.parsers import BaseParser, MultiPartParser, FormParser, JSONParser
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
 from django.contrib.auth import authenticate, login, logout
-from django.contrib.auth.models import User
 from rest_framework.authtoken.models import Token
 from django.db import IntegrityError, transaction
 from django.core.exceptions import ValidationError
-from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
-import os
-import uuid
-from .models import Employee, AttendanceRecord, LeaveRequest, Task, TaskAttachment, TaskProgressUpdate
+import csv
+from .models import Employee, AttendanceRecord, LeaveRequest, Task, TaskAttachment, TaskAttachmentUpload, TaskProgressUpdate, BackgroundJob
 from .serializers import (
     EmployeeSerializer, 
     AttendanceRecordSerializer, 
     LeaveRequestSerializer, 
     TaskSerializer,
     TaskAttachmentSerializer,
-    TaskProgressUpdateSerializer
+    TaskAttachmentUploadSerializer,
+    TaskProgressUpdateSerializer,
+    BackgroundJobSerializer
 )
+from . import accounts, blobs, downloads, instrumentation, jobs, reports, search, thumbnails, uploads
+from .exports import EXPORT_FORMATS, export_response
+from .ingestion import CSVParser, MAX_BULK_RECORDS, read_csv_rows, validate_attendance_rows, upsert_attendance_records
+from .db.pool import database_metrics
+from .pagination import AttendanceKeysetPagination, LeaveRequestKeysetPagination, TaskKeysetPagination
+
+
+def request_employee(request):
+    """The employee acting in a request; falls back to the first employee while auth is optional"""
+    if hasattr(request.user, 'employee'):
+        return request.user.employee
+    try:
+        return Employee.objects.get(user=request.user)
+    except Employee.DoesNotExist:
+        return Employee.objects.first()
+
+
+class EagerLoadingViewSetMixin:
+    """Apply the serializer's declared select/prefetch shape to every queryset"""
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        serializer_class = self.get_serializer_class()
+        if hasattr(serializer_class, 'setup_eager_loading'):
+            queryset = serializer_class.setup_eager_loading(queryset)
+        return queryset
+
+
+class ExportViewSetMixin:
+    """
+    Adds ``GET export/?export_format=csv|ndjson`` streaming the list queryset.
+
+    Viewsets declare ``export_columns`` as ``(header, lookup)`` pairs and apply
+    their list filters in ``filter_list_queryset`` so list and export agree.
+    """
+    export_columns = ()
+    export_filename = 'export'
+    export_chunk_size = 2000
+
+    def filter_list_queryset(self, queryset):
+        return queryset
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream every row matching the list filters as CSV or NDJSON"""
+        export_format = request.query_params.get('export_format', 'csv').lower()
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {'error': f"Invalid export_format '{export_format}'. Use one of: {', '.join(EXPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        # Plain values() rows: the serializer's select/prefetch shape is not needed here
+        queryset = self.filter_list_queryset(self.queryset.model.objects.all())
+        return export_response(
+            request,
+            queryset,
+            list(self.export_columns),
+            self.pagination_class(),
+            export_format,
+            self.export_filename,
+            chunk_size=self.export_chunk_size,
+        )
 
 
 class LoginView(APIView):
@@ -86,7 +147,27 @@ class CurrentUserView(APIView):
         )
 
 
-class EmployeeViewSet(viewsets.ModelViewSet):
+class DatabaseMetricsView(APIView):
+    """
+    Connection setup timings and pool stats for this process
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        return Response(database_metrics(), status=status.HTTP_200_OK)
+
+
+class RequestMetricsView(APIView):
+    """
+    Per-route request histograms in the Prometheus text format
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        return HttpResponse(instrumentation.render_metrics(), content_type=instrumentation.CONTENT_TYPE_LATEST)
+
+
+class EmployeeViewSet(EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     queryset = Employee.objects.all()
     serializer_class = EmployeeSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -120,21 +201,17 @@ class EmployeeViewSet(viewsets.ModelViewSet):
                         employee.age = today.year - employee.date_of_birth.year - ((today.month, today.day) < (employee.date_of_birth.month, employee.date_of_birth.day))
                         employee.save()
                     # Auto-create linked auth user if not provided
+                    password_job = None
                     if not employee.user:
-                        # Derive username from employee_id, set temporary password
-                        username = employee.employee_id
-                        temp_password = provided_password or employee.employee_id
-                        user = User.objects.create_user(
-                            username=username,
-                            email=employee.email,
-                            password=temp_password,
-                            first_name=employee.name.split(' ')[0] if employee.name else '',
-                            last_name=' '.join(employee.name.split(' ')[1:]) if employee.name and len(employee.name.split(' ')) > 1 else ''
-                        )
+                        # Username is the employee_id; without a provided password the employee_id
+                        # becomes the password once a background job has hashed it (ems_api.accounts)
+                        user, password_job = accounts.create_employee_user(employee, provided_password or None, request.user)
                         employee.user = user
                         employee.save()
-                        # Optionally, include clear guidance for admin to set password via separate flow
-                    return Response(self.get_serializer(employee).data, status=status.HTTP_201_CREATED)
+                    data = self.get_serializer(employee).data
+                    # The employee can sign in once this job has succeeded (GET /api/jobs/{job_id}/)
+                    data['password_job'] = str(password_job.job_id) if password_job else None
+                    return Response(data, status=status.HTTP_201_CREATED)
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         except IntegrityError as e:
             error_message = str(e)
@@ -289,11 +366,26 @@ class EmployeeViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Ranked employee search by id, name, email, department or designation"""
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': 'q parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(max(int(request.query_params.get('limit', search.DEFAULT_LIMIT)), 1), search.MAX_LIMIT)
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        results = search.search_employees(query, limit)
+        return Response({'query': query, 'count': len(results), 'results': results})
+
     @action(detail=True, methods=['get'])
     def attendance(self, request, pk=None):
         """Get attendance records for a specific employee"""
         employee = self.get_object()
-        attendance_records = AttendanceRecord.objects.filter(employee=employee)
+        attendance_records = AttendanceRecordSerializer.setup_eager_loading(
+            AttendanceRecord.objects.filter(employee=employee)
+        )
         serializer = AttendanceRecordSerializer(attendance_records, many=True)
         return Response(serializer.data)
     
@@ -301,7 +393,9 @@ class EmployeeViewSet(viewsets.ModelViewSet):
     def leave_requests(self, request, pk=None):
         """Get leave requests for a specific employee"""
         employee = self.get_object()
-        leave_requests = LeaveRequest.objects.filter(employee=employee)
+        leave_requests = LeaveRequestSerializer.setup_eager_loading(
+            LeaveRequest.objects.filter(employee=employee)
+        )
         serializer = LeaveRequestSerializer(leave_requests, many=True)
         return Response(serializer.data)
     
@@ -309,7 +403,7 @@ class EmployeeViewSet(viewsets.ModelViewSet):
     def tasks(self, request, pk=None):
         """Get tasks assigned to a specific employee"""
         employee = self.get_object()
-        tasks = Task.objects.filter(assigned_to=employee)
+        tasks = TaskSerializer.setup_eager_loading(Task.objects.filter(assigned_to=employee))
         serializer = TaskSerializer(tasks, many=True)
         return Response(serializer.data)
 
@@ -325,48 +419,109 @@ class EmployeeViewSet(viewsets.ModelViewSet):
             return Response({'error': 'File size cannot exceed 5MB'}, status=status.HTTP_400_BAD_REQUEST)
         employee.profile_photo = file
         employee.save()
+        # Avatar-sized variants are made in the background; until then the serializer has none
+        thumbnails.schedule_thumbnails(employee.pk, request.user)
         serializer = self.get_serializer(employee)
         return Response(serializer.data)
 
 
-class AttendanceRecordViewSet(viewsets.ModelViewSet):
+class AttendanceRecordViewSet(EagerLoadingViewSetMixin, ExportViewSetMixin, viewsets.ModelViewSet):
     queryset = AttendanceRecord.objects.all().order_by('-date', 'employee__name')
     serializer_class = AttendanceRecordSerializer
     permission_classes = [permissions.AllowAny]  # Allow access for development
+    pagination_class = AttendanceKeysetPagination
+    export_filename = 'attendance'
+    export_columns = (
+        ('id', 'id'),
+        ('date', 'date'),
+        ('employee_id', 'employee__employee_id'),
+        ('employee_name', 'employee__name'),
+        ('department', 'employee__department'),
+        ('check_in', 'check_in'),
+        ('check_out', 'check_out'),
+        ('hours', 'hours'),
+        ('status', 'status'),
+    )
     
     def list(self, request, *args, **kwargs):
         """List all attendance records with optional filtering"""
-        queryset = self.get_queryset()
+        queryset = self.filter_list_queryset(self.get_queryset())
         
-        # Apply filters if provided
-        employee_id = request.query_params.get('employee_id')
-        date = request.query_params.get('date')
-        department = request.query_params.get('department')
-        status = request.query_params.get('status')
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+            
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+    
+    def filter_list_queryset(self, queryset):
+        """Apply the employee_id, date, start_date, end_date, department and status filters"""
+        params = self.request.query_params
+        employee_id = params.get('employee_id')
+        date = params.get('date')
+        start_date = params.get('start_date')
+        end_date = params.get('end_date')
+        department = params.get('department')
+        status = params.get('status')
         
         if employee_id:
             queryset = queryset.filter(employee__employee_id=employee_id)
         if date:
             queryset = queryset.filter(date=date)
+        if start_date:
+            queryset = queryset.filter(date__gte=start_date)
+        if end_date:
+            queryset = queryset.filter(date__lte=end_date)
         if department:
             queryset = queryset.filter(employee__department=department)
         if status:
             queryset = queryset.filter(status=status)
-            
-        page = self.paginate_queryset(queryset)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-            
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return queryset
+    
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser, CSVParser, MultiPartParser])
+    def bulk(self, request):
+        """
+        Upsert many attendance records on (date, employee).
+
+        Accepts a JSON list (or ``{"records": [...]}``), a ``text/csv`` body or a
+        multipart ``file`` upload. Valid rows are saved; invalid rows are
+        reported by index and skipped.
+        """
+        data = request.data
+        if 'file' in request.FILES:
+            try:
+                data = read_csv_rows(request.FILES['file'])
+            except (UnicodeDecodeError, csv.Error) as e:
+                return Response({'error': f'CSV parse error - {e}'}, status=status.HTTP_400_BAD_REQUEST)
+        elif isinstance(data, dict):
+            data = data.get('records')
+        if not isinstance(data, list):
+            return Response(
+                {'error': 'Expected a list of records, {"records": [...]}, CSV body or CSV file upload'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(data) > MAX_BULK_RECORDS:
+            return Response(
+                {'error': f'Too many records ({len(data)}). Send at most {MAX_BULK_RECORDS} per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        records, errors = validate_attendance_rows(data)
+        saved = upsert_attendance_records(records)
+        return Response({
+            'received': len(data),
+            'saved': saved,
+            'failed': len(errors),
+            'errors': errors,
+        })
     
     @action(detail=False, methods=['get'])
     def by_date(self, request):
         """Get attendance records for a specific date"""
         date = request.query_params.get('date')
         if date:
-            records = self.queryset.filter(date=date)
+            records = self.get_queryset().filter(date=date)
             serializer = self.get_serializer(records, many=True)
             return Response(serializer.data)
         return Response({'error': 'Date parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
@@ -376,16 +531,32 @@ class AttendanceRecordViewSet(viewsets.ModelViewSet):
         """Get attendance records for a specific employee"""
         employee_id = request.query_params.get('employee_id')
         if employee_id:
-            records = self.queryset.filter(employee__employee_id=employee_id)
+            records = self.get_queryset().filter(employee__employee_id=employee_id)
             serializer = self.get_serializer(records, many=True)
             return Response(serializer.data)
         return Response({'error': 'Employee ID parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
 
 
-class LeaveRequestViewSet(viewsets.ModelViewSet):
+class LeaveRequestViewSet(EagerLoadingViewSetMixin, ExportViewSetMixin, viewsets.ModelViewSet):
     queryset = LeaveRequest.objects.all()
     serializer_class = LeaveRequestSerializer
     permission_classes = [permissions.AllowAny]  # Allow anonymous access for development
+    pagination_class = LeaveRequestKeysetPagination
+    export_filename = 'leave_requests'
+    export_columns = (
+        ('id', 'id'),
+        ('employee_id', 'employee__employee_id'),
+        ('employee_name', 'employee__name'),
+        ('department', 'employee__department'),
+        ('leave_type', 'leave_type'),
+        ('start_date', 'start_date'),
+        ('end_date', 'end_date'),
+        ('days', 'days'),
+        ('applied_date', 'applied_date'),
+        ('status', 'status'),
+        ('approved_by', 'approved_by__name'),
+        ('reason', 'reason'),
+    )
     
     @action(detail=True, methods=['post'])
     def approve(self, request, pk=None):
@@ -410,16 +581,33 @@ class LeaveRequestViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def pending(self, request):
         """Get all pending leave requests"""
-        pending_requests = self.queryset.filter(status='Pending')
+        pending_requests = self.get_queryset().filter(status='Pending')
         serializer = self.get_serializer(pending_requests, many=True)
         return Response(serializer.data)
 
 
-class TaskViewSet(viewsets.ModelViewSet):
+class TaskViewSet(EagerLoadingViewSetMixin, ExportViewSetMixin, viewsets.ModelViewSet):
     queryset = Task.objects.all()
     serializer_class = TaskSerializer
     permission_classes = [permissions.AllowAny]  # Allow anonymous access for development
+    pagination_class = TaskKeysetPagination
     parser_classes = [JSONParser, MultiPartParser, FormParser]
+    export_filename = 'tasks'
+    export_columns = (
+        ('id', 'id'),
+        ('title', 'title'),
+        ('assigned_to', 'assigned_to__employee_id'),
+        ('assigned_to_name', 'assigned_to__name'),
+        ('assigned_by_name', 'assigned_by__name'),
+        ('department', 'department'),
+        ('priority', 'priority'),
+        ('status', 'status'),
+        ('progress', 'progress'),
+        ('assigned_date', 'assigned_date'),
+        ('due_date', 'due_date'),
+        ('estimated_hours', 'estimated_hours'),
+        ('last_updated', 'last_updated'),
+    )
     
     @action(detail=True, methods=['post'])
     def update_progress(self, request, pk=None):
@@ -430,16 +618,7 @@ class TaskViewSet(viewsets.ModelViewSet):
         
         if progress is not None and 0 <= progress <= 100:
             # Get employee making the update
-            employee = None
-            if hasattr(request.user, 'employee'):
-                employee = request.user.employee
-            else:
-                # Fallback for development - find employee by user ID or use first employee
-                try:
-                    employee = Employee.objects.get(user=request.user)
-                except Employee.DoesNotExist:
-                    employee = Employee.objects.first()
-            
+            employee = request_employee(request)
             if not employee:
                 return Response({'error': 'Employee profile not found'}, status=status.HTTP_400_BAD_REQUEST)
             
@@ -466,13 +645,15 @@ class TaskViewSet(viewsets.ModelViewSet):
             )
             
             task.save()
+            # Drop the prefetched history so the response includes this update
+            task._prefetched_objects_cache = {}
             serializer = self.get_serializer(task)
             return Response(serializer.data)
         return Response({'error': 'Progress must be between 0 and 100'}, status=status.HTTP_400_BAD_REQUEST)
     
     @action(detail=True, methods=['post'])
     def upload_file(self, request, pk=None):
-        """Upload file attachment to task"""
+        """Upload file attachment to task in a single request (see ``uploads`` for large files)"""
         task = self.get_object()
         
         if 'file' not in request.FILES:
@@ -482,57 +663,56 @@ class TaskViewSet(viewsets.ModelViewSet):
         description = request.data.get('description', '')
         
         # Get employee making the upload
-        employee = None
-        if hasattr(request.user, 'employee'):
-            employee = request.user.employee
-        else:
-            try:
-                employee = Employee.objects.get(user=request.user)
-            except Employee.DoesNotExist:
-                employee = Employee.objects.first()
-        
+        employee = request_employee(request)
         if not employee:
             return Response({'error': 'Employee profile not found'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Validate file size (10MB max)
-        if file.size > 10 * 1024 * 1024:
-            return Response({'error': 'File size cannot exceed 10MB'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Generate unique filename
-        file_extension = os.path.splitext(file.name)[1]
-        unique_filename = f"task_{task.id}_{uuid.uuid4().hex[:8]}{file_extension}"
+        max_size = uploads.max_upload_size()
+        if file.size > max_size:
+            return Response({'error': f'File size cannot exceed {max_size} bytes'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Save file
-        file_path = f"task_attachments/{unique_filename}"
-        saved_path = default_storage.save(file_path, ContentFile(file.read()))
-        
-        # Create attachment record
-        attachment = TaskAttachment.objects.create(
+        # Store the content once per digest (hashed while it streamed in); a
+        # new file is moved or copied in chunks, a duplicate is not written
+        attachment = blobs.create_attachment(
+            file,
+            blobs.uploaded_file_sha256(request, 'file', file),
             task=task,
             file_name=file.name,
-            file_path=saved_path,
             file_size=file.size,
             file_type=file.content_type or 'application/octet-stream',
             uploaded_by=employee,
             description=description
         )
         
-        serializer = TaskAttachmentSerializer(attachment)
+        serializer = TaskAttachmentSerializer(attachment, context={'request': request})
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+    
+    @action(detail=True, methods=['post'], url_path='uploads')
+    def start_upload(self, request, pk=None):
+        """Start a chunked, resumable attachment upload (protocol in ``ems_api.uploads``)"""
+        task = self.get_object()
+        employee = request_employee(request)
+        if not employee:
+            return Response({'error': 'Employee profile not found'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        serializer = TaskAttachmentUploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save(task=task, uploaded_by=employee)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     
     @action(detail=True, methods=['get'])
     def attachments(self, request, pk=None):
         """Get all attachments for a task"""
         task = self.get_object()
-        attachments = TaskAttachment.objects.filter(task=task)
-        serializer = TaskAttachmentSerializer(attachments, many=True)
+        attachments = TaskAttachmentSerializer.setup_eager_loading(TaskAttachment.objects.filter(task=task))
+        serializer = TaskAttachmentSerializer(attachments, many=True, context={'request': request})
         return Response(serializer.data)
     
     @action(detail=True, methods=['get'])
     def progress_history(self, request, pk=None):
         """Get progress update history for a task"""
         task = self.get_object()
-        updates = TaskProgressUpdate.objects.filter(task=task)
+        updates = TaskProgressUpdateSerializer.setup_eager_loading(TaskProgressUpdate.objects.filter(task=task))
         serializer = TaskProgressUpdateSerializer(updates, many=True)
         return Response(serializer.data)
     
@@ -541,7 +721,7 @@ class TaskViewSet(viewsets.ModelViewSet):
         """Get tasks by status"""
         status_filter = request.query_params.get('status')
         if status_filter:
-            tasks = self.queryset.filter(status=status_filter)
+            tasks = self.get_queryset().filter(status=status_filter)
             serializer = self.get_serializer(tasks, many=True)
             return Response(serializer.data)
         return Response({'error': 'Status parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
@@ -551,7 +731,7 @@ class TaskViewSet(viewsets.ModelViewSet):
         """Get tasks by priority"""
         priority_filter = request.query_params.get('priority')
         if priority_filter:
-            tasks = self.queryset.filter(priority=priority_filter)
+            tasks = self.get_queryset().filter(priority=priority_filter)
             serializer = self.get_serializer(tasks, many=True)
             return Response(serializer.data)
         return Response({'error': 'Priority parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
@@ -560,31 +740,175 @@ class TaskViewSet(viewsets.ModelViewSet):
     def employee_tasks_with_files(self, request):
         """Get all tasks with their attachments for admin view"""
         employee_id = request.query_params.get('employee_id')
+        tasks = self.get_queryset()
         if employee_id:
-            tasks = self.queryset.filter(assigned_to__employee_id=employee_id)
-        else:
-            tasks = self.queryset.all()
-        
-        # Include attachments and progress updates
-        tasks = tasks.prefetch_related('attachments', 'progress_updates')
+            tasks = tasks.filter(assigned_to__employee_id=employee_id)
         serializer = self.get_serializer(tasks, many=True)
         return Response(serializer.data)
 
 
-class TaskAttachmentViewSet(viewsets.ModelViewSet):
+class TaskAttachmentViewSet(EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     queryset = TaskAttachment.objects.all()
     serializer_class = TaskAttachmentSerializer
     permission_classes = [permissions.AllowAny]
     
     @action(detail=True, methods=['get'])
     def download(self, request, pk=None):
-        """Download attachment file"""
+        """Stream the attachment file (Range, ETag and X-Accel-Redirect/X-Sendfile in ``ems_api.downloads``)"""
         attachment = self.get_object()
+        inline = request.query_params.get('inline', '').lower() in ('1', 'true')
         try:
-            if default_storage.exists(attachment.file_path):
-                file_url = default_storage.url(attachment.file_path)
-                return Response({'download_url': file_url})
-            else:
-                return Response({'error': 'File not found'}, status=status.HTTP_404_NOT_FOUND)
-        except Exception as e:
-            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            return downloads.attachment_response(request, attachment, as_attachment=not inline)
+        except FileNotFoundError:
+            return Response({'error': 'File not found'}, status=status.HTTP_404_NOT_FOUND)
+
+
+class RawChunkParser(BaseParser):
+    """Leaves the request body unread so a chunk can be streamed from ``request.stream``"""
+    media_type = '*/*'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return {}
+
+
+class TaskAttachmentUploadViewSet(mixins.RetrieveModelMixin, mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    """Status, chunks, completion and abort of chunked attachment uploads"""
+    queryset = TaskAttachmentUpload.objects.all()
+    serializer_class = TaskAttachmentUploadSerializer
+    permission_classes = [permissions.AllowAny]
+    lookup_field = 'upload_id'
+    
+    @action(detail=True, methods=['put'], parser_classes=[RawChunkParser])
+    def chunk(self, request, upload_id=None):
+        """Write the request body at the ``Upload-Offset`` header (or ``offset`` query parameter)"""
+        upload = self.get_object()
+        offset = request.headers.get('Upload-Offset', request.query_params.get('offset'))
+        if offset is None or not str(offset).isdigit():
+            return Response({'error': 'Upload-Offset header is required', 'offset': upload.received},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if request.headers.get('Content-Length') is None:
+            return Response({'error': 'Content-Length header is required'}, status=status.HTTP_411_LENGTH_REQUIRED)
+        
+        try:
+            received = uploads.write_chunk(upload, request.stream, int(offset), request.headers.get('X-Chunk-SHA256', ''))
+        except uploads.UploadConflict as e:
+            return Response({'error': str(e), 'offset': e.offset}, status=status.HTTP_409_CONFLICT)
+        except ValueError as e:
+            return Response({'error': str(e), 'offset': upload.received}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'offset': received, 'complete': received == upload.file_size})
+    
+    @action(detail=True, methods=['post'])
+    def complete(self, request, upload_id=None):
+        """Verify the received file and create the attachment (repeatable)"""
+        upload = self.get_object()
+        already_completed = upload.status == 'Completed'
+        try:
+            attachment = uploads.complete_upload(upload, request.data.get('sha256', ''))
+        except ValueError as e:
+            upload.refresh_from_db(fields=['received'])
+            return Response({'error': str(e), 'offset': upload.received}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = TaskAttachmentSerializer(attachment, context={'request': request})
+        return Response(serializer.data, status=status.HTTP_200_OK if already_completed else status.HTTP_201_CREATED)
+    
+    def perform_destroy(self, instance):
+        uploads.abort_upload(instance)
+
+
+
+class BackgroundJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Status of background jobs (ems_api.jobs).
+
+    Admins see every job and can filter with ``status`` and ``name``; other
+    users see the jobs their requests queued. Lists return the newest
+    ``limit`` jobs (default 50, at most 500).
+    """
+    queryset = BackgroundJob.objects.all()
+    serializer_class = BackgroundJobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    lookup_field = 'job_id'
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(created_by=self.request.user)
+        for field in ('status', 'name'):
+            value = self.request.query_params.get(field)
+            if value:
+                queryset = queryset.filter(**{field: value})
+        return queryset
+    
+    def list(self, request, *args, **kwargs):
+        try:
+            limit = min(max(int(request.query_params.get('limit', 50)), 1), 500)
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        jobs_page = self.get_queryset().order_by('-id')[:limit]
+        return Response(self.get_serializer(jobs_page, many=True).data)
+    
+    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAdminUser])
+    def retry(self, request, job_id=None):
+        """Queue a failed job again with a fresh set of attempts"""
+        job = self.get_object()
+        if not jobs.retry(job):
+            return Response({'error': 'Only failed jobs can be retried'}, status=status.HTTP_409_CONFLICT)
+        job.refresh_from_db()
+        return Response(self.get_serializer(job).data)
+    
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAdminUser])
+    def stats(self, request):
+        """Jobs per status, age of the oldest waiting job and the registered handlers"""
+        return Response(jobs.queue_stats())
+
+
+class ReportViewSet(viewsets.ViewSet):
+    """Aggregated statistics for the Reports page, computed in the database"""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_report_filters(self, request):
+        """Read start_date, end_date and department query parameters"""
+        start_date = reports.parse_report_date(request.query_params.get('start_date'), 'start_date')
+        end_date = reports.parse_report_date(request.query_params.get('end_date'), 'end_date')
+        if start_date and end_date and start_date > end_date:
+            raise ValueError('start_date must be on or before end_date')
+        return {
+            'start_date': start_date,
+            'end_date': end_date,
+            'department': request.query_params.get('department') or None,
+        }
+
+    def build_report(self, request, report):
+        try:
+            filters = self.get_report_filters(request)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report(**filters))
+
+    @action(detail=False, methods=['get'])
+    def overview(self, request):
+        """Employee, attendance, leave and task headline numbers"""
+        return self.build_report(request, reports.overview_report)
+
+    @action(detail=False, methods=['get'])
+    def employees(self, request):
+        """Headcount and department distribution"""
+        try:
+            filters = self.get_report_filters(request)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(reports.employee_report(filters['department']))
+
+    @action(detail=False, methods=['get'])
+    def attendance(self, request):
+        """Attendance status counts and hours for a date range"""
+        return self.build_report(request, reports.attendance_report)
+
+    @action(detail=False, methods=['get'])
+    def leave(self, request):
+        """Leave status and type breakdown"""
+        return self.build_report(request, reports.leave_report)
+
+    @action(detail=False, methods=['get'])
+    def tasks(self, request):
+        """Task status and priority breakdown"""
+        return self.build_report(request, reports.task_report)
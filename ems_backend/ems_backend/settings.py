@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+from corsheaders.defaults import default_headers
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -61,6 +62,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Outermost, so its wall time covers the rest of the stack
+    'ems_api.instrumentation.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -101,7 +104,7 @@ CORS_ALLOWED_ORIGINS = [
 # REST Framework settings (enforce token auth by default)
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'ems_api.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -120,20 +123,55 @@ REST_SESSION_LOGIN = True
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'mysql.connector.django',
-        'NAME': MYSQL_CONFIG['NAME'],
-        'USER': MYSQL_CONFIG['USER'],
-        'PASSWORD': MYSQL_CONFIG['PASSWORD'],
-        'HOST': MYSQL_CONFIG['HOST'],
-        'PORT': MYSQL_CONFIG['PORT'],
-        'OPTIONS': {
-            'charset': 'utf8mb4',
-            'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
-        },
+# Database engine: 'mysql' (default) or 'sqlite' for the development file db.sqlite3.
+# Both go through thin wrappers (ems_api/db) that time connection setup and can pool.
+DB_ENGINE = os.getenv('DB_ENGINE', 'mysql')
+
+# Connection handling:
+#   'none'       - a new connection per request (Django's default)
+#   'persistent' - each worker thread keeps its connection for DB_CONN_MAX_AGE seconds,
+#                  checked before reuse (CONN_HEALTH_CHECKS)
+#   'pool'       - a per-process pool shared by all threads (DB_POOL_MIN_SIZE..DB_POOL_MAX_SIZE,
+#                  idle connections above the minimum closed after DB_POOL_IDLE_TIMEOUT seconds)
+DB_POOL_MODE = os.getenv('DB_POOL_MODE', 'persistent')
+DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', '60'))
+
+if DB_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'ems_api.db.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'ems_api.db.mysql',
+            'NAME': MYSQL_CONFIG['NAME'],
+            'USER': MYSQL_CONFIG['USER'],
+            'PASSWORD': MYSQL_CONFIG['PASSWORD'],
+            'HOST': MYSQL_CONFIG['HOST'],
+            'PORT': MYSQL_CONFIG['PORT'],
+            'OPTIONS': {
+                'charset': 'utf8mb4',
+                'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
+            },
+        }
+    }
+
+if DB_POOL_MODE == 'persistent':
+    DATABASES['default']['CONN_MAX_AGE'] = DB_CONN_MAX_AGE
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+elif DB_POOL_MODE == 'pool':
+    # Django closes after every request, which returns the connection to the pool
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['POOL'] = {
+        'MIN_SIZE': int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+        'MAX_SIZE': int(os.getenv('DB_POOL_MAX_SIZE', '20')),
+        'IDLE_TIMEOUT': float(os.getenv('DB_POOL_IDLE_TIMEOUT', '300')),
+        'TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', '10')),
+        'HEALTH_CHECK_AFTER': float(os.getenv('DB_POOL_HEALTH_CHECK_AFTER', '30')),
     }
-}
 
 
 # Password validation
@@ -192,6 +230,8 @@ CORS_ALLOWED_HEADERS = [
     'x-csrftoken',
     'x-requested-with',
 ]
+# Headers django-cors-headers actually reads: its defaults plus the chunked upload headers
+CORS_ALLOW_HEADERS = (*default_headers, 'upload-offset', 'x-chunk-sha256')
 
 # Remove duplicate REST_FRAMEWORK configuration and rely on the one above
 
@@ -213,3 +253,96 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Chatbot model: a Gemini model name, or 'fake' for the local stand-in used by tests and load tests
+CHATBOT_MODEL = os.getenv('CHATBOT_MODEL', 'gemini-1.5-flash')
+CHATBOT_FAKE_LATENCY = float(os.getenv('CHATBOT_FAKE_LATENCY', '0.5'))
+CHATBOT_FAKE_TOKEN_DELAY = float(os.getenv('CHATBOT_FAKE_TOKEN_DELAY', '0.02'))
+
+# Async chatbot endpoint timeouts (seconds): whole request, and database lookups within it
+CHATBOT_REQUEST_TIMEOUT = float(os.getenv('CHATBOT_REQUEST_TIMEOUT', '30'))
+CHATBOT_TOOL_TIMEOUT = float(os.getenv('CHATBOT_TOOL_TIMEOUT', '5'))
+
+# Chatbot prompt context: approximate token budget for the data sent with each question
+CHATBOT_CONTEXT_TOKEN_BUDGET = int(os.getenv('CHATBOT_CONTEXT_TOKEN_BUDGET', '4000'))
+
+# Cached chatbot answers: entries kept (LRU) and seconds before expiry; 0 disables the cache
+CHATBOT_RESPONSE_CACHE_SIZE = int(os.getenv('CHATBOT_RESPONSE_CACHE_SIZE', '256'))
+CHATBOT_RESPONSE_CACHE_TTL = float(os.getenv('CHATBOT_RESPONSE_CACHE_TTL', '300'))
+
+# Employee search index: seconds between checks for employee changes made by other processes
+EMPLOYEE_SEARCH_REFRESH_SECONDS = float(os.getenv('EMPLOYEE_SEARCH_REFRESH_SECONDS', '5'))
+
+# Token authentication cache: validated tokens kept per process (LRU) and seconds before
+# expiry (0 disables it). Without a shared cache, deletions in another process (logout,
+# deactivation, purge_tokens) reach this process's cache only through expiry, so keep the
+# TTL short or set TOKEN_AUTH_SHARED_CACHE.
+TOKEN_AUTH_CACHE_SIZE = int(os.getenv('TOKEN_AUTH_CACHE_SIZE', '10000'))
+TOKEN_AUTH_CACHE_TTL = float(os.getenv('TOKEN_AUTH_CACHE_TTL', '60'))
+# Optional Django cache alias (e.g. a Redis/Memcached entry in CACHES) shared by all workers;
+# it also carries revocation markers that every worker checks, so revoked tokens stop at once
+TOKEN_AUTH_SHARED_CACHE = os.getenv('TOKEN_AUTH_SHARED_CACHE', '')
+TOKEN_AUTH_SHARED_CACHE_TTL = float(os.getenv('TOKEN_AUTH_SHARED_CACHE_TTL', '300'))
+
+# Request instrumentation (ems_api/instrumentation.py): requests slower than this are logged
+# with their slowest SQL statements; 0 disables the log
+REQUEST_SLOW_THRESHOLD_MS = int(os.getenv('REQUEST_SLOW_THRESHOLD_MS', '500'))
+REQUEST_SLOW_TOP_QUERIES = int(os.getenv('REQUEST_SLOW_TOP_QUERIES', '5'))
+
+# Task attachments (ems_api/uploads.py): largest accepted file, chunk size suggested to
+# clients of the chunked upload endpoints, and where partial uploads are kept (outside
+# MEDIA_ROOT so unfinished files are never served)
+TASK_ATTACHMENT_MAX_SIZE = int(os.getenv('TASK_ATTACHMENT_MAX_SIZE', str(2 * 1024 ** 3)))
+TASK_UPLOAD_CHUNK_SIZE = int(os.getenv('TASK_UPLOAD_CHUNK_SIZE', str(8 * 1024 * 1024)))
+TASK_UPLOAD_STAGING_DIR = os.getenv('TASK_UPLOAD_STAGING_DIR', os.path.join(BASE_DIR, 'upload_staging'))
+
+# Background jobs (ems_api/jobs.py, run by `manage.py run_worker`): worker processes, seconds
+# between polls of an empty queue, seconds a claimed job stays hidden from other workers
+# (handlers may set their own), base retry delay (doubled per attempt) and days finished jobs
+# are kept. JOB_QUEUE_EAGER runs each job's first attempt in the process that queued it, once
+# its transaction commits, so installs without a worker still work; it follows DEBUG unless set,
+# and production deployments running `manage.py run_worker` should set JOB_QUEUE_EAGER=false
+JOB_WORKER_PROCESSES = int(os.getenv('JOB_WORKER_PROCESSES', '2'))
+JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', '1'))
+JOB_VISIBILITY_TIMEOUT = float(os.getenv('JOB_VISIBILITY_TIMEOUT', '300'))
+JOB_RETRY_DELAY = float(os.getenv('JOB_RETRY_DELAY', '10'))
+JOB_RETENTION_DAYS = float(os.getenv('JOB_RETENTION_DAYS', '7'))
+JOB_QUEUE_EAGER = os.getenv('JOB_QUEUE_EAGER', str(DEBUG)).lower() in ('1', 'true')
+
+# Attachment downloads (ems_api/downloads.py): 'stream' serves files from Django with Range and
+# ETag support; 'x-accel' (nginx, internal location at ATTACHMENT_ACCEL_REDIRECT_PREFIX aliased
+# to MEDIA_ROOT) or 'x-sendfile' (Apache/lighttpd) hand the file to the front proxy instead
+ATTACHMENT_DOWNLOAD_MODE = os.getenv('ATTACHMENT_DOWNLOAD_MODE', 'stream')
+ATTACHMENT_ACCEL_REDIRECT_PREFIX = os.getenv('ATTACHMENT_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+
+# Multipart uploads: hash files as they stream in (for the attachment blob store,
+# ems_api/blobs.py), then Django's default memory/temporary file handlers
+FILE_UPLOAD_HANDLERS = [
+    'ems_api.blobs.SHA256UploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
+# Logging
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'simple': {
+            'format': '[{asctime}] {levelname} {name}: {message}',
+            'style': '{',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'simple',
+        },
+    },
+    'loggers': {
+        'ems_api': {
+            'handlers': ['console'],
+            'level': os.getenv('EMS_LOG_LEVEL', 'INFO'),
+        },
+    },
+}
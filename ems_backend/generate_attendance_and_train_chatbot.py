@@ -11,6 +11,8 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ems_backend.settings')
 django.setup()
 
 from ems_api.models import Employee, AttendanceRecord, LeaveRequest, Task
+from ems_api.rollups import rebuild_attendance_rollups
+from ems_api.chatbot_cache import bump_data_version
 
 def generate_attendance_data():
     """Generate attendance data for 20 employees from July 1 to August 15, 2025"""
@@ -32,7 +34,7 @@ def generate_attendance_data():
     attendance_statuses = ['Present', 'Absent', 'Late', 'Half Day']
     attendance_weights = [0.85, 0.05, 0.07, 0.03]
     
-    records_created = 0
+    records = []
     current_date = start_date
     
     while current_date <= end_date:
@@ -51,18 +53,23 @@ def generate_attendance_data():
                 else:  # Absent
                     hours = 0.0
                 
-                AttendanceRecord.objects.create(
+                records.append(AttendanceRecord(
                     employee=employee,
                     date=current_date,
                     status=status,
                     hours=hours
-                )
-                
-                records_created += 1
+                ))
         
         current_date += timedelta(days=1)
     
+    AttendanceRecord.objects.bulk_create(records, batch_size=1000)
+    
+    bump_data_version('attendance')
+    records_created = len(records)
     print(f"Created {records_created} attendance records")
+    
+    # Attendance was replaced wholesale, so rebuild every daily rollup
+    rebuild_attendance_rollups()
     return records_created
 
 def train_chatbot_with_complete_data():
@@ -10,6 +10,8 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ems_backend.settings')
 django.setup()
 
 from ems_api.models import Employee, AttendanceRecord
+from ems_api.rollups import rebuild_attendance_rollups
+from ems_api.chatbot_cache import bump_data_version
 
 def generate_attendance_data():
     """Generate 320 mock attendance records for 20 employees from July 1 to August 15, 2025"""
@@ -35,7 +37,7 @@ def generate_attendance_data():
     attendance_statuses = ['Present', 'Absent', 'Late', 'Half Day']
     attendance_weights = [0.85, 0.05, 0.07, 0.03]  # 85% present, 5% absent, 7% late, 3% half day
     
-    records_created = 0
+    records = []
     current_date = start_date
     
     while current_date <= end_date:
@@ -56,21 +58,26 @@ def generate_attendance_data():
                 else:  # Absent
                     hours = 0.0
                 
-                # Create attendance record
-                AttendanceRecord.objects.create(
+                records.append(AttendanceRecord(
                     employee=employee,
                     date=current_date,
                     status=status,
                     hours=hours
-                )
-                
-                records_created += 1
+                ))
         
         current_date += timedelta(days=1)
     
+    # Insert in batches instead of one INSERT per record
+    AttendanceRecord.objects.bulk_create(records, batch_size=1000)
+    bump_data_version('attendance')
+    records_created = len(records)
     print(f"Created {records_created} attendance records")
     print(f"Records per employee: {records_created // 20}")
     
+    # Attendance was replaced wholesale, so rebuild every daily rollup
+    rollups = rebuild_attendance_rollups()
+    print(f"Rebuilt {rollups} daily attendance rollups")
+    
     # Verify data
     print("\nAttendance summary by employee:")
     for employee in employees[:20]:
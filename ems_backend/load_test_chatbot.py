@@ -0,0 +1,254 @@
+#!/usr/bin/env python
+"""
+Load test for the async chatbot endpoint.
+
+Starts one uvicorn worker serving ems_backend.asgi:application with the fake
+model (CHATBOT_MODEL=fake, CHATBOT_FAKE_LATENCY seconds per answer) and fires
+concurrent chats at /api/chatbot/async/.
+
+With --stream the chats go to the SSE endpoint /api/chatbot/stream/ instead
+and time to first token (first ``token`` event) is reported next to the full
+answer latency.
+
+With --compare-wsgi-threads N the same chats are also sent to the sync
+/api/chatbot/ view through a pool of N threads, the way a threaded WSGI worker
+serves it: every chat pins a thread for the whole model round-trip, so at most
+N chats are in flight.
+
+Pass --url to test an already running server instead (it must be started with
+the model you want to measure).
+
+Usage:
+    python load_test_chatbot.py --requests 500 --concurrency 200
+    python load_test_chatbot.py --requests 200 --concurrency 100 --compare-wsgi-threads 8
+    python load_test_chatbot.py --requests 200 --concurrency 50 --stream
+    python load_test_chatbot.py --url http://localhost:8000 --json chatbot_load.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+
+# Add the project directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ems_backend.settings')
+
+MESSAGES = [
+    "Show me the attendance summary",
+    "List all employees",
+    "Give me the leave summary",
+    "What is the task summary for engineering department?",
+    "How do I add a new employee?",
+    "Show attendance for emp003 in July",
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=500, help='Total chats to send')
+    parser.add_argument('--concurrency', type=int, default=200, help='Chats in flight at once')
+    parser.add_argument('--latency', type=float, default=0.5, help='Fake model latency in seconds')
+    parser.add_argument('--url', help='Base URL of a running server (default: start one in-process)')
+    parser.add_argument('--stream', action='store_true',
+                        help='Use the SSE endpoint and report time to first token')
+    parser.add_argument('--compare-wsgi-threads', type=int, metavar='N',
+                        help='Also run the sync /api/chatbot/ view on N worker threads (in-process server only)')
+    parser.add_argument('--timeout', type=float, default=120, help='Client timeout per request')
+    parser.add_argument('--json', help='Write results to this JSON file')
+    return parser.parse_args()
+
+
+def start_server(latency):
+    """Run a single uvicorn worker in a background thread; returns its base URL"""
+    os.environ['CHATBOT_MODEL'] = 'fake'
+    os.environ['CHATBOT_FAKE_LATENCY'] = str(latency)
+    os.environ.setdefault('EMS_LOG_LEVEL', 'WARNING')
+    import uvicorn
+
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    config = uvicorn.Config('ems_backend.asgi:application', host='127.0.0.1', port=port,
+                            log_level='warning', lifespan='off')
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return f'http://127.0.0.1:{port}'
+
+
+async def run_load(url, total, concurrency, timeout):
+    import httpx
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, statuses = [], {}
+
+    async def one(client, index):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                response = await client.post(url, json={'message': MESSAGES[index % len(MESSAGES)]})
+                code = response.status_code
+            except httpx.HTTPError as e:
+                code = type(e).__name__
+            latencies.append(time.perf_counter() - started)
+            statuses[code] = statuses.get(code, 0) + 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        # Warm up imports, URL resolution and the shared chatbot outside the timed run
+        await client.post(url, json={'message': MESSAGES[0]})
+        started = time.perf_counter()
+        await asyncio.gather(*(one(client, index) for index in range(total)))
+        elapsed = time.perf_counter() - started
+
+    return summarize(url, total, concurrency, latencies, statuses, elapsed)
+
+
+async def run_stream_load(url, total, concurrency, timeout):
+    """Like run_load, but reads the SSE stream and times the first token event"""
+    import httpx
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, ttfts, statuses = [], [], {}
+
+    async def one(client, index):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                async with client.stream('POST', url, json={'message': MESSAGES[index % len(MESSAGES)]}) as response:
+                    code = response.status_code
+                    first_token = None
+                    async for line in response.aiter_lines():
+                        if first_token is None and line == 'event: token':
+                            first_token = time.perf_counter() - started
+                    if first_token is not None:
+                        ttfts.append(first_token)
+            except httpx.HTTPError as e:
+                code = type(e).__name__
+            latencies.append(time.perf_counter() - started)
+            statuses[code] = statuses.get(code, 0) + 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        await client.post(url, json={'message': MESSAGES[0]})
+        started = time.perf_counter()
+        await asyncio.gather(*(one(client, index) for index in range(total)))
+        elapsed = time.perf_counter() - started
+
+    result = summarize(url, total, concurrency, latencies, statuses, elapsed)
+    result['ttft_ms'] = percentiles(ttfts)
+    return result
+
+
+def run_wsgi_threads(total, threads):
+    """Send chats to the sync view from a fixed pool of threads, like a threaded WSGI worker"""
+    from concurrent.futures import ThreadPoolExecutor
+    from django.db import close_old_connections
+    from django.test import Client
+
+    latencies, statuses = [], {}
+    lock = threading.Lock()
+
+    def one(index):
+        client = Client()
+        started = time.perf_counter()
+        try:
+            code = client.post('/api/chatbot/', {'message': MESSAGES[index % len(MESSAGES)]},
+                               content_type='application/json').status_code
+        finally:
+            close_old_connections()
+        with lock:
+            latencies.append(time.perf_counter() - started)
+            statuses[code] = statuses.get(code, 0) + 1
+
+    one(0)
+    latencies.clear()
+    statuses.clear()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - started
+    return summarize(f'/api/chatbot/ on {threads} WSGI threads', total, threads, latencies, statuses, elapsed)
+
+
+def percentiles(samples):
+    """p50/p95/p99/max/mean of ``samples`` (seconds) in milliseconds"""
+    if not samples:
+        return {}
+    samples = sorted(samples)
+
+    def percentile(p):
+        return round(samples[min(len(samples) - 1, int(len(samples) * p))] * 1000, 1)
+
+    return {
+        'p50': percentile(0.50),
+        'p95': percentile(0.95),
+        'p99': percentile(0.99),
+        'max': round(samples[-1] * 1000, 1),
+        'mean': round(statistics.mean(samples) * 1000, 1),
+    }
+
+
+def summarize(url, total, concurrency, latencies, statuses, elapsed):
+    return {
+        'url': url,
+        'requests': total,
+        'concurrency': concurrency,
+        'statuses': {str(code): count for code, count in statuses.items()},
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(total / elapsed, 2),
+        'latency_ms': percentiles(latencies),
+    }
+
+
+def print_result(label, result, latency):
+    print(f"\n=== {label} ===")
+    print(f"URL:            {result['url']}")
+    print(f"Requests:       {result['requests']} (concurrency {result['concurrency']})")
+    print(f"Statuses:       {result['statuses']}")
+    print(f"Elapsed:        {result['elapsed_s']}s")
+    print(f"Throughput:     {result['throughput_rps']} chats/s")
+    if 'ttft_ms' in result:
+        print(f"First token (ms): {result['ttft_ms']}")
+    print(f"Latency (ms):   {result['latency_ms']}")
+    if latency:
+        # Chats that overlapped their model wait inside one worker
+        print(f"Concurrent chats sustained: ~{result['throughput_rps'] * latency:.0f}")
+
+
+def main():
+    args = parse_args()
+    base_url = args.url.rstrip('/') if args.url else start_server(args.latency)
+    latency = None if args.url else args.latency
+
+    results = {}
+    if args.stream:
+        results['stream'] = asyncio.run(run_stream_load(f'{base_url}/api/chatbot/stream/', args.requests,
+                                                        args.concurrency, args.timeout))
+        print_result('Streaming endpoint /api/chatbot/stream/', results['stream'], None)
+    else:
+        results['async'] = asyncio.run(run_load(f'{base_url}/api/chatbot/async/', args.requests,
+                                                args.concurrency, args.timeout))
+        print_result('Async endpoint /api/chatbot/async/', results['async'], latency)
+
+    if args.compare_wsgi_threads:
+        if args.url:
+            sys.exit('--compare-wsgi-threads needs the in-process server (omit --url)')
+        results['wsgi_threads'] = run_wsgi_threads(args.requests, args.compare_wsgi_threads)
+        print_result(f'Sync endpoint on {args.compare_wsgi_threads} WSGI threads', results['wsgi_threads'], latency)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -14,6 +14,8 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ems_backend.settings')
 django.setup()
 
 from ems_api.models import Employee, AttendanceRecord
+from ems_api.rollups import rebuild_attendance_rollups
+from ems_api.chatbot_cache import bump_data_version
 
 def clear_attendance_records():
     """Clear all existing attendance records"""
@@ -49,15 +51,14 @@ def create_attendance_records():
                     check_in_time, check_out_time, status = None, None, "Absent"
                     hours = 0
 
-                record = AttendanceRecord.objects.create(
+                attendance_records.append(AttendanceRecord(
                     employee=employee,
                     date=current_date,
                     check_in=check_in_time,
                     check_out=check_out_time,
                     hours=hours,
                     status=status
-                )
-                attendance_records.append(record)
+                ))
         
         current_date += timedelta(days=1)
         
@@ -65,6 +66,9 @@ def create_attendance_records():
         if current_date.day == 1:
             print(f"✅ Generated records for {current_date.strftime('%B %Y')}")
 
+    # Insert in batches instead of one INSERT per record
+    AttendanceRecord.objects.bulk_create(attendance_records, batch_size=1000)
+    bump_data_version('attendance')
     print(f"✅ Created {len(attendance_records)} attendance records")
     return attendance_records
 
@@ -78,6 +82,9 @@ def main():
     # Create new records
     attendance_records = create_attendance_records()
     
+    # Refresh the daily rollups used by reports and the chatbot
+    rebuild_attendance_rollups()
+    
     print(f"🎉 Successfully regenerated {len(attendance_records)} attendance records")
     print("📅 Date range: July 1, 2025 to August 17, 2025")
     print("👥 Employees covered: All active employees")
@@ -0,0 +1,34 @@
+// Pre-sized profile photo variants served by the API: {size: {webp, jpeg}}
+export type PhotoThumbnails = Record<'small' | 'medium' | 'large', { webp: string; jpeg: string }>;
+
+interface AvatarProps {
+  name: string;
+  thumbnails?: PhotoThumbnails | null;
+  size?: keyof PhotoThumbnails;
+  // Full-size photo to show while thumbnails are still being generated
+  fallbackUrl?: string | null;
+  className?: string;
+  textClassName?: string;
+}
+
+const Avatar = ({ name, thumbnails, size = 'small', fallbackUrl, className = '', textClassName = 'text-white font-medium' }: AvatarProps) => {
+  const variant = thumbnails?.[size];
+  const initials = name.split(' ').map(n => n[0]).join('');
+
+  return (
+    <div className={`rounded-full overflow-hidden bg-blue-600 flex items-center justify-center ${className}`}>
+      {variant ? (
+        <picture className="w-full h-full">
+          <source srcSet={variant.webp} type="image/webp" />
+          <img src={variant.jpeg} alt={name} loading="lazy" className="w-full h-full object-cover" />
+        </picture>
+      ) : fallbackUrl ? (
+        <img src={fallbackUrl} alt={name} className="w-full h-full object-cover" />
+      ) : (
+        <span className={textClassName}>{initials}</span>
+      )}
+    </div>
+  );
+};
+
+export default Avatar;
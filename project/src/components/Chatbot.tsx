@@ -1,28 +1,91 @@
-import { useState, useEffect } from 'react';
-import { MessageCircle, X } from 'lucide-react';
+import React, { useState, useEffect, useRef } from 'react';
+import { MessageCircle, X, Send, Bot } from 'lucide-react';
 import { useAuth } from '../context/AuthContext';
+import { chatbotAPI, ChatHistoryMessage } from '../services/api';
+
+interface ChatMessage extends ChatHistoryMessage {
+  firstTokenMs?: number;
+  error?: boolean;
+}
 
 const Chatbot = () => {
   const [isOpen, setIsOpen] = useState(false);
+  const [messages, setMessages] = useState<ChatMessage[]>([]);
+  const [input, setInput] = useState('');
+  const [isStreaming, setIsStreaming] = useState(false);
+  const [suggestions, setSuggestions] = useState<string[]>([]);
+  const abortRef = useRef<AbortController | null>(null);
+  const bottomRef = useRef<HTMLDivElement>(null);
   const { user } = useAuth();
 
   // Clear chat history when user logs in
   useEffect(() => {
-    if (user && window.chatbase) {
-      // Clear chat history on login
-      try {
-        window.chatbase("reset");
-        window.chatbase("clear");
-      } catch (e) {
-        console.log('Chat history cleared');
-      }
-    }
+    abortRef.current?.abort();
+    setMessages([]);
+    setSuggestions([]);
   }, [user]);
 
+  // Keep the latest tokens in view
+  useEffect(() => {
+    bottomRef.current?.scrollIntoView({ behavior: 'smooth' });
+  }, [messages]);
+
+  // Stop an in-flight answer when the widget unmounts
+  useEffect(() => () => abortRef.current?.abort(), []);
+
   const toggleChatbot = () => {
     setIsOpen(!isOpen);
   };
 
+  // Update the assistant message being streamed (always the last one)
+  const updateLastMessage = (update: (message: ChatMessage) => ChatMessage) => {
+    setMessages((current) => [...current.slice(0, -1), update(current[current.length - 1])]);
+  };
+
+  const sendMessage = async (text: string) => {
+    const message = text.trim();
+    if (!message || isStreaming) return;
+
+    const history = messages
+      .filter((item) => !item.error)
+      .map(({ role, content }) => ({ role, content }));
+    setMessages((current) => [...current, { role: 'user', content: message }, { role: 'assistant', content: '' }]);
+    setInput('');
+    setSuggestions([]);
+    setIsStreaming(true);
+
+    const controller = new AbortController();
+    abortRef.current = controller;
+    const started = performance.now();
+    let firstTokenMs: number | undefined;
+    try {
+      await chatbotAPI.stream(message, history, {
+        onToken: (chunk) => {
+          if (firstTokenMs === undefined) {
+            firstTokenMs = Math.round(performance.now() - started);
+          }
+          updateLastMessage((last) => ({ ...last, content: last.content + chunk, firstTokenMs }));
+        },
+        onDone: (data) => setSuggestions((data.suggested_questions || []).slice(0, 3)),
+      }, controller.signal);
+    } catch (error) {
+      if (!controller.signal.aborted) {
+        const reason = error instanceof Error ? error.message : 'Please try again later.';
+        updateLastMessage((last) => ({ ...last, content: last.content || reason, error: true }));
+      }
+    } finally {
+      if (abortRef.current === controller) {
+        abortRef.current = null;
+        setIsStreaming(false);
+      }
+    }
+  };
+
+  const handleSubmit = (e: React.FormEvent) => {
+    e.preventDefault();
+    sendMessage(input);
+  };
+
   return (
     <>
       {/* Custom Chatbot Toggle Button */}
@@ -38,29 +101,76 @@ const Chatbot = () => {
         )}
       </button>
 
-      {/* Chatbot Iframe */}
+      {/* Chat Panel */}
       {isOpen && (
-        <div className="fixed bottom-24 right-6 z-[99998]">
-          <iframe
-            src="https://www.chatbase.co/chatbot-iframe/9V3iws6f5sUSDPl-dQkvl"
-            width="400"
-            height="600"
-            frameBorder="0"
-            className="rounded-lg shadow-xl border border-gray-200"
-            title="EMS Assistant"
-          />
+        <div className="fixed bottom-24 right-6 z-[99998] w-[400px] h-[600px] bg-white rounded-lg shadow-xl border border-gray-200 flex flex-col">
+          <div className="flex items-center space-x-2 px-4 py-3 border-b border-gray-200">
+            <Bot className="w-5 h-5 text-blue-600" />
+            <h2 className="font-semibold text-gray-900">EMS Assistant</h2>
+          </div>
+
+          <div className="flex-1 overflow-y-auto p-4 space-y-3">
+            {messages.length === 0 && (
+              <p className="text-sm text-gray-500 text-center mt-8">
+                Ask about employees, attendance, leave requests or tasks.
+              </p>
+            )}
+            {messages.map((message, index) => (
+              <div key={index} className={`flex ${message.role === 'user' ? 'justify-end' : 'justify-start'}`}>
+                <div
+                  className={`max-w-[85%] rounded-lg px-3 py-2 text-sm whitespace-pre-wrap ${
+                    message.role === 'user'
+                      ? 'bg-blue-600 text-white'
+                      : message.error
+                        ? 'bg-red-50 text-red-700'
+                        : 'bg-gray-100 text-gray-900'
+                  }`}
+                >
+                  {message.content || (isStreaming && index === messages.length - 1 ? '…' : '')}
+                  {message.firstTokenMs !== undefined && index === messages.length - 1 && !isStreaming && (
+                    <div className="mt-1 text-[10px] text-gray-400">first token in {message.firstTokenMs} ms</div>
+                  )}
+                </div>
+              </div>
+            ))}
+            <div ref={bottomRef} />
+          </div>
+
+          {suggestions.length > 0 && (
+            <div className="px-4 pb-2 flex flex-wrap gap-2">
+              {suggestions.map((question) => (
+                <button
+                  key={question}
+                  onClick={() => sendMessage(question)}
+                  className="text-xs bg-blue-50 text-blue-700 hover:bg-blue-100 rounded-full px-3 py-1"
+                >
+                  {question}
+                </button>
+              ))}
+            </div>
+          )}
+
+          <form onSubmit={handleSubmit} className="flex items-center space-x-2 p-3 border-t border-gray-200">
+            <input
+              value={input}
+              onChange={(e) => setInput(e.target.value)}
+              placeholder="Type your question..."
+              className="flex-1 border border-gray-300 rounded-lg px-3 py-2 text-sm focus:outline-none focus:ring-2 focus:ring-blue-500"
+              disabled={isStreaming}
+            />
+            <button
+              type="submit"
+              disabled={isStreaming || !input.trim()}
+              className="bg-blue-600 hover:bg-blue-700 disabled:bg-gray-300 text-white rounded-lg p-2 transition-colors"
+              title="Send"
+            >
+              <Send className="w-4 h-4" />
+            </button>
+          </form>
         </div>
       )}
     </>
   );
 };
 
-// Extend Window interface for TypeScript
-declare global {
-  interface Window {
-    chatbase: any;
-    chatbaseConfig: any;
-  }
-}
-
 export default Chatbot;
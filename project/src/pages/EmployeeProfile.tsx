@@ -4,6 +4,7 @@ import { User, Mail, Phone, Building, Briefcase, Calendar, IndianRupee, Edit, Sa
 import { useAuth } from '../context/AuthContext';
 import { useData } from '../context/DataContext';
 import { employeeAPI } from '../services/api';
+import Avatar, { PhotoThumbnails } from '../components/Avatar';
 
 interface Employee {
   id: string;
@@ -19,6 +20,7 @@ interface Employee {
   status: 'Active' | 'Inactive';
   salary: number;
   profile_photo?: string | null;
+  profile_photo_thumbnails?: PhotoThumbnails | null;
 }
 
 const EmployeeProfile = () => {
@@ -62,6 +64,7 @@ const EmployeeProfile = () => {
            status: employeeData.status,
            salary: employeeData.salary || 0,
            profile_photo: employeeData.profile_photo || null,
+           profile_photo_thumbnails: employeeData.profile_photo_thumbnails || null,
          };
 
         setEmployee(employeeInfo);
@@ -140,6 +143,7 @@ const EmployeeProfile = () => {
         status: updatedEmployeeData.status,
         salary: updatedEmployeeData.salary || 0,
         profile_photo: updatedEmployeeData.profile_photo || employee?.profile_photo || null,
+        profile_photo_thumbnails: updatedEmployeeData.profile_photo_thumbnails || employee?.profile_photo_thumbnails || null,
       };
       
       setEmployee(updatedEmployee);
@@ -160,7 +164,12 @@ const EmployeeProfile = () => {
       formData.append('file', photoFile);
       const updated = await employeeAPI.uploadPhoto(employee.id, formData);
       const updatedUrl = (updated && updated.profile_photo) ? (updated.profile_photo as string) : null;
-      const newEmp: Employee = { ...(employee as Employee), profile_photo: updatedUrl };
+      // Thumbnails of the new photo are generated in the background; show the photo itself until then
+      const newEmp: Employee = {
+        ...(employee as Employee),
+        profile_photo: updatedUrl,
+        profile_photo_thumbnails: updated?.profile_photo_thumbnails || null,
+      };
       setEmployee(newEmp);
       setEditData(newEmp);
       setPhotoFile(null);
@@ -244,19 +253,16 @@ const EmployeeProfile = () => {
 
       <div className="bg-white rounded-lg shadow-sm border border-gray-200 p-6">
         <div className="flex items-center space-x-6 mb-6">
-          <div className="w-24 h-24 rounded-full overflow-hidden bg-blue-600 flex items-center justify-center">
-            {employee.profile_photo ? (
-              <img
-                src={employee.profile_photo.startsWith('http') ? employee.profile_photo : `http://localhost:8000${employee.profile_photo}`}
-                alt="Profile"
-                className="w-full h-full object-cover"
-              />
-            ) : (
-              <span className="text-white font-bold text-2xl">
-                {employee.name.split(' ').map(n => n[0]).join('')}
-              </span>
-            )}
-          </div>
+          <Avatar
+            name={employee.name}
+            thumbnails={employee.profile_photo_thumbnails}
+            size="medium"
+            fallbackUrl={employee.profile_photo
+              ? (employee.profile_photo.startsWith('http') ? employee.profile_photo : `http://localhost:8000${employee.profile_photo}`)
+              : null}
+            className="w-24 h-24"
+            textClassName="text-white font-bold text-2xl"
+          />
           <div>
             <h2 className="text-2xl font-bold text-gray-900">{employee.name}</h2>
             <p className="text-gray-600">{employee.designation}</p>
@@ -39,6 +39,8 @@ interface TaskAttachment {
   id: string;
   name: string;
   url: string;
+  // Streaming download endpoint, set on attachments returned by the API
+  download_url?: string;
   size: number;
   uploadedAt: string;
 }
@@ -259,19 +261,14 @@ const EmployeeTasks = () => {
     setUploadProgress(0);
 
     try {
-      for (const file of files) {
-        const formData = new FormData();
-        formData.append('file', file);
-        formData.append('description', `File uploaded for task: ${selectedTask.title}`);
-
-        // Simulate upload progress
-        for (let i = 0; i <= 100; i += 20) {
-          setUploadProgress(i);
-          await new Promise(resolve => setTimeout(resolve, 100));
-        }
-
+      for (const [index, file] of files.entries()) {
         try {
-          await taskAPI.uploadFile(selectedTask.id.toString(), formData);
+          await taskAPI.uploadFileChunked(
+            selectedTask.id.toString(),
+            file,
+            `File uploaded for task: ${selectedTask.title}`,
+            percent => setUploadProgress(Math.round(((index + percent / 100) / files.length) * 100)),
+          );
         } catch (apiError) {
           console.log('API upload failed, using mock data:', apiError);
           // Create mock attachment for fallback
@@ -756,7 +753,7 @@ const EmployeeTasks = () => {
                       </label>
                     </div>
                     <p className="text-xs text-gray-500 mt-1">
-                      PDF, DOC, DOCX, XLS, XLSX, JPG, PNG up to 10MB each
+                      PDF, DOC, DOCX, XLS, XLSX, JPG, PNG up to 2GB each
                     </p>
                   </div>
                 </div>
@@ -819,7 +816,7 @@ const EmployeeTasks = () => {
                         </div>
                         <button
                           type="button"
-                          onClick={() => window.open(attachment.url, '_blank')}
+                          onClick={() => window.open(attachment.download_url || attachment.url, '_blank')}
                           className="text-blue-600 hover:text-blue-800"
                         >
                           <Download size={16} />
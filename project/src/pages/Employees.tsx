@@ -1,6 +1,7 @@
 import { useState, useEffect } from 'react';
 import { Plus, Search, Filter, Edit, Trash2, Eye, Save, X, User, Mail, Phone, Building, Briefcase, Calendar, DollarSign } from 'lucide-react';
-import { employeeAPI } from '../services/api';
+import { employeeAPI, jobsAPI } from '../services/api';
+import Avatar, { PhotoThumbnails } from '../components/Avatar';
 import { useAuth } from '../context/AuthContext';
 
 interface Employee {
@@ -15,8 +16,22 @@ interface Employee {
   phone: string;
   salary?: number;
   manager?: string;
+  profile_photo_thumbnails?: PhotoThumbnails | null;
 }
 
+// An employee created without a password, whose sign-in is set up by a background job
+interface PendingSignIn {
+  jobId: string;
+  employeeId: string;
+  name: string;
+  status: 'Queued' | 'Running' | 'Succeeded' | 'Failed';
+}
+
+// Milliseconds between polls of unfinished password jobs
+const PASSWORD_JOB_POLL_INTERVAL = 2000;
+
+const isUnfinished = (signIn: PendingSignIn) => signIn.status === 'Queued' || signIn.status === 'Running';
+
 const Employees = () => {
   const { user } = useAuth();
   const [employees, setEmployees] = useState<Employee[]>([]);
@@ -28,6 +43,7 @@ const Employees = () => {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
   const [filterDepartment, setFilterDepartment] = useState('');
+  const [pendingSignIns, setPendingSignIns] = useState<PendingSignIn[]>([]);
 
   // Form state
   const [formData, setFormData] = useState({
@@ -48,6 +64,29 @@ const Employees = () => {
     fetchEmployees();
   }, []);
 
+  // Poll the password jobs of new employees until each has finished
+  useEffect(() => {
+    if (!pendingSignIns.some(isUnfinished)) return;
+    const timer = setTimeout(async () => {
+      const updated = await Promise.all(pendingSignIns.map(async (signIn) => {
+        if (!isUnfinished(signIn)) return signIn;
+        try {
+          const job = await jobsAPI.get(signIn.jobId);
+          return { ...signIn, status: job.status };
+        } catch (err) {
+          console.error('Error checking password job:', err);
+          return signIn;
+        }
+      }));
+      setPendingSignIns(updated);
+    }, PASSWORD_JOB_POLL_INTERVAL);
+    return () => clearTimeout(timer);
+  }, [pendingSignIns]);
+
+  const dismissSignIn = (jobId: string) => {
+    setPendingSignIns(current => current.filter(signIn => signIn.jobId !== jobId));
+  };
+
   const fetchEmployees = async () => {
     try {
       setLoading(true);
@@ -70,7 +109,16 @@ const Employees = () => {
         salary: formData.salary ? parseFloat(formData.salary) : null
       };
       
-      await employeeAPI.create(employeeData);
+      const created = await employeeAPI.create(employeeData);
+      // Without a password the employee can sign in once this job has set their employee ID as it
+      if (created.password_job) {
+        setPendingSignIns(current => [...current, {
+          jobId: created.password_job,
+          employeeId: created.employee_id,
+          name: created.name,
+          status: 'Queued',
+        }]);
+      }
       setShowAddModal(false);
       resetForm();
       fetchEmployees();
@@ -199,6 +247,32 @@ const Employees = () => {
         </div>
       )}
 
+      {pendingSignIns.map(signIn => (
+        <div
+          key={signIn.jobId}
+          className={`px-4 py-3 rounded border flex justify-between items-center ${
+            signIn.status === 'Failed'
+              ? 'bg-red-100 border-red-400 text-red-700'
+              : signIn.status === 'Succeeded'
+                ? 'bg-green-100 border-green-400 text-green-700'
+                : 'bg-blue-100 border-blue-400 text-blue-700'
+          }`}
+        >
+          <span>
+            {signIn.status === 'Succeeded'
+              ? `${signIn.name} can now sign in as ${signIn.employeeId}, with the employee ID as password.`
+              : signIn.status === 'Failed'
+                ? `Setting up sign-in for ${signIn.name} (${signIn.employeeId}) failed. An administrator can retry job ${signIn.jobId}.`
+                : `Setting up sign-in for ${signIn.name} (${signIn.employeeId})...`}
+          </span>
+          {!isUnfinished(signIn) && (
+            <button onClick={() => dismissSignIn(signIn.jobId)} className="ml-4 hover:opacity-75">
+              <X size={16} />
+            </button>
+          )}
+        </div>
+      ))}
+
       {/* Search and Filters */}
       <div className="bg-white p-4 rounded-lg shadow-sm border border-gray-200">
         <div className="flex space-x-4">
@@ -256,11 +330,7 @@ const Employees = () => {
                 <tr key={employee.id} className="hover:bg-gray-50">
                   <td className="px-6 py-4 whitespace-nowrap">
                     <div className="flex items-center">
-                      <div className="w-10 h-10 bg-blue-600 rounded-full flex items-center justify-center">
-                        <span className="text-white font-medium">
-                          {employee.name.split(' ').map(n => n[0]).join('')}
-                        </span>
-                      </div>
+                      <Avatar name={employee.name} thumbnails={employee.profile_photo_thumbnails} className="w-10 h-10" />
                       <div className="ml-4">
                         <div className="text-sm font-medium text-gray-900">{employee.name}</div>
                         <div className="text-sm text-gray-500">{employee.employee_id}</div>
@@ -607,11 +677,12 @@ const Employees = () => {
             </div>
             <div className="space-y-4">
               <div className="flex items-center space-x-3">
-                <div className="w-12 h-12 bg-blue-600 rounded-full flex items-center justify-center">
-                  <span className="text-white font-medium text-lg">
-                    {selectedEmployee.name.split(' ').map(n => n[0]).join('')}
-                  </span>
-                </div>
+                <Avatar
+                  name={selectedEmployee.name}
+                  thumbnails={selectedEmployee.profile_photo_thumbnails}
+                  className="w-12 h-12"
+                  textClassName="text-white font-medium text-lg"
+                />
                 <div>
                   <h4 className="text-lg font-semibold">{selectedEmployee.name}</h4>
                   <p className="text-gray-600">{selectedEmployee.employee_id}</p>
@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { Download, Calendar, Users, Clock, BarChart3, FileText } from 'lucide-react';
-import { employeeAPI, attendanceAPI, leaveRequestAPI, taskAPI } from '../services/api';
+import { employeeAPI, attendanceAPI, leaveRequestAPI, taskAPI, reportsAPI } from '../services/api';
 import { useAuth } from '../context/AuthContext';
 
 interface Employee {
@@ -51,12 +51,119 @@ interface Task {
   due_date: string;
 }
 
+interface EmployeeStats {
+  total: number;
+  active: number;
+  inactive: number;
+  departments: Record<string, number>;
+  avgSalary: number;
+}
+
+interface AttendanceStats {
+  total: number;
+  present: number;
+  absent: number;
+  late: number;
+  halfDay: number;
+  totalHours: number;
+  avgHoursPerDay: number;
+}
+
+interface LeaveStats {
+  total: number;
+  approved: number;
+  pending: number;
+  rejected: number;
+  types: Record<string, number>;
+  totalDays: number;
+}
+
+interface TaskStats {
+  total: number;
+  completed: number;
+  inProgress: number;
+  notStarted: number;
+  onHold: number;
+  priorities: Record<string, number>;
+  avgProgress: number;
+}
+
+const emptyEmployeeStats: EmployeeStats = { total: 0, active: 0, inactive: 0, departments: {}, avgSalary: 0 };
+const emptyAttendanceStats: AttendanceStats = { total: 0, present: 0, absent: 0, late: 0, halfDay: 0, totalHours: 0, avgHoursPerDay: 0 };
+const emptyLeaveStats: LeaveStats = { total: 0, approved: 0, pending: 0, rejected: 0, types: {}, totalDays: 0 };
+const emptyTaskStats: TaskStats = { total: 0, completed: 0, inProgress: 0, notStarted: 0, onHold: 0, priorities: {}, avgProgress: 0 };
+
+// Support plain arrays as well as wrapped/paginated list responses
+const toList = (data: any) => (Array.isArray(data) ? data : data?.data || data?.results || []);
+
+// Normalize attendance records: support legacy keys and format times to HH:MM
+const normalizeTime = (t: any) => {
+  if (!t) return '';
+  // Accept formats like '08:30:00', '8:30', Date string, or object
+  try {
+    // If already HH:MM:SS or HH:MM, return HH:MM
+    if (typeof t === 'string') {
+      const parts = t.split(':');
+      if (parts.length >= 2) {
+        const hh = parts[0].padStart(2, '0');
+        const mm = parts[1].padStart(2, '0');
+        return `${hh}:${mm}`;
+      }
+    }
+    const d = new Date(`1970-01-01T${t}`);
+    if (!isNaN(d.getTime())) {
+      const hh = String(d.getHours()).padStart(2, '0');
+      const mm = String(d.getMinutes()).padStart(2, '0');
+      return `${hh}:${mm}`;
+    }
+  } catch {}
+  return '';
+};
+
+const addMinutes = (time: string, minutes: number) => {
+  const [h, m] = time.split(':').map(Number);
+  const total = h * 60 + m + minutes;
+  const wrapped = ((total % (24 * 60)) + (24 * 60)) % (24 * 60);
+  const hh = String(Math.floor(wrapped / 60)).padStart(2, '0');
+  const mm = String(wrapped % 60).padStart(2, '0');
+  return `${hh}:${mm}`;
+};
+
+const normalizeAttendance = (rawAttendance: any[]): AttendanceRecord[] =>
+  (rawAttendance || []).map((r: any) => {
+    const hoursNum = Number(r.hours) || 0;
+    let ci = normalizeTime(
+      r.check_in ?? r.check_in_time ?? r.checkIn ?? r.check_in_at ??
+      r.in_time ?? r.time_in ?? r.clock_in ?? r.start_time
+    );
+    let co = normalizeTime(
+      r.check_out ?? r.check_out_time ?? r.checkOut ?? r.check_out_at ??
+      r.out_time ?? r.time_out ?? r.clock_out ?? r.end_time
+    );
+    if (hoursNum > 0) {
+      const minutes = Math.round(hoursNum * 60);
+      if (ci && !co) co = addMinutes(ci, minutes);
+      else if (!ci && co) ci = addMinutes(co, -minutes);
+      else if (!ci && !co) {
+        ci = '09:00';
+        co = addMinutes(ci, minutes);
+      }
+    }
+    return {
+      ...r,
+      check_in: ci,
+      check_out: co,
+      hours: hoursNum,
+    };
+  });
+
 const Reports = () => {
   const { user } = useAuth();
-  const [employees, setEmployees] = useState<Employee[]>([]);
+  const [employeeStats, setEmployeeStats] = useState<EmployeeStats>(emptyEmployeeStats);
+  const [attendanceStats, setAttendanceStats] = useState<AttendanceStats>(emptyAttendanceStats);
+  const [leaveStats, setLeaveStats] = useState<LeaveStats>(emptyLeaveStats);
+  const [taskStats, setTaskStats] = useState<TaskStats>(emptyTaskStats);
   const [attendanceRecords, setAttendanceRecords] = useState<AttendanceRecord[]>([]);
-  const [leaveRequests, setLeaveRequests] = useState<LeaveRequest[]>([]);
-  const [tasks, setTasks] = useState<Task[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
   const [selectedReport, setSelectedReport] = useState('overview');
@@ -65,242 +172,126 @@ const Reports = () => {
     end: new Date().toISOString().split('T')[0]
   });
 
-  // Fetch data on component mount
+  // Fetch aggregate reports on mount; attendance follows the selected date range
   useEffect(() => {
     if (user) {
       fetchData();
     }
   }, [user]);
 
+  useEffect(() => {
+    if (user) {
+      fetchAttendance();
+    }
+  }, [user, dateRange.start, dateRange.end]);
+
+  const reportError = (err: unknown) => {
+    const errorMessage = err instanceof Error ? err.message : 'Unknown error';
+    setError(`Failed to connect to backend server. Please ensure Django backend is running on http://localhost:8000. Error: ${errorMessage}`);
+    console.error('Error fetching reports:', err);
+  };
+
   const fetchData = async () => {
     try {
       setLoading(true);
       setError('');
-      
-      console.log('Fetching data from APIs...');
-      
-      const [empData, attData, leaveData, taskData] = await Promise.all([
-        employeeAPI.getAll().catch(err => {
-          console.error('Employee API error:', err);
-          return [];
-        }),
-        attendanceAPI.getAll().catch(err => {
-          console.error('Attendance API error:', err);
-          return [];
-        }),
-        leaveRequestAPI.getAll().catch(err => {
-          console.error('Leave Request API error:', err);
-          return [];
-        }),
-        taskAPI.getAll().catch(err => {
-          console.error('Task API error:', err);
-          return [];
-        })
+
+      const [empReport, leaveReport, taskReport] = await Promise.all([
+        reportsAPI.employees(),
+        reportsAPI.leave(),
+        reportsAPI.tasks(),
       ]);
-      
-      console.log('API responses:', { empData, attData, leaveData, taskData });
-      
-      // Handle different response structures
-      setEmployees(Array.isArray(empData) ? empData : empData?.data || empData?.results || []);
-
-    // Normalize attendance records: support legacy keys and format times to HH:MM
-    const rawAttendance = Array.isArray(attData) ? attData : attData?.data || attData?.results || [];
-    const normalizeTime = (t: any) => {
-      if (!t) return '';
-      // Accept formats like '08:30:00', '8:30', Date string, or object
-      try {
-        // If already HH:MM:SS or HH:MM, return HH:MM
-        if (typeof t === 'string') {
-          const parts = t.split(':');
-          if (parts.length >= 2) {
-            const hh = parts[0].padStart(2, '0');
-            const mm = parts[1].padStart(2, '0');
-            return `${hh}:${mm}`;
-          }
-        }
-        const d = new Date(`1970-01-01T${t}`);
-        if (!isNaN(d.getTime())) {
-          const hh = String(d.getHours()).padStart(2, '0');
-          const mm = String(d.getMinutes()).padStart(2, '0');
-          return `${hh}:${mm}`;
-        }
-      } catch {}
-      return '';
-    };
-    const addMinutes = (time: string, minutes: number) => {
-      const [h, m] = time.split(':').map(Number);
-      const total = h * 60 + m + minutes;
-      const wrapped = ((total % (24 * 60)) + (24 * 60)) % (24 * 60);
-      const hh = String(Math.floor(wrapped / 60)).padStart(2, '0');
-      const mm = String(wrapped % 60).padStart(2, '0');
-      return `${hh}:${mm}`;
-    };
-    const normalizedAttendance = (rawAttendance || []).map((r: any) => {
-      const hoursNum = Number(r.hours) || 0;
-      let ci = normalizeTime(
-        r.check_in ?? r.check_in_time ?? r.checkIn ?? r.check_in_at ??
-        r.in_time ?? r.time_in ?? r.clock_in ?? r.start_time
-      );
-      let co = normalizeTime(
-        r.check_out ?? r.check_out_time ?? r.checkOut ?? r.check_out_at ??
-        r.out_time ?? r.time_out ?? r.clock_out ?? r.end_time
-      );
-      if (hoursNum > 0) {
-        const minutes = Math.round(hoursNum * 60);
-        if (ci && !co) co = addMinutes(ci, minutes);
-        else if (!ci && co) ci = addMinutes(co, -minutes);
-        else if (!ci && !co) {
-          ci = '09:00';
-          co = addMinutes(ci, minutes);
-        }
-      }
-      return {
-        ...r,
-        check_in: ci,
-        check_out: co,
-        hours: hoursNum,
-      };
-    });
-    setAttendanceRecords(normalizedAttendance);
-
-      setLeaveRequests(Array.isArray(leaveData) ? leaveData : leaveData?.data || leaveData?.results || []);
-      setTasks(Array.isArray(taskData) ? taskData : taskData?.data || taskData?.results || []);
-      
+
+      setEmployeeStats({
+        total: empReport.total,
+        active: empReport.active,
+        inactive: empReport.inactive,
+        departments: empReport.departments || {},
+        avgSalary: Number(empReport.avg_salary) || 0,
+      });
+      setLeaveStats({
+        total: leaveReport.total,
+        approved: leaveReport.approved,
+        pending: leaveReport.pending,
+        rejected: leaveReport.rejected,
+        types: Object.fromEntries(
+          Object.entries(leaveReport.types || {}).filter(([, count]) => Number(count) > 0)
+        ) as Record<string, number>,
+        totalDays: Number(leaveReport.total_days) || 0,
+      });
+      setTaskStats({
+        total: taskReport.total,
+        completed: taskReport.completed,
+        inProgress: taskReport.in_progress,
+        notStarted: taskReport.not_started,
+        onHold: taskReport.on_hold,
+        priorities: Object.fromEntries(
+          Object.entries(taskReport.priorities || {}).filter(([, count]) => Number(count) > 0)
+        ) as Record<string, number>,
+        avgProgress: Number(taskReport.avg_progress) || 0,
+      });
     } catch (err) {
-      const errorMessage = err instanceof Error ? err.message : 'Unknown error';
-      setError(`Failed to connect to backend server. Please ensure Django backend is running on http://localhost:8000. Error: ${errorMessage}`);
-      console.error('Error fetching data:', err);
+      reportError(err);
     } finally {
       setLoading(false);
     }
   };
 
-  // Calculate statistics
-  const getEmployeeStats = () => {
-    const totalEmployees = employees.length;
-    const activeEmployees = employees.filter(emp => emp.status === 'Active').length;
-    const inactiveEmployees = totalEmployees - activeEmployees;
-    
-    const departmentStats = employees.reduce((acc, emp) => {
-      acc[emp.department] = (acc[emp.department] || 0) + 1;
-      return acc;
-    }, {} as Record<string, number>);
-
-    const avgSalary = employees
-      .filter(emp => emp.salary)
-      .reduce((sum, emp) => sum + (emp.salary || 0), 0) / 
-      employees.filter(emp => emp.salary).length;
-
-    return {
-      total: totalEmployees,
-      active: activeEmployees,
-      inactive: inactiveEmployees,
-      departments: departmentStats,
-      avgSalary: avgSalary || 0
-    };
-  };
-
-  const getAttendanceStats = () => {
-    // Filter records by selected date range
-    const records = attendanceRecords.filter(att => att.date >= dateRange.start && att.date <= dateRange.end);
-    const totalRecords = records.length;
-    const presentCount = records.filter(att => att.status === 'Present').length;
-    const absentCount = records.filter(att => att.status === 'Absent').length;
-    const lateCount = records.filter(att => att.status === 'Late').length;
-    const halfDayCount = records.filter(att => att.status === 'Half Day').length;
-
-    // Hours may come as string from backend (DecimalField). Coerce to number safely.
-    const totalHours = records.reduce((sum, att) => sum + (Number(att.hours) || 0), 0);
-    const avgHoursPerDay = totalRecords > 0 ? totalHours / totalRecords : 0;
-
-    return {
-      total: totalRecords,
-      present: presentCount,
-      absent: absentCount,
-      late: lateCount,
-      halfDay: halfDayCount,
-      totalHours,
-      avgHoursPerDay
-    };
-  };
-
-  const getLeaveStats = () => {
-    const totalRequests = leaveRequests.length;
-    const approvedRequests = leaveRequests.filter(leave => leave.status === 'Approved').length;
-    const pendingRequests = leaveRequests.filter(leave => leave.status === 'Pending').length;
-    const rejectedRequests = leaveRequests.filter(leave => leave.status === 'Rejected').length;
-
-    const leaveTypeStats = leaveRequests.reduce((acc, leave) => {
-      acc[leave.leave_type] = (acc[leave.leave_type] || 0) + 1;
-      return acc;
-    }, {} as Record<string, number>);
-
-    const totalDays = leaveRequests.reduce((sum, leave) => sum + leave.days, 0);
-
-    return {
-      total: totalRequests,
-      approved: approvedRequests,
-      pending: pendingRequests,
-      rejected: rejectedRequests,
-      types: leaveTypeStats,
-      totalDays
-    };
-  };
-
-  const getTaskStats = () => {
-    const totalTasks = tasks.length;
-    const completedTasks = tasks.filter(task => task.status === 'Completed').length;
-    const inProgressTasks = tasks.filter(task => task.status === 'In Progress').length;
-    const notStartedTasks = tasks.filter(task => task.status === 'Not Started').length;
-    const onHoldTasks = tasks.filter(task => task.status === 'On Hold').length;
-
-    const priorityStats = tasks.reduce((acc, task) => {
-      acc[task.priority] = (acc[task.priority] || 0) + 1;
-      return acc;
-    }, {} as Record<string, number>);
-
-    const avgProgress = tasks.reduce((sum, task) => sum + task.progress, 0) / totalTasks;
-
-    return {
-      total: totalTasks,
-      completed: completedTasks,
-      inProgress: inProgressTasks,
-      notStarted: notStartedTasks,
-      onHold: onHoldTasks,
-      priorities: priorityStats,
-      avgProgress: avgProgress || 0
-    };
+  const fetchAttendance = async () => {
+    try {
+      const [attReport, attData] = await Promise.all([
+        reportsAPI.attendance({ start_date: dateRange.start, end_date: dateRange.end }),
+        attendanceAPI.getRange(dateRange.start, dateRange.end),
+      ]);
+      setAttendanceStats({
+        total: attReport.total,
+        present: attReport.present,
+        absent: attReport.absent,
+        late: attReport.late,
+        halfDay: attReport.half_day,
+        totalHours: Number(attReport.total_hours) || 0,
+        avgHoursPerDay: Number(attReport.avg_hours_per_day) || 0,
+      });
+      setAttendanceRecords(normalizeAttendance(toList(attData)));
+    } catch (err) {
+      reportError(err);
+    }
   };
 
-  const exportReport = (type: string) => {
-    // Generate CSV data based on report type
+  const exportReport = async (type: string) => {
+    // Generate CSV data based on report type; row-level data is only fetched on export
     let csvContent = '';
     let filename = '';
     
-    switch (type) {
-      case 'overview':
-        csvContent = generateOverviewCSV();
-        filename = 'overview_report.csv';
-        break;
-      case 'employees':
-        csvContent = generateEmployeesCSV();
-        filename = 'employees_report.csv';
-        break;
-      case 'attendance':
-        csvContent = generateAttendanceCSV();
-        filename = 'attendance_report.csv';
-        break;
-      case 'leave':
-        csvContent = generateLeaveCSV();
-        filename = 'leave_report.csv';
-        break;
-      case 'tasks':
-        csvContent = generateTasksCSV();
-        filename = 'tasks_report.csv';
-        break;
-      default:
-        alert('Invalid report type');
-        return;
+    try {
+      switch (type) {
+        case 'overview':
+          csvContent = generateOverviewCSV();
+          filename = 'overview_report.csv';
+          break;
+        case 'employees':
+          csvContent = generateEmployeesCSV(toList(await employeeAPI.getAll()));
+          filename = 'employees_report.csv';
+          break;
+        case 'attendance':
+          csvContent = generateAttendanceCSV();
+          filename = 'attendance_report.csv';
+          break;
+        case 'leave':
+          csvContent = generateLeaveCSV(toList(await leaveRequestAPI.getAll()));
+          filename = 'leave_report.csv';
+          break;
+        case 'tasks':
+          csvContent = generateTasksCSV(toList(await taskAPI.getAll()));
+          filename = 'tasks_report.csv';
+          break;
+        default:
+          alert('Invalid report type');
+          return;
+      }
+    } catch (err) {
+      reportError(err);
+      return;
     }
     
     // Create and download the file
@@ -330,8 +321,8 @@ const Reports = () => {
     return [headers, ...rows].map(row => row.join(',')).join('\n');
   };
 
-  const generateEmployeesCSV = () => {
-            const headers = ['ID', 'Name', 'Department', 'Designation', 'Status', 'Joining Date', 'Salary'];
+  const generateEmployeesCSV = (employees: Employee[]) => {
+    const headers = ['ID', 'Name', 'Department', 'Designation', 'Status', 'Joining Date', 'Salary'];
     const rows = employees.map(emp => [
       emp.employee_id,
       emp.name,
@@ -359,7 +350,7 @@ const Reports = () => {
     return [headers, ...rows].map(row => row.join(',')).join('\n');
   };
 
-  const generateLeaveCSV = () => {
+  const generateLeaveCSV = (leaveRequests: LeaveRequest[]) => {
     const headers = ['Employee', 'Leave Type', 'Start Date', 'End Date', 'Days', 'Status', 'Applied Date'];
     const rows = leaveRequests.map(leave => [
       leave.employee_name,
@@ -374,7 +365,7 @@ const Reports = () => {
     return [headers, ...rows].map(row => row.join(',')).join('\n');
   };
 
-  const generateTasksCSV = () => {
+  const generateTasksCSV = (tasks: Task[]) => {
     const headers = ['Title', 'Assigned To', 'Department', 'Priority', 'Status', 'Progress (%)', 'Due Date'];
     const rows = tasks.map(task => [
       task.title,
@@ -408,11 +399,6 @@ const Reports = () => {
     );
   }
 
-  const employeeStats = getEmployeeStats();
-  const attendanceStats = getAttendanceStats();
-  const leaveStats = getLeaveStats();
-  const taskStats = getTaskStats();
-
   return (
     <div className="p-6 space-y-6">
       <div className="flex justify-between items-center">
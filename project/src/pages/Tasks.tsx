@@ -25,6 +25,8 @@ interface TaskAttachment {
   id: string;
   name: string;
   url: string;
+  // Streaming download endpoint, set on attachments returned by the API
+  download_url?: string;
   size: number;
   uploadedAt: string;
 }
@@ -424,7 +426,7 @@ const Tasks = () => {
                             onClick={() => {
                               // Show attachments in a modal or dropdown
                               task.attachments?.forEach(attachment => {
-                                window.open(attachment.url, '_blank');
+                                window.open(attachment.download_url || attachment.url, '_blank');
                               });
                             }}
                             className="text-blue-600 hover:text-blue-800 ml-2"
@@ -24,9 +24,8 @@ const handleResponse = async (response: Response) => {
   return response.json();
 };
 
-// Helper function to make API requests
-const apiRequest = async (endpoint: string, options: RequestInit = {}) => {
-  const url = `${API_BASE_URL}${endpoint}`;
+// Helper function to make API requests against a full URL
+const apiFetch = async (url: string, options: RequestInit = {}) => {
   const token = getAuthToken();
   
   const defaultOptions: RequestInit = {
@@ -43,6 +42,46 @@ const apiRequest = async (endpoint: string, options: RequestInit = {}) => {
   return handleResponse(response);
 };
 
+// Helper function to make API requests
+const apiRequest = async (endpoint: string, options: RequestInit = {}) =>
+  apiFetch(`${API_BASE_URL}${endpoint}`, options);
+
+// Largest page the cursor-paginated list endpoints will serve
+const MAX_PAGE_SIZE = '500';
+
+// Follow `next` cursors of a paginated list endpoint and return every row
+const apiRequestAllPages = async (endpoint: string) => {
+  let data = await apiRequest(endpoint);
+  if (Array.isArray(data)) return data;
+  const results = [...(data?.results || [])];
+  while (data?.next) {
+    data = await apiFetch(data.next);
+    results.push(...(data?.results || []));
+  }
+  return results;
+};
+
+// Build a query string from optional parameters, skipping empty values
+const buildQuery = (params: Record<string, string | undefined> = {}) => {
+  const query = new URLSearchParams();
+  Object.entries(params).forEach(([key, value]) => {
+    if (value) query.append(key, value);
+  });
+  const queryString = query.toString();
+  return queryString ? `?${queryString}` : '';
+};
+
+// Consecutive failed chunk uploads before a chunked upload gives up
+const MAX_CHUNK_RETRIES = 5;
+
+// X-Chunk-SHA256 header for a chunk (omitted where Web Crypto is unavailable, e.g. plain http hosts)
+const chunkChecksumHeader = async (chunk: ArrayBuffer): Promise<Record<string, string>> => {
+  if (typeof crypto === 'undefined' || !crypto.subtle) return {};
+  const digest = await crypto.subtle.digest('SHA-256', chunk);
+  const hex = Array.from(new Uint8Array(digest), byte => byte.toString(16).padStart(2, '0')).join('');
+  return { 'X-Chunk-SHA256': hex };
+};
+
 // Employee API
 export const employeeAPI = {
   getAll: () => apiRequest('/employees/'),
@@ -71,7 +110,9 @@ export const employeeAPI = {
 
 // Attendance API
 export const attendanceAPI = {
-  getAll: () => apiRequest('/attendance/'),
+  getAll: () => apiRequestAllPages(`/attendance/${buildQuery({ page_size: MAX_PAGE_SIZE })}`),
+  getPage: (cursor?: string, pageSize?: string) =>
+    apiRequest(`/attendance/${buildQuery({ cursor, page_size: pageSize })}`),
   getById: (id: string) => apiRequest(`/attendance/${id}/`),
   create: (data: any) => apiRequest('/attendance/', {
     method: 'POST',
@@ -84,13 +125,17 @@ export const attendanceAPI = {
   delete: (id: string) => apiRequest(`/attendance/${id}/`, {
     method: 'DELETE',
   }),
+  getRange: (startDate: string, endDate: string) =>
+    apiRequestAllPages(`/attendance/${buildQuery({ start_date: startDate, end_date: endDate, page_size: MAX_PAGE_SIZE })}`),
   getByDate: (date: string) => apiRequest(`/attendance/by_date/?date=${date}`),
   getByEmployee: (employeeId: string) => apiRequest(`/attendance/by_employee/?employee_id=${employeeId}`),
 };
 
 // Leave Request API
 export const leaveRequestAPI = {
-  getAll: () => apiRequest('/leave-requests/'),
+  getAll: () => apiRequestAllPages(`/leave-requests/${buildQuery({ page_size: MAX_PAGE_SIZE })}`),
+  getPage: (cursor?: string, pageSize?: string) =>
+    apiRequest(`/leave-requests/${buildQuery({ cursor, page_size: pageSize })}`),
   getById: (id: string) => apiRequest(`/leave-requests/${id}/`),
   create: (data: any) => apiRequest('/leave-requests/', {
     method: 'POST',
@@ -114,7 +159,9 @@ export const leaveRequestAPI = {
 
 // Task API
 export const taskAPI = {
-  getAll: () => apiRequest('/tasks/'),
+  getAll: () => apiRequestAllPages(`/tasks/${buildQuery({ page_size: MAX_PAGE_SIZE })}`),
+  getPage: (cursor?: string, pageSize?: string) =>
+    apiRequest(`/tasks/${buildQuery({ cursor, page_size: pageSize })}`),
   getById: (id: string) => apiRequest(`/tasks/${id}/`),
   create: (data: any) => apiRequest('/tasks/', {
     method: 'POST',
@@ -142,12 +189,156 @@ export const taskAPI = {
     body: formData,
     headers: {}, // Let browser set Content-Type for FormData
   }),
+  // Chunked, resumable upload for large files: each chunk carries its offset and
+  // SHA-256, and after a dropped connection the upload resumes from the offset the
+  // server has. Resolves with the created attachment.
+  uploadFileChunked: async (
+    id: string,
+    file: File,
+    description = '',
+    onProgress?: (percent: number) => void,
+  ) => {
+    const upload = await apiRequest(`/tasks/${id}/uploads/`, {
+      method: 'POST',
+      body: JSON.stringify({
+        file_name: file.name,
+        file_size: file.size,
+        file_type: file.type || undefined,
+        description,
+      }),
+    });
+    const uploadPath = `/task-uploads/${upload.upload_id}/`;
+    const chunkSize: number = upload.chunk_size;
+    let offset: number = upload.offset;
+    let failures = 0;
+
+    while (offset < file.size) {
+      const chunk = await file.slice(offset, Math.min(offset + chunkSize, file.size)).arrayBuffer();
+      try {
+        const result = await apiRequest(`${uploadPath}chunk/`, {
+          method: 'PUT',
+          body: chunk,
+          headers: {
+            'Content-Type': 'application/octet-stream',
+            'Upload-Offset': String(offset),
+            ...(await chunkChecksumHeader(chunk)),
+          },
+        });
+        offset = result.offset;
+        failures = 0;
+        onProgress?.(Math.round((offset / file.size) * 100));
+      } catch (error) {
+        if (++failures > MAX_CHUNK_RETRIES) {
+          throw error;
+        }
+        await new Promise(resolve => setTimeout(resolve, 500 * 2 ** failures));
+        // Resume from whatever the server kept
+        offset = (await apiRequest(uploadPath)).offset;
+      }
+    }
+    return apiRequest(`${uploadPath}complete/`, { method: 'POST' });
+  },
   getAttachments: (id: string) => apiRequest(`/tasks/${id}/attachments/`),
   getProgressHistory: (id: string) => apiRequest(`/tasks/${id}/progress_history/`),
   getEmployeeTasksWithFiles: (employeeId?: string) => 
     apiRequest(`/tasks/employee_tasks_with_files/${employeeId ? `?employee_id=${employeeId}` : ''}`),
 };
 
+// Reports API (aggregates computed server-side)
+export interface ReportParams {
+  start_date?: string;
+  end_date?: string;
+  department?: string;
+}
+
+export const reportsAPI = {
+  overview: (params: ReportParams = {}) => apiRequest(`/reports/overview/${buildQuery({ ...params })}`),
+  employees: (params: ReportParams = {}) => apiRequest(`/reports/employees/${buildQuery({ ...params })}`),
+  attendance: (params: ReportParams = {}) => apiRequest(`/reports/attendance/${buildQuery({ ...params })}`),
+  leave: (params: ReportParams = {}) => apiRequest(`/reports/leave/${buildQuery({ ...params })}`),
+  tasks: (params: ReportParams = {}) => apiRequest(`/reports/tasks/${buildQuery({ ...params })}`),
+};
+
+// Chatbot API
+export interface ChatHistoryMessage {
+  role: 'user' | 'assistant';
+  content: string;
+}
+
+export interface ChatStreamHandlers {
+  onToken: (text: string) => void;
+  onDatabaseData?: (data: any) => void;
+  onDone?: (data: any) => void;
+}
+
+// Dispatch one Server-Sent Event block ("event: ...\ndata: {...}")
+const dispatchChatEvent = (block: string, handlers: ChatStreamHandlers) => {
+  let event = 'message';
+  const dataLines: string[] = [];
+  block.split('\n').forEach((line) => {
+    if (line.startsWith('event:')) event = line.slice(6).trim();
+    else if (line.startsWith('data:')) dataLines.push(line.slice(5).trim());
+  });
+  if (!dataLines.length) return;
+  const data = JSON.parse(dataLines.join('\n'));
+  if (event === 'token') handlers.onToken(data.text);
+  else if (event === 'database_data') handlers.onDatabaseData?.(data);
+  else if (event === 'done') handlers.onDone?.(data);
+  else if (event === 'error') throw new Error(data.response || data.error);
+};
+
+export const chatbotAPI = {
+  send: (message: string, conversationHistory: ChatHistoryMessage[] = []) => apiRequest('/chatbot/', {
+    method: 'POST',
+    body: JSON.stringify({ message, conversation_history: conversationHistory }),
+  }),
+  // Stream the answer from /chatbot/stream/, calling onToken as each chunk arrives
+  stream: async (
+    message: string,
+    conversationHistory: ChatHistoryMessage[],
+    handlers: ChatStreamHandlers,
+    signal?: AbortSignal,
+  ) => {
+    const token = getAuthToken();
+    const response = await fetch(`${API_BASE_URL}/chatbot/stream/`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        'Accept': 'text/event-stream',
+        ...(token && { 'Authorization': `Token ${token}` }),
+      },
+      credentials: 'include',
+      body: JSON.stringify({ message, conversation_history: conversationHistory }),
+      signal,
+    });
+    if (!response.ok || !response.body) {
+      const errorData = await response.json().catch(() => ({}));
+      throw new Error(errorData.response || errorData.error || `HTTP error! status: ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    while (true) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      let boundary = buffer.indexOf('\n\n');
+      while (boundary !== -1) {
+        dispatchChatEvent(buffer.slice(0, boundary), handlers);
+        buffer = buffer.slice(boundary + 2);
+        boundary = buffer.indexOf('\n\n');
+      }
+    }
+    if (buffer.trim()) dispatchChatEvent(buffer, handlers);
+  },
+};
+
+// Background jobs API (status of a job queued by one of this user's requests)
+export const jobsAPI = {
+  get: (jobId: string) => apiRequest(`/jobs/${jobId}/`),
+};
+
 // Authentication API
 export const authAPI = {
   login: (username: string, password: string) => apiRequest('/auth/login/', {
@@ -165,5 +356,8 @@ export default {
   attendance: attendanceAPI,
   leaveRequest: leaveRequestAPI,
   task: taskAPI,
+  reports: reportsAPI,
+  chatbot: chatbotAPI,
+  jobs: jobsAPI,
   auth: authAPI,
 };